@@ -45,7 +45,7 @@ depende da aderência estrita a este princípio. NÃO FAÇA MUDANÇAS ISOLADAS.
 # Imports Padrão Python
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List
-import os, secrets, json, click
+import os, json, click
 
 # Imports Flask e Extensões
 # [ATUALIZAÇÃO] Adicionado 'request' para lógica de cache baseada em rota
@@ -64,7 +64,25 @@ from dotenv import load_dotenv
 from . import compat  # adds Engine.table_names() shim for older tests
 
 # Import models from a separate file
-from .models import db, migrate, Pagina, ConteudoGeral, AreaAtuacao, MembroEquipe, User, Depoimento, ClienteParceiro, SetorAtendido, HomePageSection, ThemeSettings
+from .models import db, migrate, Pagina, ConteudoGeral, AreaAtuacao, User, ClienteParceiro, SetorAtendido
+from .site_cache import get_site_snapshot
+from .content_index import merge_pages
+from .page_cache import init_page_cache
+from .assets import init_assets, build_asset_manifest
+from .bundles import build_bundles, init_bundles
+from .responsive_images import build_responsive_images, init_responsive_images
+from .compression import BROTLI_AVAILABLE, init_compression, precompress_static
+from .image_jobs import init_image_jobs, resume_image_jobs
+from .media_store import collect_garbage, init_media_store
+from .mail_outbox import init_mail_outbox, resume_mail_outbox
+from .search_index import init_search_index, rebuild_search_index
+from .sitemaps import build_sitemaps, canonical_root, write_sitemaps
+from .seeding import apply_seed
+from .sqlite_tuning import init_sqlite_tuning
+from .db_pool import build_engine_options, database_url_from_env, init_db_pool
+from .template_cache import init_template_cache, precompile_templates
+from .request_timing import init_request_timing
+from .startup_profile import StartupTimer, baseline_from, compare_to_baseline, load_baseline, profile_startup
 
 load_dotenv()
 
@@ -128,7 +146,11 @@ def get_nav_pages() -> Dict[str, List[Pagina]]:
 
 def get_page_content(page_identifier: str) -> Dict[str, Any]:
     """
-    Busca o conteúdo de seções específicas de uma página e as configurações gerais no DB.
+    Monta o conteúdo de uma página a partir do índice em memória de `ConteudoGeral`.
+
+    Mescla, nesta ordem, `configuracoes_gerais`, `configuracoes_estilo` e a
+    própria página; em seções com o mesmo nome, vence a página. Não consulta o
+    banco enquanto o índice estiver sincronizado (ver `content_index.py`).
 
     Args:
         page_identifier (str): O slug da página cujo conteúdo deve ser buscado.
@@ -137,17 +159,7 @@ def get_page_content(page_identifier: str) -> Dict[str, Any]:
         Dict[str, Any]: Um dicionário onde as chaves são os nomes das seções
             e os valores são seus conteúdos.
     """
-    context: Dict[str, Any] = {}
-    # Páginas/seções de conteúdo geral que devem ser carregadas em quase todas as visualizações
-    pages_to_load = ['configuracoes_gerais', 'configuracoes_estilo', 'sobre-nos']
-    if page_identifier:
-        pages_to_load.append(page_identifier)
-        
-    all_contents = ConteudoGeral.query.filter(ConteudoGeral.pagina.in_(pages_to_load)).all()
-    
-    for item in all_contents:
-        context[item.secao] = item.conteudo
-    return context
+    return merge_pages('configuracoes_gerais', 'configuracoes_estilo', page_identifier)
 
 def render_page(template_name: str, page_identifier: str, return_context: bool = False, override_content: Dict[str, Any] = None, **extra_context) -> Any:
     """
@@ -181,278 +193,25 @@ def render_page(template_name: str, page_identifier: str, return_context: bool =
     
     return render_template(template_name, **context)
 
-def ensure_essential_data():
+def ensure_essential_data(force: bool = False):
     """
     Garante que os dados essenciais para o funcionamento do site existam no banco de dados.
     
     Esta função é executada na inicialização do banco de dados para popular tabelas
     com páginas padrão, áreas de atuação, configurações de tema, conteúdo inicial,
     depoimentos de exemplo e membros da equipe, prevenindo erros de dados ausentes.
+
+    As definições e a gravação em lote ficam em `seeding.py`. Se a definição não
+    mudou desde a última aplicação (hash em `SeedState`), nada é gravado.
+
+    Args:
+        force (bool): Reaplica os dados mesmo com a definição inalterada.
     """
     app = current_app  # Obtém o app atual do contexto
     app.logger.info("Verificando e garantindo a existência de dados essenciais no banco de dados.")
-
-    # --- PÁGINAS PRINCIPAIS ---
-    # Define um conjunto de páginas fundamentais para a navegação e estrutura do site.
-    essential_pages = [
-        {'slug': 'home', 'titulo_menu': 'Início', 'tipo': 'pagina', 'template_path': 'home/index.html', 'ordem': 1, 'show_in_menu': True, 'ativo': True},
-        {'slug': 'sobre-nos', 'titulo_menu': 'Sobre Nós', 'tipo': 'pagina', 'template_path': 'sobre.html', 'ordem': 2, 'show_in_menu': True, 'ativo': True},
-        {'slug': 'contato', 'titulo_menu': 'Contato', 'tipo': 'pagina', 'template_path': 'contato/contato.html', 'ordem': 4, 'show_in_menu': False, 'ativo': True},
-        {'slug': 'politica-de-privacidade', 'titulo_menu': 'Política de Privacidade', 'tipo': 'pagina', 'template_path': 'politica_privacidade.html', 'ordem': 99, 'show_in_menu': False, 'ativo': True},
-    ]
-
-    for page_data in essential_pages:
-        page = Pagina.query.filter_by(slug=page_data['slug']).first()
-        if not page:
-            db.session.add(Pagina(**page_data))
-            app.logger.info(f"Página essencial '{page_data['slug']}' criada.")
-        else:
-            app.logger.debug(f"Página essencial '{page_data['slug']}' já existe.")
-
-    # --- ÁREAS DE ATUAÇÃO ---
-    # Garante a existência de uma página "mãe" para agrupar as áreas de atuação no menu.
-    parent_page = Pagina.query.filter_by(slug='areas-de-atuacao').first()
-    if not parent_page:
-        parent_page = Pagina(slug='areas-de-atuacao', titulo_menu='Áreas de Atuação', tipo='grupo_menu', ativo=True, show_in_menu=True, ordem=3, template_path=None)
-        db.session.add(parent_page)
-        app.logger.info("Página pai 'areas-de-atuacao' criada.")
-    else:
-        app.logger.debug("Página pai 'areas-de-atuacao' já existe.")
-        
-    # --- CONFIGURAÇÕES DE TEMA ---
-    # Assegura que um registro de configurações de tema exista, usando defaults se necessário.
-    if not ThemeSettings.query.first():
-        default_theme = ThemeSettings()
-        db.session.add(default_theme)
-        app.logger.info("Configurações de tema padrão criadas.")
-    else:
-        app.logger.debug("Configurações de tema já existem.")
-
-    db.session.commit() # Commit all changes at once for pages and initial theme settings
-
-
-    # Define as áreas de atuação padrão que serão exibidas no site.
-    essential_services = [
-        {'slug': 'direito-civil', 'titulo': 'Direito Civil', 'descricao': 'Soluções para questões de obrigações, contratos, responsabilidade civil e direitos reais.', 'icone': 'bi bi-bank', 'categoria': 'areas_atuacao', 'ordem': 1},
-        {'slug': 'direito-do-consumidor', 'titulo': 'Direito do Consumidor', 'descricao': 'Atuação em conflitos nas relações de consumo, buscando a reparação de danos.', 'icone': 'bi bi-shield-check', 'categoria': 'areas_atuacao', 'ordem': 2},
-        {'slug': 'direito-previdenciario', 'titulo': 'Direito Previdenciário', 'descricao': 'Assessoria em questões de aposentadoria, pensões e benefícios previdenciários.', 'icone': 'bi bi-person-workspace', 'categoria': 'areas_atuacao', 'ordem': 3},
-        {'slug': 'direito-de-familia', 'titulo': 'Direito de Família', 'descricao': 'Condução de processos de divórcio, guarda, pensão alimentícia e inventários.', 'icone': 'bi bi-heart', 'categoria': 'areas_atuacao', 'ordem': 4},
-    ]
-
-    for service_data in essential_services:
-        if not AreaAtuacao.query.filter_by(slug=service_data['slug']).first():
-            db.session.add(AreaAtuacao(**service_data))
-            app.logger.info(f"Área de atuação '{service_data['titulo']}' criada.")
-        else:
-            app.logger.debug(f"Área de atuação '{service_data['titulo']}' já existe.")
-        
-        # Garante que cada área de atuação também tenha uma página associada
-        if not Pagina.query.filter_by(slug=service_data['slug']).first():
-            db.session.add(Pagina(
-                slug=service_data['slug'],
-                titulo_menu=service_data['titulo'],
-                tipo='servico',
-                ativo=True,
-                show_in_menu=True,
-                ordem=service_data['ordem'],
-                parent=parent_page, # Associa à página pai 'areas-de-atuacao'
-                template_path='areas_atuacao/servico_base.html'
-            ))
-            app.logger.info(f"Página para área de atuação '{service_data['titulo']}' criada.")
-        else:
-            app.logger.debug(f"Página para área de atuação '{service_data['titulo']}' já existe.")
-
-    # --- CONTEÚDO PADRÃO ---
-    # Define o conteúdo inicial para diversas seções e páginas do site.
-    # Isso inclui meta tags, textos, links para mídias, etc.
-    default_content = {
-        'home': [
-            {'secao': 'meta_title', 'conteudo': 'Belarmino Monteiro Advogado - Assessoria Jurídica de Excelência'},
-            {'secao': 'meta_description', 'conteudo': 'Escritório de advocacia com tradição e modernidade na defesa dos seus direitos. Oferecemos soluções personalizadas para suas necessidades.'},
-            {'secao': 'meta_keywords', 'conteudo': 'advogado, advocacia, direito, fortaleza, assessoria jurídica', 'field_type': 'text'},
-            {'secao': 'titulo', 'conteudo': 'Assessoria Jurídica de Excelência'},
-            {'secao': 'paragrafo', 'conteudo': 'Tradição e modernidade na defesa dos seus direitos. Soluções personalizadas para suas necessidades.'},
-            {'secao': 'hero_show_button', 'conteudo': 'true', 'field_type': 'boolean'},
-        ],
-        'sobre-nos': [
-            {'secao': 'meta_title', 'conteudo': 'Sobre o Escritório - Belarmino Monteiro Advogado'},
-            {'secao': 'meta_description', 'conteudo': 'Conheça nossa história, missão e o compromisso inabalável com a justiça e a ética que guia nosso escritório.'},
-            {'secao': 'meta_keywords', 'conteudo': 'história, missão, valores, escritório de advocacia, Belarmino Monteiro', 'field_type': 'text'},
-            {'secao': 'titulo', 'conteudo': 'Excelência e Tradição em Advocacia'},
-            {'secao': 'subtitulo', 'conteudo': 'Compromisso, integridade e resultados. A base do nosso escritório.'},
-            {'secao': 'secao1_titulo', 'conteudo': 'Nossa Missão'},
-            {'secao': 'secao1_conteudo', 'conteudo': '<p>Nossa missão é oferecer uma advocacia de excelência, pautada pela ética, transparência e por um profundo conhecimento técnico. Buscamos compreender as necessidades individuais de cada cliente para construir soluções jurídicas personalizadas, eficazes e seguras.</p>', 'field_type': 'textarea'},
-            {'secao': 'secao1_media_video', 'conteudo': 'images/Escritório.webm', 'field_type': 'video'},
-            {'secao': 'secao2_titulo', 'conteudo': 'Nossa História'},
-            {'secao': 'secao2_conteudo', 'conteudo': '<p>Fundado sobre os pilares da tradição e da inovação, o escritório Belarmino Monteiro consolidou-se como uma referência em assessoria jurídica. Nossa trajetória é marcada por uma atuação dedicada e por um relacionamento de confiança e proximidade com nossos clientes.</p>', 'field_type': 'textarea'},
-            {'secao': 'secao2_media_image', 'conteudo': 'images/Belarmino.png', 'field_type': 'image'},
-            {'secao': 'pilares_titulo', 'conteudo': 'Nossos Pilares'},
-            {'secao': 'pilares_subtitulo', 'conteudo': 'Os princípios que guiam nossa prática jurídica.'},
-            {'secao': 'pilar1_titulo', 'conteudo': 'Compromisso'},
-            {'secao': 'pilar1_texto', 'conteudo': 'Dedicação total a cada causa, tratando os objetivos de nossos clientes como se fossem os nossos. A sua confiança é a nossa maior responsabilidade.'},
-            {'secao': 'pilar2_titulo', 'conteudo': 'Ética'},
-            {'secao': 'pilar2_texto', 'conteudo': 'Atuamos com integridade, transparência e lealdade, seguindo os mais rigorosos padrões éticos da advocacia para garantir uma representação justa.'},
-            {'secao': 'pilar3_titulo', 'conteudo': 'Excelência'},
-            {'secao': 'pilar3_texto', 'conteudo': 'Buscamos a perfeição técnica em cada petição, parecer e consultoria. Nosso conhecimento aprofundado é a sua maior vantagem estratégica.'},
-            {'secao': 'mapa_titulo', 'conteudo': 'Nossa Localização'},
-            {'secao': 'mapa_subtitulo', 'conteudo': 'Venha nos fazer uma visita. Estamos de portas abertas para recebê-lo.'}
-        ],
-        'direito-civil': [
-            {'secao': 'meta_title', 'conteudo': 'Direito Civil - Belarmino Monteiro Advogado'},
-            {'secao': 'meta_description', 'conteudo': 'Assessoria completa em Direito Civil, incluindo contratos, obrigações, responsabilidade civil, direitos reais e questões sucessórias.'},
-            {'secao': 'meta_keywords', 'conteudo': 'direito civil, contratos, obrigações, responsabilidade civil, danos morais', 'field_type': 'text'},
-            {'secao': 'titulo', 'conteudo': 'Direito Civil'},
-            {'secao': 'subtitulo', 'conteudo': 'Regulando as relações que definem nosso dia a dia.'},
-            {'secao': 'conteudo_principal', 'conteudo': '<p>O Direito Civil é a espinha dorsal das relações privadas. Nossa equipe oferece uma assessoria jurídica completa, abrangendo desde a negociação e elaboração de contratos complexos até a resolução de disputas envolvendo obrigações, responsabilidade civil por danos materiais e morais, e questões de posse e propriedade. Atuamos com diligência para garantir a segurança jurídica e a proteção dos seus interesses em todas as esferas da vida civil.</p>'}
-        ],
-        'direito-do-consumidor': [
-            {'secao': 'meta_title', 'conteudo': 'Direito do Consumidor - Belarmino Monteiro Advogado'},
-            {'secao': 'meta_description', 'conteudo': 'Proteção e defesa dos direitos do consumidor contra práticas abusivas, produtos defeituosos e serviços inadequados.'},
-            {'secao': 'meta_keywords', 'conteudo': 'direito do consumidor, CDC, práticas abusivas, produtos com defeito, consumidor', 'field_type': 'text'},
-            {'secao': 'titulo', 'conteudo': 'Direito do Consumidor'},
-            {'secao': 'subtitulo', 'conteudo': 'Equilibrando as relações de consumo com justiça e eficácia.'},
-            {'secao': 'conteudo_principal', 'conteudo': '<p>As relações de consumo são parte integrante da vida moderna, e a proteção do consumidor é um direito fundamental. Atuamos de forma incisiva na defesa dos seus interesses contra práticas abusivas, publicidade enganosa, produtos com defeito e falhas na prestação de serviços. Buscamos a reparação de danos materiais e morais, a troca de produtos ou a devolução de valores, garantindo que seus direitos como consumidor sejam plenamente respeitados.</p>'}
-        ],
-        'direito-de-familia': [
-            {'secao': 'meta_title', 'conteudo': 'Direito de Família - Belarmino Monteiro Advogado'},
-            {'secao': 'meta_description', 'conteudo': 'Atuação sensível e especializada em questões como divórcio, guarda de filhos, pensão alimentícia, inventários e planejamento sucessório.'},
-            {'secao': 'meta_keywords', 'conteudo': 'direito de família, divórcio, pensão alimentícia, guarda, inventário', 'field_type': 'text'},
-            {'secao': 'titulo', 'conteudo': 'Direito de Família'},
-            {'secao': 'subtitulo', 'conteudo': 'Cuidando do seu bem mais precioso com sensibilidade e competência.'},
-            {'secao': 'conteudo_principal', 'conteudo': '<p>Questões de família exigem uma abordagem não apenas técnica, mas também humana e sensível. Conduzimos processos de divórcio, partilha de bens, definição de guarda e pensão alimentícia com o máximo de discrição e foco na solução consensual. Além disso, oferecemos assessoria completa em planejamento sucessório, testamentos e inventários, garantindo a proteção do seu patrimônio e a tranquilidade da sua família para o futuro.</p>'}
-        ],
-        'direito-previdenciario': [
-            {'secao': 'meta_title', 'conteudo': 'Direito Previdenciário - Belarmino Monteiro Advogado'},
-            {'secao': 'meta_description', 'conteudo': 'Assessoria em questões de aposentadoria, pensões e benefícios previdenciários, garantindo a proteção dos seus direitos.'},
-            {'secao': 'meta_keywords', 'conteudo': 'direito previdenciário, INSS, aposentadoria, pensão, benefício', 'field_type': 'text'},
-            {'secao': 'titulo', 'conteudo': 'Direito Previdenciário'},
-            {'secao': 'subtitulo', 'conteudo': 'Sua segurança no futuro, garantida hoje.'},
-            {'secao': 'conteudo_principal', 'conteudo': '<p>O Direito Previdenciário é essencial para garantir a segurança financeira e o bem-estar social. Nossa equipe oferece assessoria completa em aposentadorias (por idade, tempo de contribuição, especial), pensões por morte, auxílio-doença, auxílio-acidente e outros benefícios. Atuamos tanto na esfera administrativa quanto judicial, buscando a concessão ou revisão de benefícios, sempre com o objetivo de assegurar que você receba o que lhe é de direito, com agilidade e eficiência.</p>'}
-        ],
-        'contato': [
-            {'secao': 'meta_title', 'conteudo': 'Contato - Belarmino Monteiro Advogado'},
-            {'secao': 'meta_description', 'conteudo': 'Entre em contato conosco. Estamos prontos para ouvir seu caso e oferecer a melhor estratégia jurídica para você ou sua empresa.'},
-            {'secao': 'meta_keywords', 'conteudo': 'contato, telefone, endereço, email, advogado fortaleza', 'field_type': 'text'},
-            {'secao': 'titulo', 'conteudo': 'Entre em Contato'},
-            {'secao': 'subtitulo', 'conteudo': 'Estamos prontos para ouvir seu caso e oferecer a melhor estratégia jurídica.'},
-        ],
-        'configuracoes_gerais': [
-            {'secao': 'logo_principal', 'conteudo': 'images/BM.png'},
-            {'secao': 'favicon_ico', 'conteudo': 'images/favicons/favicon.ico'},
-            {'secao': 'social_linkedin', 'conteudo': ''},
-            {'secao': 'social_instagram', 'conteudo': 'https://www.instagram.com/p/DQCjFFQAfnf/?igsh=YmN6dDcxcnhkOHlk'},
-            {'secao': 'social_facebook', 'conteudo': 'https://www.facebook.com/people/Belarmino-Monteiro-Advogado/61582494125876/'},
-            {'secao': 'contato_email', 'conteudo': 'contato@belarminomonteiro.com.br'},
-            {'secao': 'contato_telefone', 'conteudo': '+55 85 9951-5962'},
-            {'secao': 'contato_endereco', 'conteudo': 'Rua Silva Paulet, 1727 - Aldeota, Fortaleza - CE, CEP: 60120-021'},
-            {'secao': 'contato_horario', 'conteudo': 'Segunda a Sexta, das 8h às 18h.'},
-        ],
-        'configuracoes_estilo': [
-            {'secao': 'video_fundo', 'conteudo': 'images/Escritório.webm'},
-            {'secao': 'google_font_link', 'conteudo': '<link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&family=Open+Sans:wght@400;600&display=swap" rel="stylesheet">'},
-            {'secao': 'font_family_headings', 'conteudo': "'Roboto', sans-serif"},
-            {'secao': 'font_family_body', 'conteudo': "'Open Sans', sans-serif"},
-            {'secao': 'custom_css_overrides', 'conteudo': '/* Adicione seu CSS customizado aqui */'}
-        ],
-        'configuracoes_seo': [
-            {'secao': 'seo_meta_title_sufixo', 'conteudo': '| Belarmino Monteiro Advogado', 'field_type': 'text'},
-            {'secao': 'seo_google_site_verification', 'conteudo': '', 'field_type': 'text'},
-            {'secao': 'seo_head_scripts', 'conteudo': '', 'field_type': 'textarea'},
-            {'secao': 'seo_body_scripts', 'conteudo': '', 'field_type': 'textarea'}
-        ],
-        'configuracoes_email': [
-            {'secao': 'smtp_server', 'conteudo': 'smtp.example.com', 'field_type': 'text'},
-            {'secao': 'smtp_port', 'conteudo': '587', 'field_type': 'text'},
-            {'secao': 'smtp_user', 'conteudo': 'user@example.com', 'field_type': 'text'},
-            {'secao': 'smtp_pass', 'conteudo': '', 'field_type': 'text'},
-            {'secao': 'email_to', 'conteudo': 'contato@example.com', 'field_type': 'text'}
-        ],
-    }
-
-    for page_slug, contents in default_content.items():
-        for content_data in contents:
-            content_item = ConteudoGeral.query.filter_by(pagina=page_slug, secao=content_data['secao']).first()
-            if content_item:
-                if content_item.conteudo != content_data['conteudo']:
-                    content_item.conteudo = content_data['conteudo']
-                    app.logger.debug(f"Conteúdo da seção '{content_data['secao']}' na página '{page_slug}' atualizado.")
-                if 'field_type' in content_data and content_item.field_type != content_data['field_type']:
-                    content_item.field_type = content_data['field_type']
-                    app.logger.debug(f"Tipo de campo da seção '{content_data['secao']}' na página '{page_slug}' atualizado.")
-            else:
-                db.session.add(ConteudoGeral(pagina=page_slug, **content_data))
-                app.logger.info(f"Conteúdo padrão da seção '{content_data['secao']}' na página '{page_slug}' criado.")
-
-    # --- DEPOIMENTOS DE EXEMPLO ---
-    # Garante a existência de um depoimento de exemplo para fins de demonstração.
-    if not Depoimento.query.first():
-        depoimento_exemplo = Depoimento(
-            nome_cliente='Empresa Exemplo S/A',
-            texto_depoimento='O escritório Belarmino Monteiro demonstrou um profissionalismo exemplar e um profundo conhecimento técnico. A assessoria jurídica foi fundamental para o sucesso de nossa operação. Recomendamos fortemente seus serviços.',
-            logo_cliente='images/uploads/BM.png',
-            aprovado=True,
-            token_submissao=secrets.token_hex(16)
-        )
-        db.session.add(depoimento_exemplo)
-        app.logger.info("Depoimento de exemplo criado.")
-    else:
-        app.logger.debug("Depoimento de exemplo já existe.")
-
-    # --- SEÇÕES DA HOME PAGE ---
-    # Define a ordem e ativação das seções que compõem a página inicial.
-    default_home_sections = [
-        {'section_type': 'hero', 'order': 0, 'is_active': True, 'title': 'Assessoria Jurídica de Excelência', 'subtitle': 'Tradição e modernidade na defesa dos seus direitos. Soluções personalizadas para suas necessidades.'},
-        {'section_type': 'show_services', 'order': 1, 'is_active': True, 'title': 'Nossas Áreas de Atuação', 'subtitle': 'Soluções jurídicas completas para pessoas e empresas.'},
-        {'section_type': 'show_team_on_home', 'order': 2, 'is_active': True, 'title': 'Nossa Equipe', 'subtitle': 'Os especialistas por trás de cada vitória.'},
-        {'section_type': 'show_testimonials', 'order': 3, 'is_active': True, 'title': 'O que nossos clientes dizem', 'subtitle': 'Confiança e resultados que falam por si.'},
-        {'section_type': 'show_clients', 'order': 4, 'is_active': True, 'title': 'Clientes que Confiam em Nosso Trabalho', 'subtitle': 'Junte-se a líderes de mercado que escolheram nossa tecnologia para impulsionar seus negócios.'}
-    ]
-    for section_data in default_home_sections:
-        section = HomePageSection.query.filter_by(section_type=section_data['section_type']).first()
-        if not section:
-            db.session.add(HomePageSection(**section_data))
-            app.logger.info(f"Seção da homepage '{section_data['section_type']}' criada.")
-        else:
-            # Opcional: atualizar campos se os defaults mudarem
-            if section.title != section_data['title']:
-                section.title = section_data['title']
-                app.logger.debug(f"Título da seção da homepage '{section_data['section_type']}' atualizado.")
-            if section.subtitle != section_data['subtitle']:
-                section.subtitle = section_data['subtitle']
-                app.logger.debug(f"Subtítulo da seção da homepage '{section_data['section_type']}' atualizado.")
-            app.logger.debug(f"Seção da homepage '{section_data['section_type']}' já existe.")
-
-    # --- MEMBROS DA EQUIPE PADRÃO ---
-    # Adiciona membros da equipe de exemplo se ainda não existirem.
-    default_team_members = [
-        {
-            'nome': "Belarmino Monteiro",
-            'cargo': "Advogado",
-            'biografia': "Sócio-fundador do escritório, com vasta experiência em Direito Civil e Contratual. Reconhecido pela sua atuação estratégica e pela dedicação incansável na defesa dos interesses de seus clientes.",
-            'foto': 'images/uploads/Belarmino_Monteiro.webp'
-        },
-        {
-            'nome': "Taise Peixoto",
-            'cargo': "Advogada",
-            'biografia': "Especialista em Direito de Família e Sucessões, com uma abordagem humana e focada na resolução consensual de conflitos. Comprometida em garantir a segurança e o bem-estar das famílias.",
-            'foto': 'images/uploads/Taise_Peixoto.webp'
-        }
-    ]
-    for member_data in default_team_members:
-        member = MembroEquipe.query.filter_by(nome=member_data['nome']).first()
-        if not member:
-            db.session.add(MembroEquipe(**member_data))
-            app.logger.info(f"Membro da equipe '{member_data['nome']}' adicionado.")
-        else:
-            app.logger.debug(f"Membro da equipe '{member_data['nome']}' já existe.")
-
-    # --- THEME SETTINGS ---
-    # Redundante, mas para garantir que o tema padrão 'option1' seja o default se não houver um ThemeSettings.
-    # Já tratado acima, mas mantém por segurança de inicialização.
-    if not ThemeSettings.query.first():
-        db.session.add(ThemeSettings(theme='option1'))
-        app.logger.info("Configuração de tema padrão 'option1' garantida.")
-    
+    if apply_seed(db.session, force=force) is None:
+        app.logger.info("Dados essenciais já aplicados (definição inalterada).")
+        return
     db.session.commit()
     app.logger.info("Dados essenciais verificados e garantidos no banco de dados.")
 
@@ -474,20 +233,31 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
     """
     # Habilita configuração relativa a instância para suportar pasta 'instance'
     app = Flask(__name__, instance_relative_config=True)
+    # [PERFORMANCE] Tempo de cada fase da inicialização (ver `startup_profile.py`).
+    startup = StartupTimer(app)
 
     # Configuração padrão da aplicação
     app.config.from_mapping(
         SECRET_KEY=os.environ.get('SECRET_KEY', 'default-dev-secret-key'),
         UPLOAD_FOLDER=os.path.join('static', 'images', 'uploads'), # Diretório para uploads de arquivos
         ALLOWED_EXTENSIONS={'png', 'jpg', 'jpeg', 'gif', 'webp', 'ico', 'mp4', 'webm'}, # Extensões permitidas para upload
+        MAX_CONTENT_LENGTH=32 * 1024 * 1024, # Corpo máximo da requisição (o próprio limite do App Engine)
+        SITE_URL=os.environ.get('SITE_URL'), # Raiz canônica das URLs absolutas (sitemap), ex: 'https://www.exemplo.com.br'
         WTF_CSRF_ENABLED=True # Habilita proteção CSRF
     )
+    # `UPLOAD_MAX_IMAGE_PIXELS` (largura x altura máxima de uma imagem enviada) é opcional: o padrão,
+    # `image_processor.MAX_IMAGE_PIXELS`, é lido no upload para não carregar o Pillow na inicialização.
     
     # --- CONFIGURAÇÃO DE DB DINÂMICA (SQLITE /TMP - CUSTO ZERO) ---
     # Lógica inteligente para alternar entre ambiente Local e GCP
     if test_config is None:
+        # `DATABASE_URL` (ex.: Cloud SQL) tem prioridade; placeholders sem esquema são ignorados.
+        database_url = database_url_from_env()
+        if database_url:
+            DB_URI = database_url
+            app.logger.info(f"MODO DATABASE_URL: Usando {DB_URI.split('://', 1)[0]}.")
         # Verifica se está no App Engine (GAE_ENV='standard')
-        if os.environ.get('GAE_ENV') == 'standard':
+        elif os.environ.get('GAE_ENV') == 'standard':
             # ÚNICO local com permissão de escrita no App Engine Standard
             # Importante: No GCP, o DB em /tmp é efêmero (reinicia com a instância)
             # Para persistência real em produção, recomenda-se Cloud SQL ou Datastore.
@@ -501,6 +271,8 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
             DB_URI = f"sqlite:///{db_path}"
             app.logger.info(f"MODO LOCAL: Usando SQLite em {db_path}.")
         
+        if not database_url and os.environ.get('DATABASE_URL'):
+            app.logger.warning("[DB POOL] DATABASE_URL sem esquema (placeholder?) ignorada; usando SQLite.")
         app.config['SQLALCHEMY_DATABASE_URI'] = DB_URI
     else:
         # Configuração de teste - sobrescreve as configurações padrão para garantir isolamento
@@ -517,9 +289,18 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
         os.makedirs(app.instance_path, exist_ok=True)
     except OSError as e:
         app.logger.warning(f"[WARNING] Não foi possível criar o diretório {app.instance_path}: {e}")
+    startup.mark('config')
 
+    # [PERFORMANCE] Pool dimensionado, com recycle/pre-ping e métricas (ver `db_pool.py`).
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app)
     db.init_app(app)
+    init_db_pool(app)
+    # [PERFORMANCE] WAL, mmap, cache e busy_timeout em cada conexão SQLite (ver `sqlite_tuning.py`).
+    init_sqlite_tuning(app)
     migrate.init_app(app, db)
+    # [PERFORMANCE] Cache LRU de HTML das rotas públicas (ver `page_cache.py`).
+    init_page_cache(app)
+    startup.mark('database')
     
     # --- INICIALIZAÇÃO CRÍTICA DO BANCO DE DADOS (GCP SAFE) ---
     # Este bloco garante que o DB é criado na inicialização, evitando o erro 502/Worker.
@@ -529,9 +310,11 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
             # Tenta verificar se a tabela 'user' (crucial) existe
             # O uso de inspect é mais seguro que try/except cego
             inspector = db.inspect(db.engine)
+            has_user_table = inspector.has_table("user")
+            startup.mark('db_inspect')
             
             # Se a tabela 'user' não existe, assumimos que o DB precisa ser criado
-            if not inspector.has_table("user"): 
+            if not has_user_table: 
                 app.logger.info("Tabela 'user' não encontrada. Executando db.create_all() e populando dados essenciais.")
                 
                 # Cria todas as tabelas definidas nos models
@@ -549,6 +332,19 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
             app.logger.error(f"FALHA CRÍTICA AO INICIALIZAR O DB: {e}. Verifique permissões de escrita em {app.config['SQLALCHEMY_DATABASE_URI']}.")
         except Exception as e:
             app.logger.error(f"FALHA INESPERADA na inicialização do DB: {e}")
+    startup.mark('seeding')
+
+    # [PERFORMANCE] Otimização de uploads fora da requisição (ver `image_jobs.py`).
+    init_image_jobs(app)
+    # [PERFORMANCE] Uploads recebidos direto em UPLOAD_FOLDER e limitados por MAX_CONTENT_LENGTH.
+    init_media_store(app)
+    # [PERFORMANCE] E-mails do site enviados fora da requisição (ver `mail_outbox.py`).
+    init_mail_outbox(app)
+    # [PERFORMANCE] Busca em texto completo com FTS5 (ver `search_index.py`).
+    init_search_index(app)
+    # [PERFORMANCE] Bytecode do Jinja em disco, pré-compilado no deploy (ver `template_cache.py`).
+    init_template_cache(app)
+    startup.mark('extensions')
 
     login_manager = LoginManager()
     login_manager.login_view = 'auth.login'
@@ -595,7 +391,8 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
             else:
                 # Cache moderado: 1 hora, mas exige revalidação com o servidor (must-revalidate)
                 # Isso garante que se você fizer um deploy, o usuário recebe o novo HTML na próxima visita (após 1h ou refresh forte)
-                response.headers['Cache-Control'] = 'public, max-age=3600, must-revalidate'
+                # Views que definem a própria política (service worker, sugestões de busca) a mantêm.
+                response.headers.setdefault('Cache-Control', 'public, max-age=3600, must-revalidate')
             
             # [SEGURANÇA] Headers de Endurecimento (Hardening)
             # Protege contra interpretação errada de tipos MIME (risco de XSS em uploads)
@@ -624,40 +421,22 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
             configs: Dict[str, Any] = {}
             home_sections_dict: Dict[str, Any] = {}
             theme: str = 'option1'
-            theme_settings: ThemeSettings = None
-            lista_areas_atuacao: List[AreaAtuacao] = []
+            theme_settings = None
+            lista_areas_atuacao: List[Any] = []
+            nav_pages: List[Any] = []
 
             try:
-                pages_to_load = ['configuracoes_gerais', 'configuracoes_estilo']
-                config_gerais_db = ConteudoGeral.query.filter(ConteudoGeral.pagina.in_(pages_to_load)).all()
-                configs = {item.secao: item.conteudo for item in config_gerais_db}
-
-                home_sections_db = HomePageSection.query.all()
-                home_sections_dict = {section.section_type: section for section in home_sections_db}
-
-                theme_settings = ThemeSettings.query.first()
-                theme = theme_settings.theme if theme_settings else 'option1'
-                
-                if theme_settings:
-                    # Cores primárias dos temas, para compatibilidade ou uso em JS
-                    configs['cor_primaria_tema1'] = theme_settings.cor_primaria_tema1
-                    configs['cor_primaria_tema2'] = theme_settings.cor_primaria_tema2
-                    configs['cor_primaria_tema3'] = theme_settings.cor_primaria_tema3
-                    configs['cor_primaria_tema4'] = theme_settings.cor_primaria_tema4
-                    configs['cor_texto'] = theme_settings.cor_texto
-                    configs['cor_fundo'] = theme_settings.cor_fundo
-                    configs['cor_texto_dark'] = getattr(theme_settings, 'cor_texto_dark', '#ffffff')
-                    configs['cor_fundo_dark'] = getattr(theme_settings, 'cor_fundo_dark', '#121212')
-                    configs['cor_fundo_secundario_dark'] = getattr(theme_settings, 'cor_fundo_secundario_dark', '#1e1e1e')
-                    
-                    # Novas variáveis CSS que podem ser necessárias em JS ou como fallback
-                    # Estes valores devem idealmente ser lidos dos arquivos CSS ou definidos de forma consistente
-                    configs['color_primary'] = '#b92027' # Default para --color-primary
-                    configs['color_primary_rgb'] = '185, 32, 39' # Default para --color-primary-rgb
-                    configs['color_whatsapp'] = '#25d366' # Default para --color-whatsapp
-                    configs['color_whatsapp_hover'] = '#20b358' # Default para --color-whatsapp-hover
-                    
-                lista_areas_atuacao = AreaAtuacao.query.order_by(AreaAtuacao.ordem).all()
+                # [PERFORMANCE] Snapshot imutável reutilizado entre requisições.
+                # Só volta ao banco quando um commit altera ConteudoGeral, HomePageSection,
+                # ThemeSettings, AreaAtuacao ou Pagina (ver `site_cache.py`).
+                snapshot = get_site_snapshot(app)
+                # Cópia rasa: templates e views recebem um dict comum, o snapshot permanece intacto.
+                configs = dict(snapshot.configs)
+                home_sections_dict = dict(snapshot.home_sections)
+                theme = snapshot.theme
+                theme_settings = snapshot.theme_settings
+                lista_areas_atuacao = list(snapshot.lista_areas_atuacao)
+                nav_pages = list(snapshot.nav_pages)
 
             except OperationalError:
                 # Trata o erro de banco de dados não inicializado/migrado, fornecendo valores padrão.
@@ -683,7 +462,7 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
                 lista_areas_atuacao = []
 
             return dict(
-                nav_pages=get_nav_pages().get('nav_pages', []),
+                nav_pages=nav_pages,
                 current_year=datetime.now(timezone.utc).year,
                 configs=configs,
                 home_sections=home_sections_dict,
@@ -703,6 +482,13 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
 
         app.jinja_env.filters['from_json'] = from_json_filter
         app.jinja_env.globals['get_file_mtime'] = get_file_mtime
+        init_assets(app)
+        init_bundles(app)
+        init_responsive_images(app)
+        init_compression(app)
+        # [PERFORMANCE] Server-Timing e log de requisições lentas, se ativado (ver `request_timing.py`).
+        init_request_timing(app)
+    startup.mark('blueprints')
 
     @app.cli.command('init-db')
     def init_db_command():
@@ -759,19 +545,150 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
             app.logger.info("Limpeza de serviços concluída.")
 
     @app.cli.command('sync-content')
-    def sync_content_command():
+    @click.option('--force', is_flag=True, help='Reaplica os dados mesmo sem alteração na definição.')
+    def sync_content_command(force):
         """
         Sincroniza e garante que os dados essenciais do site estejam no banco de dados.
         Executa a função `ensure_essential_data` para criar ou atualizar
         páginas, áreas de atuação, configurações e conteúdos padrão.
+        Sem `--force`, nada é feito se a definição (`seeding.py`) não mudou.
         """
         with app.app_context():
             app.logger.info("Iniciando sincronização de conteúdo.")
-            ensure_essential_data() # Garante que dados essenciais estão atualizados
+            ensure_essential_data(force=force) # Garante que dados essenciais estão atualizados
             db.session.commit()
             click.echo("Sincronização de conteúdo concluída.")
             app.logger.info("Sincronização de conteúdo concluída.")
 
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """
+        Gera os bundles de CSS/JS por tema (com o CSS crítico), as derivadas
+        responsivas das imagens (WebP/AVIF por largura), as cópias com
+        fingerprint (hash do conteúdo) dos assets estáticos, grava
+        `static/asset-manifest.json`, as variantes pré-comprimidas `.gz`/`.br` e
+        o bytecode de todos os templates. Deve rodar antes de cada deploy.
+        """
+        # Os bundles vêm primeiro: também recebem fingerprint e compressão.
+        bundles = build_bundles(os.path.join(app.root_path, app.template_folder), app.static_folder)
+        bundled = sum(bundle['bytes'] for bundle in bundles.values())
+        original = sum(bundle['source_bytes'] for bundle in bundles.values())
+        click.echo(f"Bundles gerados: {len(bundles)} ({original / 1024:.1f} KB -> {bundled / 1024:.1f} KB).")
+        for key, bundle in sorted(bundles.items()):
+            if bundle['missing']:
+                click.echo(f"Aviso: {key} referencia arquivos inexistentes: {', '.join(bundle['missing'])}")
+
+        images = build_responsive_images(app.static_folder)
+        click.echo(f"Imagens responsivas: {images['images']} imagens, {images['derivatives']} derivadas "
+                   f"({images['removed']} órfãs removidas, {images['failed']} falhas).")
+
+        manifest = build_asset_manifest(app.static_folder)
+        click.echo(f"Manifesto de assets gerado com {len(manifest)} arquivos.")
+        app.logger.info(f"Manifesto de assets gerado com {len(manifest)} arquivos.")
+
+        stats = precompress_static(app.static_folder)
+        click.echo(f"Variantes pré-comprimidas: {stats['gzip']} gzip, {stats['br']} brotli "
+                   f"({stats['bytes_saved'] / 1024:.1f} KB economizados com gzip).")
+        if not BROTLI_AVAILABLE:
+            click.echo("Dica: instale o pacote opcional 'brotli' para gerar variantes .br.")
+
+        templates = precompile_templates(app)
+        click.echo(f"Templates pré-compilados: {templates['compiled']} em {templates['ms']} ms.")
+        for name, error in templates['errors'].items():
+            click.echo(f"Aviso: o template {name} não compilou: {error}")
+
+    @app.cli.command('build-sitemap')
+    @click.option('--folder', type=click.Path(file_okay=False), default=None,
+                  help='Pasta de destino (padrão: SITEMAP_FOLDER ou instance/sitemaps).')
+    def build_sitemap_command(folder):
+        """
+        Gera o sitemap (`.xml` e `.xml.gz`) em disco, para inspeção ou envio
+        manual. As URLs usam `SITE_URL` (ou `SERVER_NAME`).
+        """
+        root = canonical_root(app)
+        if root is None:
+            raise click.UsageError("Configure SITE_URL (ex: https://www.exemplo.com.br) ou SERVER_NAME.")
+        folder = folder or app.config.get('SITEMAP_FOLDER') or os.path.join(app.instance_path, 'sitemaps')
+        with app.test_request_context():
+            sitemaps = build_sitemaps(root)
+        write_sitemaps(sitemaps, folder)
+        click.echo(f"Sitemap gerado em {folder}: {sitemaps.url_count} URLs em {len(sitemaps.files)} arquivo(s).")
+
+    @app.cli.command('optimize-images')
+    @click.argument('directory', required=False, type=click.Path(exists=True, file_okay=False))
+    @click.option('--workers', type=int, default=None, help='Número de processos (padrão: um por núcleo).')
+    @click.option('--force', is_flag=True, help='Ignora o manifesto e reotimiza todas as imagens.')
+    @click.option('--report', 'report_path', type=click.Path(dir_okay=False), default=None,
+                  help='Grava as estatísticas finais neste arquivo JSON.')
+    def optimize_images_command(directory, workers, force, report_path):
+        """
+        Converte para WebP as imagens de DIRECTORY (padrão: static/images), em
+        paralelo, pulando as que não mudaram desde a última execução.
+        """
+        from .image_processor import image_processor
+
+        def show(done, total, record):
+            if record['status'] != 'skipped':
+                click.echo(f"[{done}/{total}] {record['status']}: {record['input_path']}")
+
+        stats = image_processor.batch_optimize(
+            directory or os.path.join(app.static_folder, 'images'), workers=workers, force=force,
+            report_path=report_path, progress=show)
+        click.echo(f"{stats['successful_optimizations']} otimizadas, {stats['skipped_files']} inalteradas, "
+                   f"{stats['failed_optimizations']} falhas em {stats['elapsed_seconds']}s ({stats['workers']} processos).")
+
+    @app.cli.command('image-jobs')
+    @click.option('--retry-failed', is_flag=True, help='Tenta de novo as tarefas que falharam.')
+    def image_jobs_command(retry_failed):
+        """
+        Executa as otimizações de imagem pendentes, como as interrompidas por
+        um reinício da instância antes de terminar.
+        """
+        results = resume_image_jobs(app, include_failed=retry_failed)
+        for job_id, status in results:
+            click.echo(f"Tarefa {job_id}: {status or 'ignorada'}")
+        click.echo(f"{len(results)} tarefa(s) de imagem processada(s).")
+
+    @app.cli.command('mail-outbox')
+    @click.option('--retry-failed', is_flag=True, help='Tenta de novo as mensagens que falharam.')
+    def mail_outbox_command(retry_failed):
+        """
+        Envia agora a caixa de saída de e-mails, ignorando a espera entre
+        tentativas, inclusive mensagens interrompidas por um reinício.
+        """
+        counts = resume_mail_outbox(app, include_failed=retry_failed)
+        click.echo(f"{counts['sent']} enviada(s), {counts['retry']} reagendada(s), {counts['failed']} com falha.")
+
+    @app.cli.command('search-index')
+    @click.option('--rebuild', is_flag=True, help='Reconstrói o índice a partir do banco.')
+    def search_index_command(rebuild):
+        """
+        Mostra o número de documentos do índice de busca (FTS5) ou o reconstrói.
+        """
+        with app.app_context():
+            if not app.extensions.get('search_index'):
+                click.echo("Índice de busca indisponível (banco sem FTS5): busca por LIKE.")
+                return
+            if rebuild:
+                count = rebuild_search_index()
+                db.session.commit()
+            else:
+                count = db.session.execute(db.text("SELECT count(*) FROM search_index")).scalar()
+        click.echo(f"{count} documento(s) no índice de busca.")
+
+    @app.cli.command('media-gc')
+    @click.option('--dry-run', is_flag=True, help='Apenas lista os arquivos que seriam apagados.')
+    def media_gc_command(dry_run):
+        """
+        Apaga os uploads (e suas variantes) que nenhum registro referencia.
+        """
+        with app.app_context():
+            stats = collect_garbage(app, dry_run=dry_run)
+        for relpath in stats['deleted']:
+            click.echo(f"{'Seria apagado' if dry_run else 'Apagado'}: {relpath}")
+        click.echo(f"{len(stats['deleted'])} arquivo(s) órfão(s), {stats['bytes_freed'] / 1024:.1f} KB; "
+                   f"{stats['kept']} mantido(s).")
+
     @app.cli.command('reset-password')
     def reset_password_command():
         """
@@ -793,4 +710,46 @@ def create_app(test_config: Dict[str, Any] = None) -> Flask:
             click.echo('Senha atualizada com sucesso.')
             app.logger.info(f"Senha do usuário {username} atualizada com sucesso.")
 
+    @app.cli.command('startup-profile')
+    @click.option('--runs', default=3, show_default=True, help='Execuções (usa a mediana).')
+    @click.option('--top', default=15, show_default=True, help='Módulos mais lentos a listar.')
+    @click.option('--baseline', 'baseline_path', type=click.Path(dir_okay=False),
+                  help='JSON da linha de base; falha se a inicialização regredir.')
+    @click.option('--write-baseline', is_flag=True, help='Grava o resultado como nova linha de base.')
+    @click.option('--json', 'as_json', is_flag=True, help='Imprime o resultado em JSON.')
+    def startup_profile_command(runs, top, baseline_path, write_baseline, as_json):
+        """
+        Mede o cold start (import do pacote + create_app) em um interpretador
+        novo, com banco SQLite vazio: tempo por fase e por módulo importado.
+        """
+        if write_baseline and not baseline_path:
+            raise click.UsageError("--write-baseline requer --baseline (o arquivo a gravar).")
+        result = profile_startup(os.path.dirname(app.root_path), runs=runs)
+        if as_json:
+            click.echo(json.dumps(result, indent=2))
+        else:
+            click.echo(f"Import do pacote: {result['import_ms']:.1f} ms | create_app: {result['create_app_ms']:.1f} ms "
+                       f"| {result['modules_loaded']} módulos (mediana de {result['runs']} execuções)")
+            for phase, ms in result['phases'].items():
+                click.echo(f"  {phase:<12} {ms:>9.1f} ms")
+            click.echo("Módulos mais lentos (acumulado / próprio, ms):")
+            slowest = sorted(result['imports'].items(), key=lambda item: item[1][1], reverse=True)[:top]
+            for name, (own, cumulative) in slowest:
+                click.echo(f"  {cumulative:>9.1f} {own:>9.1f}  {name}")
+        if write_baseline:
+            with open(baseline_path, 'w', encoding='utf-8') as f:
+                json.dump(baseline_from(result), f, indent=2)
+                f.write('\n')
+            click.echo(f"Linha de base gravada em {baseline_path}.")
+        elif baseline_path:
+            baseline = load_baseline(baseline_path)
+            if baseline is None:
+                raise click.ClickException(f"Linha de base não encontrada: {baseline_path}")
+            problems = compare_to_baseline(result, baseline)
+            if problems:
+                raise click.ClickException("Regressão no cold start:\n  " + "\n  ".join(problems))
+            click.echo("Cold start dentro da linha de base.")
+    startup.mark('cli')
+    startup.finish()
+
     return app
\ No newline at end of file
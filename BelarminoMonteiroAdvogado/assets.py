@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Manifesto de Assets Estáticos com Fingerprint por Conteúdo
+==============================================================================
+
+Substitui o cache busting por `?v=<mtime>` (`get_file_mtime`), que fazia duas
+chamadas de sistema por referência a cada renderização e mudava a cada deploy
+do App Engine mesmo sem alteração no arquivo.
+
+Fluxo:
+------
+1.  **Build (`flask build-assets`):** para cada CSS, JS, SVG, ícone e fonte em
+    `static/`, calcula o SHA-256 do conteúdo e grava uma cópia irmã com o hash
+    no nome (`css/base.css` -> `css/base.1a2b3c4d.css`). A cópia fica no mesmo
+    diretório, então `url(...)` relativos dentro do CSS continuam válidos.
+    O mapeamento é salvo em `static/asset-manifest.json`.
+2.  **Execução:** o manifesto é lido UMA vez em `create_app` e guardado em
+    `app.extensions['asset_manifest']`. O global Jinja `asset_url()` resolve o
+    nome a partir desse dicionário, sem nenhuma chamada de sistema.
+3.  **Cache:** as cópias com hash ficam sob `/static`, que já recebe
+    `Cache-Control: public, max-age=31536000, immutable` em `add_header`.
+
+Sem manifesto (ambiente de desenvolvimento), `asset_url()` recorre ao
+`?v=<mtime>`, memorizado por processo fora do modo debug.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import Flask, current_app, url_for
+
+MANIFEST_FILENAME = 'asset-manifest.json'
+
+# Extensões com fingerprint. Imagens e vídeos ficam de fora: são grandes,
+# raramente mudam e duplicá-los pesaria no pacote de deploy.
+FINGERPRINT_EXTENSIONS: Tuple[str, ...] = ('.css', '.js', '.svg', '.ico', '.woff', '.woff2', '.ttf', '.otf', '.eot')
+
+# Diretórios ignorados: uploads do painel e backups gerados pelo otimizador de imagens.
+_EXCLUDED_DIRS = ('uploads', 'originals')
+_EXCLUDED_DIR_PREFIXES = ('images_backup',)
+
+_HASH_LENGTH = 8
+_HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{%d}\.[^./]+$' % _HASH_LENGTH)
+
+
+def fingerprint_name(relpath: str, digest: str) -> str:
+    """
+    Insere o hash antes da extensão: `css/base.css` -> `css/base.<hash>.css`.
+
+    Args:
+        relpath (str): Caminho relativo a `static/`, com `/` como separador.
+        digest (str): Hash hexadecimal do conteúdo.
+
+    Returns:
+        str: O caminho com fingerprint.
+    """
+    root, ext = os.path.splitext(relpath)
+    return f"{root}.{digest[:_HASH_LENGTH]}{ext}"
+
+
+def _iter_assets(static_folder: str, extensions: Iterable[str]):
+    """Percorre `static/` e produz os caminhos relativos elegíveis para fingerprint."""
+    extensions = tuple(ext.lower() for ext in extensions)
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in _EXCLUDED_DIRS and not d.startswith(_EXCLUDED_DIR_PREFIXES)
+        )
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(extensions) or _HASHED_NAME_RE.search(filename):
+                continue
+            full_path = os.path.join(dirpath, filename)
+            yield os.path.relpath(full_path, static_folder).replace(os.sep, '/')
+
+
+def _file_digest(path: str) -> str:
+    """Calcula o SHA-256 do arquivo em blocos."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_asset_manifest(static_folder: str,
+                         extensions: Iterable[str] = FINGERPRINT_EXTENSIONS) -> Dict[str, str]:
+    """
+    Gera as cópias com fingerprint e grava `asset-manifest.json`.
+
+    Cópias de builds anteriores que não constam mais no novo manifesto são
+    removidas. Arquivos cujo hash não mudou não são copiados novamente.
+
+    Args:
+        static_folder (str): O diretório `static` da aplicação.
+        extensions (Iterable[str]): Extensões a processar.
+
+    Returns:
+        Dict[str, str]: O manifesto `caminho original -> caminho com hash`.
+    """
+    manifest_path = os.path.join(static_folder, MANIFEST_FILENAME)
+    previous = _read_manifest(manifest_path) or {}
+
+    manifest: Dict[str, str] = {}
+    for relpath in _iter_assets(static_folder, extensions):
+        source = os.path.join(static_folder, relpath)
+        hashed = fingerprint_name(relpath, _file_digest(source))
+        target = os.path.join(static_folder, hashed)
+        if not os.path.exists(target):
+            shutil.copyfile(source, target)
+        manifest[relpath] = hashed
+
+    current = set(manifest.values())
+    for stale in set(previous.values()) - current:
+        stale_path = os.path.join(static_folder, stale)
+        if not _HASHED_NAME_RE.search(stale):
+            continue
+        # Inclui as variantes pré-comprimidas (ver `compression.py`).
+        for path in (stale_path, stale_path + '.gz', stale_path + '.br'):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, str]]:
+    """Lê um manifesto do disco; retorna None se ausente ou inválido."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def init_assets(app: Flask) -> None:
+    """
+    Carrega o manifesto (se existir) e registra o global Jinja `asset_url`.
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    manifest = _read_manifest(os.path.join(app.static_folder, MANIFEST_FILENAME))
+    if manifest is None:
+        app.logger.debug("[ASSETS] Manifesto ausente: usando cache busting por mtime.")
+    app.extensions['asset_manifest'] = manifest or {}
+    app.extensions['asset_mtimes'] = {}
+    app.jinja_env.globals['asset_url'] = asset_url
+
+
+def asset_url(filename: str) -> str:
+    """
+    Retorna a URL de um asset estático, preferindo o nome com fingerprint.
+
+    Args:
+        filename (str): O caminho relativo dentro de `static/` (ex: 'css/base.css').
+
+    Returns:
+        str: A URL do arquivo com hash ou, sem manifesto, `?v=<mtime>`.
+    """
+    hashed = current_app.extensions.get('asset_manifest', {}).get(filename)
+    if hashed:
+        return url_for('static', filename=hashed)
+
+    mtimes = current_app.extensions.setdefault('asset_mtimes', {})
+    version = None if current_app.debug else mtimes.get(filename)
+    if version is None:
+        path = os.path.join(current_app.static_folder, filename)
+        try:
+            version = int(os.path.getmtime(path))
+        except OSError:
+            version = 0
+        mtimes[filename] = version
+    return url_for('static', filename=filename, v=version)
@@ -0,0 +1,649 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Bundles de CSS/JS por Tema e CSS Crítico
+==============================================================================
+
+Cada `base_optionN.html` carregava de 2 a 14 folhas de estilo e scripts locais
+separados, todos bloqueando a renderização. Este módulo junta esses arquivos em
+bundles minificados por tema.
+
+Marcação nos templates:
+-----------------------
+Os grupos de `<link>`/`<script>` locais são envolvidos por
+`{% call css_bundle(bundle_theme, 'nome') %}...{% endcall %}` (ou `js_bundle`),
+macros de `_bundles.html`. Sem bundle construído, a macro apenas repete o
+conteúdo original: o comportamento em desenvolvimento não muda.
+
+Um tema pode ter mais de um bundle: um grupo nunca atravessa folhas de estilo
+de CDN (Bootstrap, AOS...), para não alterar a ordem da cascata.
+
+Build (`flask build-assets`, antes do fingerprint):
+---------------------------------------------------
+1.  Lê cada `base_optionN.html`, expande os `{% include %}` literais e coleta,
+    na ordem, os arquivos de cada região marcada.
+2.  CSS: concatena (arquivos com `media` viram blocos `@media`), corrige
+    `url(...)` relativos e minifica com um minificador conservador próprio.
+    JS: minifica com `rjsmin`, se instalado; senão apenas concatena.
+3.  CSS crítico: seleciona as regras do bundle cujos seletores usam apenas
+    classes, ids e tags presentes no cabeçalho do tema e na primeira seção de
+    `home/home_optionN.html` (análise estática dos templates).
+4.  Grava `css/bundle-<tema>-<nome>.css`, `js/bundle-<tema>-<nome>.js` e o
+    manifesto `static/bundles.json` (que inclui o CSS crítico).
+
+Execução:
+---------
+O manifesto é lido uma vez em `create_app` (`app.extensions['asset_bundles']`).
+Na home, o CSS crítico de cada bundle é embutido em `<style>` e o bundle é
+carregado de forma assíncrona (`preload` + `onload`); nas demais páginas, um
+único `<link>` bloqueante substitui o grupo.
+"""
+import json
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from flask import Flask, current_app
+from markupsafe import Markup
+
+from .assets import asset_url
+
+try:
+    import rjsmin  # Opcional: `pip install rjsmin` habilita a minificação de JS.
+except ImportError:  # pragma: no cover - depende do ambiente
+    rjsmin = None
+
+BUNDLE_MANIFEST_FILENAME = 'bundles.json'
+
+# Acima disso o CSS crítico deixa de compensar: o HTML da home cresceria mais
+# do que a primeira janela de congestionamento TCP (~14 KB).
+CRITICAL_MAX_BYTES = 14 * 1024
+
+_BASE_TEMPLATE_RE = re.compile(r'^base_(option\d+)\.html$')
+_JINJA_COMMENT_RE = re.compile(r'\{#.*?#\}', re.S)
+_HTML_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_INCLUDE_RE = re.compile(r"\{%-?\s*include\s+['\"]([^'\"]+)['\"][^%]*-?%\}")
+_CALL_RE = re.compile(
+    r"\{%-?\s*call\s+(css|js)_bundle\(\s*[\w.]+\s*,\s*['\"]([\w-]+)['\"][^)]*\)\s*-?%\}"
+    r"(.*?)\{%-?\s*endcall\s*-?%\}",
+    re.S,
+)
+_TAG_RE = {'css': re.compile(r'<link\b[^>]*>', re.I), 'js': re.compile(r'<script\b[^>]*>', re.I)}
+_ASSET_RE = re.compile(r"asset_url\(\s*['\"]([^'\"]+)['\"]\s*\)")
+_MEDIA_RE = re.compile(r'\bmedia\s*=\s*["\']([^"\']+)["\']', re.I)
+_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_JS_TOP_LEVEL_RE = re.compile(r'^(?:const|let|class)\s+([A-Za-z_$][\w$]*)', re.M)
+_CONTENT_BLOCK_RE = re.compile(r'\{%-?\s*block\s+content\s*-?%\}')
+_BODY_RE = re.compile(r'<body\b', re.I)
+
+
+class BundleSpec(NamedTuple):
+    """Uma região marcada em um template base."""
+    theme: str
+    name: str
+    kind: str  # 'css' ou 'js'
+    sources: Tuple[Tuple[str, Optional[str]], ...]  # (arquivo em static/, media)
+
+    @property
+    def key(self) -> str:
+        return bundle_key(self.theme, self.name, self.kind)
+
+    @property
+    def output(self) -> str:
+        return f"{self.kind}/bundle-{self.theme}-{self.name}.{self.kind}"
+
+
+def bundle_key(theme: str, name: str, kind: str) -> str:
+    """Chave do bundle no manifesto: `option5:meta.css`."""
+    return f"{theme}:{name}.{kind}"
+
+
+# --- LEITURA DOS TEMPLATES ---
+
+def _load_template(templates_folder: str, name: str, depth: int = 0) -> str:
+    """Lê um template sem comentários, com os `{% include %}` literais expandidos."""
+    path = os.path.join(templates_folder, *name.split('/'))
+    try:
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+    except OSError:
+        return ''
+    text = _HTML_COMMENT_RE.sub('', _JINJA_COMMENT_RE.sub('', text))
+    if depth >= 5:
+        return text
+    return _INCLUDE_RE.sub(lambda m: _load_template(templates_folder, m.group(1), depth + 1), text)
+
+
+def collect_bundle_specs(templates_folder: str) -> List[BundleSpec]:
+    """
+    Lê as regiões `css_bundle`/`js_bundle` de todos os `base_optionN.html`.
+
+    Args:
+        templates_folder (str): O diretório de templates.
+
+    Returns:
+        List[BundleSpec]: As regiões, por tema e na ordem do documento.
+
+    Raises:
+        ValueError: Se uma região contiver tag sem `asset_url()` literal (ela
+            seria perdida no bundle) ou se um nome se repetir no mesmo tema.
+    """
+    specs: List[BundleSpec] = []
+    for filename in sorted(os.listdir(templates_folder)):
+        match = _BASE_TEMPLATE_RE.match(filename)
+        if not match:
+            continue
+        theme = match.group(1)
+        seen: Set[str] = set()
+        for kind, name, body in _CALL_RE.findall(_load_template(templates_folder, filename)):
+            sources = []
+            for tag in _TAG_RE[kind].findall(body):
+                asset = _ASSET_RE.search(tag)
+                if asset is None:
+                    raise ValueError(f"{filename}: tag sem asset_url() no bundle '{name}': {tag}")
+                media = _MEDIA_RE.search(tag)
+                media = media.group(1).strip() if media else None
+                sources.append((asset.group(1), None if media in (None, 'all') else media))
+            spec = BundleSpec(theme, name, kind, tuple(sources))
+            if spec.key in seen:
+                raise ValueError(f"{filename}: bundle '{name}.{kind}' declarado mais de uma vez.")
+            seen.add(spec.key)
+            if sources:
+                specs.append(spec)
+    return specs
+
+
+# --- CSS: PARSER E MINIFICADOR ---
+
+def _skip_string(css: str, i: int) -> int:
+    """Retorna o índice logo após a string que começa em `css[i]`."""
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+
+def _strip_comments(css: str) -> str:
+    """Remove comentários `/* */` (fora de strings)."""
+    out = []
+    i = 0
+    while i < len(css):
+        ch = css[i]
+        if ch in '"\'':
+            end = _skip_string(css, i)
+            out.append(css[i:end])
+            i = end
+        elif css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = len(css) if end == -1 else end + 2
+            out.append(' ')
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def _scan(css: str, i: int, stops: str) -> int:
+    """Avança até um caractere de `stops` fora de strings e parênteses."""
+    depth = 0
+    while i < len(css):
+        ch = css[i]
+        if ch in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth = max(depth - 1, 0)
+        elif depth == 0 and ch in stops:
+            return i
+        i += 1
+    return i
+
+
+def _matching_brace(css: str, i: int) -> int:
+    """Índice da `}` que fecha a `{` em `css[i]`."""
+    depth = 0
+    while i < len(css):
+        ch = css[i]
+        if ch in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return i
+
+
+# Nós: ('rule', seletor, declarações) | ('group', @regra, filhos) | ('at', @regra, corpo|None)
+_GROUP_AT_RULES = ('@media', '@supports', '@layer', '@container', '@document')
+
+
+def parse_css(css: str) -> List[tuple]:
+    """
+    Divide uma folha de estilo (sem comentários) em regras.
+
+    Args:
+        css (str): O CSS.
+
+    Returns:
+        List[tuple]: Nós `('rule', seletor, corpo)`, `('group', prelúdio,
+        filhos)` para `@media`/`@supports`... e `('at', prelúdio, corpo)` para
+        as demais at-rules (`@font-face`, `@keyframes`, `@import`...).
+    """
+    nodes: List[tuple] = []
+    i = 0
+    while i < len(css):
+        j = _scan(css, i, '{;}')
+        prelude = css[i:j].strip()
+        if j >= len(css):
+            break
+        if css[j] in ';}':
+            if prelude.startswith('@'):
+                nodes.append(('at', prelude, None))
+            i = j + 1
+            continue
+        end = _matching_brace(css, j)
+        body = css[j + 1:end]
+        at_name = prelude.split(None, 1)[0].lower() if prelude.startswith('@') else ''
+        if at_name in _GROUP_AT_RULES:
+            nodes.append(('group', prelude, parse_css(body)))
+        elif at_name:
+            nodes.append(('at', prelude, body))
+        else:
+            nodes.append(('rule', prelude, body))
+        i = end + 1
+    return nodes
+
+
+def _collapse(text: str) -> str:
+    """Reduz espaços em branco a um único espaço, preservando strings."""
+    out = []
+    i = 0
+    pending_space = False
+    while i < len(text):
+        ch = text[i]
+        if ch.isspace():
+            pending_space = True
+            i += 1
+            continue
+        if pending_space and out:
+            out.append(' ')
+        pending_space = False
+        if ch in '"\'':
+            end = _skip_string(text, i)
+            out.append(text[i:end])
+            i = end
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def _minify_selector(selector: str) -> str:
+    selector = _collapse(selector)
+    return re.sub(r'\s*([,>{}])\s*', r'\1', selector)
+
+
+def _minify_declarations(body: str) -> str:
+    declarations = []
+    i = 0
+    while i <= len(body):
+        j = _scan(body, i, ';')
+        declaration = _collapse(body[i:j]).strip()
+        if declaration:
+            prop, sep, value = declaration.partition(':')
+            declarations.append(f"{prop.strip()}{sep}{value.strip()}" if sep else declaration)
+        i = j + 1
+    return ';'.join(declarations)
+
+
+def serialize_css(nodes: Iterable[tuple]) -> str:
+    """Serializa os nós de `parse_css` no formato minificado."""
+    out = []
+    for kind, prelude, body in nodes:
+        if kind == 'rule':
+            declarations = _minify_declarations(body)
+            if declarations:
+                out.append(f"{_minify_selector(prelude)}{{{declarations}}}")
+        elif kind == 'group':
+            inner = serialize_css(body)
+            if inner:
+                out.append(f"{_collapse(prelude)}{{{inner}}}")
+        elif body is None:
+            out.append(f"{_collapse(prelude)};")
+        elif prelude.split(None, 1)[0].lower().endswith('keyframes'):
+            out.append(f"{_collapse(prelude)}{{{serialize_css(parse_css(body))}}}")
+        else:
+            out.append(f"{_collapse(prelude)}{{{_minify_declarations(body)}}}")
+    return ''.join(out)
+
+
+def minify_css(css: str) -> str:
+    """
+    Minifica CSS: remove comentários e espaços, sem reescrever valores.
+
+    Args:
+        css (str): O CSS original.
+
+    Returns:
+        str: O CSS minificado.
+    """
+    return serialize_css(parse_css(_strip_comments(css)))
+
+
+def _rewrite_urls(css: str, source: str, output: str) -> str:
+    """Ajusta `url(...)` relativos ao diretório do bundle."""
+    source_dir = os.path.dirname(source)
+    output_dir = os.path.dirname(output)
+    if source_dir == output_dir:
+        return css
+
+    def fix(match: re.Match) -> str:
+        quote, url = match.group(1), match.group(2).strip()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        target = os.path.normpath(os.path.join(source_dir, url))
+        return f"url({quote}{os.path.relpath(target, output_dir).replace(os.sep, '/')}{quote})"
+
+    return _URL_RE.sub(fix, css)
+
+
+def _read_text(static_folder: str, relpath: str) -> Optional[str]:
+    try:
+        with open(os.path.join(static_folder, relpath), encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def build_css_bundle(static_folder: str, spec: BundleSpec) -> Tuple[str, List[str]]:
+    """
+    Concatena e minifica os arquivos de uma região CSS.
+
+    Arquivos ausentes são ignorados (o template referenciava um 404) e
+    repetições do mesmo arquivo com o mesmo `media` são mantidas, pois
+    reaplicam as regras na posição original da cascata.
+
+    Returns:
+        Tuple[str, List[str]]: O CSS minificado e os arquivos ausentes.
+
+    Raises:
+        ValueError: Se algum arquivo usar `@import` (só é válido no início da folha).
+    """
+    parts, missing = [], []
+    for relpath, media in spec.sources:
+        css = _read_text(static_folder, relpath)
+        if css is None:
+            missing.append(relpath)
+            continue
+        nodes = [node for node in parse_css(_strip_comments(_rewrite_urls(css, relpath, spec.output)))
+                 if not (node[0] == 'at' and node[1].lower().startswith('@charset'))]
+        if any(node[0] == 'at' and node[1].lower().startswith('@import') for node in nodes):
+            raise ValueError(f"{relpath}: @import não é suportado em bundles.")
+        minified = serialize_css(nodes)
+        parts.append(f"@media {_collapse(media)}{{{minified}}}" if media else minified)
+    return '\n'.join(parts), missing
+
+
+def build_js_bundle(static_folder: str, spec: BundleSpec) -> Tuple[str, List[str]]:
+    """
+    Concatena (e, com `rjsmin`, minifica) os scripts de uma região JS.
+
+    Os arquivos continuam sendo scripts clássicos que compartilham o escopo
+    global, exatamente como em tags `<script>` separadas.
+
+    Returns:
+        Tuple[str, List[str]]: O JS e os arquivos ausentes.
+
+    Raises:
+        ValueError: Se dois arquivos declararem o mesmo `const`/`let`/`class`
+            no nível superior (no bundle isso seria um erro de sintaxe que
+            derrubaria todos os scripts, não só o repetido).
+    """
+    parts, missing = [], []
+    declared: Dict[str, str] = {}
+    for relpath, _media in spec.sources:
+        js = _read_text(static_folder, relpath)
+        if js is None:
+            missing.append(relpath)
+            continue
+        for name in _JS_TOP_LEVEL_RE.findall(js):
+            if name in declared and declared[name] != relpath:
+                raise ValueError(f"{relpath}: '{name}' já declarado em {declared[name]}.")
+            declared[name] = relpath
+        if rjsmin is not None:
+            js = rjsmin.jsmin(js)
+        parts.append(js.strip())
+    # `;` protege contra arquivos que terminam sem ponto e vírgula.
+    return ';\n'.join(parts) + ('\n' if parts else ''), missing
+
+
+# --- CSS CRÍTICO ---
+
+_CLASS_ATTR_RE = re.compile(r'\bclass\s*=\s*"([^"]*)"', re.I)
+_ID_ATTR_RE = re.compile(r'\bid\s*=\s*"([^"]*)"', re.I)
+_TAG_NAME_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9-]*)')
+_JINJA_EXPR_RE = re.compile(r'\{\{.*?\}\}|\{%.*?%\}', re.S)
+_FUNCTIONAL_PSEUDO_RE = re.compile(r'::?[\w-]+\((?:[^()]|\([^()]*\))*\)')
+_ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+_ALWAYS_CRITICAL = {':root', 'html', 'body', '*'}
+
+
+class _Tokens(NamedTuple):
+    tags: Set[str]
+    classes: Set[str]
+    ids: Set[str]
+
+
+def _above_the_fold_markup(templates_folder: str, theme: str) -> str:
+    """Cabeçalho do tema (até o bloco `content`) e a primeira seção da home."""
+    base = _load_template(templates_folder, f'base_{theme}.html')
+    body = _BODY_RE.search(base)
+    header = base[body.start() if body else 0:]
+    content = _CONTENT_BLOCK_RE.search(header)
+    header = header[:content.start()] if content else header
+
+    home = _load_template(templates_folder, f'home/home_{theme}.html')
+    content = _CONTENT_BLOCK_RE.search(home)
+    home = home[content.end():] if content else home
+    end = home.lower().find('</section>')
+    return header + (home[:end] if end != -1 else home[:8000])
+
+
+def _collect_tokens(markup: str) -> _Tokens:
+    """Classes, ids e tags usados em um trecho de template."""
+    classes: Set[str] = set()
+    ids: Set[str] = set()
+    for value in _CLASS_ATTR_RE.findall(markup):
+        classes.update(_JINJA_EXPR_RE.sub(' ', value).split())
+    for value in _ID_ATTR_RE.findall(markup):
+        ids.update(_JINJA_EXPR_RE.sub(' ', value).split())
+    tags = {tag.lower() for tag in _TAG_NAME_RE.findall(markup)} | {'html', 'body'}
+    return _Tokens(tags, classes, ids)
+
+
+def _selector_matches(selector: str, tokens: _Tokens) -> bool:
+    """Verifica se todos os compostos do seletor podem casar com o markup."""
+    selector = selector.strip()
+    if selector.split(':', 1)[0] in _ALWAYS_CRITICAL or selector.startswith(':root'):
+        return True
+    selector = _ATTRIBUTE_RE.sub('', _FUNCTIONAL_PSEUDO_RE.sub('', selector))
+    for compound in re.split(r'[\s>+~]+', selector):
+        compound = re.sub(r'::?[\w-]+', '', compound)
+        if not compound or compound == '*':
+            continue
+        tag = re.match(r'^[a-zA-Z][\w-]*', compound)
+        if tag and tag.group(0).lower() not in tokens.tags:
+            return False
+        if any(cls not in tokens.classes for cls in re.findall(r'\.([\w-]+)', compound)):
+            return False
+        if any(id_ not in tokens.ids for id_ in re.findall(r'#([\w-]+)', compound)):
+            return False
+    return True
+
+
+def _only_custom_properties(body: str) -> bool:
+    declarations = [d.strip() for d in body.split(';') if d.strip()]
+    return bool(declarations) and all(d.startswith('--') for d in declarations)
+
+
+def _filter_critical(nodes: Iterable[tuple], tokens: _Tokens) -> List[tuple]:
+    kept = []
+    for kind, prelude, body in nodes:
+        if kind == 'rule':
+            selectors = [s for s in prelude.split(',') if _selector_matches(s, tokens)]
+            if selectors or _only_custom_properties(body):
+                kept.append((kind, ','.join(selectors) if selectors else prelude, body))
+        elif kind == 'group':
+            children = _filter_critical(body, tokens)
+            if children:
+                kept.append((kind, prelude, children))
+        elif prelude.lower().startswith('@font-face'):
+            kept.append((kind, prelude, body))
+    return kept
+
+
+def extract_critical_css(css: str, markup: str) -> str:
+    """
+    Seleciona as regras de `css` que podem afetar o markup informado.
+
+    Mantém sempre `:root`/`html`/`body`/`*`, regras só com variáveis CSS e
+    `@font-face`; `@keyframes` ficam para o bundle completo.
+
+    Args:
+        css (str): O CSS (normalmente o bundle já minificado).
+        markup (str): O trecho de template visível sem rolagem.
+
+    Returns:
+        str: O CSS crítico minificado.
+    """
+    nodes = parse_css(_strip_comments(css))
+    return serialize_css(_filter_critical(nodes, _collect_tokens(markup)))
+
+
+# --- BUILD ---
+
+def build_bundles(templates_folder: str, static_folder: str) -> Dict[str, dict]:
+    """
+    Gera os bundles de todos os temas e grava `bundles.json`.
+
+    Args:
+        templates_folder (str): O diretório de templates.
+        static_folder (str): O diretório `static` (origem e destino).
+
+    Returns:
+        Dict[str, dict]: O manifesto `chave -> {path, sources, bytes,
+        source_bytes, critical, missing}`.
+    """
+    manifest: Dict[str, dict] = {}
+    markup_by_theme: Dict[str, str] = {}
+    for spec in collect_bundle_specs(templates_folder):
+        builder = build_css_bundle if spec.kind == 'css' else build_js_bundle
+        content, missing = builder(static_folder, spec)
+        if not content.strip():
+            continue
+
+        target = os.path.join(static_folder, spec.output)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, target)
+
+        critical = None
+        if spec.kind == 'css':
+            if spec.theme not in markup_by_theme:
+                markup_by_theme[spec.theme] = _above_the_fold_markup(templates_folder, spec.theme)
+            critical = extract_critical_css(content, markup_by_theme[spec.theme])
+            if len(critical.encode('utf-8')) > CRITICAL_MAX_BYTES:
+                critical = None
+
+        source_bytes = sum(
+            os.path.getsize(os.path.join(static_folder, relpath))
+            for relpath, _media in spec.sources if relpath not in missing
+        )
+        manifest[spec.key] = {
+            'path': spec.output,
+            'sources': [relpath for relpath, _media in spec.sources],
+            'bytes': len(content.encode('utf-8')),
+            'source_bytes': source_bytes,
+            'critical': critical,
+            'missing': missing,
+        }
+
+    manifest_path = os.path.join(static_folder, BUNDLE_MANIFEST_FILENAME)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+# --- EXECUÇÃO ---
+
+def _read_bundle_manifest(path: str) -> Optional[Dict[str, dict]]:
+    """Lê o manifesto de bundles; retorna None se ausente ou inválido."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def init_bundles(app: Flask) -> None:
+    """
+    Carrega `bundles.json` (se existir) e registra os globais Jinja
+    `bundle_url` e `critical_css`.
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    manifest = _read_bundle_manifest(os.path.join(app.static_folder, BUNDLE_MANIFEST_FILENAME))
+    if manifest is None:
+        app.logger.debug("[BUNDLES] Manifesto ausente: servindo CSS/JS sem bundle.")
+    app.extensions['asset_bundles'] = manifest or {}
+    app.jinja_env.globals['bundle_url'] = bundle_url
+    app.jinja_env.globals['critical_css'] = critical_css
+
+
+def _bundle(theme: Optional[str], name: str, kind: str) -> Optional[dict]:
+    if not theme:
+        return None
+    return current_app.extensions.get('asset_bundles', {}).get(bundle_key(theme, name, kind))
+
+
+def bundle_url(theme: Optional[str], name: str, kind: str) -> Optional[str]:
+    """
+    Retorna a URL (com fingerprint) de um bundle, ou None se não foi construído.
+
+    Args:
+        theme (str | None): O tema (`bundle_theme` do template base).
+        name (str): O nome da região.
+        kind (str): 'css' ou 'js'.
+    """
+    bundle = _bundle(theme, name, kind)
+    return asset_url(bundle['path']) if bundle else None
+
+
+def critical_css(theme: Optional[str], name: str) -> Markup:
+    """
+    Retorna o CSS crítico de um bundle CSS, pronto para um `<style>`.
+
+    Args:
+        theme (str | None): O tema.
+        name (str): O nome da região.
+
+    Returns:
+        Markup: O CSS (vazio se não houver).
+    """
+    bundle = _bundle(theme, name, 'css')
+    css = (bundle or {}).get('critical') or ''
+    # Impede que um `</style>` dentro de uma string CSS feche a tag.
+    return Markup(css.replace('</', '<\\/'))
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Compressão de Respostas: Assets Pré-comprimidos e HTML Dinâmico
+==============================================================================
+
+Estáticos (build):
+------------------
+`flask build-assets` grava, ao lado de cada CSS, JS, SVG, JSON e XML
+compressível, as variantes `.gz` (gzip nível 9) e `.br` (Brotli qualidade 11,
+se o pacote opcional `brotli` estiver instalado). Uma variante só é mantida se
+for menor que o original. Todo o custo de CPU fica no build.
+
+Estáticos (execução):
+---------------------
+A view `static` é substituída por uma versão que escolhe a melhor variante
+aceita pelo cliente (`Accept-Encoding`: br > gzip > identidade), responde com
+`Content-Encoding` e sempre acrescenta `Vary: Accept-Encoding`. As variantes
+disponíveis são listadas uma vez no início do processo: nenhuma chamada
+`os.path.exists` por requisição.
+
+Observação: no App Engine, o handler `static_dir` do `app.yaml` atende
+`/static` antes do Flask e já comprime com gzip. O caminho acima vale para
+desenvolvimento e para hospedagens sem esse handler (ex: PythonAnywhere).
+
+HTML dinâmico:
+--------------
+Um `after_request` comprime com gzip (nível `COMPRESS_LEVEL`) respostas de
+texto com pelo menos `COMPRESS_MIN_SIZE` bytes quando o cliente aceita gzip.
+Uma ETag forte vira fraca (`W/"..."`), pois o corpo comprimido é outra
+representação; GETs condicionais continuam funcionando (comparação fraca).
+
+Configurações: `COMPRESS_ENABLED` (True), `COMPRESS_MIN_SIZE` (1024),
+`COMPRESS_LEVEL` (6), `COMPRESS_MIMETYPES`.
+"""
+import gzip
+import mimetypes
+import os
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from flask import Flask, current_app, request, send_from_directory
+from werkzeug.wrappers import Response
+
+try:
+    import brotli  # Opcional: `pip install brotli` habilita as variantes .br.
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+BROTLI_AVAILABLE = brotli is not None
+
+PRECOMPRESS_EXTENSIONS: Tuple[str, ...] = ('.css', '.js', '.svg', '.json', '.xml', '.txt', '.map')
+PRECOMPRESS_MIN_SIZE = 512
+
+DEFAULT_MIMETYPES: Tuple[str, ...] = (
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+)
+
+# Diretórios ignorados: uploads do painel e backups do otimizador de imagens.
+_EXCLUDED_DIRS = ('uploads', 'originals')
+_EXCLUDED_DIR_PREFIXES = ('images_backup',)
+
+# Extensões das variantes, na ordem de preferência.
+_ENCODINGS: Tuple[Tuple[str, str], ...] = (('br', '.br'), ('gzip', '.gz'))
+
+
+# --- BUILD: VARIANTES PRÉ-COMPRIMIDAS ---
+
+def _write_if_smaller(path: str, data: bytes, original_size: int) -> bool:
+    """Grava a variante apenas se ela economiza bytes; remove uma antiga caso contrário."""
+    if len(data) >= original_size:
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def precompress_static(static_folder: str,
+                       extensions: Iterable[str] = PRECOMPRESS_EXTENSIONS,
+                       min_size: int = PRECOMPRESS_MIN_SIZE) -> Dict[str, int]:
+    """
+    Grava as variantes `.gz` e `.br` dos arquivos compressíveis de `static/`.
+
+    Variantes mais novas que o original não são refeitas.
+
+    Args:
+        static_folder (str): O diretório `static` da aplicação.
+        extensions (Iterable[str]): Extensões a comprimir.
+        min_size (int): Arquivos menores que isso são ignorados.
+
+    Returns:
+        Dict[str, int]: Contagem de variantes `gzip` e `br` gravadas e
+        `bytes_saved` (economia somada das variantes gzip).
+    """
+    extensions = tuple(ext.lower() for ext in extensions)
+    stats = {'gzip': 0, 'br': 0, 'bytes_saved': 0}
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        dirnames[:] = [d for d in dirnames if d not in _EXCLUDED_DIRS and not d.startswith(_EXCLUDED_DIR_PREFIXES)]
+        for filename in filenames:
+            if not filename.lower().endswith(extensions):
+                continue
+            source = os.path.join(dirpath, filename)
+            source_stat = os.stat(source)
+            if source_stat.st_size < min_size:
+                continue
+
+            data = None
+            for encoding, suffix in _ENCODINGS:
+                if encoding == 'br' and brotli is None:
+                    continue
+                target = source + suffix
+                if os.path.exists(target) and os.stat(target).st_mtime >= source_stat.st_mtime:
+                    continue
+                if data is None:
+                    with open(source, 'rb') as f:
+                        data = f.read()
+                if encoding == 'br':
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    # mtime=0: saída determinística, o mesmo arquivo gera os mesmos bytes.
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                if _write_if_smaller(target, compressed, len(data)):
+                    stats[encoding] += 1
+                    if encoding == 'gzip':
+                        stats['bytes_saved'] += len(data) - len(compressed)
+    return stats
+
+
+def _scan_variants(static_folder: str) -> Set[str]:
+    """Lista (caminhos relativos com `/`) as variantes `.br`/`.gz` existentes."""
+    variants: Set[str] = set()
+    if not os.path.isdir(static_folder):
+        return variants
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        dirnames[:] = [d for d in dirnames if d not in _EXCLUDED_DIRS and not d.startswith(_EXCLUDED_DIR_PREFIXES)]
+        for filename in filenames:
+            if filename.endswith(('.br', '.gz')):
+                relpath = os.path.relpath(os.path.join(dirpath, filename), static_folder)
+                variants.add(relpath.replace(os.sep, '/'))
+    return variants
+
+
+# --- EXECUÇÃO ---
+
+def _accepts(encoding: str) -> bool:
+    """Verifica se o cliente aceita a codificação (qualidade > 0)."""
+    return request.accept_encodings[encoding] > 0
+
+
+def _choose_variant(filename: str, variants: Set[str]) -> Optional[Tuple[str, str]]:
+    """Retorna `(codificação, arquivo)` da melhor variante aceita, ou None."""
+    for encoding, suffix in _ENCODINGS:
+        candidate = filename + suffix
+        if candidate in variants and _accepts(encoding):
+            return encoding, candidate
+    return None
+
+
+def _has_variants(filename: str, variants: Set[str]) -> bool:
+    """Verifica se o arquivo possui alguma variante pré-comprimida."""
+    return any(filename + suffix in variants for _encoding, suffix in _ENCODINGS)
+
+
+def init_compression(app: Flask) -> None:
+    """
+    Registra a view de estáticos com negociação e a compressão do HTML dinâmico.
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+    app.extensions['static_variants'] = _scan_variants(app.static_folder) if app.static_folder else set()
+
+    original_static = app.view_functions.get('static')
+
+    def static_with_variants(filename: str) -> Response:
+        """Serve a variante pré-comprimida quando o cliente a aceita."""
+        variants = current_app.extensions.get('static_variants', set())
+        if not variants or not _has_variants(filename, variants):
+            return original_static(filename=filename)
+
+        chosen = _choose_variant(filename, variants)
+        if chosen is None:
+            response = original_static(filename=filename)
+        else:
+            encoding, variant = chosen
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(
+                current_app.static_folder, variant, mimetype=mimetype,
+                max_age=current_app.get_send_file_max_age(filename),
+            )
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    if original_static is not None:
+        app.view_functions['static'] = static_with_variants
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        """Comprime com gzip respostas de texto grandes o suficiente."""
+        return compress_dynamic_response(response)
+
+
+def compress_dynamic_response(response: Response) -> Response:
+    """
+    Aplica gzip a uma resposta dinâmica, se elegível.
+
+    Args:
+        response (Response): A resposta gerada pela view.
+
+    Returns:
+        Response: A mesma resposta, comprimida ou não.
+    """
+    config = current_app.config
+    if not config.get('COMPRESS_ENABLED', True):
+        return response
+    if response.mimetype not in config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES):
+        return response
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if not _accepts('gzip'):
+        return response
+    body = response.get_data()
+    if len(body) < config.get('COMPRESS_MIN_SIZE', 1024):
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=config.get('COMPRESS_LEVEL', 6)))
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
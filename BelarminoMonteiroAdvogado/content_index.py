@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Índice em Memória do Conteúdo Editável (`ConteudoGeral`)
+==============================================================================
+
+`render_page` precisava, a cada chamada, de uma consulta `IN` em
+`ConteudoGeral`. Este módulo mantém em memória o índice
+`pagina -> {secao: conteudo}` com TODAS as linhas da tabela, de modo que montar
+o contexto de uma página vira a mescla de poucos dicionários, sem tocar no banco.
+
+Atualização Incremental:
+------------------------
+-   Os eventos de mapper `after_insert`, `after_update` e `after_delete` de
+    `ConteudoGeral` registram as alterações na transação (`Session.info`).
+-   No `after_commit` as alterações são aplicadas ao índice; um `rollback` as
+    descarta.
+-   Operações em massa (`query.update()`/`query.delete()`) não disparam
+    eventos de mapper: nesse caso o índice é marcado como desatualizado e
+    reconstruído por completo (uma consulta) na próxima leitura.
+
+Consistência com `site_cache.py`:
+---------------------------------
+O índice guarda a geração de `conteudo_geral` com a qual está sincronizado.
+Qualquer mudança não acompanhada por eventos (SQL bruto seguido de
+`bump_generation('conteudo_geral')`) também provoca a reconstrução. Este
+módulo importa `site_cache`, garantindo que o listener de `after_commit` que
+incrementa as gerações seja registrado (e portanto executado) antes do daqui.
+
+Monitoramento:
+--------------
+`ContentIndex.stats()` informa páginas, entradas, tamanho aproximado em bytes
+e o tempo da última reconstrução; os mesmos dados aparecem em
+`/admin/cache-stats`.
+"""
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, inspect as sqlalchemy_inspect
+from sqlalchemy.orm import Session
+
+from .models import db, ConteudoGeral
+from .site_cache import get_generation
+
+# Chaves usadas em `Session.info` para acumular as alterações da transação.
+_OPS_INFO_KEY = 'bm_conteudo_ops'
+_BULK_INFO_KEY = 'bm_conteudo_bulk'
+
+_TABLE = ConteudoGeral.__tablename__
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+_rebuild_lock = threading.Lock()
+
+
+class ContentIndex:
+    """
+    Índice `pagina -> {secao: conteudo}` de todas as linhas de `ConteudoGeral`.
+
+    Attributes:
+        generation (Tuple[int, ...] | None): Geração de `conteudo_geral` com a
+            qual o índice está sincronizado (None = nunca construído).
+        build_seconds (float): Duração da última reconstrução completa.
+        built_at (datetime | None): Momento (UTC) da última reconstrução.
+        rebuilds (int): Número de reconstruções completas.
+        incremental_updates (int): Número de alterações aplicadas sem reconstruir.
+    """
+
+    def __init__(self):
+        self._pages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.generation: Optional[Tuple[int, ...]] = None
+        self.build_seconds = 0.0
+        self.built_at: Optional[datetime] = None
+        self.rebuilds = 0
+        self.incremental_updates = 0
+
+    def rebuild(self) -> None:
+        """Recarrega o índice inteiro com uma única consulta."""
+        generation = get_generation(_TABLE)
+        started = time.perf_counter()
+        rows = db.session.query(ConteudoGeral.pagina, ConteudoGeral.secao, ConteudoGeral.conteudo).all()
+        pages: Dict[str, Dict[str, Any]] = {}
+        for pagina, secao, conteudo in rows:
+            pages.setdefault(pagina, {})[secao] = conteudo
+        with self._lock:
+            self._pages = pages
+            # Geração lida ANTES da consulta: um commit concorrente força nova reconstrução.
+            self.generation = generation
+            self.build_seconds = time.perf_counter() - started
+            self.built_at = datetime.now(timezone.utc)
+            self.rebuilds += 1
+
+    def page(self, pagina: str) -> Mapping[str, Any]:
+        """
+        Retorna as seções de uma página (somente leitura).
+
+        Args:
+            pagina (str): O identificador da página (`ConteudoGeral.pagina`).
+
+        Returns:
+            Mapping[str, Any]: `{secao: conteudo}`; vazio se a página não existe.
+        """
+        with self._lock:
+            sections = self._pages.get(pagina)
+        return MappingProxyType(sections) if sections is not None else _EMPTY
+
+    def apply(self, ops: List[Tuple[str, ...]], generation: Tuple[int, ...]) -> None:
+        """
+        Aplica alterações já confirmadas no banco.
+
+        Args:
+            ops (List[Tuple[str, ...]]): `('set', pagina, secao, conteudo)` ou
+                `('del', pagina, secao)`, na ordem em que foram gravadas.
+            generation (Tuple[int, ...]): Geração resultante do commit.
+        """
+        with self._lock:
+            for op in ops:
+                if op[0] == 'set':
+                    _, pagina, secao, conteudo = op
+                    # Cópia na escrita: leitores que já pegaram `page()` não veem a mudança pela metade.
+                    sections = dict(self._pages.get(pagina, {}))
+                    sections[secao] = conteudo
+                    self._pages[pagina] = sections
+                else:
+                    _, pagina, secao = op
+                    sections = dict(self._pages.get(pagina, {}))
+                    sections.pop(secao, None)
+                    if sections:
+                        self._pages[pagina] = sections
+                    else:
+                        self._pages.pop(pagina, None)
+            self.generation = generation
+            self.incremental_updates += len(ops)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna o tamanho do índice e os tempos de reconstrução.
+
+        Returns:
+            Dict[str, Any]: páginas, entradas, bytes aproximados (strings
+            Python), tempo da última reconstrução e contadores.
+        """
+        with self._lock:
+            entries = sum(len(sections) for sections in self._pages.values())
+            approx_bytes = sum(
+                sys.getsizeof(pagina) + sum(sys.getsizeof(secao) + sys.getsizeof(conteudo)
+                                            for secao, conteudo in sections.items())
+                for pagina, sections in self._pages.items()
+            )
+            return {
+                'pages': len(self._pages),
+                'entries': entries,
+                'approx_bytes': approx_bytes,
+                'build_ms': round(self.build_seconds * 1000, 2),
+                'built_at': self.built_at.isoformat() if self.built_at else None,
+                'rebuilds': self.rebuilds,
+                'incremental_updates': self.incremental_updates,
+            }
+
+
+def get_content_index(app: Flask = None) -> ContentIndex:
+    """
+    Retorna o índice da aplicação, já sincronizado com o banco.
+
+    Args:
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+
+    Returns:
+        ContentIndex: O índice (na chamada "quente", sem nenhuma consulta ao DB).
+    """
+    app = app or current_app._get_current_object()
+    index = app.extensions.get('content_index')
+    if index is None:
+        index = app.extensions.setdefault('content_index', ContentIndex())
+    if index.generation != get_generation(_TABLE):
+        with _rebuild_lock:
+            if index.generation == get_generation(_TABLE):
+                return index
+            index.rebuild()
+            app.logger.info(
+                f"[CONTENT_INDEX] Índice reconstruído: {index.stats()['entries']} entradas "
+                f"em {index.build_seconds * 1000:.1f} ms."
+            )
+    return index
+
+
+def merge_pages(*paginas: str) -> Dict[str, Any]:
+    """
+    Mescla as seções das páginas informadas; em chaves repetidas, vence a última.
+
+    Args:
+        *paginas (str): Identificadores de página, da menor para a maior prioridade.
+
+    Returns:
+        Dict[str, Any]: Um novo dicionário (o chamador pode alterá-lo livremente).
+    """
+    index = get_content_index()
+    context: Dict[str, Any] = {}
+    for pagina in paginas:
+        if pagina:
+            context.update(index.page(pagina))
+    return context
+
+
+# --- LISTENERS: ALTERAÇÕES INCREMENTAIS ---
+
+def _record(target: ConteudoGeral, op: Tuple[str, ...]) -> None:
+    """Acumula uma alteração na sessão à qual o objeto pertence."""
+    session = Session.object_session(target)
+    if session is None:
+        return
+    session.info.setdefault(_OPS_INFO_KEY, []).append(op)
+
+
+@event.listens_for(ConteudoGeral, 'after_insert')
+def _conteudo_inserted(mapper, connection, target):
+    _record(target, ('set', target.pagina, target.secao, target.conteudo))
+
+
+@event.listens_for(ConteudoGeral.pagina, 'set', active_history=True)
+@event.listens_for(ConteudoGeral.secao, 'set', active_history=True)
+def _keep_old_key(target, value, oldvalue, initiator):
+    """
+    Sem `active_history`, o valor antigo de um atributo expirado (após um
+    commit) não é carregado e o histórico não informa a chave anterior.
+    """
+    return value
+
+
+@event.listens_for(ConteudoGeral, 'after_update')
+def _conteudo_updated(mapper, connection, target):
+    state = sqlalchemy_inspect(target)
+    # Se a chave (pagina, secao) mudou, a entrada antiga precisa sair do índice.
+    old_pagina = state.attrs.pagina.history.deleted
+    old_secao = state.attrs.secao.history.deleted
+    if old_pagina or old_secao:
+        _record(target, ('del', old_pagina[0] if old_pagina else target.pagina,
+                         old_secao[0] if old_secao else target.secao))
+    _record(target, ('set', target.pagina, target.secao, target.conteudo))
+
+
+@event.listens_for(ConteudoGeral, 'after_delete')
+def _conteudo_deleted(mapper, connection, target):
+    _record(target, ('del', target.pagina, target.secao))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_conteudo(orm_execute_state):
+    """Operações em massa não informam as linhas afetadas: exige reconstrução."""
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table is not None and mapper.local_table.name == _TABLE:
+        orm_execute_state.session.info[_BULK_INFO_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed_conteudo(session):
+    """
+    Aplica ao índice da aplicação atual as alterações confirmadas.
+
+    Só é seguro aplicar se o índice estava sincronizado com a geração anterior
+    a este commit (isto é, a atual menos um) e não houve operação em massa.
+    Caso contrário, nada é feito e a próxima leitura reconstrói o índice.
+    """
+    ops = session.info.pop(_OPS_INFO_KEY, None)
+    bulk = session.info.pop(_BULK_INFO_KEY, False)
+    if not ops or bulk or not has_app_context():
+        return
+    index = current_app.extensions.get('content_index')
+    if index is None or index.generation is None:
+        return
+    generation = get_generation(_TABLE)
+    if index.generation == (generation[0] - 1,):
+        index.apply(ops, generation)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_conteudo(session):
+    """Descarta as alterações registradas: nada chegou ao banco."""
+    session.info.pop(_OPS_INFO_KEY, None)
+    session.info.pop(_BULK_INFO_KEY, None)
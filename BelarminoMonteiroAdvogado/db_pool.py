@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+`DATABASE_URL` e Pool de Conexões Instrumentado
+==============================================================================
+
+O `app.yaml` injeta `DATABASE_URL`, mas o `create_app` sempre escolhia um
+arquivo SQLite, e o pool de conexões usava os padrões do SQLAlchemy (sem
+`pool_recycle` nem `pool_pre_ping`). Este módulo:
+
+1.  **URL:** `database_url_from_env()` lê `DATABASE_URL` (`postgres://` vira
+    `postgresql://`). Valores sem esquema, como o placeholder
+    `'BMA_DATABASE_URL'`, são ignorados e o SQLite continua valendo.
+2.  **Pool:** `build_engine_options(app)` monta `SQLALCHEMY_ENGINE_OPTIONS` a
+    partir de `DB_POOL_SIZE`, `DB_MAX_OVERFLOW`, `DB_POOL_TIMEOUT`,
+    `DB_POOL_RECYCLE` e `DB_POOL_PRE_PING` (configuração ou variáveis de
+    ambiente). Bancos SQLite em memória mantêm o pool do Flask-SQLAlchemy.
+3.  **Métricas:** eventos de pool (`connect`, `close`, `checkout`, `checkin`,
+    `invalidate`) contam conexões abertas e em uso. Os eventos não têm gancho
+    antes do checkout, então a espera é medida em `InstrumentedQueuePool._do_get`
+    (inclui abrir a conexão quando o pool ainda não está cheio). Esperas acima
+    de `DB_POOL_SLOW_CHECKOUT_MS` geram um aviso no log. Os números aparecem em
+    `/admin/cache-stats` (`db_pool`).
+4.  **Fork:** com `gunicorn --preload`, o engine criado no processo mestre
+    seria herdado pelos workers. Um único gancho `os.register_at_fork`, do
+    módulo, chama `engine.dispose(close=False)` no filho para cada engine
+    registrado (um `WeakSet`, que não prende engines de apps descartadas):
+    ele abre conexões próprias sem fechar as do pai.
+"""
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, Optional
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+from .models import db
+
+# Padrões (sobrescritos pela configuração ou por variáveis de ambiente de mesmo nome).
+POOL_DEFAULTS: Dict[str, Any] = {
+    'DB_POOL_SIZE': 5,
+    'DB_MAX_OVERFLOW': 10,
+    'DB_POOL_TIMEOUT': 10,
+    'DB_POOL_RECYCLE': 1800,
+    'DB_POOL_PRE_PING': None,  # None: ligado só para bancos de rede
+    'DB_POOL_SLOW_CHECKOUT_MS': 100,
+}
+_WAIT_SAMPLES = 512
+
+# Engines descartados no filho após `fork` (ver `_dispose_engines_in_child`).
+_FORK_ENGINES: 'weakref.WeakSet[Engine]' = weakref.WeakSet()
+
+
+def database_url_from_env(environ: Dict[str, str] = None) -> Optional[str]:
+    """
+    Lê `DATABASE_URL`, normalizando o esquema `postgres://` do Heroku/Cloud.
+
+    Args:
+        environ (dict, optional): Variáveis de ambiente. Padrão: `os.environ`.
+
+    Returns:
+        str | None: A URL, ou None se ausente ou sem esquema (placeholder).
+    """
+    url = (environ if environ is not None else os.environ).get('DATABASE_URL', '').strip()
+    if '://' not in url:
+        return None
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def _setting(app: Flask, name: str):
+    """Valor de configuração; se ausente, variável de ambiente; se ausente, padrão."""
+    if name in app.config:
+        return app.config[name]
+    raw = os.environ.get(name)
+    default = POOL_DEFAULTS[name]
+    if raw is None:
+        return default
+    if name == 'DB_POOL_PRE_PING':
+        return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+    return int(raw)
+
+
+def _is_memory_sqlite(uri: str) -> bool:
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and (url.database in (None, '', ':memory:')
+                                                  or url.query.get('mode') == 'memory')
+
+
+def is_shared_database(uri: Optional[str]) -> bool:
+    """
+    Indica se o banco é de rede (compartilhado entre instâncias e workers).
+
+    Os contadores de geração de `site_cache.py` são locais ao processo: com um
+    banco compartilhado, commits feitos em outra instância não os avançam.
+
+    Args:
+        uri (str | None): A `SQLALCHEMY_DATABASE_URI`.
+
+    Returns:
+        bool: True para qualquer backend que não seja SQLite.
+    """
+    return bool(uri) and make_url(uri).get_backend_name() != 'sqlite'
+
+
+def build_engine_options(app: Flask) -> Dict[str, Any]:
+    """
+    Monta as opções do engine a partir da configuração de pool.
+
+    Opções já presentes em `SQLALCHEMY_ENGINE_OPTIONS` têm prioridade.
+
+    Args:
+        app (Flask): A aplicação (com `SQLALCHEMY_DATABASE_URI` definido).
+
+    Returns:
+        Dict[str, Any]: As opções a passar ao `create_engine`.
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if not uri or _is_memory_sqlite(uri):
+        return options
+    pre_ping = _setting(app, 'DB_POOL_PRE_PING')
+    if pre_ping is None:
+        # Arquivo local não "cai"; conexões de rede podem ser fechadas pelo servidor.
+        pre_ping = is_shared_database(uri)
+    options.setdefault('poolclass', InstrumentedQueuePool)
+    options.setdefault('pool_size', _setting(app, 'DB_POOL_SIZE'))
+    options.setdefault('max_overflow', _setting(app, 'DB_MAX_OVERFLOW'))
+    options.setdefault('pool_timeout', _setting(app, 'DB_POOL_TIMEOUT'))
+    options.setdefault('pool_recycle', _setting(app, 'DB_POOL_RECYCLE'))
+    options.setdefault('pool_pre_ping', pre_ping)
+    return options
+
+
+class PoolMetrics:
+    """
+    Contadores do pool de um engine (thread-safe).
+
+    Attributes:
+        slow_checkout_ms (float): Limite para o aviso de espera lenta.
+    """
+
+    def __init__(self, slow_checkout_ms: float = 100):
+        self.slow_checkout_ms = slow_checkout_ms
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.invalidations = 0
+        self.checkouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.slow_checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._waits = deque(maxlen=_WAIT_SAMPLES)
+
+    def record_wait(self, seconds: float) -> None:
+        """Registra o tempo gasto para obter uma conexão do pool."""
+        with self._lock:
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, seconds)
+            self._waits.append(seconds)
+        if seconds * 1000 >= self.slow_checkout_ms:
+            with self._lock:
+                self.slow_checkouts += 1
+            if has_app_context():
+                current_app.logger.warning(f"[DB POOL] Checkout lento: {seconds * 1000:.1f} ms.")
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_opened += 1
+
+    def _on_close(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_closed += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def listen(self, engine: Engine) -> None:
+        """Registra os eventos de pool no engine (preservados em `dispose()`)."""
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'close', self._on_close)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+
+    def stats(self, engine: Engine = None) -> Dict[str, Any]:
+        """
+        Resumo para `/admin/cache-stats`.
+
+        Args:
+            engine (Engine, optional): Inclui o `status()` atual do pool.
+
+        Returns:
+            Dict[str, Any]: Contadores e espera de checkout (média, p95, máx, em ms).
+        """
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                'connections_opened': self.connections_opened,
+                'connections_closed': self.connections_closed,
+                'open_connections': self.connections_opened - self.connections_closed,
+                'invalidations': self.invalidations,
+                'checkouts': self.checkouts,
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'slow_checkouts': self.slow_checkouts,
+                'wait_ms': {
+                    'avg': round(self._wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    'p95': round(waits[int(len(waits) * 0.95)] * 1000, 3) if waits else 0.0,
+                    'max': round(self._wait_max * 1000, 3),
+                },
+            }
+        if engine is not None:
+            stats['pool'] = engine.pool.status()
+        return stats
+
+
+class InstrumentedQueuePool(QueuePool):
+    """`QueuePool` que mede o tempo de cada checkout em `PoolMetrics`."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def recreate(self) -> 'InstrumentedQueuePool':
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start)
+
+
+def get_pool_metrics(app: Flask = None) -> Optional[PoolMetrics]:
+    """Retorna as métricas do pool da aplicação (ou de `current_app`), se houver."""
+    app = app or (current_app if has_app_context() else None)
+    return app.extensions.get('db_pool') if app is not None else None
+
+
+def init_db_pool(app: Flask) -> None:
+    """
+    Liga as métricas ao engine e registra o descarte do pool após `fork`.
+
+    Deve ser chamado após `db.init_app(app)`; as opções do pool já devem
+    estar em `SQLALCHEMY_ENGINE_OPTIONS` (ver `build_engine_options`).
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    metrics = PoolMetrics(slow_checkout_ms=_setting(app, 'DB_POOL_SLOW_CHECKOUT_MS'))
+    with app.app_context():
+        engine = db.engine
+        metrics.listen(engine)
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.metrics = metrics
+            app.logger.debug(f"[DB POOL] {engine.url.get_backend_name()}: {engine.pool.status()}")
+    app.extensions['db_pool'] = metrics
+    _FORK_ENGINES.add(engine)
+
+
+def _dispose_engines_in_child() -> None:
+    """Descarta, no processo filho, os pools herdados de todos os engines registrados."""
+    for engine in list(_FORK_ENGINES):
+        # `close=False`: as conexões herdadas continuam sendo do processo pai.
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_engines_in_child)
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Fila de Otimização de Imagens em Segundo Plano
+==============================================================================
+
+A conversão para WebP (`method=6`, qualidade 95), o backup em `originals/` e
+as derivadas responsivas levam segundos para uma foto grande. Feitas dentro
+da requisição, bloqueavam o único worker da instância F1 do App Engine.
+
+Fluxo:
+------
+1.  **Upload:** `save_logo` grava o arquivo enviado como está em
+    `UPLOAD_FOLDER`, nomeado pelo hash do conteúdo (`media_store.py`), e cria
+    um `ImageJob` 'pending' na sessão da requisição.
+    O caminho do arquivo original (o "placeholder") é devolvido na hora e
+    salvo no registro (`MembroEquipe.foto`, `ConteudoGeral.conteudo`, ...),
+    então a imagem já aparece no site, ainda sem otimização.
+2.  **Commit:** a tarefa só é enviada ao executor depois do commit da
+    requisição (listeners `after_flush`/`after_commit`, no mesmo padrão de
+    `site_cache.py`). Assim o worker sempre encontra o registro gravado, e
+    um `rollback` descarta a tarefa.
+3.  **Worker:** um `ThreadPoolExecutor` local (`IMAGE_JOB_WORKERS`, padrão 1)
+    executa `ImageProcessor.optimize_image` em um contexto de aplicação
+    próprio. O Pillow libera o GIL durante a decodificação, o redimensionamento
+    e a codificação, então a thread não trava as requisições.
+4.  **Troca:** ao terminar, todos os campos de `IMAGE_PATH_FIELDS` iguais ao
+    placeholder passam a apontar para o WebP, via `UPDATE` em massa. O
+    commit incrementa as gerações de `site_cache`, o que invalida o cache
+    de páginas.
+
+Com `IMAGE_JOBS_ASYNC = False` (padrão nos testes), as tarefas rodam logo
+após o commit, na própria thread. Tarefas interrompidas por um reinício da
+instância podem ser retomadas com `flask image-jobs`.
+"""
+import copy
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .media_store import IMAGE_PATH_FIELDS, store_upload
+from .models import db, ImageJob
+
+# Chave usada em `Session.info` para acumular as tarefas criadas na transação.
+_SESSION_INFO_KEY = 'bm_image_jobs'
+
+
+class _InlineExecutor:
+    """Executor síncrono com a mesma interface de `ThreadPoolExecutor.submit`."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        pass
+
+
+class ImageJobQueue:
+    """
+    Executor das tarefas de otimização de uma aplicação.
+
+    Attributes:
+        app (Flask): A aplicação (cada tarefa roda em um contexto próprio dela).
+        executor: `ThreadPoolExecutor` ou `_InlineExecutor`.
+    """
+
+    def __init__(self, app: Flask, asynchronous: bool = True, workers: int = 1):
+        """
+        Args:
+            app (Flask): A aplicação.
+            asynchronous (bool): Se False, executa as tarefas na thread que as enviou.
+            workers (int): Número de threads do executor. Padrão: 1.
+        """
+        self.app = app
+        self.asynchronous = asynchronous
+        self.executor = (ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-job')
+                         if asynchronous else _InlineExecutor())
+        self._futures: List[Future] = []
+
+    def submit(self, job_id: int) -> Future:
+        """Agenda a execução da tarefa `job_id`."""
+        future = self.executor.submit(run_image_job, self.app, job_id)
+        self._futures = [f for f in self._futures if not f.done()] + [future]
+        return future
+
+    def wait(self, timeout: float = None) -> None:
+        """Aguarda as tarefas em andamento (usado em testes e no encerramento)."""
+        for future in list(self._futures):
+            future.exception(timeout=timeout)
+        self._futures = [f for f in self._futures if not f.done()]
+
+
+def get_image_job_queue(app: Flask = None) -> Optional[ImageJobQueue]:
+    """Retorna a fila da aplicação (ou de `current_app`), se inicializada."""
+    app = app or (current_app if has_app_context() else None)
+    return app.extensions.get('image_jobs') if app is not None else None
+
+
+def init_image_jobs(app: Flask) -> None:
+    """
+    Cria a tabela `image_jobs` (se faltar) e registra a fila em `app.extensions`.
+
+    Bancos criados antes deste módulo não passam pelo `db.create_all()` do
+    `create_app` (ele só roda quando a tabela `user` falta).
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    app.config.setdefault('IMAGE_JOBS_ASYNC', not app.testing)
+    app.config.setdefault('IMAGE_JOB_WORKERS', 1)
+    with app.app_context():
+        try:
+            ImageJob.__table__.create(db.engine, checkfirst=True)
+        except Exception as e:
+            app.logger.warning(f"[IMAGE JOBS] Tabela 'image_jobs' não criada: {e}")
+    app.extensions['image_jobs'] = ImageJobQueue(
+        app, asynchronous=app.config['IMAGE_JOBS_ASYNC'], workers=app.config['IMAGE_JOB_WORKERS'])
+
+
+def upload_folder(app: Flask = None) -> Path:
+    """
+    Diretório absoluto de `UPLOAD_FOLDER` (caminhos relativos partem do pacote).
+
+    Args:
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+
+    Returns:
+        Path: O diretório (criado se necessário).
+    """
+    app = app or current_app
+    folder = Path(app.config.get('UPLOAD_FOLDER') or Path(app.static_folder) / 'images' / 'uploads')
+    if not folder.is_absolute():
+        folder = Path(app.root_path) / folder
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def static_relpath(path: Path, app: Flask = None) -> str:
+    """Caminho relativo a 'static/' no formato usado no banco (com '/')."""
+    app = app or current_app
+    return Path(path).resolve().relative_to(Path(app.static_folder).resolve()).as_posix()
+
+
+def enqueue_upload(file, filename: str) -> str:
+    """
+    Grava o upload sem processamento e cria a tarefa que vai otimizá-lo.
+
+    O arquivo é armazenado pelo hash do conteúdo (ver `media_store.py`). Se o
+    mesmo conteúdo já foi otimizado antes, o WebP existente é devolvido e
+    nenhuma tarefa é criada. Caso contrário, a tarefa entra na sessão atual e
+    só é executada após o commit dela.
+
+    Args:
+        file (werkzeug.datastructures.FileStorage): O arquivo enviado.
+        filename (str): Nome de referência do upload (usado apenas no log).
+
+    Returns:
+        str: O caminho relativo a 'static/' do WebP já existente ou do arquivo
+        gravado (placeholder).
+    """
+    target, existed = store_upload(file, upload_folder())
+    optimized = target.with_suffix('.webp')
+    if existed and optimized.exists():
+        relpath = static_relpath(optimized)
+        current_app.logger.info(f"[IMAGE JOBS] Upload '{filename}' já armazenado como '{relpath}'.")
+        return relpath
+
+    relpath = static_relpath(target)
+    job = ImageJob(source_path=relpath, original_size=target.stat().st_size)
+    db.session.add(job)
+    current_app.logger.info(f"[IMAGE JOBS] Upload '{filename}' aceito como '{relpath}'; otimização agendada.")
+    return relpath
+
+
+def run_image_job(app: Flask, job_id: int) -> Optional[str]:
+    """
+    Otimiza a imagem da tarefa e troca o placeholder pelo WebP nos registros.
+
+    Roda em um contexto de aplicação próprio (e, portanto, em uma sessão
+    própria). Tarefas já concluídas ou em execução são ignoradas.
+
+    Args:
+        app (Flask): A aplicação.
+        job_id (int): O `ImageJob.id`.
+
+    Returns:
+        str | None: O `status` final da tarefa, ou None se ela não foi executada.
+    """
+    from .image_processor import image_processor
+
+    with app.app_context():
+        job = db.session.get(ImageJob, job_id)
+        if job is None or job.status not in ('pending', 'failed'):
+            return None
+        job.status = 'running'
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = datetime.utcnow()
+        job.error = None
+        db.session.commit()
+
+        try:
+            source = Path(app.static_folder) / job.source_path
+            # O upload armazenado por conteúdo já é o original: sem cópia em `originals/`.
+            processor = copy.copy(image_processor)
+            processor.create_backup = False
+            success, original_size, optimized_size, output = processor.optimize_image(source)
+            if not success:
+                raise RuntimeError(f"Falha ao otimizar '{job.source_path}'.")
+
+            job.result_path = static_relpath(Path(output), app)
+            job.original_size = original_size
+            job.optimized_size = optimized_size
+            job.updated_rows = 0
+            if job.result_path != job.source_path:
+                for column in IMAGE_PATH_FIELDS:
+                    result = db.session.query(column.class_).filter(column == job.source_path).update(
+                        {column: job.result_path}, synchronize_session=False)
+                    job.updated_rows += result or 0
+            job.status = 'done'
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(ImageJob, job_id)
+            job.status = 'failed'
+            job.error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+            app.logger.error(f"[IMAGE JOBS] Tarefa {job_id} falhou: {e}", exc_info=True)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        app.logger.info(f"[IMAGE JOBS] Tarefa {job_id} ({job.source_path}): {job.status}.")
+        return job.status
+
+
+def resume_image_jobs(app: Flask, include_failed: bool = False) -> List[Tuple[int, Optional[str]]]:
+    """
+    Executa, na thread atual, as tarefas pendentes (ou interrompidas).
+
+    Args:
+        app (Flask): A aplicação.
+        include_failed (bool): Também tenta de novo as tarefas que falharam.
+
+    Returns:
+        List[Tuple[int, str | None]]: `(id, status final)` de cada tarefa.
+    """
+    statuses = ['pending', 'running'] + (['failed'] if include_failed else [])
+    with app.app_context():
+        ids = [job_id for (job_id,) in db.session.query(ImageJob.id)
+               .filter(ImageJob.status.in_(statuses)).order_by(ImageJob.id)]
+        # 'running' aqui só pode ser de um processo que morreu no meio da tarefa.
+        ImageJob.query.filter(ImageJob.id.in_(ids), ImageJob.status == 'running').update(
+            {ImageJob.status: 'pending'}, synchronize_session=False)
+        db.session.commit()
+    return [(job_id, run_image_job(app, job_id)) for job_id in ids]
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_new_jobs(session, flush_context):
+    """Guarda os ids das tarefas inseridas (só existem após o flush)."""
+    new_ids = [obj.id for obj in session.new if isinstance(obj, ImageJob)]
+    if new_ids:
+        session.info.setdefault(_SESSION_INFO_KEY, []).extend(new_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _submit_committed_jobs(session):
+    """Envia ao executor as tarefas gravadas neste commit."""
+    job_ids = session.info.pop(_SESSION_INFO_KEY, None)
+    queue = get_image_job_queue() if job_ids else None
+    if queue is None:
+        return
+    for job_id in job_ids:
+        queue.submit(job_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_new_jobs(session):
+    """Descarta as tarefas da transação desfeita."""
+    session.info.pop(_SESSION_INFO_KEY, None)
@@ -26,7 +26,18 @@ Funcionalidades Principais:
     subdiretório 'originals' antes de qualquer modificação, garantindo que
     nenhum dado seja perdido.
 6.  **Processamento em Lote:** Oferece um método para otimizar todas as
-    imagens de um diretório de uma só vez.
+    imagens de um diretório de uma só vez, em paralelo (um processo por
+    núcleo) e de forma incremental: um manifesto com o hash de cada origem e
+    os parâmetros do codificador evita reprocessar o que não mudou.
+7.  **Derivadas Responsivas:** Gera uma escada de larguras (320 a 2560px) em
+    WebP e, se o Pillow suportar, AVIF, usadas no `srcset` da macro
+    `responsive_img` (ver `responsive_images.py`).
+8.  **Decodificação com Memória Limitada:** O cabeçalho é lido antes de
+    qualquer pixel: imagens acima de `MAX_IMAGE_PIXELS` são recusadas
+    (`ImageRejectedError`). JPEGs grandes são decodificados já reduzidos
+    (modo *draft* do libjpeg, 1/2 a 1/8) e nenhuma imagem decodificada passa
+    de `MAX_DECODE_PIXELS`, o que mantém o pico de memória de um upload
+    limitado mesmo em uma instância F1.
 
 Uso:
 ----
@@ -37,12 +48,125 @@ Autor: Lenilson Pinheiro
 Data: Janeiro 2025
 """
 
-from PIL import Image, ImageOps
+from PIL import Image, ImageOps, UnidentifiedImageError, features
 from pathlib import Path
+import hashlib
+import json
+import logging
 import os
-from datetime import datetime
-from typing import List, Tuple, Optional, Union # Importações adicionadas para corrigir o erro
-from flask import current_app # Importar current_app para logging no contexto da aplicação
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import re
+from typing import Callable, Dict, List, Tuple, Optional, Union # Importações adicionadas para corrigir o erro
+from flask import current_app, has_app_context # Importar current_app para logging no contexto da aplicação
+
+# Larguras da escada responsiva. Nenhuma derivada é maior que a imagem de origem.
+RESPONSIVE_WIDTHS: Tuple[int, ...] = (320, 640, 960, 1280, 1920, 2560)
+
+# AVIF é nativo a partir do Pillow 11.2 (quando compilado com libavif).
+AVIF_AVAILABLE = features.check('avif')
+
+# Formatos das derivadas, do mais eficiente para o mais compatível: (formato, MIME).
+DERIVATIVE_FORMATS: Tuple[Tuple[str, str], ...] = (('avif', 'image/avif'), ('webp', 'image/webp'))
+
+# Manifesto do `batch_optimize` (hash da origem e parâmetros do codificador por arquivo).
+OPTIMIZE_MANIFEST_FILENAME = '.optimize-manifest.json'
+
+# Dimensões máximas declaradas no cabeçalho (50 MP de uma câmera de celular cabem com folga).
+# Abaixo do limite de alerta do próprio Pillow (`Image.MAX_IMAGE_PIXELS`, ~89 MP).
+MAX_IMAGE_PIXELS = 80_000_000
+
+# Pixels efetivamente decodificados, após a redução do JPEG: 24 MP em RGBA ocupam ~96 MB.
+MAX_DECODE_PIXELS = 24_000_000
+
+_DERIVATIVE_NAME_RE = re.compile(r'-\d+w\.(?:webp|avif)$', re.IGNORECASE)
+
+
+def _logger() -> logging.Logger:
+    """Logger da aplicação; fora de um contexto Flask (processos do `batch_optimize`), o do módulo."""
+    return current_app.logger if has_app_context() else logging.getLogger(__name__)
+
+
+def derivative_path(source_path: Union[Path, str], width: int, fmt: str) -> Path:
+    """
+    Caminho de uma derivada: `fotos/equipe.png` -> `fotos/equipe-640w.webp`.
+
+    Args:
+        source_path (str | Path): A imagem de origem.
+        width (int): A largura da derivada.
+        fmt (str): 'webp' ou 'avif'.
+
+    Returns:
+        Path: O caminho, no mesmo diretório da origem.
+    """
+    source_path = Path(source_path)
+    return source_path.with_name(f"{source_path.stem}-{width}w.{fmt}")
+
+
+def is_derivative(path: Union[Path, str]) -> bool:
+    """Verifica se o arquivo é uma derivada gerada (`nome-<largura>w.webp|avif`)."""
+    return bool(_DERIVATIVE_NAME_RE.search(str(path)))
+
+
+class ImageRejectedError(ValueError):
+    """Imagem recusada antes da decodificação: formato não reconhecido ou grande demais."""
+
+
+def inspect_upload(file, max_pixels: int = None, max_decode_pixels: int = None,
+                   bound: int = None) -> Tuple[str, Tuple[int, int]]:
+    """
+    Valida um upload lendo apenas o cabeçalho da imagem, sem decodificar pixels.
+
+    Aplica os mesmos limites do `ImageProcessor.open_image`, que a tarefa em
+    segundo plano usa depois: além de `max_pixels` no cabeçalho, o tamanho a
+    decodificar (já reduzido pelo draft, no caso do JPEG; o original nos demais
+    formatos) não pode passar de `max_decode_pixels`. O stream volta à posição
+    original, pronto para ser gravado.
+
+    Args:
+        file (werkzeug.datastructures.FileStorage): O arquivo enviado.
+        max_pixels (int, optional): Limite de largura x altura. Padrão:
+            `UPLOAD_MAX_IMAGE_PIXELS` da aplicação ou `MAX_IMAGE_PIXELS`.
+        max_decode_pixels (int, optional): Limite de pixels decodificados.
+            Padrão: o do `image_processor` global.
+        bound (int, optional): Maior lado usado na decodificação. Padrão: o
+            maior entre `max_width` e as larguras responsivas do `image_processor`.
+
+    Returns:
+        Tuple[str, Tuple[int, int]]: O formato (ex: 'JPEG') e as dimensões.
+
+    Raises:
+        ImageRejectedError: Se o arquivo não é uma imagem ou excede algum dos limites.
+    """
+    if max_pixels is None:
+        max_pixels = current_app.config.get('UPLOAD_MAX_IMAGE_PIXELS', MAX_IMAGE_PIXELS) \
+            if has_app_context() else MAX_IMAGE_PIXELS
+    if max_decode_pixels is None:
+        max_decode_pixels = image_processor.max_decode_pixels
+    if bound is None:
+        bound = max((image_processor.max_width,) + image_processor.responsive_widths)
+    stream = file.stream
+    position = stream.tell()
+    try:
+        # `Image.open` é preguiçoso: lê só o cabeçalho, e não fecha um stream recebido.
+        with Image.open(stream) as img:
+            fmt, size = img.format, img.size
+            # `draft` só configura o decodificador (nenhum pixel é lido) e atualiza `img.size`.
+            img.draft(None, (bound, bound))
+            decoded = img.size
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        raise ImageRejectedError(f"Arquivo '{file.filename}' não é uma imagem válida.") from e
+    finally:
+        stream.seek(position)
+    if size[0] * size[1] > max_pixels:
+        raise ImageRejectedError(
+            f"Imagem de {size[0]}x{size[1]} pixels excede o limite de {max_pixels / 1e6:.0f} megapixels.")
+    if decoded[0] * decoded[1] > max_decode_pixels:
+        raise ImageRejectedError(
+            f"Imagem de {size[0]}x{size[1]} pixels ({fmt}) excede o limite de decodificação de "
+            f"{max_decode_pixels / 1e6:.0f} megapixels.")
+    return fmt, size
+
 
 class ImageProcessor:
     """
@@ -54,7 +178,10 @@ class ImageProcessor:
     configuráveis na instanciação.
     """
     
-    def __init__(self, quality: int = 95, max_width: int = 2560, create_backup: bool = True):
+    def __init__(self, quality: int = 95, max_width: int = 2560, create_backup: bool = True,
+                 responsive_widths: Tuple[int, ...] = RESPONSIVE_WIDTHS, derivative_quality: int = 80,
+                 avif_quality: int = 60, max_pixels: int = MAX_IMAGE_PIXELS,
+                 max_decode_pixels: int = MAX_DECODE_PIXELS):
         """
         Inicializa o processador de imagens com as configurações desejadas.
         
@@ -68,10 +195,59 @@ class ImageProcessor:
             create_backup (bool): Se `True`, um backup da imagem original será criado
                                   em um subdiretório 'originals' antes da otimização.
                                   Padrão: True.
+            responsive_widths (tuple): Larguras das derivadas para `srcset`. Uma tupla
+                                       vazia desativa as derivadas. Padrão: RESPONSIVE_WIDTHS.
+            derivative_quality (int): Qualidade WebP das derivadas. Padrão: 80.
+            avif_quality (int): Qualidade AVIF das derivadas. Padrão: 60.
+            max_pixels (int): Limite de pixels declarados no cabeçalho. Padrão: MAX_IMAGE_PIXELS.
+            max_decode_pixels (int): Limite de pixels decodificados. Padrão: MAX_DECODE_PIXELS.
         """
         self.quality = quality
         self.max_width = max_width
         self.create_backup = create_backup
+        self.responsive_widths = tuple(sorted(responsive_widths))
+        self.derivative_quality = derivative_quality
+        self.avif_quality = avif_quality
+        self.max_pixels = max_pixels
+        self.max_decode_pixels = max_decode_pixels
+
+    def open_image(self, source: Union[Path, str], bound: int = None) -> Image.Image:
+        """
+        Abre e decodifica uma imagem com o uso de memória limitado.
+
+        O cabeçalho é conferido antes da decodificação. JPEGs são decodificados
+        na menor escala (1/2, 1/4 ou 1/8) que ainda cobre `bound` pixels nos
+        dois lados, com custo proporcional ao tamanho reduzido.
+
+        Args:
+            source (str | Path): O arquivo.
+            bound (int, optional): Maior lado necessário depois do processamento.
+                                   Padrão: `self.max_width`.
+
+        Returns:
+            Image.Image: A imagem decodificada, com a orientação EXIF aplicada.
+
+        Raises:
+            ImageRejectedError: Se a imagem excede `max_pixels` ou, já reduzida, `max_decode_pixels`.
+        """
+        bound = bound or self.max_width
+        img = Image.open(source)
+        try:
+            if img.width * img.height > self.max_pixels:
+                raise ImageRejectedError(f"Imagem de {img.width}x{img.height} pixels excede o limite de "
+                                         f"{self.max_pixels / 1e6:.0f} megapixels.")
+            # Só tem efeito em JPEG (e nos poucos formatos com redução na decodificação).
+            img.draft(None, (bound, bound))
+            if img.width * img.height > self.max_decode_pixels:
+                raise ImageRejectedError(f"Imagem de {img.width}x{img.height} pixels ({img.format}) excede o "
+                                         f"limite de decodificação de {self.max_decode_pixels / 1e6:.0f} megapixels.")
+            img.load()
+            # Sem cópia: a versão rotacionada substitui a original no mesmo objeto.
+            ImageOps.exif_transpose(img, in_place=True)
+            return img
+        except BaseException:
+            img.close()
+            raise
         
     def optimize_image(self, input_path: Union[Path, str], output_path: Union[Path, str] = None) -> Tuple[bool, int, int, Optional[str]]:
         """
@@ -110,23 +286,21 @@ class ImageProcessor:
                 if not backup_path.exists():
                     import shutil
                     shutil.copy2(input_path, backup_path)
-                    current_app.logger.debug(f"Backup de '{input_path.name}' criado em '{backup_path}'.")
+                    _logger().debug(f"Backup de '{input_path.name}' criado em '{backup_path}'.")
             
-            # Abre a imagem usando Pillow
-            img = Image.open(input_path)
+            # Abre a imagem com memória limitada (JPEG já reduzido) e a orientação EXIF corrigida.
+            img = self.open_image(input_path)
             original_size = input_path.stat().st_size
             
-            # Corrige a orientação da imagem usando dados EXIF (se presentes).
-            img = ImageOps.exif_transpose(img)
+            # Redimensiona antes da conversão de modo: a composição sobre o fundo branco
+            # é feita no tamanho final, não no tamanho do original.
+            img, resized = self._smart_resize(img)
+            if resized:
+                _logger().debug(f"Imagem '{input_path.name}' redimensionada para largura máxima de {self.max_width}px.")
             
             # Converte a imagem para o modo RGB para garantir compatibilidade com WebP e evitar problemas de transparência.
             img = self._convert_to_rgb(img)
             
-            # Redimensiona a imagem de forma inteligente se ela exceder a largura máxima configurada.
-            img, resized = self._smart_resize(img)
-            if resized:
-                current_app.logger.debug(f"Imagem '{input_path.name}' redimensionada para largura máxima de {self.max_width}px.")
-            
             # Salva a imagem como WebP com a qualidade especificada.
             img.save(
                 output_path,
@@ -138,11 +312,21 @@ class ImageProcessor:
             
             new_size = output_path.stat().st_size
             
-            current_app.logger.info(f"Imagem '{input_path.name}' otimizada para '{output_path.name}'. Original: {original_size} bytes, Otimizado: {new_size} bytes.")
+            _logger().info(f"Imagem '{input_path.name}' otimizada para '{output_path.name}'. Original: {original_size} bytes, Otimizado: {new_size} bytes.")
+
+            # Gera as larguras menores para `srcset` a partir da imagem já decodificada.
+            if self.responsive_widths:
+                from .responsive_images import register_responsive_image
+                entry = self.generate_derivatives(output_path, img)
+                if entry:
+                    register_responsive_image(output_path, entry)
             return True, original_size, new_size, str(output_path)
             
+        except ImageRejectedError as e:
+            _logger().warning(f"Imagem '{input_path}' recusada: {e}")
+            return False, 0, 0, None
         except Exception as e:
-            current_app.logger.error(f"Erro ao otimizar imagem '{input_path}': {str(e)}", exc_info=True)
+            _logger().error(f"Erro ao otimizar imagem '{input_path}': {str(e)}", exc_info=True)
             return False, 0, 0, None
     
     def _convert_to_rgb(self, img: Image.Image) -> Image.Image:
@@ -183,6 +367,10 @@ class ImageProcessor:
         if img.width <= self.max_width and img.height <= self.max_width:
             return img, False
         
+        # Imagens com paleta seriam redimensionadas por vizinho mais próximo.
+        if img.mode in ('P', '1'):
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        
         # Calcula as novas dimensões mantendo a proporção original.
         if img.width > img.height:
             new_width = self.max_width
@@ -191,14 +379,81 @@ class ImageProcessor:
             new_height = self.max_width
             new_width = int(img.width * (self.max_width / img.height))
         
-        # Redimensiona usando o filtro LANCZOS para a melhor qualidade visual.
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Redimensiona usando o filtro LANCZOS para a melhor qualidade visual; `reducing_gap`
+        # faz antes uma redução inteira (média de blocos), mais rápida e com menos memória.
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
         return img, True
     
+    def generate_derivatives(self, source_path: Union[Path, str], img: Image.Image = None,
+                             force: bool = False) -> Optional[Dict]:
+        """
+        Gera a escada de larguras de uma imagem em WebP e, se disponível, AVIF.
+
+        As derivadas ficam ao lado da origem (`nome-640w.webp`). Larguras maiores
+        que a imagem não são geradas; a própria largura da imagem entra na escada
+        quando ela é menor que a maior largura configurada. Derivadas mais novas
+        que a origem não são refeitas (exceto com `force`).
+
+        Args:
+            source_path (str | Path): A imagem de origem (o arquivo servido no `src`).
+            img (Image.Image, optional): A imagem já decodificada, para evitar abrir o
+                                         arquivo de novo. Padrão: None.
+            force (bool): Regrava todas as derivadas. Padrão: False.
+
+        Returns:
+            dict | None: `{'width', 'height', 'version' (hash do conteúdo), 'sources':
+            {mime: [[largura, nome_do_arquivo], ...]}}` ou None se a imagem não puder ser lida.
+        """
+        source_path = Path(source_path)
+        try:
+            source_mtime = source_path.stat().st_mtime
+            if img is None:
+                img = self.open_image(source_path, bound=self.responsive_widths[-1])
+        except Exception as e:
+            _logger().warning(f"Derivadas não geradas para '{source_path}': {e}")
+            return None
+
+        # WebP e AVIF suportam transparência: o canal alfa é mantido nas derivadas.
+        if img.mode not in ('RGB', 'RGBA'):
+            has_alpha = img.mode in ('LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+
+        width, height = img.size
+        widths = [w for w in self.responsive_widths if w < width]
+        if width <= self.responsive_widths[-1]:
+            widths.append(width)
+
+        formats = [(fmt, mime) for fmt, mime in DERIVATIVE_FORMATS if fmt != 'avif' or AVIF_AVAILABLE]
+        sources: Dict[str, List[List]] = {mime: [] for _fmt, mime in formats}
+        for target_width in widths:
+            resized = None
+            for fmt, mime in formats:
+                if fmt == 'webp' and target_width == width and source_path.suffix.lower() == '.webp':
+                    # A própria origem já é a derivada de largura total.
+                    sources[mime].append([width, source_path.name])
+                    continue
+                target = derivative_path(source_path, target_width, fmt)
+                if force or not target.exists() or target.stat().st_mtime < source_mtime:
+                    if resized is None:
+                        target_height = max(1, round(height * target_width / width))
+                        resized = img if target_width == width else img.resize(
+                            (target_width, target_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+                    if fmt == 'avif':
+                        resized.save(target, 'avif', quality=self.avif_quality, speed=6)
+                    else:
+                        # method=4: as derivadas são muitas; o ganho do method=6 não compensa o tempo.
+                        resized.save(target, 'webp', quality=self.derivative_quality, method=4)
+                sources[mime].append([target_width, target.name])
+
+        # Versão pelo conteúdo (não pelo mtime, que muda a cada checkout do deploy).
+        version = hashlib.sha256(source_path.read_bytes()).hexdigest()[:8]
+        _logger().debug(f"Derivadas responsivas de '{source_path.name}': {widths} ({', '.join(sources)}).")
+        return {'width': width, 'height': height, 'version': version, 'sources': sources}
+
     def process_upload(self, file, upload_folder: Union[Path, str]) -> Tuple[bool, Optional[str], str]:
         """
         Processa automaticamente um arquivo de imagem enviado via upload (e.g., de um formulário Flask).
-        Salva o arquivo temporariamente, otimiza-o e retorna o caminho para a versão WebP otimizada.
+        Salva o arquivo pelo hash do conteúdo, otimiza-o e retorna o caminho para a versão WebP otimizada.
         
         Args:
             file (werkzeug.datastructures.FileStorage): Objeto de arquivo de upload do Flask.
@@ -211,17 +466,14 @@ class ImageProcessor:
                 - str: Uma mensagem de status ou erro.
         """
         try:
-            upload_folder = Path(upload_folder)
-            upload_folder.mkdir(parents=True, exist_ok=True) # Garante que a pasta de upload exista
-            
-            # Gera um nome de arquivo temporário único para evitar colisões.
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f') # Adicionado microsegundos para maior unicidade
-            original_name = Path(file.filename).stem
-            temp_path = upload_folder / f"{original_name}_{timestamp}{Path(file.filename).suffix}"
-            
-            # Salva o arquivo enviado temporariamente.
-            file.save(str(temp_path))
-            current_app.logger.debug(f"Arquivo temporário salvo em: '{temp_path}'.")
+            from .media_store import store_upload
+
+            # Salva o arquivo enviado com o nome `<sha256>.<ext>`: o mesmo conteúdo nunca é gravado duas vezes.
+            inspect_upload(file)
+            temp_path, existed = store_upload(file, upload_folder)
+            _logger().debug(f"Arquivo enviado salvo em: '{temp_path}'.")
+            if existed and temp_path.with_suffix('.webp').exists():
+                return True, str(temp_path.with_suffix('.webp')), "Imagem já otimizada anteriormente."
             
             # Otimiza a imagem temporária.
             success, orig_size, new_size, webp_path = self.optimize_image(temp_path)
@@ -230,79 +482,234 @@ class ImageProcessor:
                 # Calcula a redução de tamanho e prepara a mensagem de sucesso.
                 reduction = ((orig_size - new_size) / orig_size * 100) if orig_size > 0 else 0
                 message = f"Imagem otimizada com sucesso! Redução: {reduction:.1f}% para WebP."
-                current_app.logger.info(message)
+                _logger().info(message)
                 return True, webp_path, message
             else:
                 message = "Erro ao otimizar imagem durante o processamento de upload."
-                current_app.logger.warning(message)
+                _logger().warning(message)
                 return False, None, message
                 
+        except ImageRejectedError as e:
+            _logger().warning(f"Upload recusado: {e}")
+            return False, None, str(e)
         except Exception as e:
             message = f"Erro inesperado ao processar upload da imagem: {str(e)}"
-            current_app.logger.error(message, exc_info=True)
+            _logger().error(message, exc_info=True)
             return False, None, message
     
-    def batch_optimize(self, directory: Union[Path, str], extensions: List[str] = None) -> dict:
+    def encoder_settings(self) -> Dict:
+        """
+        Parâmetros que determinam o resultado da otimização. Uma mudança em
+        qualquer um deles invalida as entradas do manifesto do `batch_optimize`.
+        """
+        return {
+            'format': 'webp',
+            'quality': self.quality,
+            'method': 6,
+            'max_width': self.max_width,
+            'responsive_widths': list(self.responsive_widths),
+            'derivative_quality': self.derivative_quality,
+            'avif_quality': self.avif_quality if AVIF_AVAILABLE else None,
+        }
+
+    def batch_optimize(self, directory: Union[Path, str], extensions: List[str] = None,
+                       workers: Optional[int] = None, force: bool = False,
+                       manifest_path: Union[Path, str] = None, report_path: Union[Path, str] = None,
+                       progress: Optional[Callable[[int, int, Dict], None]] = None) -> dict:
         """
         Otimiza todas as imagens em um diretório especificado, convertendo-as para WebP.
+
+        As imagens são distribuídas entre processos (`ProcessPoolExecutor`, um por
+        núcleo). Um manifesto guarda, por arquivo, o SHA-256 da origem e os
+        parâmetros do codificador (`encoder_settings`); arquivos inalterados cuja
+        saída ainda existe são pulados. O manifesto é gravado a cada arquivo
+        concluído, então uma execução interrompida continua de onde parou.
         
         Args:
             directory (str | Path): O caminho para o diretório contendo as imagens a serem otimizadas.
             extensions (list, optional): Uma lista de extensões de arquivo a serem consideradas.
                                         Padrão: ['.jpg', '.jpeg', '.png', '.gif', '.bmp'].
+            workers (int, optional): Número de processos. Padrão: `os.cpu_count()`.
+                                     Com 1, roda no processo atual.
+            force (bool): Ignora o manifesto e reotimiza tudo. Padrão: False.
+            manifest_path (str | Path, optional): Padrão: `<directory>/.optimize-manifest.json`.
+            report_path (str | Path, optional): Se informado, grava as estatísticas finais em JSON.
+            progress (callable, optional): Chamado a cada arquivo com `(concluídos, total, registro)`,
+                                           em que `registro['status']` é 'optimized', 'skipped' ou 'failed'.
             
         Returns:
             dict: Um dicionário contendo estatísticas da operação em lote, incluindo
-                  total de arquivos, sucesso, falhas, tamanhos e detalhes de cada arquivo.
+                  total de arquivos, sucesso, falhas, pulados, tamanhos e detalhes de cada arquivo.
         """
-        if extensions is None:
-            extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp']
-        
+        started = time.perf_counter()
+        extensions = tuple(ext.lower() for ext in (extensions or ['.jpg', '.jpeg', '.png', '.gif', '.bmp']))
         directory = Path(directory)
+        manifest_path = Path(manifest_path) if manifest_path else directory / OPTIMIZE_MANIFEST_FILENAME
+        manifest = {} if force else _read_optimize_manifest(manifest_path)
+        settings = self.encoder_settings()
+
+        # Uma única varredura (em vez de um `rglob` por extensão), sem backups nem derivadas.
         images = []
-        
-        # Encontra todas as imagens no diretório e subdiretórios com as extensões especificadas.
-        for ext in extensions:
-            images.extend(directory.rglob(f'*{ext}'))
-            images.extend(directory.rglob(f'*{ext.upper()}')) # Inclui extensões em maiúsculas
-        
-        # Remove quaisquer duplicatas que possam ter sido adicionadas (e.g., se o glob for sensível a maiúsculas/minúsculas).
-        images = list(set(images))
-        
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = sorted(d for d in dirnames if d != 'originals' and not d.startswith('images_backup'))
+            images.extend(Path(dirpath) / name for name in sorted(filenames)
+                          if name.lower().endswith(extensions) and not is_derivative(name))
+
         stats = {
             'total_files': len(images),
             'successful_optimizations': 0,
             'failed_optimizations': 0,
+            'skipped_files': 0,
             'original_total_size': 0,
             'optimized_total_size': 0,
+            'workers': 0,
+            'elapsed_seconds': 0.0,
             'files_processed': []
         }
-        
-        current_app.logger.info(f"Iniciando otimização em lote de {stats['total_files']} imagens em '{directory}'.")
+        done = 0
+
+        def report(record: Dict) -> None:
+            nonlocal done
+            done += 1
+            if progress:
+                progress(done, len(images), record)
+
+        # Arquivos inalterados: mesmo conteúdo, mesmos parâmetros e saída presente.
+        pending = []
         for img_path in images:
-            success, orig_size, new_size, output_path = self.optimize_image(img_path)
-            
-            if success:
+            key = img_path.relative_to(directory).as_posix()
+            entry = manifest.get(key)
+            if entry and entry.get('settings') == settings and (directory / entry.get('output', '')).is_file():
+                stat = img_path.stat()
+                unchanged = (entry.get('size'), entry.get('mtime_ns')) == (stat.st_size, stat.st_mtime_ns)
+                if not unchanged and entry.get('sha256') == _sha256_file(img_path):
+                    entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)  # Só o mtime mudou (ex: checkout).
+                    unchanged = True
+                if unchanged:
+                    stats['skipped_files'] += 1
+                    report({'input_path': str(img_path), 'status': 'skipped'})
+                    continue
+            pending.append(img_path)
+
+        logger = _logger()
+        logger.info(f"Iniciando otimização em lote de {len(pending)} de {stats['total_files']} imagens em '{directory}'.")
+        options = {
+            'quality': self.quality, 'max_width': self.max_width, 'create_backup': self.create_backup,
+            'responsive_widths': self.responsive_widths, 'derivative_quality': self.derivative_quality,
+            'avif_quality': self.avif_quality,
+        }
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+        stats['workers'] = workers
+
+        def collect(result: Dict) -> None:
+            img_path = Path(result['input_path'])
+            key = img_path.relative_to(directory).as_posix()
+            if result['success']:
+                orig_size, new_size = result['original_size'], result['optimized_size']
                 stats['successful_optimizations'] += 1
                 stats['original_total_size'] += orig_size
                 stats['optimized_total_size'] += new_size
                 reduction = ((orig_size - new_size) / orig_size * 100) if orig_size > 0 else 0
                 stats['files_processed'].append({
-                    'input_path': str(img_path),
-                    'output_path': output_path,
+                    'input_path': result['input_path'],
+                    'output_path': result['output_path'],
                     'original_size_bytes': orig_size,
                     'optimized_size_bytes': new_size,
                     'size_reduction_percent': f"{reduction:.1f}%"
                 })
-                current_app.logger.debug(f"Lote: Otimizado '{img_path.name}'. Redução: {reduction:.1f}%.")
+                manifest[key] = {
+                    'sha256': result['sha256'], 'size': result['size'], 'mtime_ns': result['mtime_ns'],
+                    'settings': settings, 'output': Path(result['output_path']).relative_to(directory).as_posix(),
+                    'original_size': orig_size, 'optimized_size': new_size,
+                }
+                if result.get('responsive') and has_app_context():
+                    from .responsive_images import register_responsive_image
+                    register_responsive_image(result['output_path'], result['responsive'])
+                logger.debug(f"Lote: Otimizado '{img_path.name}'. Redução: {reduction:.1f}%.")
+                report(dict(result, status='optimized'))
             else:
                 stats['failed_optimizations'] += 1
-                current_app.logger.warning(f"Lote: Falha ao otimizar '{img_path.name}'.")
-        
-        current_app.logger.info(f"Otimização em lote concluída. Sucesso: {stats['successful_optimizations']}, Falhas: {stats['failed_optimizations']}.")
+                manifest.pop(key, None)
+                logger.warning(f"Lote: Falha ao otimizar '{img_path.name}'.")
+                report(dict(result, status='failed'))
+            # Gravado a cada arquivo: uma interrupção perde no máximo o trabalho em andamento.
+            _write_optimize_manifest(manifest_path, manifest)
+
+        try:
+            if workers == 1:
+                for img_path in pending:
+                    collect(_optimize_batch_file(options, str(img_path)))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(_optimize_batch_file, options, str(p)) for p in pending]
+                    try:
+                        for future in as_completed(futures):
+                            collect(future.result())
+                    except BaseException:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        raise
+        finally:
+            _write_optimize_manifest(manifest_path, manifest)
+
+        stats['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        if report_path:
+            report_path = Path(report_path)
+            report_path.parent.mkdir(parents=True, exist_ok=True)
+            report_path.write_text(json.dumps(stats, indent=2, ensure_ascii=False), encoding='utf-8')
+        logger.info(f"Otimização em lote concluída em {stats['elapsed_seconds']}s. Sucesso: {stats['successful_optimizations']}, "
+                                f"Pulados: {stats['skipped_files']}, Falhas: {stats['failed_optimizations']}.")
         return stats
 
 
+def _sha256_file(path: Path) -> str:
+    """SHA-256 do conteúdo de um arquivo, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_optimize_manifest(path: Path) -> Dict[str, Dict]:
+    """Lê o manifesto do `batch_optimize`; vazio se ausente ou inválido."""
+    try:
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return data.get('files', {}) if isinstance(data, dict) else {}
+
+
+def _write_optimize_manifest(path: Path, files: Dict[str, Dict]) -> None:
+    """Grava o manifesto do `batch_optimize` de forma atômica."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(json.dumps({'version': 1, 'files': files}, indent=1, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def _optimize_batch_file(options: Dict, input_path: str) -> Dict:
+    """
+    Otimiza um arquivo em um processo do `batch_optimize` (sem contexto Flask).
+
+    As derivadas responsivas são geradas aqui também, e a entrada delas é
+    devolvida para que o processo principal atualize o manifesto de imagens.
+    """
+    processor = ImageProcessor(**dict(options, responsive_widths=()))
+    path = Path(input_path)
+    stat = path.stat()
+    sha256 = _sha256_file(path)
+    success, orig_size, new_size, output_path = processor.optimize_image(path)
+    responsive = None
+    if success and options['responsive_widths']:
+        processor.responsive_widths = tuple(options['responsive_widths'])
+        responsive = processor.generate_derivatives(output_path)
+    return {
+        'input_path': input_path, 'success': success, 'output_path': output_path,
+        'original_size': orig_size, 'optimized_size': new_size, 'responsive': responsive,
+        'sha256': sha256, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+    }
+
+
 # Instância global do processador de imagens para ser reutilizada pela aplicação.
 # Configurado para qualidade de 95%, largura máxima de 2560px e criação de backups.
 image_processor = ImageProcessor(quality=95, max_width=2560, create_backup=True)
@@ -352,7 +759,7 @@ def process_and_save_image(file, upload_folder: Union[str, Path]) -> Tuple[bool,
     Returns:
         tuple: (bool: sucesso, str|None: caminho_webp, str: mensagem de status/erro).
     """
-    current_app.logger.warning("A função `process_and_save_image` está obsoleta. Use `optimize_uploaded_image` em seu lugar.")
+    _logger().warning("A função `process_and_save_image` está obsoleta. Use `optimize_uploaded_image` em seu lugar.")
     return optimize_uploaded_image(file, upload_folder)
 
 
@@ -360,6 +767,10 @@ def save_logo(file, filename: str) -> Optional[str]:
     """
     Salva um arquivo de logo ou imagem, otimizando-o automaticamente.
     Gera um caminho relativo para ser armazenado no banco de dados.
+
+    Com a fila de `image_jobs.py` ativa, o arquivo é gravado como enviado e o
+    caminho dele é retornado na hora; a otimização roda após o commit da
+    requisição e, ao terminar, troca o caminho pelo do WebP nos registros.
     
     Args:
         file (werkzeug.datastructures.FileStorage): O objeto de arquivo de upload.
@@ -367,11 +778,20 @@ def save_logo(file, filename: str) -> Optional[str]:
         
     Returns:
         str | None: O caminho relativo da imagem otimizada (WebP) dentro do diretório 'static'
-                    ou o caminho relativo da imagem original se a otimização falhar.
+                    (ou do arquivo enviado, se a otimização foi agendada ou falhou).
                     Retorna None se ocorrer um erro insuperável.
+
+    Raises:
+        ImageRejectedError: Se o arquivo não é uma imagem ou excede o limite de pixels.
     """
     try:
         from flask import current_app
+        from .image_jobs import enqueue_upload, get_image_job_queue
+
+        # Recusa bombas de descompressão antes de gravar qualquer byte (o fallback abaixo não as salva).
+        inspect_upload(file)
+        if get_image_job_queue() is not None:
+            return enqueue_upload(file, filename)
         
         # Define o diretório de upload, usando a configuração da aplicação.
         upload_folder = Path(current_app.config.get('UPLOAD_FOLDER', 'BelarminoMonteiroAdvogado/static/images/uploads'))
@@ -398,6 +818,8 @@ def save_logo(file, filename: str) -> Optional[str]:
             relative_path = str(temp_path.relative_to(Path('BelarminoMonteiroAdvogado/static')))
             return relative_path.replace('\\', '/')
             
+    except ImageRejectedError:
+        raise
     except Exception as e:
         current_app.logger.error(f"Erro inesperado ao salvar logo '{filename}': {e}. Tentando fallback...", exc_info=True)
         # Fallback: tenta salvar o arquivo original sem otimização em caso de erro.
@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Caixa de Saída de E-mails com Envio em Segundo Plano
+==============================================================================
+
+O formulário de contato abria, dentro da requisição, uma conexão SMTP nova
+(STARTTLS + login) a cada envio: um servidor de e-mail lento prendia o único
+worker da instância F1, e uma falha perdia a mensagem do cliente.
+
+Fluxo:
+------
+1.  **Requisição:** `enqueue_email` grava um `OutboxEmail` 'pending' na sessão
+    atual; a rota responde assim que o commit termina.
+2.  **Commit:** listeners `after_flush`/`after_commit` (mesmo padrão de
+    `image_jobs.py`) acordam o `MailDispatcher` só depois que a mensagem está
+    no banco. Um `rollback` não envia nada.
+3.  **Envio:** uma única thread (`ThreadPoolExecutor(1)`) reserva as
+    mensagens vencidas em lotes de `MAIL_BATCH_SIZE` e as envia por uma
+    conexão SMTP autenticada que é reaproveitada entre mensagens e entre
+    lotes (verificada com `NOOP` e fechada após `MAIL_SMTP_IDLE_SECONDS`
+    sem uso).
+4.  **Falhas:** erros temporários (conexão, 4xx) reagendam a mensagem com
+    espera exponencial (`MAIL_RETRY_BASE_SECONDS` x 2^(tentativas-1)); erros
+    permanentes (5xx, destinatário recusado), o teste do painel ou
+    `MAIL_MAX_ATTEMPTS` tentativas a marcam como 'failed'. Um `threading.Timer` acorda a fila
+    para o próximo reenvio.
+
+As configurações SMTP continuam em `ConteudoGeral` (página
+'configuracoes_email') e são relidas a cada lote. Com `MAIL_OUTBOX_ASYNC =
+False` (padrão nos testes) o envio roda logo após o commit, na mesma thread.
+Mensagens interrompidas por um reinício são retomadas na primeira requisição
+da instância (as reservadas há mais de `SENDING_LEASE` voltam à fila) ou com
+`flask mail-outbox`.
+"""
+import smtplib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from typing import Dict, List, NamedTuple, Optional
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .image_jobs import _InlineExecutor
+from .models import db, ConteudoGeral, OutboxEmail
+
+MAIL_SETTINGS_PAGE = 'configuracoes_email'
+
+# Chave usada em `Session.info` para sinalizar mensagens novas na transação.
+_SESSION_INFO_KEY = 'bm_mail_outbox'
+
+# Hosts em que o login sem TLS é aceito (servidor de depuração local).
+_LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+# Uma mensagem 'sending' há mais tempo que isto foi reservada por um processo que morreu.
+SENDING_LEASE = timedelta(minutes=10)
+
+# Destinatário das mensagens do site quando o painel não define 'email_to'.
+DEFAULT_EMAIL_TO = 'contato@belarminomonteiroadvogado.com.br'
+
+
+class SMTPSettings(NamedTuple):
+    """Configurações de envio lidas de `ConteudoGeral`."""
+    server: Optional[str]
+    port: int
+    user: Optional[str]
+    password: Optional[str]
+    email_to: str
+
+
+def load_smtp_settings() -> SMTPSettings:
+    """
+    Lê as configurações SMTP salvas pelo painel.
+
+    Returns:
+        SMTPSettings: Servidor, porta (587 se ausente ou inválida), usuário,
+        senha e destinatário padrão (`DEFAULT_EMAIL_TO` se ausente ou vazio).
+    """
+    config = {item.secao: item.conteudo for item in
+              ConteudoGeral.query.filter_by(pagina=MAIL_SETTINGS_PAGE).all()}
+    try:
+        port = int(config.get('smtp_port') or 587)
+    except (TypeError, ValueError):
+        current_app.logger.warning("[MAIL] Porta SMTP inválida no DB. Usando padrão 587.")
+        port = 587
+    return SMTPSettings(config.get('smtp_server') or None, port, config.get('smtp_user') or None,
+                        config.get('smtp_pass') or None, config.get('email_to') or DEFAULT_EMAIL_TO)
+
+
+class MailDispatcher:
+    """
+    Envia a caixa de saída de uma aplicação por uma conexão SMTP reaproveitada.
+
+    Attributes:
+        app (Flask): A aplicação (cada rodada usa um contexto próprio dela).
+        executor: `ThreadPoolExecutor` de uma thread ou `_InlineExecutor`.
+        connections (int): Conexões SMTP abertas desde o início (para diagnóstico).
+    """
+
+    def __init__(self, app: Flask, asynchronous: bool = True, batch_size: int = 20, max_attempts: int = 5,
+                 retry_base_seconds: int = 60, idle_seconds: int = 60, timeout: int = 20):
+        """
+        Args:
+            app (Flask): A aplicação.
+            asynchronous (bool): Se False, envia na thread que chamou `notify`.
+            batch_size (int): Mensagens reservadas por consulta. Padrão: 20.
+            max_attempts (int): Tentativas antes de 'failed'. Padrão: 5.
+            retry_base_seconds (int): Espera antes da 2ª tentativa; dobra a cada falha. Padrão: 60.
+            idle_seconds (int): Tempo sem uso após o qual a conexão é refeita. Padrão: 60.
+            timeout (int): Timeout de rede do SMTP, em segundos. Padrão: 20.
+        """
+        self.app = app
+        self.asynchronous = asynchronous
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.executor = (ThreadPoolExecutor(max_workers=1, thread_name_prefix='mail-outbox')
+                         if asynchronous else _InlineExecutor())
+        self.connections = 0
+        self.resumed = False
+        self._lock = threading.Lock()
+        self._queued: Optional[Future] = None
+        self._timer: Optional[threading.Timer] = None
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_key: Optional[tuple] = None
+        self._smtp_used_at = 0.0
+
+    def notify(self) -> Future:
+        """
+        Agenda uma rodada de envio. Chamadas enquanto outra rodada aguarda na
+        fila são agrupadas nela.
+
+        Returns:
+            Future: Resolve com as contagens da rodada (ver `dispatch`).
+        """
+        with self._lock:
+            if self._queued is not None and not self._queued.running() and not self._queued.done():
+                return self._queued
+            self._queued = self.executor.submit(self.dispatch)
+            return self._queued
+
+    def dispatch(self) -> Dict[str, int]:
+        """
+        Envia todas as mensagens vencidas, em lotes, e agenda o próximo reenvio.
+
+        Returns:
+            Dict[str, int]: Quantas mensagens foram 'sent', reagendadas ('retry') e 'failed'.
+        """
+        counts = {'sent': 0, 'retry': 0, 'failed': 0}
+        with self.app.app_context():
+            while True:
+                batch = self._claim_batch()
+                if not batch:
+                    break
+                settings = load_smtp_settings()
+                for message in batch:
+                    counts[self._deliver(message, settings)] += 1
+                db.session.commit()
+            next_due = db.session.query(db.func.min(OutboxEmail.next_attempt_at)).filter(
+                OutboxEmail.status.in_(('pending', 'sending'))).scalar()
+        if self.asynchronous and next_due is not None:
+            self._schedule((next_due - datetime.utcnow()).total_seconds())
+        if any(counts.values()):
+            self.app.logger.info(f"[MAIL] Rodada de envio: {counts}.")
+        return counts
+
+    def close(self) -> None:
+        """Fecha a conexão SMTP, se aberta."""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+
+    def _schedule(self, delay: float) -> None:
+        """Acorda a fila daqui a `delay` segundos (substitui o agendamento anterior)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(max(delay, 1.0), self.notify)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _claim_batch(self) -> List[OutboxEmail]:
+        """
+        Reserva até `batch_size` mensagens vencidas: 'pending' com a espera
+        cumprida, ou 'sending' com a reserva (`SENDING_LEASE`) expirada.
+        """
+        now = datetime.utcnow()
+        due = (OutboxEmail.status.in_(('pending', 'sending')), OutboxEmail.next_attempt_at <= now)
+        ids = [message_id for (message_id,) in db.session.query(OutboxEmail.id).filter(*due)
+               .order_by(OutboxEmail.id).limit(self.batch_size)]
+        claimed = []
+        for message_id in ids:
+            # Condicional: outro processo pode ter reservado a mesma mensagem.
+            if OutboxEmail.query.filter(OutboxEmail.id == message_id, *due).update(
+                    {OutboxEmail.status: 'sending', OutboxEmail.next_attempt_at: now + SENDING_LEASE},
+                    synchronize_session=False):
+                claimed.append(message_id)
+        db.session.commit()
+        return OutboxEmail.query.filter(OutboxEmail.id.in_(claimed)).order_by(OutboxEmail.id).all() if claimed else []
+
+    def _connection(self, settings: SMTPSettings) -> smtplib.SMTP:
+        """Devolve a conexão aberta (se ainda válida para `settings`) ou abre outra."""
+        key = (settings.server, settings.port, settings.user, settings.password)
+        if self._smtp is not None and (self._smtp_key != key
+                                       or time.monotonic() - self._smtp_used_at > self.idle_seconds
+                                       or not self._alive()):
+            self.close()
+        if self._smtp is None:
+            smtp_class = smtplib.SMTP_SSL if settings.port == 465 else smtplib.SMTP
+            smtp = smtp_class(settings.server, settings.port, timeout=self.timeout)
+            secure = smtp_class is smtplib.SMTP_SSL
+            try:
+                smtp.ehlo()
+                if not secure and smtp.has_extn('starttls'):
+                    smtp.starttls()
+                    smtp.ehlo()
+                    secure = True
+                if settings.user and settings.password:
+                    if not secure and settings.server not in _LOCAL_HOSTS:
+                        raise smtplib.SMTPNotSupportedError(
+                            f"O servidor {settings.server} não oferece STARTTLS; login sem criptografia recusado.")
+                    smtp.login(settings.user, settings.password)
+            except BaseException:
+                smtp.close()
+                raise
+            self._smtp, self._smtp_key = smtp, key
+            self.connections += 1
+        return self._smtp
+
+    def _alive(self) -> bool:
+        try:
+            return self._smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _deliver(self, message: OutboxEmail, settings: SMTPSettings) -> str:
+        """Tenta enviar uma mensagem e registra o resultado. Retorna 'sent', 'retry' ou 'failed'."""
+        message.attempts = (message.attempts or 0) + 1
+        recipients = [r.strip() for r in (message.recipients or settings.email_to).split(',') if r.strip()]
+        permanent = False
+        try:
+            if not settings.server or not recipients:
+                raise ValueError("Configurações de e-mail incompletas: informe servidor SMTP e destinatário.")
+            smtp = self._connection(settings)
+            smtp.send_message(build_message(message, settings.user or recipients[0], recipients))
+            self._smtp_used_at = time.monotonic()
+        except Exception as e:
+            # `SMTPException` herda de `OSError`: uma resposta 4xx/5xx não invalida a conexão.
+            if isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)):
+                self.close()
+            # 5xx e destinatários recusados não melhoram com o tempo; o teste do painel não é repetido.
+            permanent = message.kind == 'teste' or isinstance(e, smtplib.SMTPRecipientsRefused) or (
+                isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+                and not isinstance(e, smtplib.SMTPAuthenticationError))
+            message.last_error = f"{type(e).__name__}: {e}"
+            if permanent or message.attempts >= self.max_attempts:
+                message.status = 'failed'
+                current_app.logger.error(f"[MAIL] Mensagem {message.id} não enviada: {message.last_error}")
+                return 'failed'
+            message.status = 'pending'
+            message.next_attempt_at = datetime.utcnow() + timedelta(
+                seconds=self.retry_base_seconds * 2 ** (message.attempts - 1))
+            current_app.logger.warning(f"[MAIL] Mensagem {message.id} reagendada para "
+                                       f"{message.next_attempt_at:%H:%M:%S}: {message.last_error}")
+            return 'retry'
+        message.status = 'sent'
+        message.sent_at = datetime.utcnow()
+        message.last_error = None
+        return 'sent'
+
+
+def build_message(message: OutboxEmail, sender: str, recipients: List[str]) -> EmailMessage:
+    """
+    Monta o e-mail de uma mensagem da caixa de saída.
+
+    Args:
+        message (OutboxEmail): A mensagem.
+        sender (str): O remetente (o usuário SMTP).
+        recipients (List[str]): Os destinatários.
+
+    Returns:
+        EmailMessage: A mensagem pronta para `SMTP.send_message`.
+    """
+    email = EmailMessage()
+    email['From'] = sender
+    email['To'] = ', '.join(recipients)
+    email['Subject'] = message.subject
+    if message.reply_to:
+        email['Reply-To'] = message.reply_to
+    email['Date'] = formatdate((message.created_at or datetime.utcnow()).timestamp(), localtime=True)
+    email['Message-ID'] = make_msgid(idstring=f'outbox{message.id}')
+    email.set_content(message.body)
+    return email
+
+
+def get_mail_dispatcher(app: Flask = None) -> Optional[MailDispatcher]:
+    """Retorna o despachante da aplicação (ou de `current_app`), se inicializado."""
+    app = app or (current_app if has_app_context() else None)
+    return app.extensions.get('mail_outbox') if app is not None else None
+
+
+def init_mail_outbox(app: Flask) -> None:
+    """
+    Cria a tabela `mail_outbox` (se faltar) e registra o despachante em `app.extensions`.
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    app.config.setdefault('MAIL_OUTBOX_ASYNC', not app.testing)
+    app.config.setdefault('MAIL_BATCH_SIZE', 20)
+    app.config.setdefault('MAIL_MAX_ATTEMPTS', 5)
+    app.config.setdefault('MAIL_RETRY_BASE_SECONDS', 60)
+    app.config.setdefault('MAIL_SMTP_IDLE_SECONDS', 60)
+    with app.app_context():
+        try:
+            OutboxEmail.__table__.create(db.engine, checkfirst=True)
+        except Exception as e:
+            app.logger.warning(f"[MAIL] Tabela 'mail_outbox' não criada: {e}")
+    dispatcher = MailDispatcher(
+        app, asynchronous=app.config['MAIL_OUTBOX_ASYNC'], batch_size=app.config['MAIL_BATCH_SIZE'],
+        max_attempts=app.config['MAIL_MAX_ATTEMPTS'], retry_base_seconds=app.config['MAIL_RETRY_BASE_SECONDS'],
+        idle_seconds=app.config['MAIL_SMTP_IDLE_SECONDS'])
+    app.extensions['mail_outbox'] = dispatcher
+
+    if dispatcher.asynchronous:
+        @app.before_request
+        def _resume_mail_outbox():
+            # Primeira requisição da instância: retoma o que ficou pendente antes de um reinício.
+            if not dispatcher.resumed:
+                dispatcher.resumed = True
+                dispatcher.notify()
+
+
+def enqueue_email(subject: str, body: str, recipients: str = None, reply_to: str = None,
+                  kind: str = 'contato') -> OutboxEmail:
+    """
+    Coloca uma mensagem na caixa de saída (na sessão atual).
+
+    O envio só começa depois do commit.
+
+    Args:
+        subject (str): O assunto.
+        body (str): O corpo, em texto puro.
+        recipients (str, optional): Destinatários separados por vírgula. Padrão:
+            'email_to' das configurações, lido no momento do envio.
+        reply_to (str, optional): O endereço de resposta.
+        kind (str): 'contato' ou 'teste'. Padrão: 'contato'.
+
+    Returns:
+        OutboxEmail: A mensagem (ainda sem id até o flush).
+    """
+    message = OutboxEmail(kind=kind, subject=subject, body=body, recipients=recipients, reply_to=reply_to)
+    db.session.add(message)
+    return message
+
+
+def resume_mail_outbox(app: Flask, include_failed: bool = False) -> Dict[str, int]:
+    """
+    Envia agora, na thread atual, a caixa de saída (inclusive as reservadas
+    por um processo que morreu no meio do envio).
+
+    Args:
+        app (Flask): A aplicação.
+        include_failed (bool): Também tenta de novo as mensagens que falharam.
+
+    Returns:
+        Dict[str, int]: As contagens da rodada (ver `MailDispatcher.dispatch`).
+    """
+    statuses = ['pending', 'sending'] + (['failed'] if include_failed else [])
+    with app.app_context():
+        # Ignora a espera dos reenvios e as reservas ainda válidas: o envio é agora.
+        OutboxEmail.query.filter(OutboxEmail.status.in_(statuses)).update(
+            {OutboxEmail.status: 'pending', OutboxEmail.next_attempt_at: datetime.utcnow()},
+            synchronize_session=False)
+        db.session.commit()
+    return get_mail_dispatcher(app).dispatch()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_new_messages(session, flush_context):
+    """Marca a transação que inseriu mensagens na caixa de saída."""
+    if any(isinstance(obj, OutboxEmail) for obj in session.new):
+        session.info[_SESSION_INFO_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_dispatcher(session):
+    """Acorda o despachante depois que as mensagens estão gravadas."""
+    if session.info.pop(_SESSION_INFO_KEY, None):
+        dispatcher = get_mail_dispatcher()
+        if dispatcher is not None:
+            dispatcher.notify()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_new_messages(session):
+    """Nada a enviar de uma transação desfeita."""
+    session.info.pop(_SESSION_INFO_KEY, None)
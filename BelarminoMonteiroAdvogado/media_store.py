@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Armazenamento de Uploads por Conteúdo e Coleta de Órfãos
+==============================================================================
+
+Os uploads eram nomeados pelo slug, por um token ou pela hora do envio: o
+mesmo logo enviado duas vezes virava dois arquivos, cada um com o seu WebP,
+as suas derivadas e a sua cópia em `originals/`. Sem nenhuma limpeza, o
+diretório só crescia, e com ele o pacote de deploy.
+
+Componentes:
+------------
+1.  **Armazenamento por conteúdo (`store_upload`):** o arquivo é gravado
+    em blocos enquanto o SHA-256 é calculado e recebe o nome
+    `<hash>.<extensão>`. Um conteúdo já existente não é gravado de novo, e
+    se o WebP dele já existe, o upload nem gera tarefa de otimização (ver
+    `image_jobs.enqueue_upload`). O arquivo enviado é o próprio original, então
+    a cópia em `originals/` deixa de ser feita para uploads.
+2.  **Contagem de referências (`media_references`):** conta quantas vezes
+    cada caminho de `static/` aparece nos campos de imagem
+    (`IMAGE_PATH_FIELDS`) e em textos que podem citar uploads (HTML de
+    seções).
+3.  **Coleta de órfãos (`collect_garbage`, `flask media-gc`):** apaga, em
+    `UPLOAD_FOLDER`, os arquivos sem referência. Um arquivo vive junto com o
+    seu "grupo" (mesmo nome-base): o original, o WebP, as derivadas
+    responsivas e uma cópia antiga em `originals/`. Tarefas pendentes e
+    arquivos recentes (envio ainda não commitado) são preservados.
+4.  **Recepção sem cópia (`UploadRequest`):** nos endpoints que recebem
+    imagens (`UPLOAD_SPOOL_BLUEPRINTS`, `UPLOAD_SPOOL_ENDPOINTS`), o parser
+    multipart grava cada arquivo do formulário direto em
+    `UPLOAD_FOLDER/.upload-*.tmp`, em vez de um temporário do sistema.
+    `store_upload` apenas renomeia esse arquivo, e o que sobra é apagado no
+    fim da requisição. Nos demais, vale o padrão do Werkzeug. O corpo é limitado por
+    `MAX_CONTENT_LENGTH` (413 antes de ler o excedente).
+"""
+import hashlib
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from flask import Flask, Request, current_app, flash, redirect, request, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from .models import (
+    db, AreaAtuacao, ClienteParceiro, ConteudoGeral, CustomHomeSection, Depoimento,
+    HomePageSection, ImageJob, MembroEquipe, ThemeSettings,
+)
+
+# Campos que guardam caminhos de imagens enviadas (relativos a 'static/').
+IMAGE_PATH_FIELDS: Tuple = (
+    ConteudoGeral.conteudo,
+    MembroEquipe.foto,
+    ClienteParceiro.logo_path,
+    AreaAtuacao.foto,
+    Depoimento.logo_cliente,
+)
+
+# Outros campos que podem conter um caminho: valor exato ou citado em HTML.
+_EXTRA_PATH_FIELDS: Tuple = (CustomHomeSection.media_path, ThemeSettings.qr_code_path)
+_TEXT_FIELDS: Tuple = (HomePageSection.content, CustomHomeSection.content)
+
+# Tamanho do nome (em caracteres hexadecimais do SHA-256): 96 bits.
+CONTENT_HASH_LENGTH = 24
+
+# Uploads mais novos que isto não são coletados: a linha que os referencia
+# pode ainda não ter sido commitada.
+GC_MIN_AGE_SECONDS = 600
+
+_CHUNK_SIZE = 1 << 16
+_SPOOL_PREFIX = '.upload-'
+_SPOOL_SUFFIX = '.tmp'
+
+# Sufixo das derivadas responsivas no nome-base (`foto-640w`).
+_DERIVATIVE_SUFFIX_RE = re.compile(r'-\d+w$')
+
+# Onde os arquivos do formulário são recebidos na pasta de uploads: o painel
+# (protegido por login) e o envio de depoimento pelo cliente.
+UPLOAD_SPOOL_BLUEPRINTS = frozenset({'admin'})
+UPLOAD_SPOOL_ENDPOINTS = frozenset({'main.submit_depoimento'})
+
+
+class UploadRequest(Request):
+    """
+    Requisição cujos arquivos de formulário, nos endpoints de upload, são
+    recebidos em `UPLOAD_FOLDER`.
+
+    O padrão do Werkzeug usa um `SpooledTemporaryFile` (memória até 500 KB,
+    depois `/tmp`); no App Engine `/tmp` também é memória, e o arquivo ainda
+    seria copiado para a pasta de uploads. Aqui ele é gravado uma única vez,
+    já no sistema de arquivos de destino. Qualquer outro endpoint, ou uma
+    pasta sem permissão de escrita, volta ao padrão do Werkzeug.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_spools: List = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        from .image_jobs import upload_folder
+
+        if self.blueprint not in UPLOAD_SPOOL_BLUEPRINTS and self.endpoint not in UPLOAD_SPOOL_ENDPOINTS:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        try:
+            folder = upload_folder(current_app)
+            spool = tempfile.NamedTemporaryFile(mode='w+b', dir=folder, prefix=_SPOOL_PREFIX,
+                                                suffix=_SPOOL_SUFFIX, delete=False)
+        except OSError:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        self.upload_spools.append(spool)
+        return spool
+
+
+def _discard_upload_spools(exc=None) -> None:
+    """Fecha e apaga os arquivos recebidos que não foram armazenados."""
+    spools, request.upload_spools = getattr(request, 'upload_spools', []), []
+    for spool in spools:
+        try:
+            spool.close()
+            if os.path.exists(spool.name):
+                os.remove(spool.name)
+        except OSError as e:
+            current_app.logger.warning(f"[MEDIA] Temporário de upload não removido: {e}")
+
+
+def _request_too_large(error):
+    """413: no painel, volta ao formulário com uma mensagem em vez da página de erro."""
+    limit_mb = (current_app.config.get('MAX_CONTENT_LENGTH') or 0) / (1024 * 1024)
+    message = f"Arquivo muito grande. O limite por envio é de {limit_mb:.0f} MB."
+    current_app.logger.warning(f"[MEDIA] Envio recusado em {request.path}: corpo acima de {limit_mb:.0f} MB.")
+    if request.blueprint == 'admin':
+        flash(message, 'danger')
+        return redirect(request.referrer or url_for('admin.dashboard'))
+    return message, 413
+
+
+def init_media_store(app: Flask) -> None:
+    """
+    Recebe uploads direto em `UPLOAD_FOLDER` e trata o 413 de `MAX_CONTENT_LENGTH`.
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    app.request_class = UploadRequest
+    app.teardown_request(_discard_upload_spools)
+    app.register_error_handler(RequestEntityTooLarge, _request_too_large)
+
+
+def store_upload(file, folder) -> Tuple[Path, bool]:
+    """
+    Grava um upload com o nome `<sha256>.<extensão>`, calculando o hash em blocos.
+
+    Se o parser já recebeu o arquivo em `folder` (ver `UploadRequest`), ele só
+    é lido para o hash e renomeado, sem nova gravação.
+
+    Args:
+        file (werkzeug.datastructures.FileStorage): O arquivo enviado.
+        folder (str | Path): O diretório de destino (criado se necessário).
+
+    Returns:
+        Tuple[Path, bool]: O caminho final e se o conteúdo já existia.
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    suffix = Path(file.filename or '').suffix.lower()
+    digest = hashlib.sha256()
+
+    spool_name = getattr(file.stream, 'name', None)
+    if isinstance(spool_name, str) and Path(spool_name).parent.resolve() == folder.resolve():
+        file.stream.seek(0)
+        for chunk in iter(lambda: file.stream.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        target = folder / f"{digest.hexdigest()[:CONTENT_HASH_LENGTH]}{suffix}"
+        if target.exists():
+            return target, True
+        # Fechado antes do rename (exigência do Windows); o teardown ignora o nome que sumiu.
+        file.stream.close()
+        os.replace(spool_name, target)
+        return target, False
+
+    fd, tmp_name = tempfile.mkstemp(dir=folder, prefix=_SPOOL_PREFIX, suffix=_SPOOL_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: file.stream.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                tmp.write(chunk)
+        target = folder / f"{digest.hexdigest()[:CONTENT_HASH_LENGTH]}{suffix}"
+        if target.exists():
+            return target, True
+        os.replace(tmp_name, target)
+        return target, False
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def _normalize(path: str) -> str:
+    """Caminho relativo a 'static/' como gravado nos templates (`url_for('static', ...)`)."""
+    path = path.strip().lstrip('/')
+    return path[len('static/'):] if path.startswith('static/') else path
+
+
+def media_references(upload_prefix: str = 'images/uploads/') -> Counter:
+    """
+    Conta as referências de cada caminho de `static/` no banco de dados.
+
+    Args:
+        upload_prefix (str): Prefixo (relativo a 'static/') procurado dentro
+            de textos HTML. Padrão: 'images/uploads/'.
+
+    Returns:
+        Counter: `caminho relativo a 'static/' -> número de referências`.
+    """
+    refs: Counter = Counter()
+    for column in IMAGE_PATH_FIELDS + _EXTRA_PATH_FIELDS:
+        for (value,) in db.session.query(column).filter(column.isnot(None)):
+            if value:
+                refs[_normalize(value)] += 1
+
+    cited = re.compile(re.escape(upload_prefix) + r'[^\s"\'()<>?#]+')
+    for column in (ConteudoGeral.conteudo,) + _TEXT_FIELDS:
+        for (value,) in db.session.query(column).filter(column.like(f'%{upload_prefix}%')):
+            for match in cited.findall(value or ''):
+                refs[match] += 1
+    return refs
+
+
+def _group(relpath: str) -> Tuple[str, str]:
+    """
+    Grupo de um arquivo: (diretório, nome-base sem sufixo de derivada).
+
+    `uploads/abc.png`, `uploads/abc.webp`, `uploads/abc-640w.avif` e
+    `uploads/originals/abc.png` pertencem ao grupo `('uploads', 'abc')`.
+    """
+    directory, _, name = relpath.rpartition('/')
+    if directory == 'originals' or directory.endswith('/originals'):
+        directory = directory[:-len('originals')].rstrip('/')
+    stem = name.rsplit('.', 1)[0]
+    return directory, _DERIVATIVE_SUFFIX_RE.sub('', stem)
+
+
+def _live_groups(paths: Iterable[str]) -> set:
+    return {_group(path) for path in paths if path}
+
+
+def collect_garbage(app: Flask = None, dry_run: bool = False,
+                    min_age_seconds: int = GC_MIN_AGE_SECONDS) -> Dict:
+    """
+    Apaga de `UPLOAD_FOLDER` os arquivos que nenhum registro referencia.
+
+    Deve rodar em um contexto de aplicação.
+
+    Args:
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+        dry_run (bool): Apenas lista o que seria apagado. Padrão: False.
+        min_age_seconds (int): Idade mínima de um arquivo para ser apagado.
+
+    Returns:
+        Dict: `kept`, `deleted` (caminhos relativos a 'static/'), `bytes_freed` e `references`.
+    """
+    from .image_jobs import upload_folder
+    from .responsive_images import unregister_responsive_images
+
+    app = app or current_app._get_current_object()
+    static = Path(app.static_folder).resolve()
+    folder = upload_folder(app).resolve()
+    upload_prefix = folder.relative_to(static).as_posix() + '/'
+
+    refs = media_references(upload_prefix)
+    in_flight = db.session.query(ImageJob.source_path, ImageJob.result_path).filter(
+        ImageJob.status.in_(('pending', 'running')))
+    live = _live_groups(list(refs) + [path for row in in_flight for path in row])
+
+    stats = {'kept': 0, 'deleted': [], 'bytes_freed': 0, 'references': sum(refs.values())}
+    cutoff = time.time() - min_age_seconds
+    for dirpath, _dirnames, filenames in os.walk(folder):
+        for name in sorted(filenames):
+            path = Path(dirpath) / name
+            relpath = path.relative_to(static).as_posix()
+            recent = path.stat().st_mtime > cutoff
+            # Temporários de upload antigos são restos de um processo interrompido.
+            spool = name.startswith(_SPOOL_PREFIX) and name.endswith(_SPOOL_SUFFIX)
+            if recent or (not spool and (name.startswith('.') or _group(relpath) in live)):
+                stats['kept'] += 1
+                continue
+            stats['bytes_freed'] += path.stat().st_size
+            stats['deleted'].append(relpath)
+            if not dry_run:
+                path.unlink()
+
+    if stats['deleted'] and not dry_run:
+        unregister_responsive_images(stats['deleted'], app)
+        app.logger.info(f"[MEDIA GC] {len(stats['deleted'])} arquivo(s) órfão(s) apagado(s) "
+                        f"({stats['bytes_freed'] / 1024:.1f} KB).")
+    return stats
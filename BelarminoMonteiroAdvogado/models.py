@@ -27,6 +27,10 @@ Modelos Principais:
                      inicial.
 - **ThemeSettings:** Armazena as configurações de design, como o tema ativo e
                  a paleta de cores.
+- **ImageJob:** Fila das otimizações de imagem enviadas pelo painel e pelos
+            depoimentos (ver `image_jobs.py`).
+- **OutboxEmail:** Caixa de saída dos e-mails do site (formulário de contato e
+               teste do painel), enviados em segundo plano (ver `mail_outbox.py`).
 
 Além dos modelos, este arquivo também inicializa as instâncias `db`
 (SQLAlchemy) and `migrate` (Flask-Migrate) e inclui lógica de compatibilidade
@@ -37,7 +41,8 @@ from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import event
+from sqlalchemy import event, update
+from sqlalchemy.orm import object_session
 from sqlalchemy.engine import Engine as SAEngine
 from sqlalchemy import inspect as sqlalchemy_inspect
 from flask_login import UserMixin
@@ -269,8 +274,10 @@ class Pagina(db.Model):
     data_modificacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
                                  comment="Timestamp da última modificação da página.")
     
-    # Relacionamento de auto-referência para páginas aninhadas (menu hierárquico)
-    children = db.relationship('Pagina', backref=db.backref('parent', remote_side=[id]), lazy='joined', order_by='Pagina.ordem')
+    # Relacionamento de auto-referência para páginas aninhadas (menu hierárquico).
+    # Carregamento sob demanda: o menu usa a árvore pré-montada de `page_registry.py`,
+    # e um `lazy='joined'` faria toda consulta de `Pagina` carregar um auto-join.
+    children = db.relationship('Pagina', backref=db.backref('parent', remote_side=[id]), lazy='select', order_by='Pagina.ordem')
 
     def __repr__(self):
         """
@@ -352,20 +359,27 @@ class ConteudoGeral(db.Model):
 def receive_before_update(mapper, connection, target):
     """
     Listener para o evento 'before_update' do modelo ConteudoGeral.
-    Quando um item de ConteudoGeral é modificado, este listener verifica se a `pagina`
-    associada é um slug de uma `Pagina` existente. Se for, a `data_modificacao`
-    da `Pagina` correspondente é atualizada. Isso é útil para mecanismos de cache,
-    indicando que o conteúdo da página foi alterado.
+    Quando um item de ConteudoGeral é modificado, a `data_modificacao` da `Pagina`
+    cujo slug é `target.pagina` (se existir) é atualizada. Isso é útil para mecanismos
+    de cache e para o `lastmod` do sitemap, indicando que o conteúdo da página mudou.
+
+    O carimbo é um UPDATE direto na conexão do flush: alterar um atributo de outro
+    objeto ORM dentro do flush seria descartado pelo SQLAlchemy. A tabela `pagina`
+    é registrada como alterada na transação para que os caches de processo
+    (registro de páginas, sitemap) sejam invalidados no commit.
     """
     from flask import current_app # Importa aqui para evitar import circular e garantir o contexto da app
+    from .site_cache import _pending_tables
     if db.session.is_modified(target) and target.pagina:
-        # Verifica se 'target.pagina' corresponde a um slug de uma Página real
-        # para evitar atualização desnecessária de páginas que não são gerenciadas.
-        if Pagina.query.filter_by(slug=target.pagina).first():
-            pagina = Pagina.query.filter_by(slug=target.pagina).first()
-            if pagina:
-                pagina.data_modificacao = datetime.utcnow()
-                current_app.logger.debug(f"Atualizando data_modificacao para a página '{pagina.slug}' devido à modificação do ConteudoGeral '{target.secao}'.")
+        # Só páginas reais: grupos como 'configuracoes_gerais' não correspondem a nenhum slug.
+        result = connection.execute(
+            update(Pagina.__table__).where(Pagina.__table__.c.slug == target.pagina)
+            .values(data_modificacao=datetime.utcnow()))
+        if result.rowcount:
+            session = object_session(target)
+            if session is not None:
+                _pending_tables(session).add(Pagina.__tablename__)
+            current_app.logger.debug(f"Atualizando data_modificacao para a página '{target.pagina}' devido à modificação do ConteudoGeral '{target.secao}'.")
         else:
             current_app.logger.debug(f"ConteudoGeral para '{target.pagina}' alterado, mas nenhuma Página correspondente encontrada para atualizar data_modificacao.")
 
@@ -413,6 +427,80 @@ class ClienteParceiro(db.Model):
         """
         return f'<ClienteParceiro {self.nome}>'
 
+class ImageJob(db.Model):
+    """
+    Tarefa de otimização de uma imagem enviada por upload.
+
+    O arquivo original é salvo e referenciado imediatamente (`source_path`); a
+    conversão para WebP roda em segundo plano e, ao terminar, o caminho é
+    substituído por `result_path` nos registros que o usam.
+    """
+    __tablename__ = 'image_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    source_path = db.Column(db.String(255), nullable=False, index=True,
+                            comment="Caminho (relativo a 'static/') do arquivo enviado, usado até a otimização terminar.")
+    result_path = db.Column(db.String(255), nullable=True,
+                            comment="Caminho (relativo a 'static/') da imagem otimizada.")
+    status = db.Column(db.String(20), nullable=False, default='pending', server_default='pending', index=True,
+                       comment="Estado da tarefa: 'pending', 'running', 'done' ou 'failed'.")
+    error = db.Column(db.Text, nullable=True, comment="Mensagem de erro da última tentativa.")
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0',
+                         comment="Número de execuções iniciadas.")
+    original_size = db.Column(db.Integer, nullable=True, comment="Tamanho do arquivo enviado, em bytes.")
+    optimized_size = db.Column(db.Integer, nullable=True, comment="Tamanho da imagem otimizada, em bytes.")
+    updated_rows = db.Column(db.Integer, nullable=True,
+                             comment="Quantos registros passaram a apontar para a imagem otimizada.")
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, comment="Data de criação da tarefa.")
+    started_at = db.Column(db.DateTime, nullable=True, comment="Início da última execução.")
+    finished_at = db.Column(db.DateTime, nullable=True, comment="Fim da última execução.")
+
+    def __repr__(self):
+        return f'<ImageJob {self.id} {self.status} {self.source_path}>'
+
+class OutboxEmail(db.Model):
+    """
+    Mensagem da caixa de saída, gravada na requisição e enviada em segundo plano.
+
+    O registro é o próprio "lead": se o servidor SMTP estiver lento ou fora do
+    ar, a mensagem continua no banco e é reenviada com espera crescente.
+    """
+    __tablename__ = 'mail_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False, default='contato', server_default='contato',
+                     comment="Origem da mensagem: 'contato' (formulário do site) ou 'teste' (painel).")
+    recipients = db.Column(db.String(500), nullable=True,
+                           comment="Destinatários separados por vírgula. Vazio: 'email_to' das configurações no envio.")
+    reply_to = db.Column(db.String(255), nullable=True, comment="E-mail de quem preencheu o formulário.")
+    subject = db.Column(db.String(255), nullable=False, comment="Assunto do e-mail.")
+    body = db.Column(db.Text, nullable=False, comment="Corpo do e-mail, em texto puro.")
+    status = db.Column(db.String(20), nullable=False, default='pending', server_default='pending', index=True,
+                       comment="Estado do envio: 'pending', 'sending', 'sent' ou 'failed'.")
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0',
+                         comment="Número de tentativas de envio.")
+    last_error = db.Column(db.Text, nullable=True, comment="Erro da última tentativa.")
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True,
+                                comment="Quando a mensagem pode ser (re)enviada.")
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, comment="Data do envio do formulário.")
+    sent_at = db.Column(db.DateTime, nullable=True, comment="Data em que o servidor SMTP aceitou a mensagem.")
+
+    def __repr__(self):
+        return f'<OutboxEmail {self.id} {self.kind} {self.status}>'
+
+class SeedState(db.Model):
+    """
+    Hash da última definição de dados iniciais aplicada (ver `seeding.py`).
+
+    Se o hash gravado é igual ao da definição atual, a semeadura é pulada.
+    """
+    __tablename__ = 'seed_state'
+    name = db.Column(db.String(50), primary_key=True, comment="Nome do conjunto de dados iniciais (ex: 'essential').")
+    hash = db.Column(db.String(64), nullable=False, comment="SHA-256 da definição aplicada.")
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           comment="Quando a definição foi aplicada pela última vez.")
+
+    def __repr__(self):
+        return f'<SeedState {self.name} {self.hash[:12]}>'
+
 class SetorAtendido(db.Model):
     """
     Modelo para listar e gerenciar os setores de mercado ou tipos de clientes que o escritório atende.
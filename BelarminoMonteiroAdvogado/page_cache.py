@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Cache de Páginas HTML Renderizadas (Rotas Públicas)
+==============================================================================
+
+As rotas públicas mais acessadas (`main.home`, `main.pagina_dinamica` e
+`main.todas_areas_atuacao`) consultam o banco e renderizam Jinja2 a cada
+acesso, embora seu HTML só mude quando o administrador edita conteúdo ou troca
+o tema. Em rajadas de crawlers, isso derruba a única instância F1.
+
+Este módulo guarda o HTML já renderizado em memória e o devolve diretamente.
+
+Chave e Invalidação:
+--------------------
+-   **Chave:** `(request.path, tema ativo)`.
+-   **Por página:** cada entrada guarda o `Pagina.data_modificacao` da página
+    que a originou (lido de `page_registry.py`, sem consulta). Os listeners de `models.py` já atualizam esse campo quando
+    `ConteudoGeral` ou `AreaAtuacao` da página mudam.
+-   **Global:** cada entrada guarda a geração (ver `site_cache.py`) das tabelas
+    que compõem o layout e as seções compartilhadas: `ConteudoGeral`,
+    `AreaAtuacao`, `Depoimento`, `ClienteParceiro`, `MembroEquipe`,
+    `HomePageSection`, `CustomHomeSection` e `ThemeSettings`.
+
+Memória:
+--------
+O cache é limitado tanto por número de entradas (`PAGE_CACHE_MAX_ENTRIES`)
+quanto por bytes (`PAGE_CACHE_MAX_BYTES`), com descarte LRU. Contadores de
+acertos, faltas e descartes ficam disponíveis em `PageCache.stats()` e na
+rota `/admin/cache-stats`.
+
+GET Condicional (ETag / Last-Modified):
+---------------------------------------
+Os mesmos carimbos que validam uma entrada do cache geram os validadores HTTP
+da resposta, sem precisar do corpo:
+
+-   **ETag:** hash de `(BOOT_ID, chave, geração, data_modificacao)`. O
+    `BOOT_ID` entra porque os contadores de geração recomeçam do zero a cada
+    início do processo; sem ele, uma ETag antiga poderia coincidir com a de um
+    conteúdo diferente após um reinício.
+-   **Last-Modified:** o mais recente entre `data_modificacao` da página, o
+    último commit nas tabelas acima e o início do processo.
+
+Uma requisição com `If-None-Match` / `If-Modified-Since` ainda válidos recebe
+`304 Not Modified` antes de qualquer consulta de conteúdo ou renderização.
+Desative com `CONDITIONAL_GET_ENABLED=False`.
+
+Banco Compartilhado:
+--------------------
+As gerações são contadas em cada processo. Com um `DATABASE_URL` de rede
+(ex: Cloud SQL), um commit feito em outra instância não invalida este cache
+nem os validadores, então ambos ficam desligados por padrão (com um aviso no
+log). Configurar `PAGE_CACHE_ENABLED`/`CONDITIONAL_GET_ENABLED` explicitamente
+tem prioridade.
+
+O que NUNCA é armazenado:
+-------------------------
+-   Respostas diferentes de 200 ou que não sejam HTML.
+-   Páginas que embutem o token CSRF da sessão atual.
+-   Requisições com mensagens flash pendentes (o toast é por usuário).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import Flask, current_app, g, request, session
+from werkzeug.http import is_resource_modified
+from werkzeug.wrappers import Response
+
+from .db_pool import is_shared_database
+from .models import (
+    ConteudoGeral, AreaAtuacao, Depoimento, ClienteParceiro,
+    MembroEquipe, HomePageSection, CustomHomeSection, ThemeSettings
+)
+from .page_registry import get_page_registry
+from .site_cache import BOOT_ID, get_generation, get_last_change, get_site_snapshot
+
+# Tabelas cujo commit invalida TODAS as páginas em cache.
+PAGE_CACHE_TABLES: Tuple[str, ...] = (
+    ConteudoGeral.__tablename__,
+    AreaAtuacao.__tablename__,
+    Depoimento.__tablename__,
+    ClienteParceiro.__tablename__,
+    MembroEquipe.__tablename__,
+    HomePageSection.__tablename__,
+    CustomHomeSection.__tablename__,
+    ThemeSettings.__tablename__,
+)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024  # 16 MB: folga confortável nos 256 MB de uma F1.
+
+
+class PageCache:
+    """
+    Cache LRU de respostas HTML, limitado por entradas e por bytes.
+
+    Cada entrada guarda o corpo, o mimetype e os "carimbos" de validade
+    (geração global e data de modificação da página). Uma entrada com carimbo
+    diferente do atual é tratada como falta e descartada.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            max_entries (int): Número máximo de páginas armazenadas.
+            max_bytes (int): Soma máxima, em bytes, dos corpos armazenados.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[str, str], generation: Tuple[int, ...], page_stamp: Any) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma entrada válida para a chave e os carimbos informados.
+
+        Returns:
+            Dict | None: A entrada (`body`, `mimetype`) ou None em caso de falta.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry['generation'] != generation or entry['page_stamp'] != page_stamp:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: Tuple[str, str], body: bytes, mimetype: str,
+            generation: Tuple[int, ...], page_stamp: Any) -> bool:
+        """
+        Armazena uma resposta, descartando as entradas menos usadas se necessário.
+
+        Returns:
+            bool: False se o corpo sozinho excede `max_bytes` (não armazenado).
+        """
+        size = len(body)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                'body': body,
+                'mimetype': mimetype,
+                'generation': generation,
+                'page_stamp': page_stamp,
+            }
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            return True
+
+    def clear(self) -> None:
+        """Remove todas as entradas (os contadores são mantidos)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas de uso do cache.
+
+        Returns:
+            Dict[str, Any]: entradas, bytes, acertos, faltas, descartes e taxa de acerto.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        """Remove uma entrada e atualiza o total de bytes. Requer `_lock`."""
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry['body'])
+
+
+def init_page_cache(app: Flask) -> PageCache:
+    """
+    Cria o cache de páginas da aplicação a partir da configuração.
+
+    Configurações:
+        PAGE_CACHE_ENABLED (bool): Liga/desliga o cache. Padrão: True (False com banco compartilhado).
+        PAGE_CACHE_MAX_ENTRIES (int): Padrão: 256.
+        PAGE_CACHE_MAX_BYTES (int): Padrão: 16 MB.
+        CONDITIONAL_GET_ENABLED (bool): Liga/desliga ETag/Last-Modified. Padrão: True
+            (False com banco compartilhado).
+
+    Args:
+        app (Flask): A aplicação.
+
+    Returns:
+        PageCache: A instância registrada em `app.extensions['page_cache']`.
+    """
+    local = not is_shared_database(app.config.get('SQLALCHEMY_DATABASE_URI'))
+    if not local and ('PAGE_CACHE_ENABLED' not in app.config or 'CONDITIONAL_GET_ENABLED' not in app.config):
+        app.logger.warning("[PAGE CACHE] Banco compartilhado: cache de páginas e GET condicional desligados, "
+                           "pois commits de outras instâncias não invalidam as gerações deste processo.")
+    app.config.setdefault('PAGE_CACHE_ENABLED', local)
+    app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+    app.config.setdefault('PAGE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+    app.config.setdefault('CONDITIONAL_GET_ENABLED', local)
+    cache = PageCache(
+        max_entries=int(app.config['PAGE_CACHE_MAX_ENTRIES']),
+        max_bytes=int(app.config['PAGE_CACHE_MAX_BYTES']),
+    )
+    app.extensions['page_cache'] = cache
+    return cache
+
+
+def get_page_cache(app: Flask = None) -> Optional[PageCache]:
+    """Retorna o `PageCache` da aplicação (ou None se não inicializado)."""
+    app = app or current_app
+    return app.extensions.get('page_cache')
+
+
+def compute_validators(key: Tuple[str, str], generation: Tuple[int, ...],
+                       page_stamp: Optional[datetime]) -> Tuple[str, datetime]:
+    """
+    Calcula a ETag e o Last-Modified de uma página a partir dos seus carimbos.
+
+    Args:
+        key (Tuple[str, str]): A chave `(caminho, tema)` da página.
+        generation (Tuple[int, ...]): Geração atual de `PAGE_CACHE_TABLES`.
+        page_stamp (datetime | None): `Pagina.data_modificacao` (UTC, sem fuso).
+
+    Returns:
+        Tuple[str, datetime]: A ETag (sem aspas) e o Last-Modified em UTC,
+        truncado para segundos (a resolução do cabeçalho HTTP).
+    """
+    raw = repr((BOOT_ID, key, generation, page_stamp.isoformat() if page_stamp else None))
+    etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    last_modified = get_last_change(*PAGE_CACHE_TABLES)
+    if page_stamp is not None:
+        last_modified = max(last_modified, page_stamp.replace(tzinfo=timezone.utc))
+    return etag, last_modified.replace(microsecond=0)
+
+
+def _is_cacheable(response: Response) -> bool:
+    """Verifica se a resposta pode ser compartilhada entre visitantes."""
+    if response.status_code != 200 or response.mimetype != 'text/html' or response.direct_passthrough:
+        return False
+    if '_flashes' in session:
+        return False
+    csrf_token = g.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))
+    if csrf_token and csrf_token.encode('utf-8') in response.get_data():
+        return False
+    return True
+
+
+def cached_page(page_slug: Callable[..., str]) -> Callable:
+    """
+    Decorador que serve a view a partir do `PageCache` quando possível e
+    responde `304 Not Modified` a GETs condicionais ainda válidos.
+
+    Args:
+        page_slug (Callable[..., str]): Recebe os argumentos da view e retorna
+            o slug da `Pagina` cujo `data_modificacao` valida a entrada
+            (ex: `lambda slug: slug` para a rota dinâmica).
+
+    Returns:
+        Callable: O decorador.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_page_cache()
+            use_cache = cache is not None and current_app.config.get('PAGE_CACHE_ENABLED', True)
+            use_validators = current_app.config.get('CONDITIONAL_GET_ENABLED', True)
+            if (not (use_cache or use_validators)
+                    or request.method not in ('GET', 'HEAD') or '_flashes' in session):
+                return view(*args, **kwargs)
+
+            try:
+                key = (request.path, get_site_snapshot().theme)
+                generation = get_generation(*PAGE_CACHE_TABLES)
+                stamp = get_page_registry().stamp(page_slug(*args, **kwargs))
+            except Exception as e:
+                # Sem banco disponível o cache não tem como validar: a view decide o que fazer.
+                current_app.logger.warning(f"[PAGE_CACHE] Cache ignorado para '{request.path}': {e}")
+                return view(*args, **kwargs)
+
+            etag = last_modified = None
+            # Slug sem `Pagina` (ex: 404): não há o que validar, a view decide.
+            if use_validators and stamp is not None:
+                etag, last_modified = compute_validators(key, generation, stamp)
+                if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                    response = current_app.response_class(status=304)
+                    _set_validators(response, etag, last_modified)
+                    return response
+
+            entry = cache.get(key, generation, stamp) if use_cache else None
+            if entry is not None:
+                response = current_app.response_class(entry['body'], status=200, mimetype=entry['mimetype'])
+                response.headers['X-Page-Cache'] = 'HIT'
+                _set_validators(response, etag, last_modified)
+                return response
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if _is_cacheable(response):
+                if use_cache:
+                    cache.set(key, response.get_data(), response.mimetype, generation, stamp)
+                response.headers['X-Page-Cache'] = 'MISS' if use_cache else 'BYPASS'
+                _set_validators(response, etag, last_modified)
+            else:
+                response.headers['X-Page-Cache'] = 'BYPASS'
+            return response
+        return wrapper
+    return decorator
+
+
+def _set_validators(response: Response, etag: Optional[str], last_modified: Optional[datetime]) -> None:
+    """Aplica ETag e Last-Modified à resposta, se calculados."""
+    if etag is None:
+        return
+    response.set_etag(etag)
+    response.last_modified = last_modified
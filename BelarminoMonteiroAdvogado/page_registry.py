@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Registro de Páginas: Árvore de Navegação e Tabela de Rotas
+==============================================================================
+
+A rota coringa `main.pagina_dinamica` e o menu de navegação consultavam a
+tabela `pagina` a cada requisição. Como o conjunto de páginas só muda quando o
+administrador edita o menu, este módulo materializa, em uma única consulta:
+
+-   **Tabela de rotas:** `slug -> RotaPagina(template_path, tipo, ativo,
+    data_modificacao)`. Resolver uma página dinâmica vira uma busca em dicionário.
+-   **Árvore de navegação:** páginas raiz ativas e visíveis no menu, ordenadas
+    por `ordem`, com os filhos já montados (cópias `RegistroCongelado`).
+
+O registro é reconstruído quando a geração da tabela `pagina` muda, ou seja,
+após qualquer commit que insira, altere ou remova uma `Pagina` (ver
+`site_cache.py`). Fica em `app.extensions['page_registry']`.
+"""
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy.orm import lazyload
+
+from .models import db, Pagina
+from .site_cache import RegistroCongelado, get_generation
+
+_build_lock = threading.Lock()
+
+
+class RotaPagina(NamedTuple):
+    """Dados de uma `Pagina` necessários para atender a rota dinâmica."""
+    template_path: Optional[str]
+    tipo: Optional[str]
+    ativo: bool
+    data_modificacao: Optional[datetime]
+
+
+class PageRegistry:
+    """
+    Tabela de rotas e árvore de navegação imutáveis, construídas de uma vez.
+
+    Attributes:
+        generation (Tuple[int, ...]): Geração de `pagina` usada na construção.
+        routes (Dict[str, RotaPagina]): Rotas por slug (todas as páginas).
+        nav_pages (Tuple[RegistroCongelado, ...]): Páginas raiz do menu com `children`.
+        built_at (datetime): Momento (UTC) da construção.
+    """
+
+    def __init__(self, generation: Tuple[int, ...], pages: List[Pagina]):
+        """
+        Args:
+            generation (Tuple[int, ...]): Geração a registrar.
+            pages (List[Pagina]): Todas as páginas, sem relacionamentos carregados.
+        """
+        self.generation = generation
+        self.routes: Dict[str, RotaPagina] = {
+            page.slug: RotaPagina(page.template_path, page.tipo, bool(page.ativo), page.data_modificacao)
+            for page in pages
+        }
+
+        # Mesma ordenação do antigo `order_by(Pagina.ordem)`: nulos primeiro, empates por id.
+        ordered = sorted(pages, key=lambda p: (p.ordem is not None, p.ordem or 0, p.id))
+        children_of: Dict[Optional[int], List[Pagina]] = {}
+        for page in ordered:
+            children_of.setdefault(page.parent_id, []).append(page)
+
+        def freeze(page: Pagina, seen: frozenset) -> RegistroCongelado:
+            # `seen` protege contra ciclos acidentais em `parent_id`.
+            children = tuple(
+                freeze(child, seen | {page.id})
+                for child in children_of.get(page.id, []) if child.id not in seen
+            )
+            return RegistroCongelado(page, children=children)
+
+        self.nav_pages: Tuple[RegistroCongelado, ...] = tuple(
+            freeze(page, frozenset())
+            for page in children_of.get(None, [])
+            if page.ativo and page.show_in_menu
+        )
+        self.built_at = datetime.now(timezone.utc)
+
+    def resolve(self, slug: str) -> Optional[RotaPagina]:
+        """
+        Busca a rota de um slug.
+
+        Args:
+            slug (str): O slug da página.
+
+        Returns:
+            RotaPagina | None: A rota, ou None se não houver página com esse slug.
+        """
+        return self.routes.get(slug)
+
+    def stamp(self, slug: str) -> Optional[datetime]:
+        """Retorna o `data_modificacao` da página (None se ela não existe)."""
+        route = self.routes.get(slug)
+        return route.data_modificacao if route else None
+
+
+def build_page_registry(generation: Tuple[int, ...] = None) -> PageRegistry:
+    """
+    Carrega todas as páginas (uma consulta, sem o auto-join de `children`) e
+    monta o registro.
+
+    Args:
+        generation (Tuple[int, ...], optional): Geração a registrar. Se None,
+            usa a geração atual de `pagina`.
+
+    Returns:
+        PageRegistry: O registro recém-construído.
+    """
+    if generation is None:
+        generation = get_generation(Pagina.__tablename__)
+    # `populate_existing`: a sessão pode guardar uma `Pagina` já carregada, e o
+    # `data_modificacao` pode ter mudado por UPDATE direto (ver `models.py`).
+    pages = (db.session.query(Pagina).options(lazyload(Pagina.children))
+             .populate_existing().order_by(Pagina.id).all())
+    return PageRegistry(generation, pages)
+
+
+def get_page_registry(app: Flask = None) -> PageRegistry:
+    """
+    Retorna o registro vigente, reconstruindo-o só se alguma `Pagina` mudou.
+
+    Args:
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+
+    Returns:
+        PageRegistry: O registro (na chamada "quente", sem nenhuma consulta ao DB).
+    """
+    app = app or current_app._get_current_object()
+    generation = get_generation(Pagina.__tablename__)
+    registry = app.extensions.get('page_registry')
+    if registry is not None and registry.generation == generation:
+        return registry
+
+    with _build_lock:
+        registry = app.extensions.get('page_registry')
+        if registry is not None and registry.generation == generation:
+            return registry
+        registry = build_page_registry(generation)
+        app.extensions['page_registry'] = registry
+        app.logger.debug(f"[PAGE_REGISTRY] Registro reconstruído: {len(registry.routes)} páginas (geração {generation}).")
+        return registry
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Instrumentação por Requisição (`Server-Timing` e Log de Requisições Lentas)
+==============================================================================
+
+Desligada por padrão. Com `REQUEST_TIMING_ENABLED` (config ou variável de
+ambiente), cada requisição mede:
+
+-   **db:** número e tempo das consultas, pelos eventos de cursor do
+    SQLAlchemy (`before/after_cursor_execute`) no engine da aplicação;
+-   **ctx:** tempo dos context processors (ex: `inject_global_vars`);
+-   **tpl:** tempo de renderização dos templates, pelos sinais
+    `before_render_template`/`template_rendered` (as consultas disparadas
+    durante a renderização, como relacionamentos lazy, também contam em `db`);
+-   **total:** do primeiro `before_request` ao último `after_request`.
+
+O resultado vai no cabeçalho `Server-Timing` (aba Network > Timing do
+DevTools), por exemplo:
+
+    Server-Timing: db;dur=4.2;desc="9 queries", ctx;dur=0.3, tpl;dur=38.5;desc="home/home_option9.html", total;dur=47.1
+
+Em um acerto do cache de páginas (`X-Page-Cache: HIT`) não há `tpl` nem
+`ctx`: o HTML não foi renderizado.
+
+Requisições com `total` acima de `REQUEST_TIMING_SLOW_MS` são registradas no
+log (`[TIMING]`, com o endpoint e os templates) em uma amostra de
+`REQUEST_TIMING_SAMPLE_RATE` delas, e as mais recentes ficam em
+`/admin/cache-stats`. Com `REQUEST_TIMING_HEADER=False` o cabeçalho não é
+enviado e só o log é mantido.
+
+Configurações: `REQUEST_TIMING_ENABLED` (False), `REQUEST_TIMING_HEADER`
+(True), `REQUEST_TIMING_SLOW_MS` (500), `REQUEST_TIMING_SAMPLE_RATE` (1.0).
+"""
+import functools
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import Flask, before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+from .models import db
+
+DEFAULTS: Dict[str, Any] = {
+    'REQUEST_TIMING_ENABLED': False,
+    'REQUEST_TIMING_HEADER': True,
+    'REQUEST_TIMING_SLOW_MS': 500,
+    'REQUEST_TIMING_SAMPLE_RATE': 1.0,
+}
+
+# Quantas requisições lentas recentes ficam disponíveis em `/admin/cache-stats`.
+_RECENT_SLOW = 20
+
+
+def _setting(app: Flask, name: str) -> Any:
+    """Valor de `app.config[name]`, da variável de ambiente de mesmo nome ou o padrão."""
+    if name in app.config:
+        return app.config[name]
+    raw = os.environ.get(name)
+    default = DEFAULTS[name]
+    if raw is None or raw.strip() == '':
+        return default
+    if isinstance(default, bool):
+        return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+    return type(default)(raw)
+
+
+class RequestTiming:
+    """
+    Medições de uma requisição (guardadas em `g`).
+
+    Attributes:
+        queries (int): Consultas executadas.
+        db_ms, ctx_ms, tpl_ms (float): Tempo no banco, nos context processors
+            e na renderização de templates.
+        templates (List[str]): Templates renderizados, na ordem.
+    """
+
+    __slots__ = ('start', 'queries', 'db_ms', 'ctx_ms', 'tpl_ms', 'templates', '_render_start')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.ctx_ms = 0.0
+        self.tpl_ms = 0.0
+        self.templates: List[str] = []
+        self._render_start: List[float] = []
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self, total_ms: float, page_cache: Optional[str] = None) -> str:
+        """
+        Valor do cabeçalho `Server-Timing`.
+
+        Args:
+            total_ms (float): Duração total da requisição.
+            page_cache (str, optional): Valor de `X-Page-Cache`, se houver.
+
+        Returns:
+            str: As métricas separadas por vírgula (durações em ms).
+        """
+        metrics = [f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"']
+        if self.ctx_ms:
+            metrics.append(f'ctx;dur={self.ctx_ms:.1f}')
+        if self.templates:
+            metrics.append(f'tpl;dur={self.tpl_ms:.1f};desc="{self.templates[0]}"')
+        if page_cache:
+            metrics.append(f'page-cache;desc="{page_cache}"')
+        metrics.append(f'total;dur={total_ms:.1f}')
+        return ', '.join(metrics)
+
+
+def _current() -> Optional[RequestTiming]:
+    return g.get('_request_timing') if has_request_context() else None
+
+
+class SlowRequestLog:
+    """Contadores e amostras recentes de requisições lentas (thread-safe)."""
+
+    def __init__(self, slow_ms: float, sample_rate: float):
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.slow_requests = 0
+        self.recent = deque(maxlen=_RECENT_SLOW)
+
+    def record(self, app: Flask, timing: RequestTiming, total_ms: float, status: int) -> None:
+        with self._lock:
+            self.requests += 1
+            if total_ms < self.slow_ms:
+                return
+            self.slow_requests += 1
+        if random.random() >= self.sample_rate:
+            return
+        entry = {
+            'endpoint': request.endpoint, 'method': request.method, 'path': request.path, 'status': status,
+            'total_ms': round(total_ms, 1), 'db_ms': round(timing.db_ms, 1), 'queries': timing.queries,
+            'ctx_ms': round(timing.ctx_ms, 1), 'tpl_ms': round(timing.tpl_ms, 1), 'templates': timing.templates,
+        }
+        with self._lock:
+            self.recent.append(entry)
+        app.logger.warning(
+            f"[TIMING] Requisição lenta: {entry['method']} {entry['path']} ({entry['endpoint']}) {status} "
+            f"em {entry['total_ms']} ms | db {entry['db_ms']} ms / {entry['queries']} queries | "
+            f"ctx {entry['ctx_ms']} ms | tpl {entry['tpl_ms']} ms {timing.templates}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Resumo para `/admin/cache-stats`."""
+        with self._lock:
+            return {
+                'slow_ms': self.slow_ms,
+                'sample_rate': self.sample_rate,
+                'requests': self.requests,
+                'slow_requests': self.slow_requests,
+                'recent_slow': list(self.recent),
+            }
+
+
+def _timed_context_processor(func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timing = _current()
+        if timing is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timing.ctx_ms += (time.perf_counter() - start) * 1000
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        conn.info.setdefault('_request_timing_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = _current()
+    starts = conn.info.get('_request_timing_start')
+    if timing is None or not starts:
+        return
+    timing.queries += 1
+    timing.db_ms += (time.perf_counter() - starts.pop()) * 1000
+
+
+def _handle_error(exception_context):
+    # Consulta que falhou: descarta o início pendente para não desalinhar as próximas.
+    conn = exception_context.connection
+    starts = conn.info.get('_request_timing_start') if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def _before_render(sender, template, context, **extra):
+    timing = _current()
+    if timing is not None:
+        timing._render_start.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    timing = _current()
+    if timing is None or not timing._render_start:
+        return
+    timing.tpl_ms += (time.perf_counter() - timing._render_start.pop()) * 1000
+    timing.templates.append(template.name)
+
+
+def init_request_timing(app: Flask) -> Optional[SlowRequestLog]:
+    """
+    Liga a instrumentação por requisição, se `REQUEST_TIMING_ENABLED`.
+
+    Deve ser chamado após o registro dos blueprints e context processors
+    (apenas os já registrados são medidos em `ctx`) e dentro de um contexto
+    da aplicação (acessa `db.engine`). Desligada, não registra nenhum evento.
+
+    Args:
+        app (Flask): A aplicação.
+
+    Returns:
+        SlowRequestLog | None: O log registrado em
+        `app.extensions['request_timing']`, ou None se desligada.
+    """
+    if not _setting(app, 'REQUEST_TIMING_ENABLED'):
+        return None
+    send_header = _setting(app, 'REQUEST_TIMING_HEADER')
+    slow_log = SlowRequestLog(float(_setting(app, 'REQUEST_TIMING_SLOW_MS')),
+                              float(_setting(app, 'REQUEST_TIMING_SAMPLE_RATE')))
+    app.extensions['request_timing'] = slow_log
+
+    event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(db.engine, 'handle_error', _handle_error)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    for processors in app.template_context_processors.values():
+        processors[:] = [_timed_context_processor(func) for func in processors]
+
+    def start_timing():
+        g._request_timing = RequestTiming()
+
+    def finish_timing(response):
+        timing = g.pop('_request_timing', None)
+        if timing is None:
+            return response
+        total_ms = timing.total_ms()
+        if send_header:
+            response.headers.add('Server-Timing',
+                                 timing.server_timing(total_ms, response.headers.get('X-Page-Cache')))
+        slow_log.record(app, timing, total_ms, response.status_code)
+        return response
+
+    # Primeiro `before_request` e último `after_request` da aplicação: inclui
+    # o cache de páginas, a compressão e os cabeçalhos globais no `total`.
+    app.before_request_funcs.setdefault(None, []).insert(0, start_timing)
+    app.after_request_funcs.setdefault(None, []).insert(0, finish_timing)
+    app.logger.info(f"[TIMING] Instrumentação ativa (lentas: >= {slow_log.slow_ms:.0f} ms, "
+                    f"amostra {slow_log.sample_rate:.0%}).")
+    return slow_log
+
+
+def get_request_timing(app: Flask = None) -> Optional[SlowRequestLog]:
+    """Retorna o log de requisições lentas da aplicação (None se desligado)."""
+    app = app or current_app
+    return app.extensions.get('request_timing')
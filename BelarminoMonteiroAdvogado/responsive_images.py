@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Imagens Responsivas: Manifesto de Derivadas e `srcset`
+==============================================================================
+
+O `ImageProcessor` gera, para cada imagem, uma escada de larguras em WebP (e
+AVIF, se disponível) ao lado do arquivo original (`equipe-640w.webp`). Este
+módulo mantém o manifesto dessas derivadas e o expõe aos templates.
+
+Fluxo:
+------
+1.  **Build (`flask build-assets`):** percorre `static/images`, gera as
+    derivadas que faltam ou estão desatualizadas e grava
+    `static/responsive-images.json` (`caminho -> largura, altura, versão e
+    candidatos por MIME`). Derivadas órfãs são removidas.
+2.  **Upload:** `ImageProcessor.optimize_image` gera as derivadas da imagem
+    enviada e chama `register_responsive_image`, que atualiza o manifesto em
+    memória e em disco.
+3.  **Execução:** o manifesto é lido uma vez em `create_app`
+    (`app.extensions['responsive_images']`). A macro `responsive_img` de
+    `templates/_images.html` consulta o global Jinja `responsive_image()`
+    e emite `<picture>` com `srcset`/`sizes`, `width` e `height` intrínsecos.
+    Imagens fora do manifesto recebem um `<img>` simples.
+
+Como `/static` é servido com `max-age` de um ano, todas as URLs levam
+`?v=<hash do conteúdo da origem>`.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from flask import Flask, current_app, has_app_context, url_for
+
+RESPONSIVE_MANIFEST_FILENAME = 'responsive-images.json'
+
+# Apenas fotos e ilustrações rasterizadas; GIFs (animados) ficam de fora.
+RESPONSIVE_SOURCE_EXTENSIONS: Tuple[str, ...] = ('.jpg', '.jpeg', '.png', '.webp')
+RESPONSIVE_ROOT = 'images'
+
+# Diretórios ignorados: backups do otimizador e ícones (tamanhos fixos).
+_EXCLUDED_DIRS = ('originals', 'favicons')
+_EXCLUDED_DIR_PREFIXES = ('images_backup',)
+
+_manifest_lock = threading.Lock()
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, dict]]:
+    """Lê o manifesto do disco; retorna None se ausente ou inválido."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_manifest(path: str, manifest: Dict[str, dict]) -> None:
+    """Grava o manifesto de forma atômica."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _iter_sources(static_folder: str):
+    """Produz os caminhos absolutos das imagens elegíveis sob `static/images`."""
+    from .image_processor import is_derivative
+
+    root = os.path.join(static_folder, RESPONSIVE_ROOT)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in _EXCLUDED_DIRS and not d.startswith(_EXCLUDED_DIR_PREFIXES)
+        )
+        for filename in sorted(filenames):
+            if filename.lower().endswith(RESPONSIVE_SOURCE_EXTENSIONS) and not is_derivative(filename):
+                yield os.path.join(dirpath, filename)
+
+
+def build_responsive_images(static_folder: str, processor=None, force: bool = False) -> Dict[str, int]:
+    """
+    Gera as derivadas de todas as imagens de `static/images` e grava o manifesto.
+
+    Args:
+        static_folder (str): O diretório `static` da aplicação.
+        processor (ImageProcessor, optional): O processador. Padrão: a
+            instância global `image_processor`.
+        force (bool): Regrava todas as derivadas. Padrão: False.
+
+    Returns:
+        Dict[str, int]: `images` (no manifesto), `derivatives` (arquivos
+        referenciados), `removed` (derivadas órfãs apagadas) e `failed`.
+    """
+    from .image_processor import image_processor, is_derivative
+
+    processor = processor or image_processor
+    manifest: Dict[str, dict] = {}
+    stats = {'images': 0, 'derivatives': 0, 'removed': 0, 'failed': 0}
+    referenced = set()
+
+    for source in _iter_sources(static_folder):
+        entry = processor.generate_derivatives(source, force=force)
+        if entry is None:
+            stats['failed'] += 1
+            continue
+        relpath = os.path.relpath(source, static_folder).replace(os.sep, '/')
+        manifest[relpath] = entry
+        directory = os.path.dirname(source)
+        for candidates in entry['sources'].values():
+            for _width, name in candidates:
+                referenced.add(os.path.join(directory, name))
+
+    # Derivadas cuja origem sumiu (ou cuja largura saiu da escada).
+    root = os.path.join(static_folder, RESPONSIVE_ROOT)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in _EXCLUDED_DIRS and not d.startswith(_EXCLUDED_DIR_PREFIXES)]
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if is_derivative(filename) and path not in referenced:
+                os.remove(path)
+                stats['removed'] += 1
+
+    stats['images'] = len(manifest)
+    stats['derivatives'] = sum(1 for path in referenced if is_derivative(path))
+    with _manifest_lock:
+        _write_manifest(os.path.join(static_folder, RESPONSIVE_MANIFEST_FILENAME), manifest)
+    return stats
+
+
+def register_responsive_image(image_path: Union[Path, str], entry: dict, app: Flask = None) -> None:
+    """
+    Adiciona (ou substitui) uma imagem no manifesto, em memória e em disco.
+
+    Imagens fora de `static/` são ignoradas, pois não têm URL pública.
+
+    Args:
+        image_path (str | Path): O arquivo servido no `src` (caminho absoluto ou
+            relativo ao diretório de trabalho).
+        entry (dict): O retorno de `ImageProcessor.generate_derivatives`.
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+    """
+    if app is None:
+        if not has_app_context():
+            return
+        app = current_app._get_current_object()
+    try:
+        relpath = Path(image_path).resolve().relative_to(Path(app.static_folder).resolve()).as_posix()
+    except ValueError:
+        return
+
+    manifest_path = os.path.join(app.static_folder, RESPONSIVE_MANIFEST_FILENAME)
+    with _manifest_lock:
+        # Cópia na escrita: renderizações em andamento continuam com o dicionário anterior.
+        manifest = dict(_read_manifest(manifest_path) or app.extensions.get('responsive_images', {}))
+        manifest[relpath] = entry
+        try:
+            _write_manifest(manifest_path, manifest)
+        except OSError as e:
+            # Sistema de arquivos somente leitura (App Engine): vale só para este processo.
+            app.logger.warning(f"[RESPONSIVE] Manifesto não gravado ({e}); mantido apenas em memória.")
+        app.extensions['responsive_images'] = manifest
+
+
+def unregister_responsive_images(relpaths, app: Flask = None) -> None:
+    """
+    Remove imagens apagadas do manifesto, em memória e em disco.
+
+    Args:
+        relpaths (Iterable[str]): Caminhos relativos a 'static/'.
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+    """
+    app = app or current_app._get_current_object()
+    manifest_path = os.path.join(app.static_folder, RESPONSIVE_MANIFEST_FILENAME)
+    with _manifest_lock:
+        manifest = dict(_read_manifest(manifest_path) or app.extensions.get('responsive_images', {}))
+        removed = [path for path in relpaths if manifest.pop(path, None) is not None]
+        if not removed:
+            return
+        try:
+            _write_manifest(manifest_path, manifest)
+        except OSError as e:
+            app.logger.warning(f"[RESPONSIVE] Manifesto não gravado ({e}); mantido apenas em memória.")
+        app.extensions['responsive_images'] = manifest
+
+
+def init_responsive_images(app: Flask) -> None:
+    """
+    Carrega o manifesto (se existir) e registra o global Jinja `responsive_image`.
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    manifest = _read_manifest(os.path.join(app.static_folder, RESPONSIVE_MANIFEST_FILENAME))
+    if manifest is None:
+        app.logger.debug("[RESPONSIVE] Manifesto ausente: imagens servidas sem srcset.")
+    app.extensions['responsive_images'] = manifest or {}
+    app.jinja_env.globals['responsive_image'] = responsive_image
+
+
+def responsive_image(src: Optional[str]) -> Optional[dict]:
+    """
+    Monta os dados de `<picture>` para uma imagem de `static/`.
+
+    Args:
+        src (str | None): O caminho relativo a `static/` (ex: 'images/Belarmino.png').
+
+    Returns:
+        dict | None: `{'src', 'width', 'height', 'sources': [(mime, srcset), ...]}`
+        (AVIF antes de WebP), ou None se a imagem não está no manifesto.
+    """
+    if not src:
+        return None
+    entry = current_app.extensions.get('responsive_images', {}).get(src)
+    if not entry:
+        return None
+
+    version = entry.get('version')
+    directory = src.rsplit('/', 1)[0] + '/' if '/' in src else ''
+    sources: List[Tuple[str, str]] = []
+    for mime, candidates in entry.get('sources', {}).items():
+        if candidates:
+            srcset = ', '.join(
+                f"{url_for('static', filename=directory + name, v=version)} {width}w"
+                for width, name in candidates
+            )
+            sources.append((mime, srcset))
+    sources.sort(key=lambda item: item[0] != 'image/avif')
+    return {
+        'src': url_for('static', filename=src, v=version),
+        'width': entry['width'],
+        'height': entry['height'],
+        'sources': sources,
+    }
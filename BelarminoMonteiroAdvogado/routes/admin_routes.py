@@ -40,19 +40,23 @@ from flask_wtf import FlaskForm
 from werkzeug.utils import secure_filename
 import secrets
 import json
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from pathlib import Path
+from datetime import datetime
 
 from ..models import (
     db, Pagina, ConteudoGeral, AreaAtuacao, MembroEquipe, User, Depoimento, 
-    ClienteParceiro, HomePageSection, ThemeSettings
+    ClienteParceiro, HomePageSection, ThemeSettings, ImageJob, OutboxEmail
 )
 from ..forms import (
     ChangePasswordForm, ThemeForm, DesignForm, MembroEquipeForm as TeamMemberForm
 )
-from ..image_processor import save_logo, process_and_save_image, image_processor
+# `image_processor` (Pillow) é importado dentro das views de upload, não na inicialização.
+from ..page_cache import get_page_cache
+from ..content_index import get_content_index
+from ..db_pool import get_pool_metrics
+from ..request_timing import get_request_timing
+from ..image_jobs import static_relpath, upload_folder
+from ..media_store import store_upload
+from ..mail_outbox import enqueue_email, get_mail_dispatcher, load_smtp_settings
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -106,31 +110,27 @@ def save_admin_upload(file, secao_name: str, page_identifier: str) -> tuple[bool
     
     try:
         original_filename = secure_filename(file.filename)
-        # Gera um nome de arquivo único para evitar colisões e problemas de cache.
+        # Nome de referência para o log: o arquivo é nomeado pelo hash do conteúdo (ver `media_store.py`),
+        # o que já evita colisões e problemas de cache.
         unique_filename_base = f"{secao_name}_{secrets.token_hex(4)}"
         
         # Usa o image_processor se for uma imagem permitida, caso contrário, salva diretamente.
         # As extensões permitidas já são definidas em ALLOWED_EXTENSIONS
         # image_processor.process_and_save_image já lida com WebP e otimização
         
-        upload_path_relative_to_static = Path(current_app.config['UPLOAD_FOLDER']).relative_to(Path(current_app.static_folder))
         final_file_path_relative = None
         
         # Tenta otimizar se for uma imagem, senão salva o arquivo original
         if original_filename.lower().endswith(tuple(['.png', '.jpg', '.jpeg', '.webp', '.gif'])):
             # A função save_logo já lida com a otimização e retorna o caminho relativo
+            from ..image_processor import save_logo
             final_file_path_relative = save_logo(file, unique_filename_base)
             if not final_file_path_relative:
                 raise Exception("Falha ao otimizar e salvar a imagem.")
         else:
-            # Para outros tipos de arquivo (ex: .ico, .mp4, .webm)
-            full_upload_folder = Path(current_app.static_folder) / upload_path_relative_to_static
-            full_upload_folder.mkdir(parents=True, exist_ok=True)
-            
-            final_filename = f"{unique_filename_base}{Path(file.filename).suffix}"
-            final_absolute_path = full_upload_folder / final_filename
-            file.save(str(final_absolute_path))
-            final_file_path_relative = str(upload_path_relative_to_static / final_filename).replace('\\', '/')
+            # Para outros tipos de arquivo (ex: .ico, .mp4, .webm): armazenados pelo hash do conteúdo.
+            final_absolute_path, _existed = store_upload(file, upload_folder())
+            final_file_path_relative = static_relpath(final_absolute_path)
         
         if not final_file_path_relative:
             raise Exception("Caminho final do arquivo não gerado.")
@@ -241,6 +241,8 @@ def dashboard():
                            all_testimonials=Depoimento.query.filter(Depoimento.aprovado==True).order_by(Depoimento.data_criacao.desc()).all(), # Adicionado filtro por aprovado
                            all_pending_testimonials=Depoimento.query.filter(Depoimento.aprovado==False).order_by(Depoimento.data_criacao.desc()).all(), # Depoimentos pendentes
                            all_clients=ClienteParceiro.query.order_by(ClienteParceiro.nome).all(),
+                           image_jobs=ImageJob.query.order_by(ImageJob.id.desc()).limit(20).all(),
+                           outbox_messages=OutboxEmail.query.order_by(OutboxEmail.id.desc()).limit(20).all(),
                            password_form=password_form,
                            theme_form=theme_form,
                            design_form=design_form, # Passando o DesignForm
@@ -309,6 +311,7 @@ def update_content():
                             # Otimiza e salva a imagem, atualizando o campo 'conteudo' com o novo caminho.
                             # A função `process_and_save_image` agora é um alias para `optimize_uploaded_image`
                             # que retorna (success, path, message).
+                            from ..image_processor import process_and_save_image
                             success, file_path, msg = process_and_save_image(file, current_app.config['UPLOAD_FOLDER'])
                             if success:
                                 item.conteudo = file_path # Caminho relativo já retornado
@@ -440,6 +443,7 @@ def add_area_atuacao():
     if request.files.get('foto'):
         try: 
             # save_logo já lida com otimização e nomes seguros
+            from ..image_processor import save_logo
             foto = save_logo(request.files['foto'], secure_filename(slug)) 
             current_app.logger.info(f"Foto para área de atuação '{titulo}' salva: {foto}")
         except Exception as e: 
@@ -554,6 +558,7 @@ def edit_service(slug: str):
                 secao_name = k.replace('content-', '')
                 try:
                     # process_and_save_image retorna (success, path, message)
+                    from ..image_processor import process_and_save_image
                     success, file_path, msg = process_and_save_image(f, current_app.config['UPLOAD_FOLDER'])
                     if success:
                         item = ConteudoGeral.query.filter_by(pagina=slug, secao=secao_name).first()
@@ -594,6 +599,7 @@ def add_membro_equipe():
     foto_path = None
     if request.files.get('foto'):
         try: 
+            from ..image_processor import save_logo
             foto_path = save_logo(request.files['foto'], secure_filename(nome))
             current_app.logger.info(f"Foto para {nome} salva: {foto_path}")
         except Exception as e: 
@@ -651,6 +657,7 @@ def edit_membro(id: int):
         # Lógica para fazer upload de uma nova foto
         elif request.files.get('foto'):
             try: 
+                from ..image_processor import save_logo
                 membro.foto = save_logo(request.files['foto'], secure_filename(membro.nome))
                 current_app.logger.info(f"Nova foto para '{membro.nome}' salva: {membro.foto}")
             except Exception as e: 
@@ -676,6 +683,7 @@ def add_cliente_parceiro():
 
     if request.files.get('logo'):
         try:
+            from ..image_processor import save_logo
             logo_path = save_logo(request.files['logo'], secure_filename(nome))
             novo_cliente = ClienteParceiro(nome=nome, logo_path=logo_path, site_url=site_url)
             db.session.add(novo_cliente)
@@ -819,38 +827,106 @@ def update_email_settings():
 def test_email():
     """
     Envia um e-mail de teste usando as configurações SMTP salvas.
+    A mensagem passa pela caixa de saída e a rota aguarda a rodada de envio.
     Retorna um JSON indicando sucesso ou falha.
     """
     current_app.logger.info("Iniciando teste de envio de e-mail.")
-    configs_email = {i.secao: i.conteudo for i in ConteudoGeral.query.filter_by(pagina='configuracoes_email').all()}
-    
+    settings = load_smtp_settings()
+    recipient = settings.user or settings.email_to
+    if not settings.server or not recipient:
+        return jsonify({'success': False, 'message': 'Falha ao enviar e-mail de teste: configurações SMTP incompletas. '
+                                                     'Verifique servidor e usuário.'})
+
+    # Mesmo caminho do formulário de contato: caixa de saída + despachante (e a mesma conexão SMTP).
+    now = datetime.now()
+    message = enqueue_email(
+        subject=f"Email de Teste - {now.strftime('%Y-%m-%d %H:%M:%S')}",
+        body=("Este é um e-mail de teste enviado do seu painel administrativo. Se você o recebeu, "
+              f"suas configurações SMTP estão corretas. Data/Hora: {now}"),
+        recipients=recipient, kind='teste')
+    db.session.commit()
     try:
-        # Tenta conectar ao servidor SMTP e enviar um e-mail.
-        smtp_server = configs_email.get('smtp_server')
-        smtp_port = int(configs_email.get('smtp_port') or 587)
-        smtp_user = configs_email.get('smtp_user')
-        smtp_pass = configs_email.get('smtp_pass')
-
-        if not all([smtp_server, smtp_user, smtp_pass]):
-            raise ValueError("Configurações SMTP incompletas. Verifique servidor, usuário e senha.")
-
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls() # Habilita TLS para comunicação segura
-            server.login(smtp_user, smtp_pass)
-            
-            msg = MIMEMultipart()
-            msg['From'] = smtp_user
-            msg['To'] = smtp_user # Envia para si mesmo para teste
-            msg['Subject'] = f"Email de Teste - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            msg.attach(MIMEText(f"Este é um e-mail de teste enviado do seu painel administrativo. Se você o recebeu, suas configurações SMTP estão corretas. Data/Hora: {datetime.now()}", 'plain'))
-            
-            server.sendmail(smtp_user, smtp_user, msg.as_string())
-        
+        get_mail_dispatcher().notify().result(timeout=60)
+    except Exception as e:
+        current_app.logger.error(f"Falha no envio do e-mail de teste: {e}", exc_info=True)
+        return jsonify({'success': False, 'message': f'Falha ao enviar e-mail de teste: {e}'})
+
+    db.session.refresh(message)
+    if message.status == 'sent':
         current_app.logger.info("Teste de e-mail enviado com sucesso.")
         return jsonify({'success': True, 'message': 'E-mail de teste enviado com sucesso!'})
-    except Exception as e: 
-        current_app.logger.error(f"Falha no envio do e-mail de teste: {e}", exc_info=True)
-        return jsonify({'success': False, 'message': f'Falha ao enviar e-mail de teste: {str(e)}'})
+    current_app.logger.error(f"Falha no envio do e-mail de teste: {message.last_error}")
+    return jsonify({'success': False, 'message': f'Falha ao enviar e-mail de teste: {message.last_error}'})
+
+@admin_bp.route('/cache-stats')
+@login_required
+def cache_stats():
+    """
+    Retorna, em JSON, as estatísticas dos caches em memória deste processo
+    (cache de páginas HTML e índice de `ConteudoGeral`, com tamanho e tempo
+    da última reconstrução) e as métricas do pool de conexões do banco. Com
+    `REQUEST_TIMING_ENABLED`, inclui as requisições lentas recentes.
+    """
+    page_cache = get_page_cache()
+    pool_metrics = get_pool_metrics()
+    request_timing = get_request_timing()
+    return jsonify({
+        'page_cache': page_cache.stats() if page_cache else None,
+        'content_index': get_content_index().stats(),
+        'db_pool': pool_metrics.stats(db.engine) if pool_metrics else None,
+        'request_timing': request_timing.stats() if request_timing else None,
+    })
+
+@admin_bp.route('/image-jobs')
+@login_required
+def image_jobs():
+    """
+    Retorna, em JSON, a contagem de tarefas de otimização de imagem por estado
+    e as 20 mais recentes (usado para acompanhar uploads em processamento).
+    """
+    counts = dict(db.session.query(ImageJob.status, db.func.count(ImageJob.id)).group_by(ImageJob.status).all())
+    recent = ImageJob.query.order_by(ImageJob.id.desc()).limit(20).all()
+    return jsonify({
+        'counts': counts,
+        'jobs': [{
+            'id': job.id,
+            'status': job.status,
+            'source_path': job.source_path,
+            'result_path': job.result_path,
+            'original_size': job.original_size,
+            'optimized_size': job.optimized_size,
+            'updated_rows': job.updated_rows,
+            'attempts': job.attempts,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        } for job in recent],
+    })
+
+@admin_bp.route('/mail-outbox')
+@login_required
+def mail_outbox():
+    """
+    Retorna, em JSON, a contagem de mensagens da caixa de saída por estado e
+    as 20 mais recentes (sem o corpo), para acompanhar entregas e falhas.
+    """
+    counts = dict(db.session.query(OutboxEmail.status, db.func.count(OutboxEmail.id)).group_by(OutboxEmail.status).all())
+    recent = OutboxEmail.query.order_by(OutboxEmail.id.desc()).limit(20).all()
+    return jsonify({
+        'counts': counts,
+        'messages': [{
+            'id': message.id,
+            'kind': message.kind,
+            'status': message.status,
+            'subject': message.subject,
+            'reply_to': message.reply_to,
+            'attempts': message.attempts,
+            'last_error': message.last_error,
+            'created_at': message.created_at.isoformat() if message.created_at else None,
+            'next_attempt_at': message.next_attempt_at.isoformat() if message.next_attempt_at else None,
+            'sent_at': message.sent_at.isoformat() if message.sent_at else None,
+        } for message in recent],
+    })
 
 @admin_bp.route('/change-password', methods=['POST'])
 @login_required
@@ -16,7 +16,8 @@ Funcionalidades do Blueprint:
   no banco de dados pelo seu `slug` e a renderiza com o template associado.
   É a espinha dorsal do sistema de gerenciamento de conteúdo.
 - **Contato (`/contato`):** Apresenta e processa o formulário de contato,
-  enviando um e-mail para o administrador com as informações submetidas.
+  colocando na caixa de saída (`mail_outbox.py`) um e-mail para o
+  administrador com as informações submetidas.
 - **SEO e Indexação:** Inclui rotas para `robots.txt` e `sitemap.xml`,
   essenciais para a otimização de mecanismos de busca.
 - **Service Worker:** Rota para servir o arquivo do service worker, fundamental
@@ -28,23 +29,27 @@ centraliza a busca de conteúdo no banco de dados, garantindo consistência.
 import logging
 import traceback
 import os
-import smtplib
 from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
 # Imports Flask e Extensões
-from flask import Blueprint, render_template, request, url_for, abort, current_app, jsonify, Response, g
+from flask import Blueprint, render_template, request, abort, current_app, jsonify, Response, g
+from werkzeug.http import is_resource_modified
 from werkzeug.utils import secure_filename
-from PIL import Image
 
 # Imports Locais
 from .. import db, render_page
 from ..models import (
-    AreaAtuacao, MembroEquipe, Depoimento, ConteudoGeral, User, Pagina, 
-    ClienteParceiro, SetorAtendido, HomePageSection, CustomHomeSection, ThemeSettings
+    AreaAtuacao, MembroEquipe, Depoimento, User,
+    ClienteParceiro, HomePageSection, CustomHomeSection, ThemeSettings
 )
 from ..forms import ContactForm
+from ..mail_outbox import enqueue_email
+from ..page_cache import cached_page
+from ..page_registry import get_page_registry
+from ..search_index import search as search_site
+from ..sitemaps import SITEMAP_FILENAME, sitemap_response
+from ..template_cache import warm_up
+from ..search_suggest import DEFAULT_SUGGEST_LIMIT, MAX_SUGGEST_QUERY_LENGTH, get_suggest_index, suggest_etag
 
 # Configuração do Logger
 logger = logging.getLogger(__name__)
@@ -83,6 +88,7 @@ def allowed_file(filename: str) -> bool:
 # --- SUBSTIUA APENAS A FUNÇÃO def home(): ---
 
 @main_bp.route('/')
+@cached_page(lambda: 'home')
 def home():
     """
     Renderiza a página inicial, garantindo o carregamento correto do template.
@@ -160,6 +166,7 @@ def politica_privacidade():
     return render_page('politica_privacidade.html', 'politica_privacidade')
 
 @main_bp.route('/areas-de-atuacao')
+@cached_page(lambda: 'areas-de-atuacao')
 def todas_areas_atuacao():
     """
     Definição de todas_areas_atuacao.
@@ -186,30 +193,9 @@ def pagina_contato():
         current_app.logger.info(f"Recebida submissão de formulário de contato de {nome} ({email}).")
 
         try:
-            email_settings_db = ConteudoGeral.query.filter_by(pagina='configuracoes_email').all()
-            email_config = {item.secao: item.conteudo for item in email_settings_db}
-
-            SMTP_SERVER = email_config.get('smtp_server')
-            try:
-                SMTP_PORT = int(email_config.get('smtp_port') or 587)
-            except (ValueError, TypeError):
-                SMTP_PORT = 587
-                current_app.logger.warning("Porta SMTP inválida no DB. Usando padrão 587.")
-            
-            SMTP_USER = email_config.get('smtp_user')
-            SMTP_PASS = email_config.get('smtp_pass')
-            EMAIL_TO = email_config.get('email_to', 'contato@belarminomonteiroadvogado.com.br')
-
-            if not all([SMTP_SERVER, SMTP_USER, SMTP_PASS]):
-                current_app.logger.error("Configurações SMTP incompletas no banco de dados.")
-                return jsonify({'success': False, 'message': 'Erro interno: Configurações de e-mail incompletas.'}), 500
-
-            msg = MIMEMultipart()
-            msg['From'] = SMTP_USER
-            msg['To'] = EMAIL_TO
-            msg['Subject'] = f"[{current_app.config.get('SITE_NAME', 'Site Contato')}] {assunto}"
-            msg['Reply-To'] = email
-
+            # [PERFORMANCE] A mensagem vai para a caixa de saída e é enviada em segundo plano
+            # (ver `mail_outbox.py`): a resposta não espera o servidor SMTP, e uma falha
+            # de envio não perde o contato.
             body = f"""Nova mensagem do site:
 Nome: {nome}
 Email: {email}
@@ -220,18 +206,16 @@ Mensagem:
 Enviado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
 IP: {request.remote_addr}
 """
-            msg.attach(MIMEText(body, 'plain'))
+            enqueue_email(subject=f"[{current_app.config.get('SITE_NAME', 'Site Contato')}] {assunto}",
+                          body=body, reply_to=email)
+            db.session.commit()
 
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                server.starttls()
-                server.login(SMTP_USER, SMTP_PASS)
-                server.sendmail(SMTP_USER, EMAIL_TO, msg.as_string())
-            
-            current_app.logger.info(f"E-mail enviado com sucesso para {EMAIL_TO}.")
+            current_app.logger.info(f"Mensagem de {email} registrada na caixa de saída.")
             return jsonify({'success': True, 'message': 'Mensagem enviada com sucesso!'})
             
         except Exception as e:
-            current_app.logger.error(f"Erro ao enviar e-mail: {e}", exc_info=True)
+            db.session.rollback()
+            current_app.logger.error(f"Erro ao registrar mensagem de contato: {e}", exc_info=True)
             return jsonify({'success': False, 'message': 'Erro ao enviar mensagem. Tente novamente.'}), 500
 
     return render_page('contato/contato.html', 'contato', form=form)
@@ -239,23 +223,36 @@ IP: {request.remote_addr}
 @main_bp.route('/search')
 def search():
     """
-    Definição de search.
-    Componente essencial para a arquitetura do sistema.
+    Busca em texto completo nas páginas, áreas, setores e equipe.
+
+    Os resultados vêm do índice FTS5 (`search_index.py`), ordenados por
+    relevância e com os termos destacados.
     """
-    query = request.args.get('q', '').strip()
+    query = request.args.get('q', '').strip()[:200]
     current_app.logger.info(f"Busca realizada: '{query}'")
-    results = []
-    if query:
-        areas = AreaAtuacao.query.filter(AreaAtuacao.titulo.ilike(f'%{query}%')).all()
-        for area in areas:
-            results.append({'titulo': area.titulo, 'url': url_for('main.pagina_dinamica', slug=area.slug), 'descricao': area.descricao, 'tipo': 'Área de Atuação'})
-
-        setores = SetorAtendido.query.filter(SetorAtendido.titulo.ilike(f'%{query}%')).all()
-        for setor in setores:
-            results.append({'titulo': setor.titulo, 'url': url_for('main.pagina_dinamica', slug=setor.slug), 'descricao': f"Setor: {setor.titulo}", 'tipo': 'Setor Atendido'})
-            
+    results = search_site(query) if query else []
     return render_template('search_results.html', query=query, results=results)
 
+@main_bp.route('/search/suggest')
+def search_suggest():
+    """
+    Sugestões da caixa de busca (JSON), servidas do índice em memória.
+
+    Não consulta o banco enquanto o conteúdo não muda. A ETag depende do
+    índice vigente e do texto normalizado, então o navegador revalida com
+    `If-None-Match` e recebe `304` sem corpo.
+    """
+    query = request.args.get('q', '')[:MAX_SUGGEST_QUERY_LENGTH]
+    index = get_suggest_index()
+    etag = suggest_etag(index, query, DEFAULT_SUGGEST_LIMIT)
+    if not is_resource_modified(request.environ, etag=etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(q=query, suggestions=[s._asdict() for s in index.suggest(query, DEFAULT_SUGGEST_LIMIT)])
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    return response
+
 @main_bp.route('/service-worker.js')
 def service_worker():
     """
@@ -284,32 +281,32 @@ def robots_txt():
 @main_bp.route('/sitemap.xml')
 def sitemap():
     """
-    Gera dinamicamente o sitemap.xml do site.
-    
-    Busca todas as páginas ativas no banco de dados e cria um mapa do site
-    em formato XML. Isso ajuda os mecanismos de busca a descobrir e indexar
-    todas as páginas importantes do site de forma mais eficiente.
+    Serve o sitemap.xml do site (ou o índice de sitemaps, se for grande).
+
+    O XML é gerado apenas quando alguma `Pagina` muda e fica em memória já
+    comprimido (ver `sitemaps.py`); o `lastmod` de cada URL é a data real de
+    modificação da página.
     """
-    urls = []
-    today = datetime.now().strftime('%Y-%m-%d')
-    pages = Pagina.query.filter_by(ativo=True).all()
-    for page in pages:
-        if page.tipo == 'grupo_menu' or not page.template_path:
-            continue
-        
-        if page.slug == 'home':
-            loc = url_for('main.home', _external=True)
-        else:
-            loc = url_for('main.pagina_dinamica', slug=page.slug, _external=True)
+    return sitemap_response(SITEMAP_FILENAME)
 
-        urls.append({
-            'loc': loc,
-            'lastmod': today,
-            'changefreq': 'weekly',
-            'priority': '0.8' if page.slug == 'home' else '0.6'
-        })
+@main_bp.route('/sitemap-<int:number>.xml')
+def sitemap_part(number: int):
+    """Serve uma parte do sitemap listada no índice `sitemap.xml`."""
+    response = sitemap_response(f'sitemap-{number}.xml')
+    if response is None:
+        abort(404)
+    return response
+
+@main_bp.route('/_ah/warmup')
+def warmup():
+    """
+    Requisição de aquecimento do App Engine (`inbound_services: warmup`).
 
-    return Response(render_template('sitemap.xml', urls=urls), mimetype='application/xml')
+    Compila os templates do tema ativo e monta os caches em memória antes do
+    primeiro visitante (ver `template_cache.py`). Só trabalha na primeira chamada.
+    """
+    warm_up(current_app._get_current_object())
+    return Response('OK', mimetype='text/plain', headers={'Cache-Control': 'no-store'})
 
 @main_bp.route('/depoimento/submit/<token>', methods=['GET', 'POST'])
 def submit_depoimento(token: str):
@@ -349,20 +346,20 @@ def submit_depoimento(token: str):
     return render_template('depoimentos/submit.html')
 
 @main_bp.route('/<path:slug>')
+@cached_page(lambda slug: slug)
 def pagina_dinamica(slug: str):
     """
     Definição de pagina_dinamica.
     Componente essencial para a arquitetura do sistema.
     """
-    page = Pagina.query.filter_by(slug=slug, ativo=True).first_or_404()
-    
-    if not page.template_path:
+    route = get_page_registry().resolve(slug)
+    if route is None or not route.ativo or not route.template_path:
         abort(404)
 
-    template_path = page.template_path
+    template_path = route.template_path
     content_id = slug
     
-    if page.tipo == 'servico':
+    if route.tipo == 'servico':
         if not template_path.startswith('areas_atuacao/'):
             template_path = f'areas_atuacao/{template_path}'
 
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Busca em Texto Completo (SQLite FTS5)
+==============================================================================
+
+A rota `/search` fazia `ILIKE '%termo%'` apenas nos títulos de
+`AreaAtuacao` e `SetorAtendido`: varredura completa das tabelas, sem acentos
+("previdencia" não achava "Previdência"), sem relevância e sem o texto das
+páginas. Este módulo mantém a tabela virtual `search_index` (FTS5) com um
+documento por item pesquisável:
+
+-   **Páginas (`Pagina`):** título do menu + campos de texto de `ConteudoGeral`
+    da página (HTML removido). Páginas `configuracoes_*`, grupos de menu e
+    páginas inativas ficam de fora.
+-   **Áreas de atuação, setores atendidos e membros da equipe:** título/nome e
+    descrição/biografia.
+
+Tokenização e Consulta:
+-----------------------
+-   O tokenizador `unicode61 remove_diacritics 2` ignora acentos e caixa, no
+    índice e na consulta.
+-   Cada termo vira uma consulta de prefixo (`"termo"*`, servida pelo índice
+    `prefix='2 3'`); termos longos perdem o 's' final. É uma aproximação do
+    radical em português: "advogados" encontra "advogado" e "advocacia" não
+    exige a palavra inteira.
+-   A ordenação usa `bm25`, com peso maior para o título; os trechos vêm de
+    `snippet()` com os termos em `<mark>`.
+
+Atualização:
+------------
+O `rowid` do documento é `código do tipo * 10**9 + id`. Os eventos de mapper
+registram em `Session.info` os documentos alterados na transação; no
+`before_commit` eles são recalculados na própria conexão da sessão, então o
+índice é gravado (ou desfeito) junto com o conteúdo. Operações em massa
+(`query.update()`/`query.delete()`) reconstroem o índice inteiro, assim como
+`flask search-index --rebuild`.
+
+Em bancos sem FTS5 (outros SGBDs), `search()` recorre a `LIKE` nos títulos.
+"""
+import html
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from flask import Flask, current_app, has_app_context, url_for
+from markupsafe import Markup, escape
+from sqlalchemy import event, inspect as sqlalchemy_inspect, or_, text
+from sqlalchemy.orm import Session, object_session
+
+from .models import db, AreaAtuacao, ConteudoGeral, MembroEquipe, Pagina, SetorAtendido
+
+SEARCH_TABLE = 'search_index'
+
+# Código do tipo de documento (compõe o `rowid`) e rótulo exibido nos resultados.
+KIND_CODES: Dict[str, int] = {'pagina': 1, 'area': 2, 'setor': 3, 'membro': 4}
+KIND_LABELS: Dict[str, str] = {
+    'pagina': 'Página',
+    'area': 'Área de Atuação',
+    'setor': 'Setor Atendido',
+    'membro': 'Equipe',
+}
+_ROWID_BASE = 10 ** 9
+
+# Apenas campos de texto do `ConteudoGeral` entram no índice (não caminhos de mídia).
+INDEXED_FIELD_TYPES = ('text', 'textarea')
+_EXCLUDED_PAGE_PREFIX = 'configuracoes'
+
+MAX_QUERY_TERMS = 8
+# Peso das colunas no `bm25`: kind, ref, title, body.
+_BM25_WEIGHTS = '0.0, 0.0, 10.0, 1.0'
+# Delimitadores de destaque: escapados junto com o texto e trocados por `<mark>`.
+_MARK_OPEN, _MARK_CLOSE = '\x02', '\x03'
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# Chaves usadas em `Session.info` para acumular os documentos alterados.
+_DOCS_INFO_KEY = 'bm_search_docs'
+_BULK_INFO_KEY = 'bm_search_bulk'
+
+_MODEL_KINDS = {Pagina: 'pagina', AreaAtuacao: 'area', SetorAtendido: 'setor', MembroEquipe: 'membro'}
+_TRACKED_TABLES = {model.__tablename__ for model in list(_MODEL_KINDS) + [ConteudoGeral]}
+
+_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "kind UNINDEXED, ref UNINDEXED, title, body, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+
+def plain_text(value: Optional[str]) -> str:
+    """Remove tags HTML e entidades, e normaliza os espaços."""
+    if not value:
+        return ''
+    return ' '.join(html.unescape(_TAG_RE.sub(' ', value)).split())
+
+
+def _rowid(kind: str, obj_id: int) -> int:
+    return KIND_CODES[kind] * _ROWID_BASE + obj_id
+
+
+def _page_documents(session: Session, pages: Iterable[Pagina]) -> Iterator[Tuple]:
+    pages = [p for p in pages if p.ativo and p.template_path and p.tipo != 'grupo_menu'
+             and not p.slug.startswith(_EXCLUDED_PAGE_PREFIX)]
+    if not pages:
+        return
+    content: Dict[str, Dict[str, str]] = {}
+    rows = (session.query(ConteudoGeral.pagina, ConteudoGeral.secao, ConteudoGeral.conteudo)
+            .filter(ConteudoGeral.pagina.in_([p.slug for p in pages]),
+                    ConteudoGeral.field_type.in_(INDEXED_FIELD_TYPES))
+            .order_by(ConteudoGeral.id))
+    for pagina, secao, conteudo in rows:
+        content.setdefault(pagina, {})[secao] = plain_text(conteudo)
+    for page in pages:
+        fields = content.get(page.slug, {})
+        title = fields.get('titulo') or page.titulo_menu
+        body = ' '.join(v for k, v in fields.items() if v and k != 'titulo')
+        yield _rowid('pagina', page.id), 'pagina', page.slug, title, body
+
+
+def _documents(session: Session, kind: str, ids: Optional[Set[int]] = None) -> Iterator[Tuple]:
+    """
+    Monta os documentos `(rowid, kind, ref, title, body)` de um tipo.
+
+    Args:
+        session (Session): A sessão (a leitura enxerga a transação em curso).
+        kind (str): Uma chave de `KIND_CODES`.
+        ids (Set[int], optional): Restringe aos ids informados. Padrão: todos.
+    """
+    model = next(m for m, k in _MODEL_KINDS.items() if k == kind)
+    with session.no_autoflush:
+        query = session.query(model)
+        if ids is not None:
+            query = query.filter(model.id.in_(ids))
+        objs = query.all()
+        if kind == 'pagina':
+            yield from _page_documents(session, objs)
+            return
+        for obj in objs:
+            if kind == 'area':
+                title, ref, body = obj.titulo, obj.slug, f"{obj.descricao or ''} {obj.categoria or ''}"
+            elif kind == 'setor':
+                title, ref, body = obj.titulo, obj.slug, obj.descricao
+            else:
+                title, ref, body = obj.nome, str(obj.id), f"{obj.cargo or ''} {obj.biografia or ''}"
+            yield _rowid(kind, obj.id), kind, ref, plain_text(title), plain_text(body)
+
+
+def _insert(connection, documents: Iterable[Tuple]) -> int:
+    params = [{'rowid': r, 'kind': k, 'ref': ref, 'title': t, 'body': b} for r, k, ref, t, b in documents]
+    if params:
+        connection.execute(text(f"INSERT INTO {SEARCH_TABLE} (rowid, kind, ref, title, body) "
+                                "VALUES (:rowid, :kind, :ref, :title, :body)"), params)
+    return len(params)
+
+
+def rebuild_search_index(session: Session = None) -> int:
+    """
+    Reconstrói o índice inteiro na transação da sessão (sem commit).
+
+    Args:
+        session (Session, optional): A sessão. Padrão: `db.session`.
+
+    Returns:
+        int: Número de documentos indexados.
+    """
+    session = session or db.session
+    connection = session.connection()
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    return sum(_insert(connection, _documents(session, kind)) for kind in KIND_CODES)
+
+
+def _update_documents(session: Session, keys: Set[Tuple[str, object]]) -> None:
+    """Recalcula os documentos alterados (`('pagina_slug', slug)` vira a página)."""
+    by_kind: Dict[str, Set[int]] = {}
+    slugs = {ref for kind, ref in keys if kind == 'pagina_slug'}
+    if slugs:
+        with session.no_autoflush:
+            for (page_id,) in session.query(Pagina.id).filter(Pagina.slug.in_(slugs)):
+                by_kind.setdefault('pagina', set()).add(page_id)
+    for kind, ref in keys:
+        if kind in KIND_CODES:
+            by_kind.setdefault(kind, set()).add(ref)
+
+    connection = session.connection()
+    for kind, ids in by_kind.items():
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"),
+                           [{'rowid': _rowid(kind, obj_id)} for obj_id in ids])
+        _insert(connection, _documents(session, kind, ids))
+
+
+def search_available(app: Flask = None) -> bool:
+    """True se a tabela FTS5 foi criada para a aplicação (ou `current_app`)."""
+    app = app or (current_app if has_app_context() else None)
+    return bool(app is not None and app.extensions.get('search_index'))
+
+
+def init_search_index(app: Flask) -> None:
+    """
+    Cria a tabela FTS5 (se faltar) e a popula quando estiver vazia.
+
+    Se o banco não for SQLite ou não tiver FTS5, a busca funciona por `LIKE`.
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    app.extensions['search_index'] = False
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            app.logger.info("[SEARCH] Banco sem FTS5: busca por LIKE.")
+            return
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(text(_CREATE_SQL))
+            app.extensions['search_index'] = True
+            if db.session.execute(text(f"SELECT 1 FROM {SEARCH_TABLE} LIMIT 1")).first() is None:
+                count = rebuild_search_index()
+                db.session.commit()
+                app.logger.info(f"[SEARCH] Índice de busca criado com {count} documentos.")
+        except Exception as e:
+            db.session.rollback()
+            app.extensions['search_index'] = False
+            app.logger.warning(f"[SEARCH] FTS5 indisponível ({e}); busca por LIKE.")
+
+
+def build_match_query(query: str, any_term: bool = False) -> Optional[str]:
+    """
+    Converte o texto digitado em uma expressão `MATCH` segura.
+
+    Cada termo é citado (sem operadores do FTS5 vindos do usuário) e vira um
+    prefixo; termos com mais de 4 letras perdem o 's' final (plural) e termos
+    de uma letra são ignorados.
+
+    Args:
+        query (str): O texto digitado.
+        any_term (bool): Une os termos com OR em vez de AND. Padrão: False.
+
+    Returns:
+        str | None: A expressão, ou None se não houver termos.
+    """
+    terms = []
+    for term in _TERM_RE.findall(query.lower())[:MAX_QUERY_TERMS]:
+        if len(term) < 2:
+            continue  # Um prefixo de uma letra casaria com quase todo o índice.
+        if len(term) > 4 and term.endswith('s'):
+            term = term[:-1]
+        terms.append(f'"{term}"*')
+    if not terms:
+        return None
+    return (' OR ' if any_term else ' ').join(terms)
+
+
+def _highlight(fragment: Optional[str]) -> Markup:
+    escaped = str(escape(fragment or ''))
+    return Markup(escaped.replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>'))
+
+
+def result_url(kind: str, ref: str) -> str:
+    """URL pública de um documento do índice."""
+    if kind == 'membro':
+        return url_for('main.home', _anchor='equipe')
+    if kind == 'pagina' and ref == 'home':
+        return url_for('main.home')
+    return url_for('main.pagina_dinamica', slug=ref)
+
+
+def _fts_search(match: str, limit: int) -> List[dict]:
+    rows = db.session.execute(text(
+        f"SELECT kind, ref, "
+        f"highlight({SEARCH_TABLE}, 2, :open, :close) AS title, "
+        f"snippet({SEARCH_TABLE}, 3, :open, :close, '…', 24) AS snippet, "
+        f"bm25({SEARCH_TABLE}, {_BM25_WEIGHTS}) AS rank "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match ORDER BY rank LIMIT :limit"),
+        {'open': _MARK_OPEN, 'close': _MARK_CLOSE, 'match': match, 'limit': limit})
+    return [{'kind': kind, 'ref': ref, 'titulo': _highlight(title), 'snippet': _highlight(snippet), 'rank': rank}
+            for kind, ref, title, snippet, rank in rows]
+
+
+def _like_search(query: str, limit: int) -> List[dict]:
+    pattern = f'%{query}%'
+    results = []
+    for kind, model, title_col, body_col, ref_col in (
+            ('area', AreaAtuacao, AreaAtuacao.titulo, AreaAtuacao.descricao, AreaAtuacao.slug),
+            ('setor', SetorAtendido, SetorAtendido.titulo, SetorAtendido.descricao, SetorAtendido.slug),
+            ('membro', MembroEquipe, MembroEquipe.nome, MembroEquipe.biografia, MembroEquipe.id)):
+        rows = (db.session.query(title_col, body_col, ref_col)
+                .filter(or_(title_col.ilike(pattern), body_col.ilike(pattern))).limit(limit))
+        for title, body, ref in rows:
+            results.append({'kind': kind, 'ref': str(ref), 'titulo': Markup.escape(title),
+                            'snippet': Markup.escape(plain_text(body)[:160]), 'rank': 0.0})
+    return results[:limit]
+
+
+def search(query: str, limit: int = 20) -> List[dict]:
+    """
+    Busca no índice, do resultado mais para o menos relevante.
+
+    Se nenhum documento contém todos os termos, repete com qualquer termo.
+
+    Args:
+        query (str): O texto digitado.
+        limit (int): Máximo de resultados. Padrão: 20.
+
+    Returns:
+        List[dict]: `titulo` e `snippet` (Markup com `<mark>`), `url`, `tipo`
+        (rótulo), `kind`, `ref` e `rank` (menor é melhor). Uma entrada por URL.
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+    if search_available():
+        match = build_match_query(query)
+        if match is None:
+            return []
+        results = _fts_search(match, limit)
+        if not results and ' ' in match:
+            results = _fts_search(build_match_query(query, any_term=True), limit)
+    else:
+        results = _like_search(query, limit)
+
+    unique, seen = [], set()
+    for result in results:
+        result['url'] = result_url(result['kind'], result['ref'])
+        result['tipo'] = KIND_LABELS[result['kind']]
+        if result['url'] not in seen:
+            seen.add(result['url'])
+            unique.append(result)
+    return unique
+
+
+def _record(target, kind: str, ref) -> None:
+    session = object_session(target)
+    if session is not None and search_available():
+        session.info.setdefault(_DOCS_INFO_KEY, set()).add((kind, ref))
+
+
+def _register_model_listeners(model, kind: str) -> None:
+    def changed(mapper, connection, target):
+        _record(target, kind, target.id)
+
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, name, changed)
+
+
+for _model, _kind in _MODEL_KINDS.items():
+    _register_model_listeners(_model, _kind)
+
+
+@event.listens_for(ConteudoGeral, 'after_insert')
+@event.listens_for(ConteudoGeral, 'after_update')
+@event.listens_for(ConteudoGeral, 'after_delete')
+def _conteudo_changed(mapper, connection, target):
+    # A página anterior também muda se o conteúdo foi movido (`active_history` em `content_index`).
+    for pagina in [target.pagina] + list(sqlalchemy_inspect(target).attrs.pagina.history.deleted):
+        _record(target, 'pagina_slug', pagina)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_search(orm_execute_state):
+    """Operações em massa não informam as linhas afetadas: exige reconstrução."""
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if (mapper is not None and mapper.local_table is not None
+            and mapper.local_table.name in _TRACKED_TABLES and search_available()):
+        orm_execute_state.session.info[_BULK_INFO_KEY] = True
+
+
+@event.listens_for(Session, 'before_commit')
+def _sync_search_index(session):
+    """Grava no índice, na mesma transação, os documentos alterados."""
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    keys = session.info.pop(_DOCS_INFO_KEY, None)
+    bulk = session.info.pop(_BULK_INFO_KEY, False)
+    if not (keys or bulk) or not search_available():
+        return
+    if bulk:
+        rebuild_search_index(session)
+    else:
+        _update_documents(session, keys)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_search_changes(session):
+    """Descarta os documentos registrados: nada chegou ao banco."""
+    session.info.pop(_DOCS_INFO_KEY, None)
+    session.info.pop(_BULK_INFO_KEY, None)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Sugestões de Busca em Memória (`/search/suggest`)
+==============================================================================
+
+A caixa de busca sugere resultados a cada tecla. Mesmo com FTS5
+(`search_index.py`), isso seria uma consulta por tecla. As sugestões vêm de
+um conjunto pequeno de títulos: áreas de atuação, setores atendidos, páginas
+do menu e nomes da equipe. Este módulo mantém esses títulos em memória, em um
+índice de prefixos.
+
+Estrutura:
+----------
+-   Cada título é normalizado (sem acentos, minúsculo) e cada palavra vira uma
+    chave `(palavra, posição, índice da entrada)` em uma lista ordenada.
+-   A consulta faz `bisect` na última palavra digitada (prefixo) e filtra as
+    entradas que também contêm as palavras anteriores. O custo depende do
+    número de palavras com o prefixo, não do número total de títulos.
+-   Entradas cujo título começa pelo texto digitado vêm primeiro.
+
+O índice é reconstruído quando muda a geração de `area_atuacao`,
+`setor_atendido`, `pagina` ou `membro_equipe` (ver `site_cache.py`), no mesmo
+padrão de `page_registry.py`. Fica em `app.extensions['search_suggest']`.
+"""
+import hashlib
+import threading
+import unicodedata
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Tuple
+
+from flask import Flask, current_app, url_for
+
+from .models import db, AreaAtuacao, MembroEquipe, Pagina, SetorAtendido
+from .search_index import KIND_LABELS, result_url
+from .site_cache import BOOT_ID, get_generation
+
+# Tabelas cujos commits invalidam o índice.
+SUGGEST_TABLES: Tuple[str, ...] = (
+    AreaAtuacao.__tablename__,
+    SetorAtendido.__tablename__,
+    Pagina.__tablename__,
+    MembroEquipe.__tablename__,
+)
+DEFAULT_SUGGEST_LIMIT = 8
+MAX_SUGGEST_QUERY_LENGTH = 64
+
+_build_lock = threading.Lock()
+
+
+def fold(value: str) -> str:
+    """Remove acentos, converte para minúsculas e normaliza os espaços."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in stripped.casefold()).split())
+
+
+class Sugestao(NamedTuple):
+    """Uma sugestão pronta para o JSON (`label`, `url`, `tipo`)."""
+    label: str
+    url: str
+    tipo: str
+
+
+class SuggestIndex:
+    """
+    Índice imutável de prefixos sobre os títulos sugeridos.
+
+    Attributes:
+        generation (Tuple[int, ...]): Geração de `SUGGEST_TABLES` usada na construção.
+        entries (Tuple[Sugestao, ...]): As sugestões, na ordem de prioridade.
+        built_at (datetime): Momento (UTC) da construção.
+    """
+
+    def __init__(self, generation: Tuple[int, ...], entries: List[Sugestao]):
+        """
+        Args:
+            generation (Tuple[int, ...]): Geração a registrar.
+            entries (List[Sugestao]): As sugestões; a ordem define a prioridade.
+        """
+        self.generation = generation
+        self.entries: Tuple[Sugestao, ...] = tuple(entries)
+        self._folded: Tuple[str, ...] = tuple(fold(entry.label) for entry in self.entries)
+        self._keys: List[Tuple[str, int, int]] = sorted(
+            (word, position, i)
+            for i, folded in enumerate(self._folded)
+            for position, word in enumerate(folded.split())
+        )
+        self.built_at = datetime.now(timezone.utc)
+
+    def suggest(self, query: str, limit: int = DEFAULT_SUGGEST_LIMIT) -> List[Sugestao]:
+        """
+        Sugestões para o texto digitado.
+
+        Args:
+            query (str): O texto (a última palavra é tratada como prefixo).
+            limit (int): Máximo de sugestões. Padrão: 8.
+
+        Returns:
+            List[Sugestao]: Títulos iniciados pelo texto primeiro; depois os
+            demais, na ordem de prioridade.
+        """
+        words = fold(query).split()
+        if not words:
+            return []
+        prefix, others = words[-1], words[:-1]
+        matches = set()
+        start = bisect_left(self._keys, (prefix,))
+        for word, _position, i in self._keys[start:]:
+            if not word.startswith(prefix):
+                break
+            title_words = self._folded[i].split()
+            if all(other in title_words for other in others):
+                matches.add(i)
+
+        folded_query = ' '.join(words)
+        ranked = sorted(matches, key=lambda i: (not self._folded[i].startswith(folded_query), i))
+        return [self.entries[i] for i in ranked[:limit]]
+
+
+def build_suggest_index(generation: Tuple[int, ...] = None) -> SuggestIndex:
+    """
+    Carrega os títulos (uma consulta por tabela) e monta o índice.
+
+    Args:
+        generation (Tuple[int, ...], optional): Geração a registrar. Se None,
+            usa a geração atual de `SUGGEST_TABLES`.
+
+    Returns:
+        SuggestIndex: O índice recém-construído.
+    """
+    if generation is None:
+        generation = get_generation(*SUGGEST_TABLES)
+    entries: List[Sugestao] = []
+    seen_urls = set()
+
+    def add(label: str, kind: str, ref: str) -> None:
+        url = result_url(kind, ref)
+        if label and url not in seen_urls:
+            seen_urls.add(url)
+            entries.append(Sugestao(label, url, KIND_LABELS[kind]))
+
+    for titulo, slug in db.session.query(AreaAtuacao.titulo, AreaAtuacao.slug).order_by(AreaAtuacao.ordem, AreaAtuacao.id):
+        add(titulo, 'area', slug)
+    for titulo, slug in db.session.query(SetorAtendido.titulo, SetorAtendido.slug).order_by(SetorAtendido.ordem, SetorAtendido.id):
+        add(titulo, 'setor', slug)
+    pages = (db.session.query(Pagina.titulo_menu, Pagina.slug)
+             .filter(Pagina.ativo.is_(True), Pagina.template_path.isnot(None), Pagina.tipo != 'grupo_menu')
+             .order_by(Pagina.ordem, Pagina.id))
+    for titulo, slug in pages:
+        add(titulo, 'pagina', slug)
+    for (nome,) in db.session.query(MembroEquipe.nome).order_by(MembroEquipe.ordem, MembroEquipe.id):
+        # Todos os membros apontam para a seção da equipe: a URL não serve para deduplicar.
+        entries.append(Sugestao(nome, url_for('main.home', _anchor='equipe'), KIND_LABELS['membro']))
+    return SuggestIndex(generation, entries)
+
+
+def get_suggest_index(app: Flask = None) -> SuggestIndex:
+    """
+    Retorna o índice vigente, reconstruindo-o só se algum título mudou.
+
+    Args:
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+
+    Returns:
+        SuggestIndex: O índice (na chamada "quente", sem nenhuma consulta ao DB).
+    """
+    app = app or current_app._get_current_object()
+    generation = get_generation(*SUGGEST_TABLES)
+    index = app.extensions.get('search_suggest')
+    if index is not None and index.generation == generation:
+        return index
+
+    with _build_lock:
+        index = app.extensions.get('search_suggest')
+        if index is not None and index.generation == generation:
+            return index
+        index = build_suggest_index(generation)
+        app.extensions['search_suggest'] = index
+        app.logger.debug(f"[SUGGEST] Índice reconstruído: {len(index.entries)} sugestões (geração {generation}).")
+        return index
+
+
+def suggest_etag(index: SuggestIndex, query: str, limit: int) -> str:
+    """
+    ETag da resposta: depende só do índice vigente e do texto normalizado.
+
+    Args:
+        index (SuggestIndex): O índice.
+        query (str): O texto digitado.
+        limit (int): O limite de sugestões.
+
+    Returns:
+        str: A ETag (sem aspas).
+    """
+    raw = repr((BOOT_ID, index.generation, fold(query), limit))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
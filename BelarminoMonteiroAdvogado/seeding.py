@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Dados Iniciais do Site (Semeadura em Lote com Hash de Versão)
+==============================================================================
+
+Define as páginas, áreas de atuação, conteúdos, seções da home e membros da
+equipe que o site precisa para funcionar, e os grava com `apply_seed`.
+
+A versão anterior de `ensure_essential_data` fazia um `filter_by(...).first()`
+por item (cerca de 80 consultas) e regravava todo o `conteudo` a cada
+`flask sync-content`. Agora:
+
+1.  **Hash:** `seed_hash()` é o SHA-256 da definição abaixo. Se o hash gravado
+    em `SeedState` for igual, a semeadura é pulada com uma única consulta.
+2.  **Uma consulta por tabela:** os registros existentes são carregados com
+    `IN` (apenas as colunas comparadas) e as diferenças são aplicadas com
+    `INSERT`/`UPDATE` em lote do ORM 2.0.
+3.  **`data_modificacao`:** o `UPDATE` em lote não passa pelo `before_update`
+    de `ConteudoGeral`; as páginas com conteúdo alterado recebem a data em um
+    único `UPDATE`. Os caches (`site_cache`, `content_index`, `search_index`)
+    já tratam comandos em lote.
+
+Ao alterar qualquer definição, o hash muda e a próxima execução reaplica os
+padrões (o conteúdo existente volta ao valor padrão, como antes). Use
+`flask sync-content --force` para reaplicar sem alteração na definição (ex:
+após apagar uma página essencial).
+"""
+import hashlib
+import json
+import secrets
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from .models import (AreaAtuacao, ConteudoGeral, Depoimento, HomePageSection, MembroEquipe, Pagina, SeedState,
+                     ThemeSettings)
+
+SEED_NAME = 'essential'
+
+# --- PÁGINAS PRINCIPAIS ---
+# Páginas fundamentais para a navegação e estrutura do site.
+ESSENTIAL_PAGES: List[Dict[str, Any]] = [
+    {'slug': 'home', 'titulo_menu': 'Início', 'tipo': 'pagina', 'template_path': 'home/index.html', 'ordem': 1, 'show_in_menu': True, 'ativo': True},
+    {'slug': 'sobre-nos', 'titulo_menu': 'Sobre Nós', 'tipo': 'pagina', 'template_path': 'sobre.html', 'ordem': 2, 'show_in_menu': True, 'ativo': True},
+    {'slug': 'contato', 'titulo_menu': 'Contato', 'tipo': 'pagina', 'template_path': 'contato/contato.html', 'ordem': 4, 'show_in_menu': False, 'ativo': True},
+    {'slug': 'politica-de-privacidade', 'titulo_menu': 'Política de Privacidade', 'tipo': 'pagina', 'template_path': 'politica_privacidade.html', 'ordem': 99, 'show_in_menu': False, 'ativo': True},
+]
+
+# Página "mãe" que agrupa as áreas de atuação no menu.
+AREAS_PARENT_PAGE: Dict[str, Any] = {
+    'slug': 'areas-de-atuacao', 'titulo_menu': 'Áreas de Atuação', 'tipo': 'grupo_menu', 'ativo': True,
+    'show_in_menu': True, 'ordem': 3, 'template_path': None,
+}
+
+# --- ÁREAS DE ATUAÇÃO ---
+# Cada área também recebe uma página (tipo 'servico') sob `AREAS_PARENT_PAGE`.
+ESSENTIAL_SERVICES: List[Dict[str, Any]] = [
+    {'slug': 'direito-civil', 'titulo': 'Direito Civil', 'descricao': 'Soluções para questões de obrigações, contratos, responsabilidade civil e direitos reais.', 'icone': 'bi bi-bank', 'categoria': 'areas_atuacao', 'ordem': 1},
+    {'slug': 'direito-do-consumidor', 'titulo': 'Direito do Consumidor', 'descricao': 'Atuação em conflitos nas relações de consumo, buscando a reparação de danos.', 'icone': 'bi bi-shield-check', 'categoria': 'areas_atuacao', 'ordem': 2},
+    {'slug': 'direito-previdenciario', 'titulo': 'Direito Previdenciário', 'descricao': 'Assessoria em questões de aposentadoria, pensões e benefícios previdenciários.', 'icone': 'bi bi-person-workspace', 'categoria': 'areas_atuacao', 'ordem': 3},
+    {'slug': 'direito-de-familia', 'titulo': 'Direito de Família', 'descricao': 'Condução de processos de divórcio, guarda, pensão alimentícia e inventários.', 'icone': 'bi bi-heart', 'categoria': 'areas_atuacao', 'ordem': 4},
+]
+
+# --- CONTEÚDO PADRÃO ---
+# Conteúdo inicial por página: meta tags, textos, links para mídias, etc.
+DEFAULT_CONTENT: Dict[str, List[Dict[str, str]]] = {
+    'home': [
+        {'secao': 'meta_title', 'conteudo': 'Belarmino Monteiro Advogado - Assessoria Jurídica de Excelência'},
+        {'secao': 'meta_description', 'conteudo': 'Escritório de advocacia com tradição e modernidade na defesa dos seus direitos. Oferecemos soluções personalizadas para suas necessidades.'},
+        {'secao': 'meta_keywords', 'conteudo': 'advogado, advocacia, direito, fortaleza, assessoria jurídica', 'field_type': 'text'},
+        {'secao': 'titulo', 'conteudo': 'Assessoria Jurídica de Excelência'},
+        {'secao': 'paragrafo', 'conteudo': 'Tradição e modernidade na defesa dos seus direitos. Soluções personalizadas para suas necessidades.'},
+        {'secao': 'hero_show_button', 'conteudo': 'true', 'field_type': 'boolean'},
+    ],
+    'sobre-nos': [
+        {'secao': 'meta_title', 'conteudo': 'Sobre o Escritório - Belarmino Monteiro Advogado'},
+        {'secao': 'meta_description', 'conteudo': 'Conheça nossa história, missão e o compromisso inabalável com a justiça e a ética que guia nosso escritório.'},
+        {'secao': 'meta_keywords', 'conteudo': 'história, missão, valores, escritório de advocacia, Belarmino Monteiro', 'field_type': 'text'},
+        {'secao': 'titulo', 'conteudo': 'Excelência e Tradição em Advocacia'},
+        {'secao': 'subtitulo', 'conteudo': 'Compromisso, integridade e resultados. A base do nosso escritório.'},
+        {'secao': 'secao1_titulo', 'conteudo': 'Nossa Missão'},
+        {'secao': 'secao1_conteudo', 'conteudo': '<p>Nossa missão é oferecer uma advocacia de excelência, pautada pela ética, transparência e por um profundo conhecimento técnico. Buscamos compreender as necessidades individuais de cada cliente para construir soluções jurídicas personalizadas, eficazes e seguras.</p>', 'field_type': 'textarea'},
+        {'secao': 'secao1_media_video', 'conteudo': 'images/Escritório.webm', 'field_type': 'video'},
+        {'secao': 'secao2_titulo', 'conteudo': 'Nossa História'},
+        {'secao': 'secao2_conteudo', 'conteudo': '<p>Fundado sobre os pilares da tradição e da inovação, o escritório Belarmino Monteiro consolidou-se como uma referência em assessoria jurídica. Nossa trajetória é marcada por uma atuação dedicada e por um relacionamento de confiança e proximidade com nossos clientes.</p>', 'field_type': 'textarea'},
+        {'secao': 'secao2_media_image', 'conteudo': 'images/Belarmino.png', 'field_type': 'image'},
+        {'secao': 'pilares_titulo', 'conteudo': 'Nossos Pilares'},
+        {'secao': 'pilares_subtitulo', 'conteudo': 'Os princípios que guiam nossa prática jurídica.'},
+        {'secao': 'pilar1_titulo', 'conteudo': 'Compromisso'},
+        {'secao': 'pilar1_texto', 'conteudo': 'Dedicação total a cada causa, tratando os objetivos de nossos clientes como se fossem os nossos. A sua confiança é a nossa maior responsabilidade.'},
+        {'secao': 'pilar2_titulo', 'conteudo': 'Ética'},
+        {'secao': 'pilar2_texto', 'conteudo': 'Atuamos com integridade, transparência e lealdade, seguindo os mais rigorosos padrões éticos da advocacia para garantir uma representação justa.'},
+        {'secao': 'pilar3_titulo', 'conteudo': 'Excelência'},
+        {'secao': 'pilar3_texto', 'conteudo': 'Buscamos a perfeição técnica em cada petição, parecer e consultoria. Nosso conhecimento aprofundado é a sua maior vantagem estratégica.'},
+        {'secao': 'mapa_titulo', 'conteudo': 'Nossa Localização'},
+        {'secao': 'mapa_subtitulo', 'conteudo': 'Venha nos fazer uma visita. Estamos de portas abertas para recebê-lo.'}
+    ],
+    'direito-civil': [
+        {'secao': 'meta_title', 'conteudo': 'Direito Civil - Belarmino Monteiro Advogado'},
+        {'secao': 'meta_description', 'conteudo': 'Assessoria completa em Direito Civil, incluindo contratos, obrigações, responsabilidade civil, direitos reais e questões sucessórias.'},
+        {'secao': 'meta_keywords', 'conteudo': 'direito civil, contratos, obrigações, responsabilidade civil, danos morais', 'field_type': 'text'},
+        {'secao': 'titulo', 'conteudo': 'Direito Civil'},
+        {'secao': 'subtitulo', 'conteudo': 'Regulando as relações que definem nosso dia a dia.'},
+        {'secao': 'conteudo_principal', 'conteudo': '<p>O Direito Civil é a espinha dorsal das relações privadas. Nossa equipe oferece uma assessoria jurídica completa, abrangendo desde a negociação e elaboração de contratos complexos até a resolução de disputas envolvendo obrigações, responsabilidade civil por danos materiais e morais, e questões de posse e propriedade. Atuamos com diligência para garantir a segurança jurídica e a proteção dos seus interesses em todas as esferas da vida civil.</p>'}
+    ],
+    'direito-do-consumidor': [
+        {'secao': 'meta_title', 'conteudo': 'Direito do Consumidor - Belarmino Monteiro Advogado'},
+        {'secao': 'meta_description', 'conteudo': 'Proteção e defesa dos direitos do consumidor contra práticas abusivas, produtos defeituosos e serviços inadequados.'},
+        {'secao': 'meta_keywords', 'conteudo': 'direito do consumidor, CDC, práticas abusivas, produtos com defeito, consumidor', 'field_type': 'text'},
+        {'secao': 'titulo', 'conteudo': 'Direito do Consumidor'},
+        {'secao': 'subtitulo', 'conteudo': 'Equilibrando as relações de consumo com justiça e eficácia.'},
+        {'secao': 'conteudo_principal', 'conteudo': '<p>As relações de consumo são parte integrante da vida moderna, e a proteção do consumidor é um direito fundamental. Atuamos de forma incisiva na defesa dos seus interesses contra práticas abusivas, publicidade enganosa, produtos com defeito e falhas na prestação de serviços. Buscamos a reparação de danos materiais e morais, a troca de produtos ou a devolução de valores, garantindo que seus direitos como consumidor sejam plenamente respeitados.</p>'}
+    ],
+    'direito-de-familia': [
+        {'secao': 'meta_title', 'conteudo': 'Direito de Família - Belarmino Monteiro Advogado'},
+        {'secao': 'meta_description', 'conteudo': 'Atuação sensível e especializada em questões como divórcio, guarda de filhos, pensão alimentícia, inventários e planejamento sucessório.'},
+        {'secao': 'meta_keywords', 'conteudo': 'direito de família, divórcio, pensão alimentícia, guarda, inventário', 'field_type': 'text'},
+        {'secao': 'titulo', 'conteudo': 'Direito de Família'},
+        {'secao': 'subtitulo', 'conteudo': 'Cuidando do seu bem mais precioso com sensibilidade e competência.'},
+        {'secao': 'conteudo_principal', 'conteudo': '<p>Questões de família exigem uma abordagem não apenas técnica, mas também humana e sensível. Conduzimos processos de divórcio, partilha de bens, definição de guarda e pensão alimentícia com o máximo de discrição e foco na solução consensual. Além disso, oferecemos assessoria completa em planejamento sucessório, testamentos e inventários, garantindo a proteção do seu patrimônio e a tranquilidade da sua família para o futuro.</p>'}
+    ],
+    'direito-previdenciario': [
+        {'secao': 'meta_title', 'conteudo': 'Direito Previdenciário - Belarmino Monteiro Advogado'},
+        {'secao': 'meta_description', 'conteudo': 'Assessoria em questões de aposentadoria, pensões e benefícios previdenciários, garantindo a proteção dos seus direitos.'},
+        {'secao': 'meta_keywords', 'conteudo': 'direito previdenciário, INSS, aposentadoria, pensão, benefício', 'field_type': 'text'},
+        {'secao': 'titulo', 'conteudo': 'Direito Previdenciário'},
+        {'secao': 'subtitulo', 'conteudo': 'Sua segurança no futuro, garantida hoje.'},
+        {'secao': 'conteudo_principal', 'conteudo': '<p>O Direito Previdenciário é essencial para garantir a segurança financeira e o bem-estar social. Nossa equipe oferece assessoria completa em aposentadorias (por idade, tempo de contribuição, especial), pensões por morte, auxílio-doença, auxílio-acidente e outros benefícios. Atuamos tanto na esfera administrativa quanto judicial, buscando a concessão ou revisão de benefícios, sempre com o objetivo de assegurar que você receba o que lhe é de direito, com agilidade e eficiência.</p>'}
+    ],
+    'contato': [
+        {'secao': 'meta_title', 'conteudo': 'Contato - Belarmino Monteiro Advogado'},
+        {'secao': 'meta_description', 'conteudo': 'Entre em contato conosco. Estamos prontos para ouvir seu caso e oferecer a melhor estratégia jurídica para você ou sua empresa.'},
+        {'secao': 'meta_keywords', 'conteudo': 'contato, telefone, endereço, email, advogado fortaleza', 'field_type': 'text'},
+        {'secao': 'titulo', 'conteudo': 'Entre em Contato'},
+        {'secao': 'subtitulo', 'conteudo': 'Estamos prontos para ouvir seu caso e oferecer a melhor estratégia jurídica.'},
+    ],
+    'configuracoes_gerais': [
+        {'secao': 'logo_principal', 'conteudo': 'images/BM.png'},
+        {'secao': 'favicon_ico', 'conteudo': 'images/favicons/favicon.ico'},
+        {'secao': 'social_linkedin', 'conteudo': ''},
+        {'secao': 'social_instagram', 'conteudo': 'https://www.instagram.com/p/DQCjFFQAfnf/?igsh=YmN6dDcxcnhkOHlk'},
+        {'secao': 'social_facebook', 'conteudo': 'https://www.facebook.com/people/Belarmino-Monteiro-Advogado/61582494125876/'},
+        {'secao': 'contato_email', 'conteudo': 'contato@belarminomonteiro.com.br'},
+        {'secao': 'contato_telefone', 'conteudo': '+55 85 9951-5962'},
+        {'secao': 'contato_endereco', 'conteudo': 'Rua Silva Paulet, 1727 - Aldeota, Fortaleza - CE, CEP: 60120-021'},
+        {'secao': 'contato_horario', 'conteudo': 'Segunda a Sexta, das 8h às 18h.'},
+    ],
+    'configuracoes_estilo': [
+        {'secao': 'video_fundo', 'conteudo': 'images/Escritório.webm'},
+        {'secao': 'google_font_link', 'conteudo': '<link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&family=Open+Sans:wght@400;600&display=swap" rel="stylesheet">'},
+        {'secao': 'font_family_headings', 'conteudo': "'Roboto', sans-serif"},
+        {'secao': 'font_family_body', 'conteudo': "'Open Sans', sans-serif"},
+        {'secao': 'custom_css_overrides', 'conteudo': '/* Adicione seu CSS customizado aqui */'}
+    ],
+    'configuracoes_seo': [
+        {'secao': 'seo_meta_title_sufixo', 'conteudo': '| Belarmino Monteiro Advogado', 'field_type': 'text'},
+        {'secao': 'seo_google_site_verification', 'conteudo': '', 'field_type': 'text'},
+        {'secao': 'seo_head_scripts', 'conteudo': '', 'field_type': 'textarea'},
+        {'secao': 'seo_body_scripts', 'conteudo': '', 'field_type': 'textarea'}
+    ],
+    'configuracoes_email': [
+        {'secao': 'smtp_server', 'conteudo': 'smtp.example.com', 'field_type': 'text'},
+        {'secao': 'smtp_port', 'conteudo': '587', 'field_type': 'text'},
+        {'secao': 'smtp_user', 'conteudo': 'user@example.com', 'field_type': 'text'},
+        {'secao': 'smtp_pass', 'conteudo': '', 'field_type': 'text'},
+        {'secao': 'email_to', 'conteudo': 'contato@example.com', 'field_type': 'text'}
+    ],
+}
+
+# --- DEPOIMENTO DE EXEMPLO ---
+# Criado apenas se não houver nenhum depoimento (o token é gerado na criação).
+EXAMPLE_TESTIMONIAL: Dict[str, Any] = {
+    'nome_cliente': 'Empresa Exemplo S/A',
+    'texto_depoimento': 'O escritório Belarmino Monteiro demonstrou um profissionalismo exemplar e um profundo conhecimento técnico. A assessoria jurídica foi fundamental para o sucesso de nossa operação. Recomendamos fortemente seus serviços.',
+    'logo_cliente': 'images/uploads/BM.png',
+    'aprovado': True,
+}
+
+# --- SEÇÕES DA HOME PAGE ---
+# Ordem e ativação das seções da página inicial (título e subtítulo seguem o padrão).
+DEFAULT_HOME_SECTIONS: List[Dict[str, Any]] = [
+    {'section_type': 'hero', 'order': 0, 'is_active': True, 'title': 'Assessoria Jurídica de Excelência', 'subtitle': 'Tradição e modernidade na defesa dos seus direitos. Soluções personalizadas para suas necessidades.'},
+    {'section_type': 'show_services', 'order': 1, 'is_active': True, 'title': 'Nossas Áreas de Atuação', 'subtitle': 'Soluções jurídicas completas para pessoas e empresas.'},
+    {'section_type': 'show_team_on_home', 'order': 2, 'is_active': True, 'title': 'Nossa Equipe', 'subtitle': 'Os especialistas por trás de cada vitória.'},
+    {'section_type': 'show_testimonials', 'order': 3, 'is_active': True, 'title': 'O que nossos clientes dizem', 'subtitle': 'Confiança e resultados que falam por si.'},
+    {'section_type': 'show_clients', 'order': 4, 'is_active': True, 'title': 'Clientes que Confiam em Nosso Trabalho', 'subtitle': 'Junte-se a líderes de mercado que escolheram nossa tecnologia para impulsionar seus negócios.'}
+]
+
+# --- MEMBROS DA EQUIPE PADRÃO ---
+DEFAULT_TEAM_MEMBERS: List[Dict[str, str]] = [
+    {
+        'nome': "Belarmino Monteiro",
+        'cargo': "Advogado",
+        'biografia': "Sócio-fundador do escritório, com vasta experiência em Direito Civil e Contratual. Reconhecido pela sua atuação estratégica e pela dedicação incansável na defesa dos interesses de seus clientes.",
+        'foto': 'images/uploads/Belarmino_Monteiro.webp'
+    },
+    {
+        'nome': "Taise Peixoto",
+        'cargo': "Advogada",
+        'biografia': "Especialista em Direito de Família e Sucessões, com uma abordagem humana e focada na resolução consensual de conflitos. Comprometida em garantir a segurança e o bem-estar das famílias.",
+        'foto': 'images/uploads/Taise_Peixoto.webp'
+    }
+]
+
+
+def seed_hash() -> str:
+    """
+    Calcula o hash da definição de dados iniciais.
+
+    Returns:
+        str: SHA-256 (hex) do JSON canônico de todas as definições do módulo.
+    """
+    definition = {
+        'pages': ESSENTIAL_PAGES,
+        'areas_parent': AREAS_PARENT_PAGE,
+        'services': ESSENTIAL_SERVICES,
+        'content': DEFAULT_CONTENT,
+        'testimonial': EXAMPLE_TESTIMONIAL,
+        'home_sections': DEFAULT_HOME_SECTIONS,
+        'team': DEFAULT_TEAM_MEMBERS,
+    }
+    payload = json.dumps(definition, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _service_page(service: Dict[str, Any], parent_id: int) -> Dict[str, Any]:
+    return {
+        'slug': service['slug'], 'titulo_menu': service['titulo'], 'tipo': 'servico', 'ativo': True,
+        'show_in_menu': True, 'ordem': service['ordem'], 'parent_id': parent_id,
+        'template_path': 'areas_atuacao/servico_base.html',
+    }
+
+
+def _seed_pages(session: Session, stats: Dict[str, int]) -> None:
+    """Páginas essenciais, página "mãe" e áreas de atuação (com as páginas de serviço)."""
+    slugs = ([page['slug'] for page in ESSENTIAL_PAGES] + [AREAS_PARENT_PAGE['slug']]
+             + [service['slug'] for service in ESSENTIAL_SERVICES])
+    page_ids = dict(session.execute(select(Pagina.slug, Pagina.id).where(Pagina.slug.in_(slugs))).all())
+
+    new_pages = [page for page in ESSENTIAL_PAGES + [AREAS_PARENT_PAGE] if page['slug'] not in page_ids]
+    if new_pages:
+        page_ids.update(session.execute(insert(Pagina).returning(Pagina.slug, Pagina.id), new_pages).all())
+        stats['pagina'] += len(new_pages)
+
+    parent_id = page_ids[AREAS_PARENT_PAGE['slug']]
+    service_pages = [_service_page(service, parent_id) for service in ESSENTIAL_SERVICES
+                     if service['slug'] not in page_ids]
+    if service_pages:
+        session.execute(insert(Pagina), service_pages)
+        stats['pagina'] += len(service_pages)
+
+    existing_areas = set(session.scalars(
+        select(AreaAtuacao.slug).where(AreaAtuacao.slug.in_([service['slug'] for service in ESSENTIAL_SERVICES]))))
+    new_areas = [service for service in ESSENTIAL_SERVICES if service['slug'] not in existing_areas]
+    if new_areas:
+        session.execute(insert(AreaAtuacao), new_areas)
+        stats['area_atuacao'] += len(new_areas)
+
+
+def _seed_content(session: Session, stats: Dict[str, int]) -> None:
+    """`ConteudoGeral`: cria as seções ausentes e devolve as existentes ao padrão."""
+    rows = session.execute(
+        select(ConteudoGeral.id, ConteudoGeral.pagina, ConteudoGeral.secao, ConteudoGeral.conteudo,
+               ConteudoGeral.field_type).where(ConteudoGeral.pagina.in_(list(DEFAULT_CONTENT)))).all()
+    existing = {(row.pagina, row.secao): row for row in rows}
+
+    inserts, updates, changed_pages = [], [], set()
+    for page_slug, contents in DEFAULT_CONTENT.items():
+        for content_data in contents:
+            row = existing.get((page_slug, content_data['secao']))
+            if row is None:
+                inserts.append({'pagina': page_slug, 'field_type': 'text', **content_data})
+                continue
+            field_type = content_data.get('field_type', row.field_type)
+            if row.conteudo != content_data['conteudo'] or row.field_type != field_type:
+                updates.append({'id': row.id, 'conteudo': content_data['conteudo'], 'field_type': field_type})
+                changed_pages.add(page_slug)
+
+    if inserts:
+        session.execute(insert(ConteudoGeral), inserts)
+    if updates:
+        session.execute(update(ConteudoGeral), updates)
+        # O UPDATE em lote não dispara o `before_update` que atualiza a data da página.
+        session.execute(update(Pagina).where(Pagina.slug.in_(changed_pages))
+                        .values(data_modificacao=datetime.utcnow()))
+    stats['conteudo_geral'] += len(inserts)
+    stats['atualizados'] += len(updates)
+
+
+def _seed_home_and_team(session: Session, stats: Dict[str, int]) -> None:
+    """Seções da home (título/subtítulo no padrão), equipe, depoimento e tema."""
+    section_types = [section['section_type'] for section in DEFAULT_HOME_SECTIONS]
+    sections = {row.section_type: row for row in session.execute(
+        select(HomePageSection.id, HomePageSection.section_type, HomePageSection.title, HomePageSection.subtitle)
+        .where(HomePageSection.section_type.in_(section_types)))}
+    new_sections, section_updates = [], []
+    for section_data in DEFAULT_HOME_SECTIONS:
+        row = sections.get(section_data['section_type'])
+        if row is None:
+            new_sections.append(section_data)
+        elif (row.title, row.subtitle) != (section_data['title'], section_data['subtitle']):
+            section_updates.append({'id': row.id, 'title': section_data['title'], 'subtitle': section_data['subtitle']})
+    if new_sections:
+        session.execute(insert(HomePageSection), new_sections)
+        stats['home_page_section'] += len(new_sections)
+    if section_updates:
+        session.execute(update(HomePageSection), section_updates)
+        stats['atualizados'] += len(section_updates)
+
+    names = set(session.scalars(select(MembroEquipe.nome).where(
+        MembroEquipe.nome.in_([member['nome'] for member in DEFAULT_TEAM_MEMBERS]))))
+    new_members = [member for member in DEFAULT_TEAM_MEMBERS if member['nome'] not in names]
+    if new_members:
+        session.execute(insert(MembroEquipe), new_members)
+        stats['membro_equipe'] += len(new_members)
+
+    if session.scalar(select(Depoimento.id).limit(1)) is None:
+        session.add(Depoimento(token_submissao=secrets.token_hex(16), **EXAMPLE_TESTIMONIAL))
+        stats['depoimentos'] += 1
+    if session.scalar(select(ThemeSettings.id).limit(1)) is None:
+        session.add(ThemeSettings(theme='option1'))
+        stats['theme_settings'] += 1
+
+
+def apply_seed(session: Session, force: bool = False) -> Optional[Dict[str, int]]:
+    """
+    Grava os dados iniciais que faltam e devolve os existentes ao padrão.
+
+    Não faz commit: quem chama decide (ver `ensure_essential_data`).
+
+    Args:
+        session (Session): A sessão do SQLAlchemy.
+        force (bool): Aplica mesmo que o hash gravado seja igual ao atual.
+
+    Returns:
+        Optional[Dict[str, int]]: Linhas criadas por tabela e `atualizados`,
+        ou None se a definição não mudou desde a última aplicação.
+    """
+    SeedState.__table__.create(session.connection(), checkfirst=True)
+    digest = seed_hash()
+    state = session.get(SeedState, SEED_NAME)
+    if state is not None and state.hash == digest and not force:
+        current_app.logger.debug(f"[SEED] Definição inalterada ({digest[:12]}); semeadura pulada.")
+        return None
+
+    stats = dict.fromkeys(('pagina', 'area_atuacao', 'conteudo_geral', 'home_page_section', 'membro_equipe',
+                           'depoimentos', 'theme_settings', 'atualizados'), 0)
+    _seed_pages(session, stats)
+    _seed_content(session, stats)
+    _seed_home_and_team(session, stats)
+
+    if state is None:
+        session.add(SeedState(name=SEED_NAME, hash=digest))
+    else:
+        state.hash = digest
+        state.applied_at = datetime.utcnow()
+    current_app.logger.info(f"[SEED] Definição {digest[:12]} aplicada: {stats}.")
+    return stats
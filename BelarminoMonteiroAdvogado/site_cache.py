@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Cache de Processo: Contadores de Geração e "Snapshot" do Site
+==============================================================================
+
+Este módulo mantém, em memória do processo, dados que mudam raramente (apenas
+quando o administrador edita algo no painel) mas que eram consultados no banco
+de dados a cada renderização de template pelo `inject_global_vars`.
+
+Componentes:
+------------
+1.  **Contadores de Geração:** Cada tabela monitorada possui um contador
+    inteiro. Listeners de sessão do SQLAlchemy registram quais tabelas foram
+    alteradas durante uma transação (`before_flush` e operações em massa via
+    `do_orm_execute`) e incrementam os contadores somente no `after_commit`.
+    Um `rollback` descarta as alterações registradas sem invalidar nada.
+2.  **SiteSnapshot:** Objeto imutável com configurações gerais, seções da
+    home, tema ativo, áreas de atuação e árvore de navegação. É construído uma
+    única vez e reutilizado entre requisições até que a geração das tabelas
+    das quais ele depende mude.
+
+Por que cópias "congeladas" em vez de objetos ORM?
+--------------------------------------------------
+Objetos ORM pertencem a uma sessão. Guardá-los entre requisições levaria a
+`DetachedInstanceError` (ou a atributos expirados após um commit). O snapshot
+copia apenas os valores das colunas para `RegistroCongelado`, que se comporta
+como o objeto original para leitura nos templates (`area.slug`,
+`theme_settings.qr_code_path`) e recusa qualquer escrita.
+
+Limitação:
+----------
+Os contadores vivem no processo. O `app.yaml` usa um único worker Gunicorn,
+então todas as escritas passam pelo mesmo processo. Com múltiplos workers,
+cada um só enxerga os próprios commits.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from itertools import chain
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy import event, inspect as sqlalchemy_inspect
+from sqlalchemy.orm import Session
+
+from .models import ConteudoGeral, HomePageSection, ThemeSettings, AreaAtuacao, Pagina
+
+# Chave usada em `Session.info` para acumular as tabelas alteradas na transação.
+_SESSION_INFO_KEY = 'bm_tabelas_alteradas'
+
+# Tabelas das quais o snapshot global depende.
+SNAPSHOT_TABLES: Tuple[str, ...] = (
+    ConteudoGeral.__tablename__,
+    HomePageSection.__tablename__,
+    ThemeSettings.__tablename__,
+    AreaAtuacao.__tablename__,
+    Pagina.__tablename__,
+)
+
+# Identificador deste processo. Os contadores recomeçam do zero a cada início,
+# então qualquer validador HTTP derivado deles precisa incluir este valor.
+PROCESS_STARTED_AT: datetime = datetime.now(timezone.utc)
+BOOT_ID: str = f"{os.getpid()}-{time.time_ns()}"
+
+_generations: Dict[str, int] = {}
+_generation_times: Dict[str, datetime] = {}
+_generations_lock = threading.Lock()
+_build_lock = threading.Lock()
+
+
+# --- 1. CONTADORES DE GERAÇÃO ---
+
+def bump_generation(*tables: str) -> None:
+    """
+    Incrementa o contador de geração das tabelas informadas.
+
+    Chamado automaticamente após cada commit que alterou essas tabelas, mas
+    também pode ser usado manualmente quando dados forem alterados por fora
+    do ORM (ex: SQL bruto em scripts de manutenção).
+
+    Args:
+        *tables (str): Nomes das tabelas (`Model.__tablename__`).
+    """
+    now = datetime.now(timezone.utc)
+    with _generations_lock:
+        for table in tables:
+            _generations[table] = _generations.get(table, 0) + 1
+            _generation_times[table] = now
+
+
+def get_generation(*tables: str) -> Tuple[int, ...]:
+    """
+    Retorna a geração atual das tabelas informadas, na mesma ordem.
+
+    Args:
+        *tables (str): Nomes das tabelas.
+
+    Returns:
+        Tuple[int, ...]: Uma tupla com o contador de cada tabela (0 se nunca alterada).
+    """
+    with _generations_lock:
+        return tuple(_generations.get(table, 0) for table in tables)
+
+
+def get_last_change(*tables: str) -> datetime:
+    """
+    Retorna o instante (UTC) do último commit que alterou alguma das tabelas.
+
+    Se nenhuma delas mudou desde o início do processo, retorna
+    `PROCESS_STARTED_AT`, pois um novo deploy pode ter alterado os templates.
+
+    Args:
+        *tables (str): Nomes das tabelas.
+
+    Returns:
+        datetime: O instante mais recente (timezone-aware, UTC).
+    """
+    with _generations_lock:
+        times = [_generation_times[table] for table in tables if table in _generation_times]
+    return max(times + [PROCESS_STARTED_AT])
+
+
+def _pending_tables(session: Session) -> set:
+    """Retorna (criando se necessário) o conjunto de tabelas alteradas na transação."""
+    return session.info.setdefault(_SESSION_INFO_KEY, set())
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_flushed_tables(session, flush_context, instances):
+    """
+    Registra as tabelas de todos os objetos novos, alterados ou removidos
+    que serão enviados ao banco neste flush.
+    """
+    pending = _pending_tables(session)
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            pending.add(table)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_statements(orm_execute_state):
+    """
+    Registra tabelas afetadas por operações em massa que não passam pelo
+    flush, como `Model.query.filter_by(...).delete()`.
+    """
+    if orm_execute_state.is_select:
+        return
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.local_table is not None:
+            _pending_tables(orm_execute_state.session).add(mapper.local_table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_committed_tables(session):
+    """Incrementa as gerações das tabelas efetivamente gravadas no commit."""
+    pending = session.info.pop(_SESSION_INFO_KEY, None)
+    if pending:
+        bump_generation(*pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_tables(session):
+    """Descarta as alterações registradas: nada chegou ao banco."""
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+# --- 2. CÓPIAS SOMENTE-LEITURA DE LINHAS ORM ---
+
+class RegistroCongelado:
+    """
+    Cópia imutável das colunas de um objeto ORM.
+
+    Expõe os valores como atributos (compatível com o acesso feito nos
+    templates Jinja2) e lança `AttributeError` em qualquer tentativa de escrita.
+    Atributos extras (ex: `children` de uma `Pagina`) podem ser anexados na criação.
+    """
+    __slots__ = ('_modelo', '_dados')
+
+    def __init__(self, obj: Any, **extras: Any):
+        """
+        Args:
+            obj (Any): A instância ORM a ser copiada.
+            **extras (Any): Atributos adicionais que não são colunas.
+        """
+        mapper = sqlalchemy_inspect(obj).mapper
+        dados = {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs}
+        dados.update(extras)
+        object.__setattr__(self, '_modelo', mapper.class_.__name__)
+        object.__setattr__(self, '_dados', MappingProxyType(dados))
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._dados[name]
+        except KeyError:
+            raise AttributeError(f"'{self._modelo}' congelado não possui o atributo '{name}'") from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"'{self._modelo}' congelado é somente leitura.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"'{self._modelo}' congelado é somente leitura.")
+
+    def __repr__(self) -> str:
+        return f"<{self._modelo} (congelado) {dict(self._dados)!r}>"
+
+
+# --- 3. SNAPSHOT DO SITE ---
+
+class SiteSnapshot:
+    """
+    Conjunto imutável de dados globais injetados em todos os templates.
+
+    Attributes:
+        generation (Tuple[int, ...]): Geração de `SNAPSHOT_TABLES` usada na construção.
+        configs (Mapping[str, Any]): Configurações de `configuracoes_gerais`,
+            `configuracoes_estilo` e cores do tema.
+        home_sections (Mapping[str, RegistroCongelado]): Seções da home por `section_type`.
+        theme (str): Layout ativo (ex: 'option1').
+        theme_settings (RegistroCongelado | None): Cópia das configurações de tema.
+        lista_areas_atuacao (Tuple[RegistroCongelado, ...]): Áreas ordenadas por `ordem`.
+        nav_pages (Tuple[RegistroCongelado, ...]): Páginas raiz do menu com seus filhos.
+        built_at (datetime): Momento (UTC) da construção.
+    """
+    __slots__ = ('generation', 'configs', 'home_sections', 'theme', 'theme_settings',
+                 'lista_areas_atuacao', 'nav_pages', 'built_at')
+
+    def __init__(self, generation: Tuple[int, ...], configs: Dict[str, Any],
+                 home_sections: Dict[str, RegistroCongelado], theme: str,
+                 theme_settings: Optional[RegistroCongelado],
+                 lista_areas_atuacao: Iterable[RegistroCongelado],
+                 nav_pages: Iterable[RegistroCongelado]):
+        valores = {
+            'generation': generation,
+            'configs': MappingProxyType(dict(configs)),
+            'home_sections': MappingProxyType(dict(home_sections)),
+            'theme': theme,
+            'theme_settings': theme_settings,
+            'lista_areas_atuacao': tuple(lista_areas_atuacao),
+            'nav_pages': tuple(nav_pages),
+            'built_at': datetime.now(timezone.utc),
+        }
+        for name, value in valores.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("SiteSnapshot é imutável.")
+
+    def __repr__(self) -> str:
+        return f"<SiteSnapshot theme={self.theme} generation={self.generation}>"
+
+
+def build_site_snapshot(generation: Tuple[int, ...] = None) -> SiteSnapshot:
+    """
+    Consulta o banco de dados e monta um novo `SiteSnapshot`.
+
+    Exceções do banco (ex: `OperationalError` com o DB ainda não migrado) são
+    propagadas para que o chamador decida o fallback; nada é armazenado nesse caso.
+
+    Args:
+        generation (Tuple[int, ...], optional): Geração a registrar no snapshot.
+            Se None, usa a geração atual de `SNAPSHOT_TABLES`.
+
+    Returns:
+        SiteSnapshot: O snapshot recém-construído.
+    """
+    # Imports tardios: `content_index` e `page_registry` importam este módulo.
+    from .content_index import merge_pages
+    from .page_registry import get_page_registry
+
+    if generation is None:
+        generation = get_generation(*SNAPSHOT_TABLES)
+
+    configs: Dict[str, Any] = merge_pages('configuracoes_gerais', 'configuracoes_estilo')
+
+    home_sections = {section.section_type: RegistroCongelado(section) for section in HomePageSection.query.all()}
+
+    theme_settings = ThemeSettings.query.first()
+    theme = theme_settings.theme if theme_settings else 'option1'
+    if theme_settings:
+        # Cores primárias dos temas, para compatibilidade ou uso em JS
+        configs['cor_primaria_tema1'] = theme_settings.cor_primaria_tema1
+        configs['cor_primaria_tema2'] = theme_settings.cor_primaria_tema2
+        configs['cor_primaria_tema3'] = theme_settings.cor_primaria_tema3
+        configs['cor_primaria_tema4'] = theme_settings.cor_primaria_tema4
+        configs['cor_texto'] = theme_settings.cor_texto
+        configs['cor_fundo'] = theme_settings.cor_fundo
+        configs['cor_texto_dark'] = getattr(theme_settings, 'cor_texto_dark', '#ffffff')
+        configs['cor_fundo_dark'] = getattr(theme_settings, 'cor_fundo_dark', '#121212')
+        configs['cor_fundo_secundario_dark'] = getattr(theme_settings, 'cor_fundo_secundario_dark', '#1e1e1e')
+
+        # Novas variáveis CSS que podem ser necessárias em JS ou como fallback
+        # Estes valores devem idealmente ser lidos dos arquivos CSS ou definidos de forma consistente
+        configs['color_primary'] = '#b92027' # Default para --color-primary
+        configs['color_primary_rgb'] = '185, 32, 39' # Default para --color-primary-rgb
+        configs['color_whatsapp'] = '#25d366' # Default para --color-whatsapp
+        configs['color_whatsapp_hover'] = '#20b358' # Default para --color-whatsapp-hover
+
+    lista_areas_atuacao = [RegistroCongelado(area) for area in AreaAtuacao.query.order_by(AreaAtuacao.ordem).all()]
+    nav_pages = get_page_registry().nav_pages
+
+    return SiteSnapshot(
+        generation=generation,
+        configs=configs,
+        home_sections=home_sections,
+        theme=theme,
+        theme_settings=RegistroCongelado(theme_settings) if theme_settings else None,
+        lista_areas_atuacao=lista_areas_atuacao,
+        nav_pages=nav_pages,
+    )
+
+
+def get_site_snapshot(app: Flask = None) -> SiteSnapshot:
+    """
+    Retorna o snapshot vigente da aplicação, reconstruindo-o apenas se a
+    geração de alguma tabela monitorada mudou desde a última construção.
+
+    O snapshot é guardado em `app.extensions`, de modo que várias instâncias
+    da aplicação no mesmo processo (comum nos testes) não compartilhem dados.
+
+    Args:
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+
+    Returns:
+        SiteSnapshot: O snapshot atual (na chamada "quente", sem nenhuma consulta ao DB).
+    """
+    app = app or current_app._get_current_object()
+    generation = get_generation(*SNAPSHOT_TABLES)
+    snapshot = app.extensions.get('site_snapshot')
+    if snapshot is not None and snapshot.generation == generation:
+        return snapshot
+
+    with _build_lock:
+        snapshot = app.extensions.get('site_snapshot')
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+        # A geração é lida ANTES da construção: se um commit ocorrer durante a
+        # montagem, o snapshot fica com a geração antiga e será refeito na próxima chamada.
+        snapshot = build_site_snapshot(generation)
+        app.extensions['site_snapshot'] = snapshot
+        app.logger.debug(f"[SITE_CACHE] Snapshot reconstruído (geração {generation}).")
+        return snapshot
+
+
+def invalidate_site_snapshot(app: Flask = None) -> None:
+    """
+    Descarta o snapshot armazenado, forçando a reconstrução na próxima requisição.
+
+    Args:
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+    """
+    app = app or current_app._get_current_object()
+    app.extensions.pop('site_snapshot', None)
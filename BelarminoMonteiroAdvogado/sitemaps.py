@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Sitemap Pré-Gerado (XML + gzip) com `lastmod` Real
+==============================================================================
+
+`main.sitemap` consultava todas as páginas e rodava `url_for` para cada uma a
+cada visita de um crawler, e carimbava todas as URLs com a data do dia, o que
+fazia os buscadores baixarem o site inteiro diariamente.
+
+Fluxo:
+------
+1.  **Geração:** na primeira requisição após uma mudança em `pagina` ou em
+    `conteudo_geral`, as entradas são montadas a partir do `page_registry` (sem nova consulta).
+    O `lastmod` de cada URL é o `Pagina.data_modificacao`, que também avança
+    quando o `ConteudoGeral` da página é editado (listener em `models.py`).
+2.  **Arquivos:** até `SITEMAP_MAX_URLS` (50.000, limite do protocolo) URLs,
+    `sitemap.xml` é um `<urlset>`. Acima disso, vira um `<sitemapindex>` que
+    aponta para `sitemap-1.xml`, `sitemap-2.xml`, ... Cada arquivo é guardado
+    em memória já serializado, junto com a versão gzip (nível 9) e a ETag.
+    Só são gravados em disco se `SITEMAP_FOLDER` estiver configurado, ou pelo
+    comando `flask build-sitemap` (padrão `instance/sitemaps`), para inspeção
+    ou envio manual; a requisição nunca escreve no disco por conta própria.
+3.  **Entrega:** clientes que aceitam gzip recebem a variante comprimida
+    (`Content-Encoding: gzip`). `If-None-Match`/`If-Modified-Since` válidos
+    recebem `304`.
+
+As URLs são absolutas e usam a raiz canônica do site (`SITE_URL`, ou
+`PREFERRED_URL_SCHEME` + `SERVER_NAME`), nunca o cabeçalho `Host` da
+requisição. Sem nenhuma das duas (desenvolvimento, testes), vale o host da
+requisição que gerou o sitemap, mas há um único conjunto em memória, que só
+é refeito quando o conteúdo muda: variar o `Host` não força nova geração.
+Fica em `app.extensions['sitemaps']`.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from flask import Flask, Response, current_app, request, url_for
+
+from .compression import _accepts
+from .models import ConteudoGeral, Pagina
+from .page_registry import get_page_registry
+from .site_cache import get_generation
+
+SITEMAP_FILENAME = 'sitemap.xml'
+SITEMAP_MAX_URLS = 50_000
+
+# Editar o conteúdo de uma página avança o `data_modificacao` dela (ver `models.py`).
+SITEMAP_TABLES = (Pagina.__tablename__, ConteudoGeral.__tablename__)
+
+_build_lock = threading.Lock()
+
+
+class SitemapFile(NamedTuple):
+    """Um arquivo do sitemap, pronto para ser servido."""
+    xml: bytes
+    gz: bytes
+    etag: str
+    last_modified: datetime
+
+
+class SitemapSet:
+    """
+    Arquivos do sitemap para uma geração de `pagina` e `conteudo_geral`.
+
+    Attributes:
+        generation (Tuple[int, ...]): Geração de `SITEMAP_TABLES` usada na construção.
+        root (str): Raiz das URLs (ex: 'https://exemplo.com.br').
+        files (Dict[str, SitemapFile]): Arquivos por nome ('sitemap.xml', 'sitemap-1.xml', ...).
+        url_count (int): Número de URLs publicadas.
+    """
+
+    def __init__(self, generation: Tuple[int, ...], root: str, files: Dict[str, SitemapFile], url_count: int):
+        self.generation = generation
+        self.root = root
+        self.files = files
+        self.url_count = url_count
+
+
+def canonical_root(app: Flask = None) -> Optional[str]:
+    """
+    Raiz canônica das URLs do sitemap, sem a barra final.
+
+    Args:
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+
+    Returns:
+        str | None: `SITE_URL`, ou `PREFERRED_URL_SCHEME://SERVER_NAME`; None se nenhum está configurado.
+    """
+    config = (app or current_app).config
+    if config.get('SITE_URL'):
+        return config['SITE_URL'].rstrip('/')
+    if config.get('SERVER_NAME'):
+        return f"{config.get('PREFERRED_URL_SCHEME') or 'http'}://{config['SERVER_NAME']}"
+    return None
+
+
+def _w3c(moment: datetime) -> str:
+    """Data no formato W3C exigido em `<lastmod>` (UTC)."""
+    return moment.replace(microsecond=0).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+def sitemap_entries(root: str) -> List[Dict[str, str]]:
+    """
+    Monta as entradas `{loc, lastmod, priority}` das páginas publicadas.
+
+    Páginas inativas, grupos de menu e páginas sem template ficam de fora,
+    como antes. A home vem primeiro, as demais em ordem de slug.
+
+    Args:
+        root (str): Raiz das URLs, sem a barra final.
+
+    Returns:
+        List[Dict[str, str]]: As entradas (com `modified`, o `datetime` do `lastmod`).
+    """
+    entries = []
+    for slug, route in sorted(get_page_registry().routes.items(), key=lambda item: (item[0] != 'home', item[0])):
+        if not route.ativo or not route.template_path or route.tipo == 'grupo_menu':
+            continue
+        if slug == 'home':
+            loc = root + url_for('main.home')
+        else:
+            loc = root + url_for('main.pagina_dinamica', slug=slug)
+        modified = route.data_modificacao or datetime.utcnow()
+        entries.append({
+            'loc': loc,
+            'modified': modified,
+            'lastmod': _w3c(modified),
+            'priority': '1.0' if slug == 'home' else '0.8',
+        })
+    return entries
+
+
+def _make_file(xml: str, last_modified: datetime) -> SitemapFile:
+    data = xml.encode('utf-8')
+    # `mtime=0`: o mesmo XML gera sempre o mesmo gzip.
+    return SitemapFile(data, gzip.compress(data, compresslevel=9, mtime=0),
+                       hashlib.sha1(data).hexdigest(), last_modified.replace(tzinfo=timezone.utc, microsecond=0))
+
+
+def build_sitemaps(root: str, generation: Tuple[int, ...] = None, max_urls: int = None) -> SitemapSet:
+    """
+    Gera os arquivos do sitemap (em memória).
+
+    Args:
+        root (str): Raiz das URLs, sem a barra final (ver `canonical_root`).
+        generation (Tuple[int, ...], optional): Geração a registrar. Padrão: a atual.
+        max_urls (int, optional): URLs por arquivo. Padrão: `SITEMAP_MAX_URLS`.
+
+    Returns:
+        SitemapSet: Os arquivos gerados.
+    """
+    if generation is None:
+        generation = get_generation(*SITEMAP_TABLES)
+    max_urls = max_urls or int(current_app.config.get('SITEMAP_MAX_URLS', SITEMAP_MAX_URLS))
+    entries = sitemap_entries(root)
+    env = current_app.jinja_env
+    newest = max((e['modified'] for e in entries), default=datetime.utcnow())
+
+    files: Dict[str, SitemapFile] = {}
+    if len(entries) <= max_urls:
+        files[SITEMAP_FILENAME] = _make_file(env.get_template('sitemap.xml').render(urls=entries), newest)
+    else:
+        sitemaps = []
+        for number, start in enumerate(range(0, len(entries), max_urls), start=1):
+            chunk = entries[start:start + max_urls]
+            chunk_newest = max(e['modified'] for e in chunk)
+            files[f'sitemap-{number}.xml'] = _make_file(env.get_template('sitemap.xml').render(urls=chunk), chunk_newest)
+            sitemaps.append({'loc': root + url_for('main.sitemap_part', number=number),
+                             'lastmod': _w3c(chunk_newest)})
+        files[SITEMAP_FILENAME] = _make_file(env.get_template('sitemap_index.xml').render(sitemaps=sitemaps), newest)
+
+    return SitemapSet(generation, root, files, len(entries))
+
+
+def write_sitemaps(sitemaps: SitemapSet, folder: str) -> None:
+    """
+    Grava os arquivos (e os `.gz`) em `folder`, de forma atômica, e apaga as
+    partes de uma geração anterior maior que a atual.
+
+    Args:
+        sitemaps (SitemapSet): Os arquivos gerados.
+        folder (str): A pasta de destino (criada se não existir).
+
+    Raises:
+        OSError: Se a pasta não puder ser gravada.
+    """
+    files = sitemaps.files
+    os.makedirs(folder, exist_ok=True)
+    for name, item in files.items():
+        for filename, data in ((name, item.xml), (name + '.gz', item.gz)):
+            path = os.path.join(folder, filename)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+    # Partes de uma geração anterior maior que a atual.
+    for filename in os.listdir(folder):
+        if filename.startswith('sitemap-') and filename.split('.xml')[0] + '.xml' not in files:
+            os.remove(os.path.join(folder, filename))
+
+
+def _write_to_configured_folder(sitemaps: SitemapSet) -> None:
+    """Grava os arquivos em `SITEMAP_FOLDER`, se configurado; sem ele, vale só a cópia em memória."""
+    folder = current_app.config.get('SITEMAP_FOLDER')
+    if not folder:
+        return
+    try:
+        write_sitemaps(sitemaps, folder)
+    except OSError as e:
+        # Sistema de arquivos somente leitura (App Engine): vale só a cópia em memória.
+        current_app.logger.warning(f"[SITEMAP] Arquivos não gravados em '{folder}': {e}")
+
+
+def get_sitemaps(app: Flask = None) -> SitemapSet:
+    """
+    Retorna o sitemap vigente, gerando-o só se `pagina` ou `conteudo_geral` mudou.
+
+    Args:
+        app (Flask, optional): A aplicação. Padrão: `current_app`.
+
+    Returns:
+        SitemapSet: Os arquivos (na chamada "quente", sem nenhuma consulta ao DB).
+    """
+    app = app or current_app._get_current_object()
+    generation = get_generation(*SITEMAP_TABLES)
+    current = app.extensions.get('sitemaps')
+    if current is not None and current.generation == generation:
+        return current
+
+    with _build_lock:
+        current = app.extensions.get('sitemaps')
+        if current is not None and current.generation == generation:
+            return current
+        root = canonical_root(app)
+        if root is None:
+            root = request.host_url.rstrip('/')
+            if not (app.debug or app.testing):
+                app.logger.warning(f"[SITEMAP] SITE_URL não configurado: usando o host da requisição ({root}).")
+        current = build_sitemaps(root, generation)
+        _write_to_configured_folder(current)
+        app.extensions['sitemaps'] = current
+        app.logger.info(f"[SITEMAP] Sitemap gerado: {current.url_count} URLs em {len(current.files)} arquivo(s).")
+        return current
+
+
+def sitemap_response(name: str) -> Optional[Response]:
+    """
+    Resposta condicional de um arquivo do sitemap.
+
+    Args:
+        name (str): O nome do arquivo ('sitemap.xml', 'sitemap-1.xml', ...).
+
+    Returns:
+        Response | None: A resposta (gzip se aceito), ou None se o arquivo não existe.
+    """
+    item = get_sitemaps().files.get(name)
+    if item is None:
+        return None
+    compressed = _accepts('gzip')
+    response = Response(item.gz if compressed else item.xml, mimetype='application/xml')
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.set_etag(item.etag, weak=compressed)
+    response.last_modified = item.last_modified
+    return response.make_conditional(request)
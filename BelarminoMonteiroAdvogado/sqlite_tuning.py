@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Perfil de Desempenho do SQLite (PRAGMAs na Conexão)
+==============================================================================
+
+O `create_app` usa um arquivo SQLite (`instance/site.db` ou `/tmp/site.db` no
+App Engine) com os PRAGMAs padrão: journal em modo `DELETE` (rollback), em que
+um commit do painel bloqueia todas as leituras e workers concorrentes recebem
+`database is locked`.
+
+Este módulo aplica, em cada nova conexão DBAPI (evento `connect` do engine):
+
+-   **journal_mode=WAL:** leitores não esperam o escritor (e vice-versa). É
+    persistente no arquivo; bancos em memória ficam de fora.
+-   **synchronous=NORMAL:** no WAL, só o checkpoint faz `fsync`. Um commit
+    pode se perder em queda de energia, mas o banco não corrompe.
+-   **mmap_size:** leituras por memória mapeada, sem cópia para o cache.
+-   **cache_size:** cache de páginas por conexão (negativo = KiB).
+-   **temp_store=MEMORY:** ordenações e tabelas temporárias em memória.
+-   **busy_timeout:** espera (ms) pelo lock em vez de falhar na hora.
+
+Configuração:
+-------------
+`SQLITE_TUNING_ENABLED` (padrão True) liga/desliga; `SQLITE_PRAGMAS` é mesclado
+sobre `DEFAULT_SQLITE_PRAGMAS` (um valor None remove o PRAGMA). O benchmark
+`scripts/optimization/sqlite_concurrency_benchmark.py` compara os dois modos.
+"""
+from typing import Dict, Iterable, Optional, Union
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .models import db
+
+PragmaValue = Union[int, str]
+
+# Ordem importa: `journal_mode` primeiro (o `synchronous` adequado depende dele).
+DEFAULT_SQLITE_PRAGMAS: Dict[str, PragmaValue] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 64 * 1024 * 1024,
+    'cache_size': -8000,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# PRAGMAs que não se aplicam a bancos em memória.
+_FILE_ONLY_PRAGMAS = ('journal_mode', 'mmap_size')
+
+
+def resolve_pragmas(overrides: Optional[Dict[str, Optional[PragmaValue]]] = None) -> Dict[str, PragmaValue]:
+    """
+    Mescla `overrides` sobre `DEFAULT_SQLITE_PRAGMAS`.
+
+    Args:
+        overrides (dict, optional): PRAGMAs a alterar; None remove o PRAGMA.
+
+    Returns:
+        Dict[str, PragmaValue]: Os PRAGMAs finais, na ordem de aplicação.
+    """
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS)
+    for name, value in (overrides or {}).items():
+        if value is None:
+            pragmas.pop(name, None)
+        else:
+            pragmas[name] = value
+    return pragmas
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: Dict[str, PragmaValue], in_memory: bool = False) -> None:
+    """
+    Executa os PRAGMAs em uma conexão `sqlite3`.
+
+    Args:
+        dbapi_connection: A conexão DBAPI (`sqlite3.Connection`).
+        pragmas (Dict[str, PragmaValue]): Nome -> valor.
+        in_memory (bool): Banco em memória (pula `journal_mode` e `mmap_size`).
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if in_memory and name in _FILE_ONLY_PRAGMAS:
+                continue
+            if not name.isidentifier() or not str(value).lstrip('-').isalnum():
+                raise ValueError(f"PRAGMA inválido: {name}={value!r}")
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def read_sqlite_pragmas(connection, names: Iterable[str] = DEFAULT_SQLITE_PRAGMAS) -> Dict[str, PragmaValue]:
+    """
+    Lê os valores atuais dos PRAGMAs (diagnóstico e testes).
+
+    Args:
+        connection: Conexão SQLAlchemy ou DBAPI.
+        names (Iterable[str]): Os PRAGMAs. Padrão: os de `DEFAULT_SQLITE_PRAGMAS`.
+
+    Returns:
+        Dict[str, PragmaValue]: Nome -> valor devolvido pelo SQLite.
+    """
+    driver = getattr(connection, 'exec_driver_sql', None) or connection.execute
+    return {name: driver(f"PRAGMA {name}").fetchone()[0] for name in names}
+
+
+def install_sqlite_tuning(engine: Engine, pragmas: Dict[str, PragmaValue]) -> bool:
+    """
+    Registra os PRAGMAs no evento `connect` de um engine SQLite.
+
+    Conexões já abertas no pool são descartadas para que todas passem pelo
+    evento (exceto em bancos em memória, cujo conteúdo vive na conexão).
+
+    Args:
+        engine (Engine): O engine.
+        pragmas (Dict[str, PragmaValue]): Os PRAGMAs a aplicar.
+
+    Returns:
+        bool: True se o engine é SQLite e o listener foi registrado.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+    in_memory = engine.url.database in (None, '', ':memory:') or 'mode=memory' in str(engine.url)
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas, in_memory=in_memory)
+
+    if not in_memory:
+        engine.dispose()
+    return True
+
+
+def init_sqlite_tuning(app: Flask) -> None:
+    """
+    Aplica o perfil de PRAGMAs ao engine do Flask-SQLAlchemy da aplicação.
+
+    Deve ser chamado logo após `db.init_app(app)`, antes da primeira consulta.
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    app.config.setdefault('SQLITE_TUNING_ENABLED', True)
+    app.config.setdefault('SQLITE_PRAGMAS', {})
+    if not app.config['SQLITE_TUNING_ENABLED']:
+        return
+    pragmas = resolve_pragmas(app.config['SQLITE_PRAGMAS'])
+    with app.app_context():
+        if install_sqlite_tuning(db.engine, pragmas):
+            app.extensions['sqlite_pragmas'] = pragmas
+            app.logger.debug(f"[SQLITE] PRAGMAs aplicados em cada conexão: {pragmas}")
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Perfil de Inicialização (Cold Start)
+==============================================================================
+
+Com `min_instances: 0`, cada instância nova do App Engine importa o pacote e
+executa `create_app()` (via `main.py`) antes de atender a primeira requisição.
+Este módulo mede esse custo:
+
+1.  **Fases do `create_app`:** `StartupTimer` registra o tempo de cada etapa
+    (configuração, banco, inspeção do schema, semeadura, extensões,
+    blueprints, comandos) em `app.extensions['startup_phases']`, em ms.
+2.  **`flask startup-profile`:** executa `import` + `create_app()` em um
+    interpretador novo (`python -X importtime`), com um SQLite vazio em um
+    diretório temporário (como o `/tmp` de uma instância nova), e informa o
+    tempo de importação por módulo e por fase. Com `--runs N` usa a mediana.
+3.  **Linha de base:** `--baseline` compara o resultado com um JSON gravado
+    por `--write-baseline` e falha (código 1) se o tempo de importação ou do
+    `create_app` crescer além da tolerância, se o número de módulos
+    carregados crescer, ou se um módulo de `DEFERRED_MODULES` (ex: Pillow)
+    voltar a ser importado na inicialização.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask
+
+# Módulos pesados que só devem ser importados no primeiro uso (uploads).
+DEFERRED_MODULES: Tuple[str, ...] = ('PIL',)
+
+DEFAULT_TOLERANCE = {'time': 1.0, 'modules': 0.05}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import BelarminoMonteiroAdvogado
+imported = time.perf_counter()
+app = BelarminoMonteiroAdvogado.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'phases': app.extensions.get('startup_phases', {}),
+    'modules': sorted(sys.modules),
+}))
+"""
+
+
+class StartupTimer:
+    """
+    Cronômetro das fases do `create_app`.
+
+    Cada `mark(nome)` registra o tempo desde a marca anterior; `finish()`
+    grava o resultado em `app.extensions['startup_phases']`.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.phases: Dict[str, float] = {}
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        """Encerra a fase `phase` (acumula se já existir)."""
+        now = time.perf_counter()
+        self.phases[phase] = round(self.phases.get(phase, 0.0) + (now - self._last) * 1000, 3)
+        self._last = now
+
+    def finish(self) -> Dict[str, float]:
+        """Grava as fases na aplicação e registra o total no log."""
+        self.app.extensions['startup_phases'] = self.phases
+        total = (time.perf_counter() - self._start) * 1000
+        self.app.logger.info(f"[STARTUP] create_app em {total:.1f} ms: {self.phases}")
+        return self.phases
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Lê a saída de `python -X importtime`.
+
+    Args:
+        stderr (str): A saída de erro do interpretador.
+
+    Returns:
+        List[Tuple[str, int, int]]: (módulo, próprio em µs, acumulado em µs).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def run_probe(root: str, python: str = sys.executable) -> Dict:
+    """
+    Mede `import` + `create_app()` em um interpretador novo.
+
+    Args:
+        root (str): Diretório do projeto (onde está o pacote).
+        python (str): O interpretador. Padrão: o atual.
+
+    Returns:
+        Dict: `import_ms`, `create_app_ms`, `phases`, `modules_loaded`,
+        `deferred_loaded` e `imports` (módulo -> (próprio, acumulado) em ms).
+    """
+    with tempfile.TemporaryDirectory(prefix='startup-profile-') as workdir:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'site.db')}",
+                   PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+        proc = subprocess.run([python, '-X', 'importtime', '-c', _PROBE], cwd=root, env=env,
+                              capture_output=True, text=True, timeout=300)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Falha ao criar a aplicação no perfil de inicialização:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    modules = result.pop('modules')
+    result['modules_loaded'] = len(modules)
+    result['deferred_loaded'] = [name for name in DEFERRED_MODULES if name in modules]
+    result['imports'] = {name: (own / 1000, cumulative / 1000)
+                         for name, own, cumulative in parse_importtime(proc.stderr)}
+    return result
+
+
+def profile_startup(root: str, runs: int = 3) -> Dict:
+    """
+    Executa `run_probe` `runs` vezes e devolve as medianas.
+
+    Args:
+        root (str): Diretório do projeto.
+        runs (int): Número de execuções (a primeira também aquece o bytecode).
+
+    Returns:
+        Dict: O mesmo formato de `run_probe`, com os tempos medianos.
+    """
+    results = [run_probe(root) for _ in range(max(runs, 1))]
+    median = lambda values: round(statistics.median(values), 3)
+    phases = {name: median([r['phases'].get(name, 0.0) for r in results]) for name in results[0]['phases']}
+    imports = {name: tuple(median([r['imports'].get(name, (0, 0))[i] for r in results]) for i in (0, 1))
+               for name in results[0]['imports']}
+    return {
+        'runs': len(results),
+        'import_ms': median([r['import_ms'] for r in results]),
+        'create_app_ms': median([r['create_app_ms'] for r in results]),
+        'phases': phases,
+        'modules_loaded': max(r['modules_loaded'] for r in results),
+        'deferred_loaded': sorted({name for r in results for name in r['deferred_loaded']}),
+        'imports': imports,
+    }
+
+
+def baseline_from(result: Dict) -> Dict:
+    """Linha de base a gravar a partir de um resultado de `profile_startup`."""
+    return {
+        'import_ms': result['import_ms'],
+        'create_app_ms': result['create_app_ms'],
+        'modules_loaded': result['modules_loaded'],
+        'deferred_modules': list(DEFERRED_MODULES),
+        'tolerance': dict(DEFAULT_TOLERANCE),
+    }
+
+
+def compare_to_baseline(result: Dict, baseline: Dict) -> List[str]:
+    """
+    Compara um resultado com a linha de base.
+
+    Args:
+        result (Dict): Resultado de `profile_startup`.
+        baseline (Dict): Linha de base (ver `baseline_from`).
+
+    Returns:
+        List[str]: As regressões encontradas (vazia se dentro do orçamento).
+    """
+    tolerance = {**DEFAULT_TOLERANCE, **baseline.get('tolerance', {})}
+    problems = []
+    for key in ('import_ms', 'create_app_ms'):
+        limit = baseline[key] * (1 + tolerance['time'])
+        if result[key] > limit:
+            problems.append(f"{key}: {result[key]:.1f} ms > {limit:.1f} ms "
+                            f"(base {baseline[key]:.1f} ms + {tolerance['time']:.0%})")
+    module_limit = int(baseline['modules_loaded'] * (1 + tolerance['modules']))
+    if result['modules_loaded'] > module_limit:
+        problems.append(f"modules_loaded: {result['modules_loaded']} > {module_limit}")
+    loaded = set(result['deferred_loaded']) & set(baseline.get('deferred_modules', DEFERRED_MODULES))
+    if loaded:
+        problems.append(f"Módulos que deveriam ser adiados foram importados na inicialização: {sorted(loaded)}")
+    return problems
+
+
+def load_baseline(path: str) -> Optional[Dict]:
+    """Lê a linha de base (None se o arquivo não existe)."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,99 @@
+/* BelarminoMonteiroAdvogado/static/js/search-suggest.js
+   SUGESTÕES DE BUSCA - Lista instantânea sob os formulários `form[role="search"][data-suggest-url]`.
+   As respostas de /search/suggest vêm de um índice em memória (sem consulta ao banco)
+   e são guardadas por texto digitado, então repetir um prefixo não gera requisição.
+*/
+
+(() => {
+    const DEBOUNCE_MS = 120;
+    const cache = new Map();
+
+    function attach(form) {
+        const input = form.querySelector('input[name="q"]');
+        const endpoint = form.dataset.suggestUrl;
+        // O script pode ser incluído duas vezes (menu + página de busca).
+        if (!input || !endpoint || form.dataset.suggestReady) return;
+        form.dataset.suggestReady = '1';
+
+        const list = document.createElement('ul');
+        list.className = 'search-suggest dropdown-menu shadow';
+        list.setAttribute('role', 'listbox');
+        list.id = `search-suggest-${Math.random().toString(36).slice(2, 8)}`;
+        form.style.position = form.style.position || 'relative';
+        form.appendChild(list);
+        input.setAttribute('autocomplete', 'off');
+        input.setAttribute('aria-controls', list.id);
+
+        let timer = null;
+        let controller = null;
+        let active = -1;
+
+        const close = () => { list.classList.remove('show'); active = -1; };
+
+        const render = (suggestions) => {
+            list.replaceChildren(...suggestions.map((item) => {
+                const li = document.createElement('li');
+                const a = document.createElement('a');
+                a.className = 'dropdown-item d-flex justify-content-between gap-3';
+                a.href = item.url;
+                a.setAttribute('role', 'option');
+                const label = document.createElement('span');
+                label.textContent = item.label;
+                const tipo = document.createElement('small');
+                tipo.className = 'text-muted';
+                tipo.textContent = item.tipo;
+                a.append(label, tipo);
+                li.appendChild(a);
+                return li;
+            }));
+            list.classList.toggle('show', suggestions.length > 0);
+            active = -1;
+        };
+
+        const fetchSuggestions = async (query) => {
+            if (cache.has(query)) return cache.get(query);
+            if (controller) controller.abort();
+            controller = new AbortController();
+            const response = await fetch(`${endpoint}?q=${encodeURIComponent(query)}`, {
+                signal: controller.signal,
+                headers: { Accept: 'application/json' },
+            });
+            if (!response.ok) return [];
+            const data = await response.json();
+            cache.set(query, data.suggestions);
+            return data.suggestions;
+        };
+
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (query.length < 2) { close(); return; }
+            timer = setTimeout(() => {
+                fetchSuggestions(query).then(render).catch(() => {});
+            }, cache.has(query) ? 0 : DEBOUNCE_MS);
+        });
+
+        input.addEventListener('keydown', (event) => {
+            const items = list.querySelectorAll('a');
+            if (!list.classList.contains('show') || !items.length) return;
+            if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+                event.preventDefault();
+                active = (active + (event.key === 'ArrowDown' ? 1 : items.length - 1)) % items.length;
+                items.forEach((a, i) => a.classList.toggle('active', i === active));
+            } else if (event.key === 'Enter' && active >= 0) {
+                event.preventDefault();
+                window.location.href = items[active].href;
+            } else if (event.key === 'Escape') {
+                close();
+            }
+        });
+
+        document.addEventListener('click', (event) => {
+            if (!form.contains(event.target)) close();
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('form[role="search"]').forEach(attach);
+    });
+})();
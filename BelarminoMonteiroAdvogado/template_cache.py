@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Cache de Bytecode do Jinja e Aquecimento (`/_ah/warmup`)
+==============================================================================
+
+Sem cache, o primeiro visitante após um cold start paga a compilação de
+`base_optionN.html`, `home_optionN.html`, dos parciais e, no painel, do
+`admin/dashboard.html`. Este módulo:
+
+1.  **Bytecode persistente:** `app.jinja_env.bytecode_cache` grava o código
+    compilado de cada template em `TEMPLATE_CACHE_FOLDER` (padrão:
+    `BelarminoMonteiroAdvogado/.jinja-cache`). A chave usa só o nome do
+    template (não o caminho absoluto), então o cache gerado no deploy vale na
+    instância; a soma de verificação do fonte e a versão do Python invalidam
+    entradas antigas. Em disco somente leitura (App Engine), o cache é lido e
+    as gravações são ignoradas; se a pasta não existir e não puder ser criada,
+    usa o diretório temporário.
+2.  **Pré-compilação no deploy:** `flask build-assets` chama
+    `precompile_templates(app)` para todos os templates.
+3.  **Aquecimento:** o App Engine chama `/_ah/warmup` (com
+    `inbound_services: warmup`) antes de enviar tráfego a uma instância nova.
+    `warm_up(app)` carrega os templates do tema ativo (e os comuns) e monta os
+    caches em memória (snapshot do site, registro de páginas, índice de
+    conteúdo e sugestões de busca). Só roda uma vez por processo.
+
+Configuração: `TEMPLATE_CACHE_ENABLED` (padrão: True fora dos testes) e
+`TEMPLATE_CACHE_FOLDER`.
+"""
+import os
+import re
+import tempfile
+import threading
+import time
+from hashlib import sha1
+from typing import Dict, Iterable, List, Optional
+
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+
+TEMPLATE_CACHE_DIRNAME = '.jinja-cache'
+
+# Templates de um tema específico: `base_option3.html`, `home/home_option3.html`...
+_THEME_TEMPLATE_RE = re.compile(r'_(option\d+)\.[a-z]+$')
+
+_warmup_lock = threading.Lock()
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """
+    `FileSystemBytecodeCache` com chave independente do caminho de instalação
+    e tolerante a disco somente leitura.
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(directory, pattern='%s.jinja-cache')
+        self.writable = True
+
+    def get_cache_key(self, name: str, filename: Optional[str] = None) -> str:
+        return sha1(name.encode('utf-8')).hexdigest()
+
+    def dump_bytecode(self, bucket) -> None:
+        if not self.writable:
+            return
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            # Pasta do deploy somente leitura: usa o que foi pré-compilado e não tenta de novo.
+            self.writable = False
+
+
+def _cache_folder(app: Flask) -> str:
+    folder = app.config['TEMPLATE_CACHE_FOLDER']
+    try:
+        os.makedirs(folder, exist_ok=True)
+        return folder
+    except OSError:
+        fallback = os.path.join(tempfile.gettempdir(), 'bma-jinja-cache')
+        os.makedirs(fallback, exist_ok=True)
+        app.logger.warning(f"[TEMPLATES] {folder} indisponível; cache de bytecode em {fallback}.")
+        return fallback
+
+
+def init_template_cache(app: Flask) -> None:
+    """
+    Liga o cache de bytecode do Jinja à aplicação.
+
+    Args:
+        app (Flask): A aplicação.
+    """
+    app.config.setdefault('TEMPLATE_CACHE_ENABLED', not app.testing)
+    app.config.setdefault('TEMPLATE_CACHE_FOLDER', os.path.join(app.root_path, TEMPLATE_CACHE_DIRNAME))
+    if not app.config['TEMPLATE_CACHE_ENABLED']:
+        return
+    app.jinja_env.bytecode_cache = TemplateBytecodeCache(_cache_folder(app))
+
+
+def theme_templates(names: Iterable[str], theme: Optional[str]) -> List[str]:
+    """
+    Filtra os templates de um tema: mantém os comuns e os de `theme`.
+
+    Args:
+        names (Iterable[str]): Nomes dos templates.
+        theme (str | None): Tema ativo (ex: 'option3'). None mantém todos.
+
+    Returns:
+        List[str]: Os nomes selecionados, ordenados.
+    """
+    selected = []
+    for name in names:
+        match = _THEME_TEMPLATE_RE.search(name)
+        if theme is None or match is None or match.group(1) == theme:
+            selected.append(name)
+    return sorted(selected)
+
+
+def precompile_templates(app: Flask, theme: Optional[str] = None) -> Dict[str, object]:
+    """
+    Carrega (compila) os templates, gravando o bytecode se o cache estiver ligado.
+
+    Args:
+        app (Flask): A aplicação.
+        theme (str, optional): Só os templates comuns e os deste tema.
+
+    Returns:
+        Dict[str, object]: `compiled` (quantidade), `errors` (nome -> erro) e `ms`.
+    """
+    start = time.perf_counter()
+    env = app.jinja_env
+    names = theme_templates((n for n in env.list_templates() if n.endswith(('.html', '.xml', '.txt'))), theme)
+    errors = {}
+    for name in names:
+        try:
+            env.get_template(name)
+        except Exception as e:  # Um template quebrado não deve impedir o aquecimento dos demais.
+            errors[name] = str(e)
+    return {'compiled': len(names) - len(errors), 'errors': errors,
+            'ms': round((time.perf_counter() - start) * 1000, 1)}
+
+
+def warm_up(app: Flask) -> Dict[str, object]:
+    """
+    Pré-compila os templates do tema ativo e monta os caches em memória.
+
+    Deve rodar dentro de uma requisição (as sugestões de busca usam
+    `url_for`). Chamadas seguintes no mesmo processo devolvem o resultado da
+    primeira.
+
+    Args:
+        app (Flask): A aplicação.
+
+    Returns:
+        Dict[str, object]: Estatísticas do aquecimento.
+    """
+    with _warmup_lock:
+        if 'warmup' in app.extensions:
+            return app.extensions['warmup']
+        from .content_index import get_content_index
+        from .page_registry import get_page_registry
+        from .search_suggest import get_suggest_index
+        from .site_cache import get_site_snapshot
+
+        start = time.perf_counter()
+        snapshot = get_site_snapshot(app)
+        get_page_registry(app)
+        get_content_index(app)
+        get_suggest_index(app)
+        caches_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        templates = precompile_templates(app, theme=snapshot.theme)
+        for name, error in templates['errors'].items():
+            app.logger.warning(f"[WARMUP] Template {name} não compilou: {error}")
+        stats = {'theme': snapshot.theme, 'caches_ms': caches_ms, **templates}
+        app.extensions['warmup'] = stats
+        app.logger.info(f"[WARMUP] {templates['compiled']} templates ({snapshot.theme}) em {templates['ms']} ms; "
+                        f"caches em {caches_ms} ms.")
+        return stats
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de latência, vazão e memória dos endpoints públicos e do painel.
+
+Uso: `python -m benchmarks.run --help` (ver `harness.py`).
+"""
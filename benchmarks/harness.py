@@ -0,0 +1,500 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+Harness de Benchmark: Latência (p50/p95/p99), Vazão e Memória
+==============================================================================
+
+Os testes em `tests/` verificam status e marcação; os `DEPLOY_REPORT_*.json`
+registram apenas aprovado/reprovado. Este harness mede desempenho:
+
+1.  **Banco preparado:** um SQLite novo em um diretório temporário, com os
+    dados iniciais do site (`ensure_essential_data`), alguns membros da
+    equipe, depoimentos e parceiros a mais e um usuário administrador.
+2.  **Cenários:** a home em cada tema (`templates/base_optionN.html`), as
+    páginas de serviço (`Pagina.tipo == 'servico'`, em rodízio), a busca
+    (termos em rodízio), o sitemap e o painel (`/admin/dashboard`, logado).
+    Os cenários que não são a home rodam no primeiro tema.
+3.  **Modos:** `inprocess` chama o WSGI da aplicação no próprio processo
+    (cliente de teste do Flask, sem rede); `gunicorn` sobe um Gunicorn local
+    (`benchmarks.wsgi:app`) e faz `requests` requisições por cenário com
+    `concurrency` threads, após `warmup` requisições de aquecimento. Em
+    processo as requisições são sequenciais: threads só disputariam o GIL
+    (trocas de ~5 ms) e o p95 mediria essa disputa, não a aplicação. O cache
+    de processo não é compartilhado entre workers, então no modo `gunicorn`
+    cada tema usa um servidor novo.
+4.  **Métricas:** p50/p95/p99/máx (ms), vazão (req/s), erros (status != 200)
+    e RSS ao fim do cenário (no Gunicorn, soma do master e dos workers).
+5.  **Linha de base:** o relatório é gravado em JSON e comparado com uma
+    execução anterior: p95 e RSS não podem subir, nem a vazão cair, além da
+    tolerância gravada na linha de base (ver `compare_to_baseline`). O p95
+    também precisa subir mais que `latency_ms` (em ms), para que o ruído de
+    cenários abaixo de 1 ms não conte como regressão.
+
+Tempos dependem da máquina: compare execuções feitas no mesmo ambiente.
+"""
+import itertools
+import math
+import os
+import platform
+import re
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.client import HTTPConnection
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+ROOT = Path(__file__).resolve().parents[1]
+TEMPLATES_DIR = ROOT / 'BelarminoMonteiroAdvogado' / 'templates'
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+DEFAULT_TOLERANCE = {'latency': 0.5, 'latency_ms': 2.0, 'throughput': 0.35, 'rss': 0.25}
+SEARCH_TERMS: Tuple[str, ...] = ('direito', 'trabalhista', 'contrato', 'família')
+
+_CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+# (status, cabeçalhos Set-Cookie, corpo)
+Response = Tuple[int, List[str], bytes]
+
+
+class Scenario(NamedTuple):
+    """Um cenário: nome, URLs (usadas em rodízio) e se exige login."""
+    name: str
+    paths: Tuple[str, ...]
+    admin: bool = False
+
+
+def bench_config(database_uri: str, page_cache: bool = True) -> Dict:
+    """
+    Configuração da aplicação nos dois modos (como em produção, com outro banco).
+
+    Args:
+        database_uri (str): URI do SQLite preparado.
+        page_cache (bool): Mantém o cache de páginas HTML (padrão de produção).
+
+    Returns:
+        Dict: O `test_config` a passar ao `create_app`.
+    """
+    return {
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'SECRET_KEY': 'benchmark-secret-key',
+        'PAGE_CACHE_ENABLED': page_cache,
+    }
+
+
+def discover_themes() -> List[str]:
+    """Temas disponíveis (`base_optionN.html`), em ordem numérica."""
+    found = (re.fullmatch(r'base_(option\d+)\.html', name) for name in os.listdir(TEMPLATES_DIR))
+    return sorted((m.group(1) for m in found if m), key=lambda theme: int(theme[len('option'):]))
+
+
+# --- BANCO E CENÁRIOS ---
+
+def prepare_app(database_path: str, page_cache: bool = True):
+    """
+    Cria a aplicação sobre um SQLite novo e popula os dados do benchmark.
+
+    Args:
+        database_path (str): Caminho do arquivo SQLite (não deve existir).
+        page_cache (bool): Ver `bench_config`.
+
+    Returns:
+        Tuple[Flask, Tuple[str, str]]: A aplicação e as credenciais do admin.
+    """
+    from BelarminoMonteiroAdvogado import create_app, db, ensure_essential_data
+    from BelarminoMonteiroAdvogado.models import ClienteParceiro, Depoimento, MembroEquipe, User
+
+    app = create_app(bench_config(f'sqlite:///{database_path}', page_cache))
+    credentials = ('bench-admin', secrets.token_urlsafe(12))
+    with app.app_context():
+        db.create_all()
+        ensure_essential_data()
+        for n in range(6):
+            db.session.add(MembroEquipe(nome=f'Advogado {n}', cargo='Advogado', ordem=n))
+            db.session.add(Depoimento(nome_cliente=f'Cliente {n}', texto_depoimento='Ótimo atendimento. ' * 10,
+                                      aprovado=True, token_submissao=secrets.token_hex(16)))
+            db.session.add(ClienteParceiro(nome=f'Parceiro {n}', logo_path='images/logo.png', ordem=n))
+        user = User(username=credentials[0])
+        user.set_password(credentials[1])
+        db.session.add(user)
+        db.session.commit()
+    return app, credentials
+
+
+def set_theme(app, theme: str) -> None:
+    """Ativa `theme` (o commit invalida os caches do processo da `app`)."""
+    from BelarminoMonteiroAdvogado import db
+    from BelarminoMonteiroAdvogado.models import ThemeSettings
+
+    with app.app_context():
+        settings = ThemeSettings.query.first() or ThemeSettings()
+        settings.theme = theme
+        db.session.add(settings)
+        db.session.commit()
+
+
+def build_scenarios(app, themes: Sequence[str], only: Optional[Sequence[str]] = None) -> List[Tuple[str, List[Scenario]]]:
+    """
+    Agrupa os cenários por tema: a home em todos, os demais no primeiro.
+
+    Args:
+        app (Flask): A aplicação preparada (para listar as páginas de serviço).
+        themes (Sequence[str]): Temas a medir.
+        only (Sequence[str], optional): Filtra por prefixo do nome do cenário
+            (ex: `home`, `search`).
+
+    Returns:
+        List[Tuple[str, List[Scenario]]]: (tema, cenários) na ordem de execução.
+    """
+    from BelarminoMonteiroAdvogado.models import Pagina
+
+    with app.app_context():
+        services = tuple(f'/{slug}' for (slug,) in Pagina.query.filter_by(tipo='servico', ativo=True)
+                         .order_by(Pagina.slug).with_entities(Pagina.slug))
+    shared = [
+        Scenario('services', services),
+        Scenario('search', tuple(f'/search?{urlencode({"q": term})}' for term in SEARCH_TERMS)),
+        Scenario('sitemap', ('/sitemap.xml',)),
+        Scenario('admin_dashboard', ('/admin/dashboard',), admin=True),
+    ]
+    wanted = lambda scenario: not only or any(scenario.name.startswith(prefix) for prefix in only)
+    groups = []
+    for index, theme in enumerate(themes):
+        scenarios = [Scenario(f'home[{theme}]', ('/',))] + (shared if index == 0 else [])
+        scenarios = [s for s in scenarios if wanted(s) and s.paths]
+        if scenarios:
+            groups.append((theme, scenarios))
+    return groups
+
+
+# --- CLIENTES ---
+
+class InProcessDriver:
+    """Chama o WSGI da aplicação diretamente (um cliente de teste por thread)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, headers: Optional[Dict] = None,
+                data: Optional[Dict] = None) -> Response:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client(use_cookies=False)
+        response = client.open(path, method=method, headers=headers or {}, data=data)
+        return response.status_code, response.headers.getlist('Set-Cookie'), response.get_data()
+
+
+class HttpDriver:
+    """Requisições HTTP a um servidor local (uma conexão por thread)."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, headers: Optional[Dict] = None,
+                data: Optional[Dict] = None) -> Response:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = HTTPConnection(self.host, self.port, timeout=30)
+        headers = dict(headers or {})
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+        except (ConnectionError, OSError):
+            # O worker síncrono do Gunicorn pode fechar a conexão: reabre uma vez.
+            connection.close()
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+        return response.status, response.headers.get_all('Set-Cookie') or [], response.read()
+
+
+def _session_cookie(set_cookies: List[str]) -> Optional[str]:
+    for header in set_cookies:
+        if header.startswith('session='):
+            return header.split(';', 1)[0]
+    return None
+
+
+def login(driver, username: str, password: str) -> str:
+    """
+    Faz login pelo formulário (com CSRF) e devolve o cabeçalho `Cookie`.
+
+    Raises:
+        RuntimeError: Se o login não devolver um cookie de sessão.
+    """
+    status, cookies, body = driver.request('GET', '/auth/login')
+    token = _CSRF_RE.search(body.decode('utf-8', 'replace'))
+    cookie = _session_cookie(cookies)
+    data = {'username': username, 'password': password, 'csrf_token': token.group(1) if token else ''}
+    status, cookies, _body = driver.request('POST', '/auth/login', headers={'Cookie': cookie} if cookie else None,
+                                            data=data)
+    session = _session_cookie(cookies)
+    if status not in (302, 303) or session is None:
+        raise RuntimeError(f"Login do benchmark falhou (status {status}).")
+    return session
+
+
+# --- MEDIÇÃO ---
+
+def percentile(sorted_values: Sequence[float], pct: float) -> Optional[float]:
+    """Percentil por posição mais próxima (`sorted_values` já ordenado)."""
+    if not sorted_values:
+        return None
+    index = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def rss_mb(pids: Sequence[int]) -> Optional[float]:
+    """Soma do RSS (MB) dos processos, via `/proc` (None fora do Linux)."""
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status', encoding='ascii') as f:
+                total_kb += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        except (OSError, StopIteration, ValueError):
+            return None
+    return round(total_kb / 1024, 1)
+
+
+def _child_pids(pid: int) -> List[int]:
+    children = []
+    for task in Path(f'/proc/{pid}/task').glob('*'):
+        try:
+            children.extend(int(child) for child in (task / 'children').read_text().split())
+        except OSError:
+            continue
+    return children
+
+
+def run_scenario(driver, scenario: Scenario, requests: int, concurrency: int, warmup: int,
+                 cookie: Optional[str] = None, pids: Callable[[], List[int]] = lambda: [os.getpid()]) -> Dict:
+    """
+    Executa um cenário e calcula as métricas.
+
+    Args:
+        driver: `InProcessDriver` ou `HttpDriver`.
+        scenario (Scenario): O cenário.
+        requests (int): Requisições medidas.
+        concurrency (int): Threads simultâneas.
+        warmup (int): Requisições de aquecimento (não medidas).
+        cookie (str, optional): Cookie de sessão (cenários do painel).
+        pids (Callable): Processos cujo RSS é medido ao final.
+
+    Returns:
+        Dict: `requests`, `errors`, `p50_ms`, `p95_ms`, `p99_ms`, `max_ms`,
+        `throughput_rps` e `rss_mb`.
+    """
+    headers = {'Cookie': cookie} if cookie else None
+    for i in range(warmup):
+        driver.request('GET', scenario.paths[i % len(scenario.paths)], headers=headers)
+
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors: List[Tuple[str, int]] = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            path = scenario.paths[i % len(scenario.paths)]
+            start = time.perf_counter()
+            status, _cookies, _body = driver.request('GET', path, headers=headers)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if status != 200:
+                    errors.append((path, status))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(max(concurrency, 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        'requests': len(ordered),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+        'max_ms': ms(ordered[-1] if ordered else None),
+        'throughput_rps': round(len(ordered) / wall, 1) if wall > 0 else None,
+        'rss_mb': rss_mb(pids()),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def gunicorn_server(database_path: str, workers: int = 1, threads: int = 1,
+                    page_cache: bool = True) -> Iterator[Tuple[HttpDriver, subprocess.Popen]]:
+    """
+    Sobe `gunicorn benchmarks.wsgi:app` em uma porta livre e espera responder.
+
+    Yields:
+        Tuple[HttpDriver, Popen]: O cliente HTTP e o processo master.
+    """
+    port = _free_port()
+    env = dict(os.environ, BENCH_DATABASE_URI=f'sqlite:///{database_path}', BENCH_PAGE_CACHE='1' if page_cache else '0',
+               PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{port}', '-w', str(workers),
+               '--threads', str(threads), '--log-level', 'warning', 'benchmarks.wsgi:app']
+    process = subprocess.Popen(command, cwd=str(ROOT), env=env)
+    driver = HttpDriver('127.0.0.1', port)
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Gunicorn encerrou ao iniciar (código {process.returncode}).")
+            try:
+                if HttpDriver('127.0.0.1', port).request('GET', '/robots.txt')[0] == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("Gunicorn não respondeu em 60 s.")
+            time.sleep(0.2)
+        yield driver, process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+# --- EXECUÇÃO ---
+
+@contextmanager
+def _driver(mode: str, app, database_path: str, workers: int, threads: int, page_cache: bool):
+    """Cliente do modo e função que lista os processos medidos no RSS."""
+    if mode == 'inprocess':
+        yield InProcessDriver(app), lambda: [os.getpid()]
+    elif mode == 'gunicorn':
+        # Um servidor novo por tema: o cache de processo de cada worker não vê commits de outro processo.
+        with gunicorn_server(database_path, workers, threads, page_cache) as (driver, process):
+            yield driver, lambda: [process.pid] + _child_pids(process.pid)
+    else:
+        raise ValueError(f"Modo desconhecido: {mode}")
+
+
+def run_benchmarks(modes: Sequence[str] = ('inprocess',), requests: int = 200, concurrency: int = 4,
+                   warmup: int = 10, themes: Optional[Sequence[str]] = None, only: Optional[Sequence[str]] = None,
+                   workers: int = 1, threads: int = 1, page_cache: bool = True,
+                   log: Callable[[str], None] = lambda message: None) -> Dict:
+    """
+    Prepara o banco e executa os cenários em cada modo.
+
+    Args:
+        modes (Sequence[str]): `inprocess` e/ou `gunicorn`.
+        requests, warmup (int): Ver `run_scenario`.
+        concurrency (int): Threads do cliente no modo `gunicorn` (em processo: 1).
+        themes (Sequence[str], optional): Temas da home. Padrão: todos.
+        only (Sequence[str], optional): Filtra cenários (ver `build_scenarios`).
+        workers, threads (int): Workers e threads do Gunicorn.
+        page_cache (bool): Mantém o cache de páginas HTML.
+        log (Callable): Recebe uma linha de progresso por cenário.
+
+    Returns:
+        Dict: `meta` (ambiente e parâmetros) e `modes` (modo -> cenário -> métricas).
+    """
+    themes = list(themes or discover_themes())
+    report = {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'requests': requests, 'concurrency': concurrency, 'warmup': warmup,
+            'workers': workers, 'threads': threads, 'page_cache': page_cache,
+        },
+        'modes': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        database_path = os.path.join(workdir, 'site.db')
+        app, credentials = prepare_app(database_path, page_cache)
+        groups = build_scenarios(app, themes, only)
+
+        for mode in modes:
+            results = report['modes'][mode] = {}
+            for theme, scenarios in groups:
+                set_theme(app, theme)
+                with _driver(mode, app, database_path, workers, threads, page_cache) as (driver, pids):
+                    cookie = None
+                    for scenario in scenarios:
+                        if scenario.admin and cookie is None:
+                            cookie = login(driver, *credentials)
+                        results[scenario.name] = stats = run_scenario(
+                            driver, scenario, requests, concurrency if mode == 'gunicorn' else 1, warmup,
+                            cookie if scenario.admin else None, pids)
+                        log(f"{mode:<9} {scenario.name:<18} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  "
+                            f"p99 {stats['p99_ms']:>8} ms  {stats['throughput_rps']:>8} req/s  "
+                            f"RSS {stats['rss_mb']} MB  erros {stats['errors']}")
+    return report
+
+
+def compare_to_baseline(report: Dict, baseline: Dict) -> List[str]:
+    """
+    Compara um relatório com a linha de base (mesmos modos e cenários).
+
+    Regressão: p95 acima de `base * (1 + latency)` e de `base + latency_ms`,
+    RSS acima de `base * (1 + rss)`, vazão abaixo de `base * (1 - throughput)`
+    ou erros em um cenário que não tinha erros.
+
+    Args:
+        report (Dict): Resultado de `run_benchmarks`.
+        baseline (Dict): Relatório anterior (com `tolerance` opcional).
+
+    Returns:
+        List[str]: As regressões encontradas (vazia se dentro da tolerância).
+    """
+    tolerance = {**DEFAULT_TOLERANCE, **baseline.get('tolerance', {})}
+    problems = []
+    for mode, scenarios in report['modes'].items():
+        for name, current in scenarios.items():
+            base = baseline.get('modes', {}).get(mode, {}).get(name)
+            if not base:
+                continue
+            label = f"{mode}/{name}"
+            if current['errors'] and not base.get('errors'):
+                problems.append(f"{label}: {current['errors']} erros {current['error_samples']}")
+            if base.get('p95_ms') and current['p95_ms'] is not None:
+                limit = max(base['p95_ms'] * (1 + tolerance['latency']), base['p95_ms'] + tolerance['latency_ms'])
+                if current['p95_ms'] > limit:
+                    problems.append(f"{label}: p95 {current['p95_ms']:.1f} ms > {limit:.1f} ms "
+                                    f"(base {base['p95_ms']:.1f} ms)")
+            if base.get('throughput_rps') and current['throughput_rps'] is not None:
+                limit = base['throughput_rps'] * (1 - tolerance['throughput'])
+                if current['throughput_rps'] < limit:
+                    problems.append(f"{label}: vazão {current['throughput_rps']:.1f} req/s < {limit:.1f} req/s "
+                                    f"(base {base['throughput_rps']:.1f} - {tolerance['throughput']:.0%})")
+            if base.get('rss_mb') and current['rss_mb'] is not None:
+                limit = base['rss_mb'] * (1 + tolerance['rss'])
+                if current['rss_mb'] > limit:
+                    problems.append(f"{label}: RSS {current['rss_mb']:.1f} MB > {limit:.1f} MB "
+                                    f"(base {base['rss_mb']:.1f} MB + {tolerance['rss']:.0%})")
+    return problems
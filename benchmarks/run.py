@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+run.py
+
+Executa os benchmarks e compara com a linha de base (ver `harness.py`).
+
+Uso:
+    python -m benchmarks.run                               # em processo, compara com benchmarks/baseline.json
+    python -m benchmarks.run --mode all --concurrency 8    # também via Gunicorn local
+    python -m benchmarks.run --only home --themes option1,option9
+    python -m benchmarks.run --write-baseline              # grava a linha de base desta máquina
+    python -m benchmarks.run --output resultado.json --no-compare
+
+Sai com código 1 se houver regressão em relação à linha de base.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from .harness import DEFAULT_BASELINE, DEFAULT_TOLERANCE, compare_to_baseline, run_benchmarks
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn', 'all'), default='inprocess',
+                        help='WSGI em processo, Gunicorn local ou ambos (padrão: inprocess).')
+    parser.add_argument('--requests', type=int, default=200, help='Requisições medidas por cenário (padrão: 200).')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Requisições simultâneas no modo gunicorn (padrão: 4; em processo são sequenciais).')
+    parser.add_argument('--warmup', type=int, default=10, help='Requisições de aquecimento por cenário (padrão: 10).')
+    parser.add_argument('--workers', type=int, default=1, help='Workers do Gunicorn (padrão: 1, como no app.yaml).')
+    parser.add_argument('--threads', type=int, default=1, help='Threads por worker do Gunicorn (padrão: 1).')
+    parser.add_argument('--themes', help='Temas da home, separados por vírgula (padrão: todos).')
+    parser.add_argument('--only', help='Prefixos dos cenários, separados por vírgula (ex: home,search).')
+    parser.add_argument('--no-page-cache', action='store_true',
+                        help='Desliga o cache de páginas HTML (mede a renderização a cada requisição).')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                        help=f'Linha de base para comparação (padrão: {DEFAULT_BASELINE.name}).')
+    parser.add_argument('--no-compare', action='store_true', help='Não compara com a linha de base.')
+    parser.add_argument('--write-baseline', action='store_true', help='Grava o resultado como nova linha de base.')
+    parser.add_argument('--output', type=Path, help='Grava o relatório completo em JSON.')
+    parser.add_argument('--json', action='store_true', help='Imprime o relatório em JSON.')
+    args = parser.parse_args(argv)
+
+    split = lambda value: [item.strip() for item in value.split(',') if item.strip()] if value else None
+    modes = ('inprocess', 'gunicorn') if args.mode == 'all' else (args.mode,)
+    report = run_benchmarks(modes, requests=args.requests, concurrency=args.concurrency, warmup=args.warmup,
+                            themes=split(args.themes), only=split(args.only), workers=args.workers,
+                            threads=args.threads, page_cache=not args.no_page_cache,
+                            log=(lambda line: None) if args.json else print)
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    if args.write_baseline:
+        args.baseline.write_text(json.dumps(dict(report, tolerance=DEFAULT_TOLERANCE), indent=2, ensure_ascii=False)
+                                 + '\n', encoding='utf-8')
+        print(f"Linha de base gravada em {args.baseline}.", file=sys.stderr)
+        return 0
+    if args.no_compare:
+        return 0
+    if not args.baseline.exists():
+        print(f"Sem linha de base em {args.baseline}; use --write-baseline.", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    if baseline.get('meta', {}).get('page_cache') != report['meta']['page_cache']:
+        print("Aviso: a linha de base foi gravada com outra configuração de cache de páginas.", file=sys.stderr)
+    problems = compare_to_baseline(report, baseline)
+    for problem in problems:
+        print(f"REGRESSÃO: {problem}", file=sys.stderr)
+    if not problems:
+        print("Dentro da linha de base.", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+Entrada WSGI do benchmark com Gunicorn (`gunicorn benchmarks.wsgi:app`).
+
+Cria a aplicação com a mesma configuração do modo em processo, apontando para
+o banco preparado pelo harness (`BENCH_DATABASE_URI`).
+"""
+import os
+
+from BelarminoMonteiroAdvogado import create_app
+
+from .harness import bench_config
+
+app = create_app(bench_config(os.environ['BENCH_DATABASE_URI'], os.environ.get('BENCH_PAGE_CACHE', '1') == '1'))
@@ -9,6 +9,8 @@ Script AVANÇADO para otimizar TODAS as imagens do projeto:
 3. Comprime SEM perda visual perceptível
 4. Mantém backup das originais
 5. Suporta múltiplos formatos (JPG, PNG, GIF, BMP, TIFF)
+6. Processa em paralelo e pula as imagens que não mudaram
+   (usa `ImageProcessor.batch_optimize`)
 
 Autor: 
 Data: Janeiro 2025
@@ -17,10 +19,11 @@ Data: Janeiro 2025
 import os
 import sys
 from pathlib import Path
-from PIL import Image, ImageOps
 import shutil
 from datetime import datetime
 
+from BelarminoMonteiroAdvogado.image_processor import ImageProcessor
+
 # Cores
 class Colors:
     """
@@ -80,80 +83,6 @@ def format_size(bytes):
         bytes /= 1024.0
     return f"{bytes:.1f} TB"
 
-def optimize_image_high_quality(input_path, max_width=2560, quality=95):
-    """
-    Otimiza uma imagem com QUALIDADE MÁXIMA:
-    - Qualidade 95% (imperceptível ao olho humano)
-    - Redimensiona apenas se MUITO grande (>2560px)
-    - Usa método de compressão mais lento mas melhor (method=6)
-    - Mantém metadados EXIF importantes
-    - Corrige orientação automática
-    """
-    try:
-        # Abrir imagem
-        img = Image.open(input_path)
-        original_size = input_path.stat().st_size
-        
-        # Corrigir orientação EXIF
-        img = ImageOps.exif_transpose(img)
-        
-        # Converter RGBA para RGB se necessário (mantendo qualidade)
-        if img.mode in ('RGBA', 'LA'):
-            # Criar fundo branco de alta qualidade
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[-1])
-            img = background
-        elif img.mode == 'P':
-            img = img.convert('RGB')
-        elif img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
-        
-        # Redimensionar APENAS se MUITO grande (>2560px)
-        resized = False
-        if img.width > max_width or img.height > max_width:
-            # Calcular novo tamanho mantendo proporção
-            if img.width > img.height:
-                new_width = max_width
-                new_height = int(img.height * (max_width / img.width))
-            else:
-                new_height = max_width
-                new_width = int(img.width * (max_width / img.height))
-            
-            # Usar LANCZOS (melhor qualidade de redimensionamento)
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            resized = True
-            print_info(f"  Redimensionado para {new_width}x{new_height}")
-        
-        # Salvar como WebP com QUALIDADE MÁXIMA
-        output_path = input_path.with_suffix('.webp')
-        
-        # Parâmetros de qualidade máxima:
-        # - quality=95: Qualidade imperceptível ao olho humano
-        # - method=6: Compressão mais lenta mas melhor
-        # - lossless=False: Usa compressão lossy (menor tamanho, qualidade visual idêntica)
-        img.save(
-            output_path, 
-            'webp', 
-            quality=quality,
-            method=6,  # Melhor compressão (0-6, 6 é o melhor)
-            exact=False  # Permite otimizações adicionais
-        )
-        
-        new_size = output_path.stat().st_size
-        reduction = ((original_size - new_size) / original_size * 100)
-        
-        print_success(f"  Original: {format_size(original_size)}")
-        print_success(f"  WebP: {format_size(new_size)}")
-        print_success(f"  Redução: {reduction:.1f}%")
-        if resized:
-            print_info(f"  Redimensionado: Sim")
-        
-        return True, original_size, new_size
-        
-    except Exception as e:
-        print_error(f"  Erro: {str(e)}")
-        return False, 0, 0
-
 def create_backup(image_dir):
     """Cria backup das imagens originais"""
     backup_dir = image_dir.parent / f"images_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -202,38 +131,31 @@ def main():
         print_error("Falha ao criar backup. Abortando...")
         return 1
     
-    # Encontrar todas as imagens
-    image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif']
-    images_to_optimize = []
-    
-    for ext in image_extensions:
-        images_to_optimize.extend(image_dir.rglob(f'*{ext}'))
-        images_to_optimize.extend(image_dir.rglob(f'*{ext.upper()}'))
-    
-    # Remover duplicatas
-    images_to_optimize = list(set(images_to_optimize))
-    
+    # Conversão em paralelo (um processo por núcleo). O manifesto em
+    # `static/images/.optimize-manifest.json` faz as próximas execuções pularem
+    # as imagens que não mudaram.
     print_header("OTIMIZANDO IMAGENS")
-    print_info(f"Encontradas {len(images_to_optimize)} imagens para otimizar\n")
-    
-    # Otimizar cada imagem
-    total_original = 0
-    total_optimized = 0
-    success_count = 0
-    error_count = 0
-    
-    for i, img_path in enumerate(images_to_optimize, 1):
-        rel_path = img_path.relative_to(image_dir)
-        print(f"\n[{i}/{len(images_to_optimize)}] {rel_path}")
-        
-        success, orig_size, new_size = optimize_image_high_quality(img_path, max_width=2560, quality=95)
-        
-        if success:
-            total_original += orig_size
-            total_optimized += new_size
-            success_count += 1
-        else:
-            error_count += 1
+    processor = ImageProcessor(quality=95, max_width=2560, create_backup=False)  # O backup já foi feito acima.
+
+    def show_progress(done, total, record):
+        rel_path = Path(record['input_path']).relative_to(image_dir)
+        if record['status'] == 'optimized':
+            print_success(f"[{done}/{total}] {rel_path}: {format_size(record['original_size'])} -> {format_size(record['optimized_size'])}")
+        elif record['status'] == 'failed':
+            print_error(f"[{done}/{total}] {rel_path}: falha na otimização")
+
+    stats = processor.batch_optimize(
+        image_dir,
+        extensions=['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif'],
+        report_path=Path('test_logs') / 'image_optimization_report.json',
+        progress=show_progress,
+    )
+    print_info(f"{stats['skipped_files']} imagens inalteradas puladas; {stats['workers']} processos; {stats['elapsed_seconds']}s")
+
+    total_original = stats['original_total_size']
+    total_optimized = stats['optimized_total_size']
+    success_count = stats['successful_optimizations']
+    error_count = stats['failed_optimizations']
     
     # Relatório final
     print_header("RELATÓRIO DE OTIMIZAÇÃO")
@@ -264,7 +186,7 @@ def main():
     print_info("4. → Faça o deploy")
     print_info("5. → Monitore a performance")
     
-    if success_count > 0:
+    if success_count > 0 or (stats['skipped_files'] and not error_count):
         print(f"\n{Colors.GREEN}{Colors.BOLD} OTIMIZAÇÃO CONCLUÍDA COM SUCESSO!{Colors.END}")
         print(f"{Colors.GREEN}Todas as imagens foram otimizadas mantendo qualidade visual máxima!{Colors.END}\n")
         return 0
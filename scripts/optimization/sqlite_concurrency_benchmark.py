@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+sqlite_concurrency_benchmark.py
+
+Mede a vazão de leitura do SQLite com vários workers enquanto o "admin"
+grava, comparando os PRAGMAs padrão com o perfil de `sqlite_tuning.py`.
+
+Para cada modo:
+1. Cria um banco novo com `create_app` (mesmas tabelas e dados iniciais do site)
+   e replica o `conteudo_geral` até `--rows` linhas.
+2. Inicia `--readers` processos que repetem a consulta de montagem de página
+   (`ConteudoGeral` de uma página) e um processo escritor que, a cada
+   `--write-interval` segundos, atualiza `--batch` linhas em uma transação
+   (como um "Salvar" no painel).
+3. Após `--duration` segundos, informa leituras/s, latência p50/p95/máx,
+   erros `database is locked` e commits do escritor.
+
+Uso:
+    python scripts/optimization/sqlite_concurrency_benchmark.py --readers 4 --duration 5
+
+Os processos usam `sqlite3` diretamente (sem Flask), com o mesmo `timeout`
+padrão do driver usado pelo SQLAlchemy, para isolar o efeito dos PRAGMAs.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from BelarminoMonteiroAdvogado.sqlite_tuning import apply_sqlite_pragmas, resolve_pragmas  # noqa: E402
+
+READ_SQL = "SELECT secao, conteudo FROM conteudo_geral WHERE pagina IN (?, 'configuracoes_gerais')"
+WRITE_SQL = "UPDATE conteudo_geral SET conteudo = ? WHERE id = ?"
+
+
+def prepare_database(path: str, rows: int) -> list:
+    """Cria o banco com o esquema e os dados do site e o amplia até `rows` linhas."""
+    from BelarminoMonteiroAdvogado import create_app
+
+    create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+                'SQLITE_TUNING_ENABLED': False, 'WTF_CSRF_ENABLED': False})
+    connection = sqlite3.connect(path)
+    existing = connection.execute("SELECT pagina, secao, field_type, conteudo FROM conteudo_geral").fetchall()
+    copies, count = 0, len(existing)
+    while count < rows:
+        copies += 1
+        connection.executemany(
+            "INSERT INTO conteudo_geral (pagina, secao, field_type, conteudo) VALUES (?, ?, ?, ?)",
+            [(f"{pagina}-{copies}", secao, field_type, conteudo) for pagina, secao, field_type, conteudo in existing])
+        count += len(existing)
+    connection.commit()
+    pages = [p for (p,) in connection.execute("SELECT DISTINCT pagina FROM conteudo_geral")]
+    connection.close()
+    return pages
+
+
+def _connect(path: str, tuned: bool) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)  # timeout padrão do driver: 5 s
+    if tuned:
+        apply_sqlite_pragmas(connection, resolve_pragmas())
+    return connection
+
+
+def reader(path, tuned, pages, stop_at, queue):
+    """Repete a leitura de uma página até `stop_at`; devolve latências e erros."""
+    connection = _connect(path, tuned)
+    latencies, errors, i = [], 0, 0
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            connection.execute(READ_SQL, (pages[i % len(pages)],)).fetchall()
+            latencies.append(time.perf_counter() - start)
+        except sqlite3.OperationalError:
+            errors += 1
+        i += 1
+    connection.close()
+    queue.put(('reader', latencies, errors))
+
+
+def writer(path, tuned, batch, interval, stop_at, queue):
+    """Grava `batch` linhas por transação a cada `interval` segundos."""
+    connection = _connect(path, tuned)
+    ids = [i for (i,) in connection.execute("SELECT id FROM conteudo_geral ORDER BY id")]
+    commits, errors, n = 0, 0, 0
+    while time.perf_counter() < stop_at:
+        try:
+            with connection:
+                for offset in range(batch):
+                    connection.execute(WRITE_SQL, (f"<p>Revisão {n}</p>" * 20, ids[(n + offset) % len(ids)]))
+            commits += 1
+        except sqlite3.OperationalError:
+            errors += 1
+        n += batch
+        time.sleep(interval)
+    connection.close()
+    queue.put(('writer', commits, errors))
+
+
+def run_mode(tuned: bool, args) -> dict:
+    """Executa um modo e agrega os resultados."""
+    workdir = tempfile.mkdtemp(prefix='sqlite-bench-')
+    path = os.path.join(workdir, 'site.db')
+    pages = prepare_database(path, args.rows)
+    if tuned:
+        connection = _connect(path, True)  # `journal_mode=WAL` fica gravado no arquivo
+        connection.close()
+
+    queue = multiprocessing.Queue()
+    stop_at = time.perf_counter() + args.duration
+    procs = [multiprocessing.Process(target=reader, args=(path, tuned, pages, stop_at, queue))
+             for _ in range(args.readers)]
+    procs.append(multiprocessing.Process(target=writer, args=(path, tuned, args.batch, args.write_interval,
+                                                             stop_at, queue)))
+    for proc in procs:
+        proc.start()
+    results = [queue.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    latencies = sorted(l for kind, values, _ in results if kind == 'reader' for l in values)
+    read_errors = sum(errors for kind, _, errors in results if kind == 'reader')
+    commits, write_errors = next((c, e) for kind, c, e in results if kind == 'writer')
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        'mode': 'tuned' if tuned else 'default',
+        'reads_per_second': round(len(latencies) / args.duration),
+        'p50_ms': ms(statistics.median(latencies)) if latencies else None,
+        'p95_ms': ms(latencies[int(len(latencies) * 0.95)]) if latencies else None,
+        'max_ms': ms(latencies[-1]) if latencies else None,
+        'read_errors': read_errors,
+        'writer_commits': commits,
+        'writer_errors': write_errors,
+    }
+
+
+def main(argv=None) -> list:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--readers', type=int, default=4, help='Processos leitores (padrão: 4).')
+    parser.add_argument('--duration', type=float, default=5.0, help='Segundos por modo (padrão: 5).')
+    parser.add_argument('--rows', type=int, default=5000, help='Linhas em conteudo_geral (padrão: 5000).')
+    parser.add_argument('--batch', type=int, default=200, help='Linhas por commit do escritor (padrão: 200).')
+    parser.add_argument('--write-interval', type=float, default=0.05, help='Pausa entre commits (padrão: 0,05 s).')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON.')
+    args = parser.parse_args(argv)
+
+    results = [run_mode(False, args), run_mode(True, args)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'modo':<8} {'leituras/s':>11} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>9} "
+              f"{'erros leitura':>14} {'commits':>8}")
+        for r in results:
+            print(f"{r['mode']:<8} {r['reads_per_second']:>11} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+                  f"{r['max_ms']:>9} {r['read_errors']:>14} {r['writer_commits']:>8}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -19,8 +19,13 @@ Fixtures Principais:
   simular requisições HTTP às rotas da aplicação sem a necessidade de um
   servidor web real. Tem escopo de função, então um novo cliente é criado
   para cada função de teste.
+- **admin_client:** O `client` já autenticado como administrador (logout ao
+  final). `png_upload()` gera um PNG em memória para campos de arquivo.
 - **runner:** Fornece um executor de comandos de CLI (`test_cli_runner`) para
   testar os comandos de linha de comando personalizados do Flask.
+- **query_counter:** Conta as consultas SQL executadas em um bloco `with`,
+  guardando o SQL e o local de origem (arquivo do projeto ou template) de
+  cada uma; usado pelos orçamentos de consultas (`query_budgets.json`).
 - **Fixtures de Tema:** Um conjunto de fixtures parametrizadas (`theme_number`,
   `theme_name`, `theme_option`) para facilitar a execução de testes em
   diferentes temas visuais do site.
@@ -28,9 +33,13 @@ Fixtures Principais:
 O uso de fixtures promove a reutilização de código e torna os testes mais
 limpos e fáceis de manter.
 """
+import io
 import os
+import sys
+from contextlib import contextmanager
 import pytest
-from sqlalchemy import text
+from PIL import Image
+from sqlalchemy import event, text
 from BelarminoMonteiroAdvogado import create_app, db
 from BelarminoMonteiroAdvogado.models import ThemeSettings
 
@@ -126,9 +135,96 @@ def client(app):
     with app.test_client() as client:
         yield client
 
+@pytest.fixture
+def admin_client(client):
+    """
+    Cliente de teste já autenticado como o administrador criado na fixture `app`.
+
+    O contexto de aplicação da fixture `app` é compartilhado entre os testes:
+    sem o logout no final, o usuário ficaria logado nos testes seguintes.
+    """
+    client.post('/auth/login', data={'username': 'admin', 'password': 'admin'})
+    yield client
+    client.get('/auth/logout')
+
+
+def png_upload(size=(300, 200), color=(30, 90, 160)):
+    """Um PNG em memória (`BytesIO` no início), pronto para um campo de arquivo do formulário."""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    buffer.seek(0)
+    return buffer
+
 @pytest.fixture
 def runner(app):
     """
     Fornece um `test_cli_runner` para testar os comandos de CLI do Flask.
     """
     return app.test_cli_runner()
+
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(sys.modules['BelarminoMonteiroAdvogado'].__file__))
+
+
+def _call_site(limit=3):
+    """
+    Locais do projeto que originaram a consulta, do mais interno ao mais externo.
+
+    Frames de templates Jinja aparecem como `templates/arquivo.html:linha`.
+    """
+    sites = []
+    frame = sys._getframe(2)
+    while frame is not None and len(sites) < limit:
+        template = frame.f_globals.get('__jinja_template__')
+        filename = template.filename if template is not None else frame.f_code.co_filename
+        if filename and filename.startswith(PACKAGE_DIR):
+            lineno = template.get_corresponding_lineno(frame.f_lineno) if template is not None else frame.f_lineno
+            site = f"{os.path.relpath(filename, PACKAGE_DIR)}:{lineno}"
+            if template is None:
+                site += f" ({frame.f_code.co_name})"
+            if not sites or sites[-1] != site:
+                sites.append(site)
+        frame = frame.f_back
+    return sites
+
+
+class QueryCounter:
+    """Consultas capturadas por `query_counter`: lista de (SQL, locais de origem)."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __len__(self):
+        return len(self.queries)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.queries.append((statement, _call_site()))
+
+    def report(self):
+        """Lista numerada das consultas, com o SQL e de onde cada uma partiu."""
+        lines = []
+        for number, (statement, sites) in enumerate(self.queries, 1):
+            lines.append(f"{number:3d}. {' '.join(statement.split())}")
+            lines.extend(f"       em {site}" for site in sites or ['(fora do projeto)'])
+        return '\n'.join(lines)
+
+
+@pytest.fixture
+def query_counter():
+    """
+    Conta as consultas executadas por um engine dentro de um bloco `with`.
+
+    Uso:
+        with query_counter(db.engine) as queries:
+            client.get('/')
+        assert len(queries) <= 10, queries.report()
+    """
+    @contextmanager
+    def count(engine):
+        counter = QueryCounter()
+        event.listen(engine, 'before_cursor_execute', counter._record)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, 'before_cursor_execute', counter._record)
+    return count
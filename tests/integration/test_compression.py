@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Testes de compressão (`compression.py`): variantes pré-comprimidas de
+estáticos, negociação por `Accept-Encoding` e gzip do HTML dinâmico.
+"""
+import gzip
+
+import pytest
+
+from BelarminoMonteiroAdvogado.compression import _scan_variants, precompress_static
+
+
+def test_precompress_writes_smaller_gzip_variants(tmp_path):
+    """Gera `.gz` para arquivos compressíveis e ignora os pequenos demais."""
+    (tmp_path / 'css').mkdir()
+    css = 'body { color: red; }\n' * 200
+    (tmp_path / 'css' / 'site.css').write_text(css)
+    (tmp_path / 'css' / 'tiny.css').write_text('a{}')
+    (tmp_path / 'foto.png').write_bytes(b'\x89PNG' * 500)
+
+    stats = precompress_static(str(tmp_path))
+    assert stats['gzip'] == 1
+    assert gzip.decompress((tmp_path / 'css' / 'site.css.gz').read_bytes()).decode() == css
+    assert not (tmp_path / 'css' / 'tiny.css.gz').exists()
+    assert not (tmp_path / 'foto.png.gz').exists()
+
+    # Variantes atualizadas não são refeitas.
+    assert precompress_static(str(tmp_path))['gzip'] == 0
+
+
+def test_static_serves_gzip_variant_when_accepted(client, app, tmp_path, monkeypatch):
+    """Com variante disponível, o cliente recebe a versão comprimida e `Vary`."""
+    (tmp_path / 'css').mkdir()
+    css = 'body { color: red; }\n' * 200
+    (tmp_path / 'css' / 'site.css').write_text(css)
+    precompress_static(str(tmp_path))
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+    monkeypatch.setitem(app.extensions, 'static_variants', _scan_variants(str(tmp_path)))
+
+    response = client.get('/static/css/site.css', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).decode() == css
+    response.close()
+
+    response = client.get('/static/css/site.css')
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.data.decode() == css
+    response.close()
+
+
+def test_static_serves_brotli_variant_when_accepted(client, app, tmp_path, monkeypatch):
+    """Com o `brotli` instalado, gera a variante `.br` e a prefere quando o cliente aceita `br`."""
+    brotli = pytest.importorskip('brotli')
+    (tmp_path / 'css').mkdir()
+    css = 'body { color: red; }\n' * 200
+    (tmp_path / 'css' / 'site.css').write_text(css)
+    assert precompress_static(str(tmp_path))['br'] == 1
+    assert brotli.decompress((tmp_path / 'css' / 'site.css.br').read_bytes()).decode() == css
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+    monkeypatch.setitem(app.extensions, 'static_variants', _scan_variants(str(tmp_path)))
+
+    response = client.get('/static/css/site.css', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert brotli.decompress(response.data).decode() == css
+    response.close()
+
+
+def test_dynamic_html_is_gzipped_with_weak_etag(client):
+    """O HTML grande é comprimido e a ETag fraca ainda permite o 304."""
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'<html' in gzip.decompress(response.data).lower()
+    assert response.headers['ETag'].startswith('W/')
+
+    response = client.get('/', headers={'Accept-Encoding': 'gzip',
+                                        'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_dynamic_html_is_not_compressed_without_accept_encoding(client):
+    """Clientes que não anunciam gzip recebem o corpo original."""
+    response = client.get('/')
+    assert 'Content-Encoding' not in response.headers
+    assert b'<html' in response.data.lower()
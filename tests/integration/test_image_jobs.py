@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da fila de otimização de imagens (`image_jobs.py`): upload aceito com
+o arquivo original, execução só após o commit e troca do caminho pelo WebP.
+"""
+import re
+
+import pytest
+from PIL import Image
+
+from BelarminoMonteiroAdvogado.image_jobs import ImageJobQueue, resume_image_jobs
+from BelarminoMonteiroAdvogado.models import db, ImageJob, MembroEquipe
+from conftest import png_upload
+
+
+@pytest.fixture
+def uploads(app, tmp_path, monkeypatch):
+    """Direciona `static/` e `UPLOAD_FOLDER` para um diretório temporário."""
+    static = tmp_path / 'static'
+    monkeypatch.setattr(app, 'static_folder', str(static))
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(static / 'images' / 'uploads'))
+    monkeypatch.setitem(app.extensions, 'responsive_images', {})
+    yield static / 'images' / 'uploads'
+    with app.app_context():
+        ImageJob.query.delete()
+        MembroEquipe.query.filter(MembroEquipe.nome.like('Fila %')).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def test_upload_is_accepted_and_swapped_for_webp_after_commit(admin_client, app, uploads):
+    """O membro é salvo com o PNG enviado; a tarefa troca o caminho pelo WebP."""
+    response = admin_client.post('/admin/add-membro-equipe', data={
+        'nome': 'Fila Teste', 'cargo': 'Advogada', 'foto': (png_upload((400, 300), (120, 30, 30)), 'retrato.png'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 302
+    assert '/admin/dashboard' in response.location
+
+    with app.app_context():
+        job = ImageJob.query.one()
+        membro = MembroEquipe.query.filter_by(nome='Fila Teste').one()
+        assert re.fullmatch(r'images/uploads/[0-9a-f]{24}\.png', job.source_path)
+        assert (job.status, job.result_path, job.updated_rows) == ('done', job.source_path[:-4] + '.webp', 1)
+        assert membro.foto == job.result_path
+    assert (uploads / job.result_path.rsplit('/', 1)[1]).exists()
+    assert not (uploads / 'originals').exists()
+
+    payload = admin_client.get('/admin/image-jobs').get_json()
+    assert payload['counts'] == {'done': 1}
+    assert payload['jobs'][0]['optimized_size'] > 0
+
+
+def test_rollback_discards_the_job(app, uploads, monkeypatch):
+    """Sem commit, nada é enviado ao executor."""
+    submitted = []
+    monkeypatch.setattr(app.extensions['image_jobs'], 'submit', submitted.append)
+    with app.app_context():
+        db.session.add(ImageJob(source_path='images/uploads/descartada.png'))
+        db.session.flush()
+        db.session.rollback()
+        db.session.add(MembroEquipe(nome='Fila Sem Foto', cargo='Estagiário'))
+        db.session.commit()
+    assert submitted == []
+
+
+def test_invalid_image_fails_and_keeps_the_original(app, uploads):
+    """Uma tarefa que falha registra o erro e o registro continua com o arquivo enviado."""
+    uploads.mkdir(parents=True)
+    (uploads / 'quebrada.png').write_bytes(b'isto nao e uma imagem')
+    with app.app_context():
+        db.session.add(MembroEquipe(nome='Fila Falha', cargo='Advogado', foto='images/uploads/quebrada.png'))
+        db.session.add(ImageJob(source_path='images/uploads/quebrada.png'))
+        db.session.commit()
+
+        job = ImageJob.query.one()
+        assert job.status == 'failed' and job.error
+        assert MembroEquipe.query.filter_by(nome='Fila Falha').one().foto == 'images/uploads/quebrada.png'
+
+
+def test_thread_pool_runs_jobs_outside_the_request(app, uploads, monkeypatch):
+    """No modo assíncrono, a tarefa roda em outra thread e pode ser aguardada."""
+    queue = ImageJobQueue(app, asynchronous=True)
+    monkeypatch.setitem(app.extensions, 'image_jobs', queue)
+    uploads.mkdir(parents=True)
+    Image.new('RGB', (200, 200)).save(uploads / 'fundo.png')
+    with app.app_context():
+        db.session.add(ImageJob(source_path='images/uploads/fundo.png'))
+        db.session.commit()
+    queue.wait(timeout=30)
+    queue.executor.shutdown()
+
+    with app.app_context():
+        assert ImageJob.query.one().status == 'done'
+
+
+def test_resume_runs_interrupted_jobs(app, uploads, monkeypatch):
+    """Tarefas 'pending'/'running' deixadas por um reinício são retomadas."""
+    monkeypatch.setattr(app.extensions['image_jobs'], 'submit', lambda job_id: None)
+    uploads.mkdir(parents=True)
+    Image.new('RGB', (200, 200)).save(uploads / 'interrompida.png')
+    with app.app_context():
+        db.session.add(ImageJob(source_path='images/uploads/interrompida.png', status='running'))
+        db.session.commit()
+
+    assert [status for _id, status in resume_image_jobs(app)] == ['done']
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da caixa de saída de e-mails (`mail_outbox.py`) contra um servidor
+SMTP local de depuração: resposta imediata, conexão reaproveitada, reenvio
+com espera e o teste de e-mail do painel pelo mesmo caminho.
+"""
+import email
+import socketserver
+import threading
+
+import pytest
+
+from BelarminoMonteiroAdvogado.mail_outbox import DEFAULT_EMAIL_TO, get_mail_dispatcher, resume_mail_outbox
+from BelarminoMonteiroAdvogado.models import db, ConteudoGeral, OutboxEmail
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Fala o mínimo de SMTP para o `smtplib` (sem STARTTLS nem AUTH)."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 stub ESMTP')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 tchau')
+                return
+            if command in ('EHLO', 'HELO'):
+                self.reply('250-stub')
+                self.reply('250 8BITMIME')
+            elif command == 'MAIL' and server.rejections:
+                self.reply(server.rejections.pop(0))
+            elif command == 'DATA':
+                self.reply('354 fim com .')
+                data = []
+                while (chunk := self.rfile.readline()) not in (b'.\r\n', b''):
+                    data.append(chunk[1:] if chunk.startswith(b'..') else chunk)
+                server.messages.append(email.message_from_bytes(b''.join(data)))
+                self.reply('250 aceita')
+            else:
+                self.reply('250 ok')
+
+
+@pytest.fixture
+def smtp_server(app):
+    """Servidor SMTP local configurado como o servidor do site."""
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.connections, server.messages, server.rejections = 0, [], []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    settings = {'smtp_server': '127.0.0.1', 'smtp_port': str(server.server_address[1]),
+                'smtp_user': 'site@example.com', 'smtp_pass': '', 'email_to': 'escritorio@example.com'}
+    with app.app_context():
+        previous = {}
+        for secao, conteudo in settings.items():
+            item = ConteudoGeral.query.filter_by(pagina='configuracoes_email', secao=secao).first()
+            if item is None:
+                item = ConteudoGeral(pagina='configuracoes_email', secao=secao)
+                db.session.add(item)
+            previous[secao] = item.conteudo
+            item.conteudo = conteudo
+        db.session.commit()
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    get_mail_dispatcher(app).close()
+    with app.app_context():
+        for secao, conteudo in previous.items():
+            ConteudoGeral.query.filter_by(pagina='configuracoes_email', secao=secao).one().conteudo = conteudo
+        OutboxEmail.query.delete()
+        db.session.commit()
+
+
+def _contact(client, sender='cliente@example.com'):
+    return client.post('/contato', data={
+        'name': 'Cliente', 'email': sender, 'subject': 'Consulta', 'message': 'Preciso de uma orientação.',
+    })
+
+
+def test_contact_form_is_queued_and_sent_over_one_connection(client, app, smtp_server):
+    """As mensagens são gravadas, respondidas e enviadas pela mesma conexão SMTP."""
+    for sender in ('a@example.com', 'b@example.com'):
+        assert _contact(client, sender).get_json()['success'] is True
+
+    with app.app_context():
+        statuses = [(m.status, m.attempts) for m in OutboxEmail.query.order_by(OutboxEmail.id)]
+    assert statuses == [('sent', 1), ('sent', 1)]
+    assert smtp_server.connections == 1
+    assert [m['Reply-To'] for m in smtp_server.messages] == ['a@example.com', 'b@example.com']
+    assert smtp_server.messages[0]['To'] == 'escritorio@example.com'
+    assert 'Preciso de uma orientação.' in smtp_server.messages[0].get_payload(decode=True).decode()
+
+
+def test_temporary_failure_is_retried_and_permanent_failure_is_kept(client, app, smtp_server):
+    """4xx reagenda com espera (o lead fica no banco); 5xx marca 'failed' sem repetir."""
+    smtp_server.rejections = ['451 tente mais tarde', '550 remetente recusado']
+    assert _contact(client, 'a@example.com').get_json()['success'] is True
+    assert _contact(client, 'b@example.com').get_json()['success'] is True
+
+    with app.app_context():
+        first, second = OutboxEmail.query.order_by(OutboxEmail.id).all()
+        assert (first.status, first.attempts) == ('pending', 1) and '451' in first.last_error
+        assert (first.next_attempt_at - first.created_at).total_seconds() >= 55
+        assert (second.status, second.attempts) == ('failed', 1) and '550' in second.last_error
+
+    assert resume_mail_outbox(app) == {'sent': 1, 'retry': 0, 'failed': 0}
+    with app.app_context():
+        assert [(m.status, m.attempts) for m in OutboxEmail.query.order_by(OutboxEmail.id)] == [
+            ('sent', 2), ('failed', 1)]
+    assert [m['Reply-To'] for m in smtp_server.messages] == ['a@example.com']
+    # Respostas 4xx/5xx não derrubam a conexão reaproveitada.
+    assert smtp_server.connections == 1
+
+
+def test_empty_email_to_falls_back_to_the_default_recipient(client, app, smtp_server):
+    """Sem 'email_to' no painel, o contato vai para o endereço padrão do escritório."""
+    with app.app_context():
+        ConteudoGeral.query.filter_by(pagina='configuracoes_email', secao='email_to').one().conteudo = ''
+        db.session.commit()
+    assert _contact(client).get_json()['success'] is True
+    assert smtp_server.messages[-1]['To'] == DEFAULT_EMAIL_TO
+
+
+def test_admin_test_email_goes_through_the_outbox(admin_client, app, smtp_server):
+    """O teste do painel usa a caixa de saída e relata o resultado do envio."""
+    payload = admin_client.post('/admin/test-email').get_json()
+    assert payload['success'] is True
+    assert smtp_server.messages[-1]['To'] == 'site@example.com'
+
+    smtp_server.rejections = ['451 ocupado']
+    payload = admin_client.post('/admin/test-email').get_json()
+    assert payload['success'] is False and '451' in payload['message']
+
+    counts = admin_client.get('/admin/mail-outbox').get_json()['counts']
+    assert counts == {'sent': 1, 'failed': 1}
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do armazenamento por conteúdo (`media_store.py`): reenvio sem cópia
+nova, coleta dos uploads sem referência e recusa de envios grandes demais.
+"""
+import io
+import os
+import time
+
+import pytest
+
+from BelarminoMonteiroAdvogado import media_store
+from BelarminoMonteiroAdvogado.media_store import collect_garbage, media_references
+from BelarminoMonteiroAdvogado.models import db, HomePageSection, ImageJob, MembroEquipe
+from conftest import png_upload
+
+
+@pytest.fixture
+def uploads(app, tmp_path, monkeypatch):
+    """Direciona `static/` e `UPLOAD_FOLDER` para um diretório temporário."""
+    static = tmp_path / 'static'
+    monkeypatch.setattr(app, 'static_folder', str(static))
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(static / 'images' / 'uploads'))
+    monkeypatch.setitem(app.extensions, 'responsive_images', {})
+    yield static / 'images' / 'uploads'
+    with app.app_context():
+        ImageJob.query.delete()
+        MembroEquipe.query.filter(MembroEquipe.nome.like('Midia %')).delete(synchronize_session=False)
+        HomePageSection.query.filter_by(section_type='midia-teste').delete()
+        db.session.commit()
+
+
+def _age(path, seconds=3600):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_same_content_is_stored_once_and_reuses_the_webp(admin_client, app, uploads):
+    """O segundo envio do mesmo arquivo aponta direto para o WebP já gerado."""
+    for nome in ('Midia Um', 'Midia Dois'):
+        admin_client.post('/admin/add-membro-equipe', data={
+            'nome': nome, 'cargo': 'Advogado', 'foto': (png_upload(), f'{nome}.png'),
+        }, content_type='multipart/form-data')
+
+    with app.app_context():
+        assert ImageJob.query.count() == 1
+        fotos = {m.foto for m in MembroEquipe.query.filter(MembroEquipe.nome.like('Midia %'))}
+    assert len(fotos) == 1 and fotos.pop().endswith('.webp')
+    assert sorted(p.suffix for p in uploads.iterdir() if '-' not in p.stem) == ['.png', '.webp']
+
+
+def test_garbage_collection_keeps_referenced_pending_and_recent_files(app, uploads, monkeypatch):
+    """Só o grupo sem referência (original, WebP, derivadas e backup) é apagado."""
+    monkeypatch.setattr(app.extensions['image_jobs'], 'submit', lambda job_id: None)
+    (uploads / 'originals').mkdir(parents=True)
+    files = ['usada.webp', 'usada-640w.webp', 'citada.png', 'pendente.png',
+             'orfa.png', 'orfa.webp', 'orfa-320w.avif', 'originals/orfa.png']
+    for name in files:
+        (uploads / name).write_bytes(b'x' * 10)
+        _age(uploads / name)
+    (uploads / 'recente.png').write_bytes(b'x')
+
+    with app.app_context():
+        db.session.add(MembroEquipe(nome='Midia Usada', cargo='Advogado', foto='images/uploads/usada.webp'))
+        db.session.add(HomePageSection(section_type='midia-teste', order=99, title='Teste',
+                                       content='<img src="/static/images/uploads/citada.png">'))
+        db.session.add(ImageJob(source_path='images/uploads/pendente.png'))
+        db.session.commit()
+
+        assert media_references()['images/uploads/citada.png'] == 1
+        preview = collect_garbage(app, dry_run=True)
+        assert (uploads / 'orfa.png').exists()
+        stats = collect_garbage(app)
+
+    assert sorted(stats['deleted']) == sorted(preview['deleted']) == [
+        'images/uploads/orfa-320w.avif', 'images/uploads/orfa.png',
+        'images/uploads/orfa.webp', 'images/uploads/originals/orfa.png']
+    assert stats['bytes_freed'] == 40
+    remaining = sorted(p.relative_to(uploads).as_posix() for p in uploads.rglob('*') if p.is_file())
+    assert remaining == ['citada.png', 'pendente.png', 'recente.png', 'usada-640w.webp', 'usada.webp']
+
+
+def test_upload_is_received_in_place_and_leaves_no_spool(admin_client, app, uploads):
+    """O arquivo do formulário é renomeado, não copiado: nenhum `.upload-*.tmp` sobra."""
+    admin_client.post('/admin/add-membro-equipe', data={
+        'nome': 'Midia Spool', 'cargo': 'Advogado', 'foto': (png_upload(color=(5, 5, 5)), 'spool.png'),
+        'documento': (io.BytesIO(b'campo sem uso'), 'extra.txt'),
+    }, content_type='multipart/form-data')
+    assert [p.name for p in uploads.iterdir() if p.name.startswith('.')] == []
+    with app.app_context():
+        assert MembroEquipe.query.filter_by(nome='Midia Spool').one().foto.endswith('.webp')
+
+
+def test_upload_spool_is_limited_to_upload_endpoints(admin_client, app, uploads, monkeypatch):
+    """Fora dos endpoints de upload, ou sem permissão de escrita, vale o temporário do Werkzeug."""
+    seen = []
+    original = media_store.UploadRequest._get_file_stream
+
+    def spy(self, *args, **kwargs):
+        stream = original(self, *args, **kwargs)
+        seen.append((self.endpoint, getattr(stream, 'name', None)))
+        return stream
+
+    monkeypatch.setattr(media_store.UploadRequest, '_get_file_stream', spy)
+    admin_client.get('/auth/logout')
+    admin_client.post('/auth/login', data={'username': 'admin', 'password': 'admin',
+                                           'anexo': (png_upload(), 'anexo.png')}, content_type='multipart/form-data')
+    assert seen[-1][0] == 'auth.login' and not str(seen[-1][1]).startswith(str(uploads))
+
+    def unwritable(*args, **kwargs):
+        raise PermissionError('somente leitura')
+
+    monkeypatch.setattr(media_store.tempfile, 'NamedTemporaryFile', unwritable)
+    admin_client.post('/admin/add-membro-equipe', data={
+        'nome': 'Midia Sem Spool', 'cargo': 'Advogado', 'foto': (png_upload(color=(9, 9, 9)), 'fallback.png'),
+    }, content_type='multipart/form-data')
+    assert seen[-1][0] == 'admin.add_membro_equipe' and not str(seen[-1][1]).startswith(str(uploads))
+    with app.app_context():
+        assert MembroEquipe.query.filter_by(nome='Midia Sem Spool').one().foto.endswith('.webp')
+
+
+@pytest.mark.parametrize('config, payload, message', [
+    ({'UPLOAD_MAX_IMAGE_PIXELS': 10_000}, png_upload, b'excede o limite'),
+    ({}, lambda: io.BytesIO(b'nao e imagem'), b'lida'),
+    ({'MAX_CONTENT_LENGTH': 1024}, png_upload, b'Arquivo muito grande'),
+])
+def test_rejected_uploads_store_nothing(admin_client, app, uploads, monkeypatch, config, payload, message):
+    """Imagens grandes demais, arquivos inválidos e corpos acima do limite não gravam nada."""
+    for key, value in config.items():
+        monkeypatch.setitem(app.config, key, value)
+    response = admin_client.post('/admin/add-membro-equipe', data={
+        'nome': 'Midia Recusada', 'cargo': 'Advogado', 'foto': (payload(), 'grande.png'),
+    }, content_type='multipart/form-data', follow_redirects=True)
+
+    assert response.status_code == 200
+    assert message in response.data
+    assert not uploads.exists() or list(uploads.iterdir()) == []
+    with app.app_context():
+        assert ImageJob.query.count() == 0
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do cache de páginas HTML (`page_cache.py`): limites LRU, acertos
+e invalidação por commit e por `Pagina.data_modificacao`.
+"""
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from BelarminoMonteiroAdvogado.models import db, Depoimento, Pagina, ThemeSettings
+from BelarminoMonteiroAdvogado.page_cache import PageCache, get_page_cache, init_page_cache
+
+
+def test_lru_evicts_by_entries_and_bytes():
+    """O cache respeita o número máximo de entradas e de bytes."""
+    cache = PageCache(max_entries=2, max_bytes=10)
+    cache.set(('/a', 't'), b'1234', 'text/html', (0,), None)
+    cache.set(('/b', 't'), b'1234', 'text/html', (0,), None)
+    assert cache.get(('/a', 't'), (0,), None) is not None  # '/a' passa a ser o mais recente
+    cache.set(('/c', 't'), b'1234', 'text/html', (0,), None)
+    assert cache.get(('/b', 't'), (0,), None) is None
+    assert cache.stats()['evictions'] == 1
+
+    assert cache.set(('/grande', 't'), b'x' * 11, 'text/html', (0,), None) is False
+    cache.set(('/d', 't'), b'123456789', 'text/html', (0,), None)
+    assert cache.stats()['bytes'] <= 10
+
+
+def test_home_is_served_from_cache_until_content_changes(client, app):
+    """A segunda visita é um acerto; um commit em Depoimento invalida a página."""
+    get_page_cache(app).clear()
+    assert client.get('/').headers['X-Page-Cache'] == 'MISS'
+    assert client.get('/').headers['X-Page-Cache'] == 'HIT'
+
+    with app.app_context():
+        db.session.add(Depoimento(nome_cliente='Cache', texto_depoimento='Teste',
+                                  aprovado=True, token_submissao='cache-test-token'))
+        db.session.commit()
+    assert client.get('/').headers['X-Page-Cache'] == 'MISS'
+
+
+def test_theme_is_part_of_the_cache_key(client, app):
+    """Trocar o tema gera uma entrada distinta para o mesmo caminho."""
+    client.get('/')
+    with app.app_context():
+        theme = ThemeSettings.query.first()
+        original = theme.theme
+        theme.theme = 'option2' if original != 'option2' else 'option3'
+        db.session.commit()
+    try:
+        response = client.get('/')
+        assert response.headers['X-Page-Cache'] == 'MISS'
+    finally:
+        with app.app_context():
+            ThemeSettings.query.first().theme = original
+            db.session.commit()
+
+
+def test_page_modification_only_invalidates_that_page(client, app):
+    """Alterar `data_modificacao` de uma página não invalida as demais."""
+    client.get('/sobre-nos')
+    client.get('/')
+    assert client.get('/sobre-nos').headers['X-Page-Cache'] == 'HIT'
+
+    with app.app_context():
+        page = Pagina.query.filter_by(slug='sobre-nos').first()
+        page.data_modificacao = datetime.utcnow() + timedelta(seconds=1)
+        db.session.commit()
+
+    assert client.get('/sobre-nos').headers['X-Page-Cache'] == 'MISS'
+    assert client.get('/').headers['X-Page-Cache'] == 'HIT'
+
+
+def test_not_found_is_never_cached(client, app):
+    """Respostas 404 não são armazenadas."""
+    entries = get_page_cache(app).stats()['entries']
+    assert client.get('/pagina-que-nao-existe').status_code == 404
+    assert get_page_cache(app).stats()['entries'] == entries
+
+
+def test_conditional_get_returns_304_before_rendering(client, app, monkeypatch):
+    """Com `If-None-Match` válido, a view nem chega a ser executada."""
+    first = client.get('/sobre-nos')
+    etag = first.headers['ETag']
+    assert first.headers['Last-Modified']
+
+    def fail(*args, **kwargs):
+        raise AssertionError('template não deveria ser renderizado')
+
+    monkeypatch.setattr('BelarminoMonteiroAdvogado.routes.main_routes.render_page', fail)
+    response = client.get('/sobre-nos', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    response = client.get('/sobre-nos', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 304
+
+
+def test_etag_changes_with_content(client, app):
+    """Um commit em tabela monitorada gera nova ETag e a antiga deixa de valer."""
+    etag = client.get('/').headers['ETag']
+    with app.app_context():
+        db.session.add(Depoimento(nome_cliente='ETag', texto_depoimento='Teste',
+                                  aprovado=True, token_submissao='etag-test-token'))
+        db.session.commit()
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_missing_page_ignores_conditional_headers(client):
+    """Páginas inexistentes continuam 404 mesmo com `If-Modified-Since`."""
+    response = client.get('/pagina-que-nao-existe',
+                          headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 404
+
+
+def test_shared_database_disables_page_cache_by_default():
+    """Com banco de rede, as gerações locais não veem commits de outras instâncias."""
+    shared = Flask(__name__)
+    shared.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://usuario@db.exemplo/site'
+    init_page_cache(shared)
+    assert shared.config['PAGE_CACHE_ENABLED'] is False and shared.config['CONDITIONAL_GET_ENABLED'] is False
+
+    explicit = Flask(__name__)
+    explicit.config.update(SQLALCHEMY_DATABASE_URI='postgresql://usuario@db.exemplo/site', PAGE_CACHE_ENABLED=True)
+    init_page_cache(explicit)
+    assert explicit.config['PAGE_CACHE_ENABLED'] is True
+
+    local = Flask(__name__)
+    local.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////tmp/site.db'
+    init_page_cache(local)
+    assert local.config['PAGE_CACHE_ENABLED'] is True and local.config['CONDITIONAL_GET_ENABLED'] is True
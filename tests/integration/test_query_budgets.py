@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Orçamento de consultas SQL por endpoint, em todos os temas.
+
+Cada endpoint de `query_budgets.json` é requisitado com cada tema
+(`templates/base_optionN.html`) e não pode executar mais consultas que o seu
+orçamento. Um loop de template que toque um relacionamento lazy (N+1) faz o
+teste falhar, listando o SQL e o arquivo/linha de origem de cada consulta.
+
+Medimos a segunda requisição (caches de processo já montados) com o cache de
+páginas HTML desligado: é o custo de uma renderização em regime. Para
+ajustar um orçamento após uma mudança intencional, edite `query_budgets.json`.
+"""
+import json
+import os
+import re
+import secrets
+
+import pytest
+
+from BelarminoMonteiroAdvogado import create_app, db, ensure_essential_data
+from BelarminoMonteiroAdvogado.models import ClienteParceiro, Depoimento, MembroEquipe, ThemeSettings, User
+
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'query_budgets.json')
+
+with open(BUDGETS_PATH, encoding='utf-8') as f:
+    BUDGETS = json.load(f)
+
+# URL representativa de cada endpoint orçado.
+ENDPOINT_URLS = {
+    'main.home': '/',
+    'main.pagina_dinamica': '/direito-civil',
+    'main.search': '/search?q=direito',
+    'main.sitemap': '/sitemap.xml',
+    'admin.dashboard': '/admin/dashboard',
+}
+
+
+def _themes():
+    templates = os.path.join(os.path.dirname(os.path.abspath(create_app.__code__.co_filename)), 'templates')
+    found = (re.fullmatch(r'base_(option\d+)\.html', name) for name in os.listdir(templates))
+    return sorted((m.group(1) for m in found if m), key=lambda theme: int(theme[len('option'):]))
+
+
+THEMES = _themes()
+
+
+@pytest.fixture(scope='module')
+def budget_app():
+    app = create_app(test_config={
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'WTF_CSRF_ENABLED': False,
+        'SECRET_KEY': 'test-secret-key',
+        'PAGE_CACHE_ENABLED': False,
+    })
+    with app.app_context():
+        db.create_all()
+        ensure_essential_data()
+        # Várias linhas por lista: um N+1 aparece como várias consultas, não uma.
+        for n in range(4):
+            db.session.add(MembroEquipe(nome=f'Advogado {n}', cargo='Advogado', ordem=n))
+            db.session.add(Depoimento(nome_cliente=f'Cliente {n}', texto_depoimento='Ótimo atendimento.',
+                                      aprovado=True, token_submissao=secrets.token_hex(16)))
+            db.session.add(ClienteParceiro(nome=f'Parceiro {n}', logo_path='images/logo.png', ordem=n))
+        user = User(username='budget-admin')
+        user.set_password('budget-admin')
+        db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def test_budget_file_covers_endpoints():
+    assert set(BUDGETS) == set(ENDPOINT_URLS)
+    assert len(THEMES) >= 9
+
+
+@pytest.mark.parametrize('theme', THEMES)
+@pytest.mark.parametrize('endpoint', sorted(ENDPOINT_URLS))
+def test_query_budget(budget_app, query_counter, endpoint, theme):
+    url = ENDPOINT_URLS[endpoint]
+    with budget_app.app_context():
+        settings = ThemeSettings.query.first() or ThemeSettings()
+        settings.theme = theme
+        db.session.add(settings)
+        db.session.commit()
+
+        client = budget_app.test_client()
+        if endpoint.startswith('admin.'):
+            client.post('/auth/login', data={'username': 'budget-admin', 'password': 'budget-admin'})
+        assert client.get(url).status_code == 200
+        with query_counter(db.engine) as queries:
+            response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.request.url.endswith(url)
+    budget = BUDGETS[endpoint]
+    assert len(queries) <= budget, (
+        f"{endpoint} ({url}) com o tema {theme}: {len(queries)} consultas, orçamento {budget}.\n"
+        f"{queries.report()}")
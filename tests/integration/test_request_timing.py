@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da instrumentação por requisição (`request_timing.py`).
+"""
+import pytest
+
+from BelarminoMonteiroAdvogado import create_app, db
+from BelarminoMonteiroAdvogado.models import User
+from BelarminoMonteiroAdvogado.request_timing import RequestTiming
+
+
+@pytest.fixture(scope='module')
+def timed_app():
+    app = create_app(test_config={
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'WTF_CSRF_ENABLED': False,
+        'SECRET_KEY': 'test-secret-key',
+        'PAGE_CACHE_ENABLED': False,
+        'REQUEST_TIMING_ENABLED': True,
+        'REQUEST_TIMING_SLOW_MS': 0,
+    })
+    with app.app_context():
+        db.create_all()
+        user = User(username='admin')
+        user.set_password('admin')
+        db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _metrics(header):
+    return {item.split(';')[0]: item for item in header.split(', ')}
+
+
+def test_server_timing_header_reports_db_context_and_template(timed_app):
+    response = timed_app.test_client().get('/')
+    assert response.status_code == 200
+    metrics = _metrics(response.headers['Server-Timing'])
+    assert set(metrics) >= {'db', 'ctx', 'tpl', 'total'}
+    assert 'queries"' in metrics['db'] and not metrics['db'].endswith('"0 queries"')
+    assert 'home/home_option' in metrics['tpl']
+
+
+def test_slow_requests_are_sampled_with_endpoint(timed_app):
+    slow_log = timed_app.extensions['request_timing']
+    slow_log.recent.clear()
+    timed_app.test_client().get('/')
+    entry = slow_log.recent[-1]
+    assert entry['endpoint'] == 'main.home' and entry['queries'] > 0 and entry['templates']
+
+    slow_log.sample_rate = 0.0
+    try:
+        before = slow_log.slow_requests
+        timed_app.test_client().get('/')
+        assert slow_log.slow_requests == before + 1 and len(slow_log.recent) == 1
+    finally:
+        slow_log.sample_rate = 1.0
+
+
+def test_disabled_by_default(client, app):
+    assert 'request_timing' not in app.extensions
+    assert 'Server-Timing' not in client.get('/').headers
+
+
+def test_server_timing_format():
+    timing = RequestTiming()
+    timing.queries, timing.db_ms = 3, 1.234
+    assert timing.server_timing(10.0, 'HIT') == 'db;dur=1.2;desc="3 queries", page-cache;desc="HIT", total;dur=10.0'
+
+
+def _cache_stats(client):
+    client.post('/auth/login', data={'username': 'admin', 'password': 'admin'})
+    response = client.get('/admin/cache-stats')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_cache_stats_without_timing(client):
+    stats = _cache_stats(client)
+    client.get('/auth/logout')
+    assert stats['request_timing'] is None and 'page_cache' in stats and 'db_pool' in stats
+
+
+def test_cache_stats_with_timing(timed_app):
+    with timed_app.test_client() as client:
+        stats = _cache_stats(client)
+    assert stats['request_timing']['requests'] >= 1 and 'recent_slow' in stats['request_timing']
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da busca em texto completo (`search_index.py`): acentos, relevância,
+trechos destacados e atualização do índice junto com o commit.
+"""
+import pytest
+
+from BelarminoMonteiroAdvogado.models import db, AreaAtuacao, ConteudoGeral, MembroEquipe
+from BelarminoMonteiroAdvogado.search_index import build_match_query, rebuild_search_index, search
+
+
+@pytest.fixture
+def request_ctx(app):
+    with app.test_request_context():
+        yield
+    db.session.rollback()
+
+
+def test_accents_and_plurals_are_folded(request_ctx):
+    """'previdencia' acha 'Previdenciário' e o plural acha o singular."""
+    results = search('previdencia')
+    assert results and results[0]['url'] == '/direito-previdenciario'
+    assert '<mark>Previdenciário</mark>' in str(results[0]['titulo'])
+    assert any(r['kind'] == 'membro' for r in search('advogados'))
+
+
+def test_title_matches_rank_first_and_snippets_are_escaped(request_ctx):
+    area = AreaAtuacao(slug='direito-tributario-teste', titulo='Direito Tributário',
+                       descricao='Planejamento fiscal: alíquota < 5% & tributos.', icone='bi-cash', categoria='Direito')
+    member = MembroEquipe(nome='Fulano de Tal', cargo='Advogado', biografia='Atua com direito tributário.')
+    db.session.add_all([area, member])
+    db.session.commit()
+    try:
+        results = search('tributario')
+        assert [r['ref'] for r in results[:2]] == ['direito-tributario-teste', str(member.id)]
+        assert 'alíquota &lt; 5% &amp;' in str(search('planejamento fiscal')[0]['snippet'])
+    finally:
+        db.session.delete(area)
+        db.session.delete(member)
+        db.session.commit()
+    assert search('tributario') == []
+
+
+def test_index_follows_commit_and_rollback(request_ctx):
+    """Conteúdo editado entra no commit; o rollback não deixa rastro."""
+    row = ConteudoGeral.query.filter_by(pagina='sobre-nos', field_type='textarea').first()
+    original = row.conteudo
+    row.conteudo = 'Texto sobre jurimetria aplicada.'
+    db.session.rollback()
+    assert search('jurimetria') == []
+
+    row = ConteudoGeral.query.filter_by(pagina='sobre-nos', field_type='textarea').first()
+    row.conteudo = 'Texto sobre <b>jurimetria</b> aplicada.'
+    db.session.commit()
+    try:
+        assert [r['url'] for r in search('jurimetria')] == ['/sobre-nos']
+    finally:
+        row.conteudo = original
+        db.session.commit()
+    assert search('jurimetria') == []
+
+
+def test_bulk_update_rebuilds_and_rebuild_is_idempotent(request_ctx):
+    MembroEquipe.query.filter_by(nome='Taise Peixoto').update({'cargo': 'Mediadora'})
+    db.session.commit()
+    try:
+        assert [r['kind'] for r in search('mediadora')] == ['membro']
+        before = rebuild_search_index()
+        assert rebuild_search_index() == before
+    finally:
+        MembroEquipe.query.filter_by(nome='Taise Peixoto').update({'cargo': 'Advogada'})
+        db.session.commit()
+
+
+def test_match_query_quotes_user_operators():
+    assert build_match_query('a"b OR x') == '"or"*'
+    assert build_match_query('Famílias NEAR') == '"família"* "near"*'
+    assert build_match_query('?') is None
+
+
+def test_search_route_renders_results(client):
+    response = client.get('/search?q=fam%C3%ADlia')
+    assert response.status_code == 200
+    assert b'<mark>' in response.data and b'/direito-de-familia' in response.data
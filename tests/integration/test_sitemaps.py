@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do sitemap pré-gerado (`sitemaps.py`): `lastmod` real, variante gzip,
+GET condicional, regeneração após commits e divisão em índice.
+"""
+import gzip
+import warnings
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.exc import SAWarning
+
+from BelarminoMonteiroAdvogado import sitemaps
+from BelarminoMonteiroAdvogado.models import db, ConteudoGeral, Pagina
+
+
+def test_sitemap_uses_page_dates_and_is_served_from_memory(client, app, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'SITEMAP_FOLDER', str(tmp_path))
+    first = client.get('/sitemap.xml')
+    assert first.status_code == 200 and b'<urlset' in first.data
+    with app.app_context():
+        home = Pagina.query.filter_by(slug='home').first()
+        assert f"<lastmod>{home.data_modificacao:%Y-%m-%dT%H:%M:%S}+00:00</lastmod>".encode() in first.data
+        engine = db.engine
+    assert (tmp_path / 'sitemap.xml').read_bytes() == first.data
+    assert gzip.decompress((tmp_path / 'sitemap.xml.gz').read_bytes()) == first.data
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        compressed = client.get('/sitemap.xml', headers={'Accept-Encoding': 'gzip'})
+        revalidated = client.get('/sitemap.xml', headers={'If-None-Match': first.headers['ETag']})
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    assert statements == []
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == first.data
+    assert revalidated.status_code == 304
+
+
+def test_sitemap_follows_page_commits_and_splits_into_index(client, app, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'SITEMAP_FOLDER', str(tmp_path))
+    with app.app_context():
+        page = Pagina(slug='sitemap-teste', titulo_menu='Teste', tipo='pagina', template_path='sobre.html')
+        db.session.add(page)
+        db.session.commit()
+        page_id = page.id
+    try:
+        assert b'http://localhost/sitemap-teste</loc>' in client.get('/sitemap.xml').data
+
+        monkeypatch.setitem(app.config, 'SITEMAP_MAX_URLS', 2)
+        with app.app_context():
+            db.session.get(Pagina, page_id).titulo_menu = 'Teste 2'
+            db.session.commit()
+        index = client.get('/sitemap.xml').data
+        assert b'<sitemapindex' in index and b'http://localhost/sitemap-1.xml</loc>' in index
+        part = client.get('/sitemap-1.xml')
+        assert part.status_code == 200 and part.data.count(b'<url>') == 2
+        assert client.get('/sitemap-999.xml').status_code == 404
+        assert (tmp_path / 'sitemap-1.xml.gz').exists()
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(Pagina, page_id))
+            db.session.commit()
+
+
+def test_content_edit_advances_page_lastmod_and_sitemap(client, app, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'SITEMAP_FOLDER', str(tmp_path))
+    with app.app_context():
+        page = Pagina(slug='lastmod-teste', titulo_menu='Lastmod', tipo='pagina', template_path='sobre.html',
+                      data_modificacao=datetime(2020, 1, 1))
+        content = ConteudoGeral(pagina='lastmod-teste', secao='titulo', conteudo='Antes')
+        db.session.add_all([page, content])
+        db.session.commit()
+        page_id, content_id = page.id, content.id
+    try:
+        before = client.get('/sitemap.xml')
+        assert b'<lastmod>2020-01-01T00:00:00+00:00</lastmod>' in before.data
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', SAWarning)
+            with app.app_context():
+                db.session.get(ConteudoGeral, content_id).conteudo = 'Depois'
+                db.session.commit()
+        with app.app_context():
+            assert db.session.get(Pagina, page_id).data_modificacao > datetime(2020, 1, 1)
+
+        after = client.get('/sitemap.xml')
+        assert after.headers['ETag'] != before.headers['ETag']
+        assert b'<lastmod>2020-01-01T00:00:00+00:00</lastmod>' not in after.data
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(ConteudoGeral, content_id))
+            db.session.delete(db.session.get(Pagina, page_id))
+            db.session.commit()
+
+
+def test_sitemap_uses_site_url_and_ignores_host(client, app, monkeypatch):
+    writes = []
+    monkeypatch.setattr(sitemaps, 'write_sitemaps', lambda *args: writes.append(args))
+    monkeypatch.setitem(app.config, 'SITE_URL', 'https://www.exemplo.com.br/')
+    monkeypatch.delitem(app.extensions, 'sitemaps', raising=False)
+    first = client.get('/sitemap.xml', headers={'Host': 'atacante.example'})
+    assert b'<loc>https://www.exemplo.com.br/</loc>' in first.data and b'atacante' not in first.data
+    built = app.extensions['sitemaps']
+    for host in ('a.example', 'b.example', 'c.example', 'd.example', 'e.example'):
+        assert client.get('/sitemap.xml', headers={'Host': host}).headers['ETag'] == first.headers['ETag']
+    assert app.extensions['sitemaps'] is built
+    # Sem `SITEMAP_FOLDER`, a requisição não grava nada em disco.
+    assert writes == []
+
+
+def test_build_sitemap_command_writes_files(runner, app, monkeypatch, tmp_path):
+    monkeypatch.delitem(app.config, 'SITE_URL', raising=False)
+    assert runner.invoke(args=['build-sitemap', '--folder', str(tmp_path)]).exit_code != 0
+
+    monkeypatch.setitem(app.config, 'SITE_URL', 'https://www.exemplo.com.br')
+    result = runner.invoke(args=['build-sitemap', '--folder', str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    data = (tmp_path / 'sitemap.xml').read_bytes()
+    assert b'<loc>https://www.exemplo.com.br/</loc>' in data
+    assert gzip.decompress((tmp_path / 'sitemap.xml.gz').read_bytes()) == data
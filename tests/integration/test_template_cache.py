@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do cache de bytecode do Jinja e do aquecimento (`template_cache.py`).
+"""
+from jinja2 import Environment, FileSystemLoader
+
+from BelarminoMonteiroAdvogado.template_cache import TemplateBytecodeCache, theme_templates
+
+
+def test_bytecode_is_reused_from_another_install_path(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    for install in ('build', 'runtime'):
+        (tmp_path / install).mkdir()
+        (tmp_path / install / 'page.html').write_text('Olá {{ nome }}', encoding='utf-8')
+
+    build = Environment(loader=FileSystemLoader(str(tmp_path / 'build')), bytecode_cache=TemplateBytecodeCache(str(cache_dir)))
+    assert build.get_template('page.html').render(nome='Ana') == 'Olá Ana'
+    assert len(list(cache_dir.iterdir())) == 1
+
+    runtime = Environment(loader=FileSystemLoader(str(tmp_path / 'runtime')), bytecode_cache=TemplateBytecodeCache(str(cache_dir)))
+    def no_compile(*args, **kwargs):
+        raise AssertionError('o template foi recompilado')
+    runtime.compile = no_compile
+    assert runtime.get_template('page.html').render(nome='Bia') == 'Olá Bia'
+
+
+def test_unwritable_cache_is_ignored(tmp_path):
+    (tmp_path / 'page.html').write_text('ok', encoding='utf-8')
+    cache = TemplateBytecodeCache(str(tmp_path / 'inexistente'))
+    env = Environment(loader=FileSystemLoader(str(tmp_path)), bytecode_cache=cache)
+    assert env.get_template('page.html').render() == 'ok'
+    assert cache.writable is False
+
+
+def test_theme_templates_keeps_common_and_active_theme():
+    names = ['base.html', 'base_option1.html', 'base_option2.html', 'home/home_option2.html', '_footer_standard.html']
+    assert theme_templates(names, 'option2') == ['_footer_standard.html', 'base.html', 'base_option2.html',
+                                                  'home/home_option2.html']
+
+
+def test_warmup_endpoint_compiles_templates_once(client, app, monkeypatch):
+    monkeypatch.delitem(app.extensions, 'warmup', raising=False)
+    response = client.get('/_ah/warmup')
+    assert response.status_code == 200 and response.data == b'OK'
+    assert response.headers['Cache-Control'] == 'no-store'
+    stats = app.extensions['warmup']
+    assert stats['compiled'] > 20 and 'site_snapshot' in app.extensions
+    assert any(name == f"base_{stats['theme']}.html" for _loader, name in app.jinja_env.cache.keys())
+    assert client.get('/_ah/warmup').status_code == 200 and app.extensions['warmup'] is stats
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do manifesto de assets com fingerprint (`assets.py`).
+"""
+import json
+
+from BelarminoMonteiroAdvogado.assets import MANIFEST_FILENAME, asset_url, build_asset_manifest
+
+
+def test_build_writes_hashed_copies_and_manifest(tmp_path):
+    """Cada asset ganha uma cópia com hash; backups e imagens ficam de fora."""
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'base.css').write_text('body { color: red; }')
+    (tmp_path / 'images').mkdir()
+    (tmp_path / 'images' / 'foto.png').write_bytes(b'png')
+    (tmp_path / 'images_backup_20250101').mkdir()
+    (tmp_path / 'images_backup_20250101' / 'antigo.svg').write_text('<svg/>')
+
+    manifest = build_asset_manifest(str(tmp_path))
+    assert list(manifest) == ['css/base.css']
+    hashed = manifest['css/base.css']
+    assert hashed.startswith('css/base.') and hashed.endswith('.css') and hashed != 'css/base.css'
+    assert (tmp_path / hashed).read_text() == 'body { color: red; }'
+    assert json.loads((tmp_path / MANIFEST_FILENAME).read_text()) == manifest
+
+    # Um novo build com conteúdo alterado gera outro nome e remove a cópia antiga.
+    (tmp_path / 'css' / 'base.css').write_text('body { color: blue; }')
+    rebuilt = build_asset_manifest(str(tmp_path))
+    assert rebuilt['css/base.css'] != hashed
+    assert not (tmp_path / hashed).exists()
+
+
+def test_asset_url_resolves_from_manifest_without_syscalls(app, monkeypatch):
+    """Com manifesto carregado, `asset_url` não toca no sistema de arquivos."""
+    def fail(*args, **kwargs):
+        raise AssertionError('asset_url não deveria consultar o disco')
+
+    with app.test_request_context('/'):
+        monkeypatch.setitem(app.extensions, 'asset_manifest', {'css/base.css': 'css/base.0123abcd.css'})
+        monkeypatch.setattr('os.path.getmtime', fail)
+        assert asset_url('css/base.css') == '/static/css/base.0123abcd.css'
+
+
+def test_asset_url_falls_back_to_mtime(app, monkeypatch):
+    """Sem entrada no manifesto, mantém o cache busting por `?v=`."""
+    with app.test_request_context('/'):
+        monkeypatch.setitem(app.extensions, 'asset_manifest', {})
+        assert asset_url('css/base.css').startswith('/static/css/base.css?v=')
+
+
+def test_templates_use_asset_url(client):
+    """A home referencia os assets via `asset_url`."""
+    html = client.get('/').get_data(as_text=True)
+    assert '/static/css/base.css?v=' in html
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do `ImageProcessor.batch_optimize`: manifesto incremental, retomada
+após interrupção, processos paralelos e relatório JSON.
+"""
+import json
+
+import pytest
+from PIL import Image
+
+from BelarminoMonteiroAdvogado.image_processor import OPTIMIZE_MANIFEST_FILENAME, ImageProcessor
+
+
+def _tree(root, count=3):
+    for i in range(count):
+        Image.new('RGB', (64 + i, 48), (i * 40, 10, 10)).save(root / f'foto{i}.jpg')
+    (root / 'originals').mkdir()
+    Image.new('RGB', (10, 10)).save(root / 'originals' / 'backup.jpg')
+
+
+def _processor(**kwargs):
+    return ImageProcessor(create_backup=False, responsive_widths=(), **kwargs)
+
+
+def test_unchanged_files_are_skipped_until_content_or_settings_change(tmp_path):
+    """A segunda execução pula tudo; conteúdo novo ou outra qualidade reprocessam."""
+    _tree(tmp_path)
+    first = _processor().batch_optimize(tmp_path, workers=1)
+    assert (first['total_files'], first['successful_optimizations']) == (3, 3)
+    assert (tmp_path / 'foto1.webp').exists()
+    assert not (tmp_path / 'originals' / 'backup.webp').exists()
+
+    assert _processor().batch_optimize(tmp_path, workers=1)['skipped_files'] == 3
+
+    Image.new('RGB', (80, 80), (0, 200, 0)).save(tmp_path / 'foto2.jpg')
+    again = _processor().batch_optimize(tmp_path, workers=1)
+    assert (again['successful_optimizations'], again['skipped_files']) == (1, 2)
+
+    assert _processor(quality=80).batch_optimize(tmp_path, workers=1)['successful_optimizations'] == 3
+
+
+def test_interrupted_run_resumes_where_it_stopped(tmp_path):
+    """O manifesto é gravado a cada arquivo: a próxima execução só faz o que faltou."""
+    _tree(tmp_path)
+
+    def interrupt(done, total, record):
+        if record['status'] == 'optimized':
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        _processor().batch_optimize(tmp_path, workers=1, progress=interrupt)
+    manifest = json.loads((tmp_path / OPTIMIZE_MANIFEST_FILENAME).read_text(encoding='utf-8'))
+    assert list(manifest['files']) == ['foto0.jpg']
+
+    resumed = _processor().batch_optimize(tmp_path, workers=1)
+    assert (resumed['successful_optimizations'], resumed['skipped_files']) == (2, 1)
+
+
+def test_process_pool_streams_progress_and_writes_report(tmp_path):
+    """Com vários processos, cada arquivo é reportado e o relatório final é gravado."""
+    images = tmp_path / 'images'
+    images.mkdir()
+    _tree(images, count=4)
+    seen = []
+    stats = _processor().batch_optimize(images, workers=2, report_path=tmp_path / 'relatorio.json',
+                                        progress=lambda done, total, record: seen.append((done, total)))
+
+    assert stats['workers'] == 2 and stats['successful_optimizations'] == 4
+    assert sorted(seen) == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    report = json.loads((tmp_path / 'relatorio.json').read_text(encoding='utf-8'))
+    assert report['successful_optimizations'] == 4 and len(report['files_processed']) == 4
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do harness de benchmark (`benchmarks/harness.py`).
+"""
+from benchmarks.harness import compare_to_baseline, discover_themes, percentile, run_benchmarks
+
+
+def _stats(**values):
+    return dict({'errors': 0, 'error_samples': [], 'p95_ms': 10.0, 'throughput_rps': 100.0, 'rss_mb': 80.0}, **values)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+    assert percentile([7], 99) == 7 and percentile([], 50) is None
+
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = {'modes': {'inprocess': {'home[option1]': _stats(), 'search': _stats(p95_ms=0.4)}},
+                'tolerance': {'latency': 0.5, 'latency_ms': 2.0, 'throughput': 0.35, 'rss': 0.25}}
+    ok = {'modes': {'inprocess': {'home[option1]': _stats(p95_ms=14.0, throughput_rps=70.0),
+                                  'search': _stats(p95_ms=2.0), 'novo': _stats(p95_ms=999.0)}}}
+    assert compare_to_baseline(ok, baseline) == []
+
+    slow = {'modes': {'inprocess': {'home[option1]': _stats(p95_ms=16.0, throughput_rps=60.0, rss_mb=101.0,
+                                                            errors=2, error_samples=[('/', 500)])}}}
+    problems = compare_to_baseline(slow, baseline)
+    assert len(problems) == 4 and all(p.startswith('inprocess/home[option1]') for p in problems)
+
+
+def test_inprocess_smoke_run():
+    report = run_benchmarks(('inprocess',), requests=3, warmup=1, themes=['option1'], only=['home', 'admin'])
+    results = report['modes']['inprocess']
+    assert set(results) == {'home[option1]', 'admin_dashboard'}
+    assert all(r['errors'] == 0 and r['requests'] == 3 and r['p99_ms'] >= r['p50_ms'] > 0 for r in results.values())
+    assert len(discover_themes()) >= 9
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Testes dos bundles de CSS/JS por tema (`bundles.py`): leitura das regiões dos
+templates, minificação, CSS crítico e a substituição feita pelas macros.
+"""
+import json
+import os
+import shutil
+
+from BelarminoMonteiroAdvogado.bundles import (
+    build_bundles, collect_bundle_specs, extract_critical_css, minify_css,
+)
+from BelarminoMonteiroAdvogado.page_cache import get_page_cache
+
+
+def _templates(app):
+    return os.path.join(app.root_path, app.template_folder)
+
+
+def test_minify_css_keeps_strings_and_media_blocks():
+    """Espaços e comentários somem; strings e prelúdios de `@media` ficam intactos."""
+    css = """
+    /* comentário */
+    .a  >  .b ,  .c {
+        content : "x  /* y */  z" ;
+        margin : 0   auto ;
+    }
+    @media (max-width: 600px) {
+        .a { color : red }
+    }
+    .vazia { }
+    """
+    assert minify_css(css) == (
+        '.a>.b,.c{content:"x  /* y */  z";margin:0 auto}'
+        '@media (max-width: 600px){.a{color:red}}'
+    )
+
+
+def test_regions_are_read_in_document_order(app):
+    """Os temas 5-9 têm a região de `_head_meta.html` e a do próprio tema."""
+    specs = {spec.key: spec for spec in collect_bundle_specs(_templates(app))}
+
+    meta = specs['option5:meta.css']
+    assert meta.sources[0] == ('css/base.css', None)
+    assert ('css/theme-dark.css', '(prefers-color-scheme: dark)') in meta.sources
+
+    theme = specs['option2:theme.css']
+    assert [src for src, _media in theme.sources][-2:] == ['css/theme-option2.css', 'css/ui-improvements.css']
+    assert 'option9:scripts.js' in specs
+    assert 'option1:meta.css' not in specs
+
+
+def test_critical_css_keeps_only_rules_used_above_the_fold():
+    """Regras de classes ausentes do markup ficam de fora; `:root` e variáveis ficam."""
+    css = minify_css("""
+        :root { --cor: #000; }
+        .hero, .rodape { color: var(--cor); }
+        .rodape a:hover { color: red; }
+        [data-theme="dark"] { --cor: #fff; }
+        @media (min-width: 768px) { .hero { padding: 0; } .rodape { padding: 1px; } }
+    """)
+    markup = '<body class="x {% if y %}escuro{% endif %}"><section class="hero"><h1>T</h1></section>'
+    critical = extract_critical_css(css, markup)
+    assert ':root{--cor:#000}' in critical
+    assert '.hero{color:var(--cor)}' in critical
+    assert '[data-theme="dark"]{--cor:#fff}' in critical
+    assert '@media (min-width: 768px){.hero{padding:0}}' in critical
+    assert 'rodape' not in critical
+
+
+def test_build_writes_bundles_and_manifest(app, tmp_path):
+    """O build gera um arquivo por região e o manifesto com o CSS crítico."""
+    specs = collect_bundle_specs(_templates(app))
+    for spec in specs:
+        for relpath, _media in spec.sources:
+            source = os.path.join(app.static_folder, relpath)
+            if os.path.exists(source):
+                (tmp_path / relpath).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(source, tmp_path / relpath)
+
+    manifest = build_bundles(_templates(app), str(tmp_path))
+    assert json.loads((tmp_path / 'bundles.json').read_text(encoding='utf-8')) == manifest
+
+    bundle = manifest['option1:theme.css']
+    assert bundle['path'] == 'css/bundle-option1-theme.css'
+    assert bundle['bytes'] < bundle['source_bytes']
+    assert bundle['critical']
+    assert (tmp_path / bundle['path']).read_text(encoding='utf-8').startswith(bundle['critical'][:20])
+    assert 'css/layout_option5.css' in manifest['option5:meta.css']['missing']
+    assert manifest['option9:scripts.js']['critical'] is None
+
+
+def test_templates_use_bundle_and_inline_critical_css_on_home(client, app, monkeypatch):
+    """Com bundle construído, a home embute o CSS crítico e carrega o bundle sem bloquear."""
+    monkeypatch.setitem(app.extensions, 'asset_bundles', {
+        'option1:theme.css': {'path': 'css/bundle-option1-theme.css', 'critical': 'body{margin:0}'},
+    })
+    get_page_cache(app).clear()
+    try:
+        html = client.get('/').get_data(as_text=True)
+        assert '<style data-bundle="theme">body{margin:0}</style>' in html
+        assert 'rel="preload" href="/static/css/bundle-option1-theme.css' in html
+        assert 'css/inner_header.css' not in html
+
+        html = client.get('/contato').get_data(as_text=True)
+        assert '<link rel="stylesheet" href="/static/css/bundle-option1-theme.css' in html
+        assert 'data-bundle' not in html
+    finally:
+        get_page_cache(app).clear()
+
+
+def test_templates_fall_back_to_individual_files_without_bundles(client, app):
+    """Sem `bundles.json`, os `<link>` originais são mantidos."""
+    get_page_cache(app).clear()
+    html = client.get('/').get_data(as_text=True)
+    assert 'css/inner_header.css' in html
+    assert 'bundle-option1' not in html
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do índice em memória de `ConteudoGeral` (`content_index.py`):
+atualização incremental, rollback, operações em massa e ausência de consultas.
+"""
+from sqlalchemy import event
+
+from BelarminoMonteiroAdvogado import get_page_content
+from BelarminoMonteiroAdvogado.models import db, ConteudoGeral
+from BelarminoMonteiroAdvogado.content_index import get_content_index
+
+
+def test_page_content_comes_from_index_without_queries(app):
+    """Com o índice aquecido, montar o conteúdo de uma página não consulta o banco."""
+    with app.app_context():
+        get_content_index(app)
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            content = get_page_content('home')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        assert statements == []
+        home = ConteudoGeral.query.filter_by(pagina='home', secao='titulo').first()
+        assert content['titulo'] == home.conteudo
+
+
+def test_page_sections_override_shared_settings_and_skip_other_pages(app):
+    """A página vence as configurações gerais; seções de 'sobre-nos' não vazam."""
+    with app.app_context():
+        content = get_page_content('politica-de-privacidade')
+        assert 'secao1_titulo' not in content
+        gerais = ConteudoGeral.query.filter_by(pagina='configuracoes_gerais').first()
+        assert content[gerais.secao] == gerais.conteudo
+
+
+def test_insert_update_delete_are_applied_incrementally(app):
+    """Commits via ORM atualizam o índice sem reconstruí-lo."""
+    with app.app_context():
+        index = get_content_index(app)
+        rebuilds = index.rebuilds
+
+        item = ConteudoGeral(pagina='indice-teste', secao='indice_a', conteudo='v1')
+        db.session.add(item)
+        db.session.commit()
+        assert get_page_content('indice-teste')['indice_a'] == 'v1'
+
+        item.conteudo = 'v2'
+        db.session.commit()
+        assert get_page_content('indice-teste')['indice_a'] == 'v2'
+
+        item.secao = 'indice_b'
+        db.session.commit()
+        content = get_page_content('indice-teste')
+        assert 'indice_a' not in content and content['indice_b'] == 'v2'
+
+        db.session.delete(item)
+        db.session.commit()
+        assert 'indice_b' not in get_page_content('indice-teste')
+        assert get_content_index(app).rebuilds == rebuilds
+
+
+def test_rollback_is_not_applied(app):
+    """Alterações desfeitas não chegam ao índice."""
+    with app.app_context():
+        get_content_index(app)
+        db.session.add(ConteudoGeral(pagina='indice-rollback', secao='titulo', conteudo='x'))
+        db.session.flush()
+        db.session.rollback()
+        assert get_page_content('indice-rollback').get('titulo') is None
+
+
+def test_bulk_update_forces_rebuild(app):
+    """`query.update()` não dispara eventos de mapper: o índice é reconstruído."""
+    with app.app_context():
+        db.session.add(ConteudoGeral(pagina='indice-massa', secao='titulo', conteudo='antes'))
+        db.session.commit()
+        index = get_content_index(app)
+        rebuilds = index.rebuilds
+
+        ConteudoGeral.query.filter_by(pagina='indice-massa').update({'conteudo': 'depois'})
+        db.session.commit()
+        assert get_page_content('indice-massa')['titulo'] == 'depois'
+        assert index.rebuilds == rebuilds + 1
+        assert index.stats()['entries'] >= 1
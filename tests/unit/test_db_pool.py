@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do pool de conexões (`db_pool.py`): `DATABASE_URL`, opções do pool,
+métricas de checkout e descarte após `fork`.
+"""
+import os
+import threading
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from BelarminoMonteiroAdvogado import create_app
+from BelarminoMonteiroAdvogado.db_pool import (
+    _FORK_ENGINES, InstrumentedQueuePool, PoolMetrics, build_engine_options, database_url_from_env)
+from BelarminoMonteiroAdvogado.models import db
+
+
+def test_database_url_from_env_ignores_placeholders():
+    assert database_url_from_env({}) is None
+    assert database_url_from_env({'DATABASE_URL': 'BMA_DATABASE_URL'}) is None
+    assert database_url_from_env({'DATABASE_URL': 'postgres://u:p@db/site'}) == 'postgresql://u:p@db/site'
+    assert database_url_from_env({'DATABASE_URL': 'sqlite:////tmp/x.db'}) == 'sqlite:////tmp/x.db'
+
+
+def test_engine_options_for_file_and_memory_databases(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'site.db'}", DB_POOL_SIZE=2)
+    options = build_engine_options(app)
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_pre_ping']) == (2, 10, False)
+
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_ENGINE_OPTIONS={'echo': False})
+    assert build_engine_options(app) == {'echo': False}
+
+
+def test_metrics_count_checkouts_and_waits(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'site.db'}", poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=5)
+    metrics = PoolMetrics(slow_checkout_ms=50)
+    metrics.listen(engine)
+    engine.pool.metrics = metrics
+
+    held = engine.connect()
+    released = threading.Timer(0.1, held.close)
+    released.start()
+    with engine.connect() as connection:  # espera a única conexão ser devolvida
+        connection.execute(text('SELECT 1'))
+    released.join()
+
+    stats = metrics.stats(engine)
+    assert (stats['checkouts'], stats['in_use'], stats['max_in_use']) == (2, 0, 1)
+    assert stats['connections_opened'] == 1 and stats['slow_checkouts'] == 1
+    assert stats['wait_ms']['max'] >= 50
+
+    engine.dispose()  # a recriação do pool mantém as métricas
+    assert engine.pool.metrics is metrics
+    assert metrics.stats()['connections_closed'] == 1
+
+
+def test_app_registers_pool_metrics(app):
+    assert isinstance(app.extensions['db_pool'], PoolMetrics)
+
+
+def test_forked_child_gets_a_fresh_pool(app):
+    if not hasattr(os, 'fork'):
+        pytest.skip('fork indisponível')
+    inherited = db.engine.pool
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if db.engine.pool is not inherited else 1)
+    assert os.waitpid(pid, 0)[1] == 0
+    assert db.engine.pool is inherited
+
+
+def test_fork_hook_tracks_engines_weakly(app, monkeypatch):
+    """Cada app só registra o engine no conjunto do módulo; nenhum gancho novo de `fork`."""
+    hooks = []
+    monkeypatch.setattr(os, 'register_at_fork', lambda **kwargs: hooks.append(kwargs), raising=False)
+    with app.app_context():
+        assert db.engine in _FORK_ENGINES
+    other = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'SECRET_KEY': 'x'})
+    with other.app_context():
+        engine = db.engine
+    assert engine in _FORK_ENGINES and hooks == []
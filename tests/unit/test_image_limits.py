@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da decodificação com memória limitada: limites de pixels checados no
+cabeçalho, JPEG decodificado já reduzido e validação do upload sem decodificar.
+"""
+import io
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from BelarminoMonteiroAdvogado.image_processor import ImageProcessor, ImageRejectedError, inspect_upload
+
+
+def _save(path, size, fmt, mode='RGB'):
+    Image.new(mode, size, 128).save(path, fmt)
+    return path
+
+
+def _processor(**kwargs):
+    return ImageProcessor(create_backup=False, responsive_widths=(), **kwargs)
+
+
+def test_large_jpeg_is_decoded_at_a_reduced_scale(tmp_path):
+    """O draft do JPEG decodifica em 1/2 e o resultado final respeita `max_width`."""
+    source = _save(tmp_path / 'foto.jpg', (3000, 2000), 'JPEG')
+    processor = _processor(max_width=1000, max_decode_pixels=2_000_000)
+
+    with processor.open_image(source) as img:
+        assert img.size == (1500, 1000)
+
+    success, _orig, _new, output = processor.optimize_image(source)
+    assert success
+    with Image.open(output) as result:
+        assert result.size == (1000, 666)
+
+
+def test_pixel_limits_reject_before_decoding(tmp_path):
+    """Cabeçalho acima de `max_pixels`, ou PNG (sem redução) acima de `max_decode_pixels`, é recusado."""
+    png = _save(tmp_path / 'grande.png', (300, 200), 'PNG')
+    with pytest.raises(ImageRejectedError, match='megapixels'):
+        _processor(max_pixels=50_000).open_image(png)
+    with pytest.raises(ImageRejectedError, match='decodificação'):
+        _processor(max_decode_pixels=50_000).open_image(png)
+    assert _processor(max_decode_pixels=50_000).optimize_image(png)[0] is False
+
+    # O mesmo tamanho em JPEG passa: decodificado em 1/4 para `max_width` 64.
+    jpeg = _save(tmp_path / 'grande.jpg', (300, 200), 'JPEG')
+    assert _processor(max_width=64, max_decode_pixels=50_000).optimize_image(jpeg)[0] is True
+
+
+def test_inspect_upload_reads_only_the_header_and_rewinds():
+    """A validação do upload não consome o stream e recusa o que não é imagem."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30)).save(buffer, 'PNG')
+    buffer.seek(0)
+    upload = FileStorage(buffer, filename='foto.png')
+    assert inspect_upload(upload, max_pixels=10_000) == ('PNG', (40, 30))
+    assert upload.stream.tell() == 0
+
+    with pytest.raises(ImageRejectedError, match='excede'):
+        inspect_upload(upload, max_pixels=1_000)
+    with pytest.raises(ImageRejectedError, match='não é uma imagem'):
+        inspect_upload(FileStorage(io.BytesIO(b'<svg onload=alert(1)>'), filename='falsa.png'))
+
+
+def test_inspect_upload_applies_the_decode_limit():
+    """O upload recusa o que a tarefa em segundo plano recusaria: PNG sem redução, JPEG já reduzido."""
+    def upload(fmt):
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 200), 128).save(buffer, fmt)
+        buffer.seek(0)
+        return FileStorage(buffer, filename=f'foto.{fmt.lower()}')
+
+    with pytest.raises(ImageRejectedError, match='decodificação'):
+        inspect_upload(upload('PNG'), max_decode_pixels=50_000, bound=64)
+    assert inspect_upload(upload('JPEG'), max_decode_pixels=50_000, bound=64) == ('JPEG', (300, 200))
+    with pytest.raises(ImageRejectedError, match='decodificação'):
+        inspect_upload(upload('JPEG'), max_decode_pixels=50_000, bound=300)
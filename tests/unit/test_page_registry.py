@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do registro de páginas (`page_registry.py`): tabela de rotas da
+`pagina_dinamica` e árvore de navegação pré-montada.
+"""
+from sqlalchemy import event
+
+from BelarminoMonteiroAdvogado.models import db, Pagina
+from BelarminoMonteiroAdvogado.page_registry import get_page_registry
+
+
+def test_nav_tree_matches_menu_pages(app):
+    """A árvore contém apenas raízes ativas do menu, em ordem, com seus filhos."""
+    with app.app_context():
+        registry = get_page_registry(app)
+        expected = Pagina.query.filter(
+            Pagina.ativo == True, Pagina.show_in_menu == True, Pagina.parent_id.is_(None)
+        ).order_by(Pagina.ordem).all()
+        assert [p.slug for p in registry.nav_pages] == [p.slug for p in expected]
+
+        grupo = next(p for p in registry.nav_pages if p.slug == 'areas-de-atuacao')
+        parent = Pagina.query.filter_by(slug='areas-de-atuacao').first()
+        assert [c.slug for c in grupo.children] == [c.slug for c in parent.children]
+
+
+def test_registry_is_rebuilt_after_page_commit(app):
+    """Um commit em `Pagina` gera novo registro; sem commits, ele é reutilizado."""
+    with app.app_context():
+        registry = get_page_registry(app)
+        assert get_page_registry(app) is registry
+
+        db.session.add(Pagina(slug='registro-teste', titulo_menu='Teste', tipo='pagina',
+                              template_path='sobre.html', ativo=False))
+        db.session.commit()
+        rebuilt = get_page_registry(app)
+        assert rebuilt is not registry
+        assert rebuilt.resolve('registro-teste').ativo is False
+
+
+def test_dynamic_route_resolves_without_queries(client, app):
+    """Com o registro aquecido, resolver a rota não consulta `pagina`."""
+    client.get('/sobre-nos')
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    app.config['PAGE_CACHE_ENABLED'] = False
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        assert client.get('/sobre-nos').status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+        app.config['PAGE_CACHE_ENABLED'] = True
+    assert not any('FROM pagina' in s for s in statements)
+
+
+def test_inactive_page_is_not_found(client, app):
+    """Páginas inativas continuam respondendo 404."""
+    with app.app_context():
+        if not Pagina.query.filter_by(slug='pagina-inativa').first():
+            db.session.add(Pagina(slug='pagina-inativa', titulo_menu='Inativa', tipo='pagina',
+                                  template_path='sobre.html', ativo=False))
+            db.session.commit()
+    assert client.get('/pagina-inativa').status_code == 404
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Testes das imagens responsivas: derivadas geradas pelo `ImageProcessor`,
+manifesto (`responsive_images.py`) e a macro `responsive_img`.
+"""
+import json
+
+from flask import render_template_string
+from PIL import Image
+
+from BelarminoMonteiroAdvogado.image_processor import AVIF_AVAILABLE, ImageProcessor
+from BelarminoMonteiroAdvogado.responsive_images import (
+    RESPONSIVE_MANIFEST_FILENAME, build_responsive_images,
+)
+
+_MACRO = "{% from '_images.html' import responsive_img %}"
+
+
+def _make_image(path, size=(1000, 500), mode='RGB'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new(mode, size, (10, 20, 30)).save(path)
+    return path
+
+
+def test_derivatives_follow_the_width_ladder_without_upscaling(app, tmp_path):
+    """Gera 320/640/960 e a largura da própria imagem; nada acima dela."""
+    source = _make_image(tmp_path / 'foto.png')
+    with app.app_context():
+        entry = ImageProcessor(create_backup=False).generate_derivatives(source)
+
+    assert (entry['width'], entry['height']) == (1000, 500)
+    webp = entry['sources']['image/webp']
+    assert [width for width, _name in webp] == [320, 640, 960, 1000]
+    with Image.open(tmp_path / 'foto-640w.webp') as img:
+        assert img.size == (640, 320)
+    assert not (tmp_path / 'foto-1280w.webp').exists()
+    assert ('image/avif' in entry['sources']) == AVIF_AVAILABLE
+
+
+def test_derivatives_are_not_reencoded_when_up_to_date(app, tmp_path):
+    """Derivadas mais novas que a origem são reaproveitadas."""
+    source = _make_image(tmp_path / 'foto.png', size=(700, 700))
+    processor = ImageProcessor(create_backup=False, responsive_widths=(320,))
+    with app.app_context():
+        processor.generate_derivatives(source)
+        derivative = tmp_path / 'foto-320w.webp'
+        mtime = derivative.stat().st_mtime_ns
+        processor.generate_derivatives(source)
+    assert derivative.stat().st_mtime_ns == mtime
+
+
+def test_build_writes_manifest_and_removes_orphans(app, tmp_path):
+    """O build lista as imagens de `static/images` e apaga derivadas sem origem."""
+    _make_image(tmp_path / 'images' / 'banner.jpg', size=(800, 200))
+    orphan = _make_image(tmp_path / 'images' / 'antiga-640w.webp')
+    _make_image(tmp_path / 'images' / 'originals' / 'banner.jpg')
+
+    with app.app_context():
+        stats = build_responsive_images(str(tmp_path), ImageProcessor(create_backup=False))
+
+    manifest = json.loads((tmp_path / RESPONSIVE_MANIFEST_FILENAME).read_text(encoding='utf-8'))
+    assert list(manifest) == ['images/banner.jpg']
+    assert stats['images'] == 1 and stats['removed'] == 1
+    assert not orphan.exists()
+    assert not (tmp_path / 'images' / 'originals' / 'banner-320w.webp').exists()
+
+
+def test_macro_emits_picture_with_srcset_and_intrinsic_size(app, monkeypatch):
+    """Com derivadas, a macro emite `<picture>` com AVIF antes de WebP."""
+    monkeypatch.setitem(app.extensions, 'responsive_images', {
+        'images/equipe.png': {
+            'width': 853, 'height': 1280, 'version': 'abc123',
+            'sources': {
+                'image/webp': [[320, 'equipe-320w.webp'], [853, 'equipe-853w.webp']],
+                'image/avif': [[320, 'equipe-320w.avif']],
+            },
+        },
+    })
+    with app.test_request_context('/'):
+        html = render_template_string(
+            _MACRO + "{{ responsive_img('images/equipe.png', 'Equipe', sizes='50vw', css_class='foto') }}")
+
+    assert html.startswith('<picture><source type="image/avif" srcset="/static/images/equipe-320w.avif?v=abc123 320w"')
+    assert 'srcset="/static/images/equipe-320w.webp?v=abc123 320w, /static/images/equipe-853w.webp?v=abc123 853w" sizes="50vw"' in html
+    assert '<img src="/static/images/equipe.png?v=abc123" width="853" height="1280" alt="Equipe" class="foto"' in html
+
+
+def test_macro_falls_back_to_plain_img(app):
+    """Imagens fora do manifesto continuam com um `<img>` simples."""
+    with app.test_request_context('/'):
+        html = render_template_string(
+            _MACRO + "{{ responsive_img('images/nao-existe.jpg', 'X', loading='eager', style='top: 0') }}")
+    assert html == '<img src="/static/images/nao-existe.jpg" alt="X" loading="eager" style="top: 0">'
+
+
+def test_optimized_upload_is_registered(app, tmp_path, monkeypatch):
+    """`optimize_image` gera as derivadas do WebP e atualiza o manifesto em memória e em disco."""
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+    monkeypatch.setitem(app.extensions, 'responsive_images', {})
+    source = _make_image(tmp_path / 'images' / 'uploads' / 'foto.png', size=(900, 600))
+
+    with app.app_context():
+        success, _orig, _new, output = ImageProcessor(create_backup=False).optimize_image(source)
+
+    assert success
+    entry = app.extensions['responsive_images']['images/uploads/foto.webp']
+    assert entry['sources']['image/webp'][-1] == [900, 'foto.webp']
+    manifest = json.loads((tmp_path / RESPONSIVE_MANIFEST_FILENAME).read_text(encoding='utf-8'))
+    assert 'images/uploads/foto.webp' in manifest
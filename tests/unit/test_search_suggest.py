@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Testes das sugestões de busca (`search_suggest.py`): índice de prefixos,
+endpoint sem consultas ao banco, ETag e reconstrução após commits.
+"""
+from sqlalchemy import event
+
+from BelarminoMonteiroAdvogado.models import db, SetorAtendido
+from BelarminoMonteiroAdvogado.search_suggest import Sugestao, SuggestIndex, fold
+
+
+def _index(*labels):
+    return SuggestIndex((0,), [Sugestao(label, f'/{i}', 'Teste') for i, label in enumerate(labels)])
+
+
+def test_prefix_index_folds_accents_and_ranks_title_prefixes_first():
+    index = _index('Direito Previdenciário', 'Planejamento Previdenciário', 'Previdência Privada', 'Família')
+    assert fold('  Previdência  PRIVADA ') == 'previdencia privada'
+    assert [s.label for s in index.suggest('previ')] == [
+        'Previdência Privada', 'Direito Previdenciário', 'Planejamento Previdenciário']
+    assert [s.label for s in index.suggest('direito prev')] == ['Direito Previdenciário']
+    assert [s.label for s in index.suggest('FAMÍ')] == ['Família']
+    assert index.suggest('previ', limit=1)[0].label == 'Previdência Privada'
+    assert index.suggest('zz') == [] and index.suggest('  ') == []
+
+
+def test_suggest_endpoint_is_etagged_and_skips_the_database(client, app):
+    client.get('/search/suggest?q=di')
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.get('/search/suggest?q=Direito%20Ci')
+        revalidated = client.get('/search/suggest?q=direito%20ci',
+                                 headers={'If-None-Match': response.headers['ETag']})
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    assert statements == []
+    assert response.status_code == 200 and response.json['q'] == 'Direito Ci'
+    assert response.headers['Cache-Control'] == 'public, max-age=300'
+    assert revalidated.status_code == 304 and revalidated.data == b''
+
+
+def test_suggestions_and_etag_follow_commits(client, app):
+    before = client.get('/search/suggest?q=agro')
+    assert before.json['suggestions'] == []
+    with app.app_context():
+        setor = SetorAtendido(titulo='Agronegócio', slug='agronegocio-teste')
+        db.session.add(setor)
+        db.session.commit()
+        setor_id = setor.id
+    try:
+        after = client.get('/search/suggest?q=agro', headers={'If-None-Match': before.headers['ETag']})
+        assert after.status_code == 200
+        assert [s['label'] for s in after.json['suggestions']] == ['Agronegócio']
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(SetorAtendido, setor_id))
+            db.session.commit()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da semeadura em lote (`seeding.py`): hash de versão e reaplicação.
+"""
+from sqlalchemy import event, func, select
+
+from BelarminoMonteiroAdvogado import ensure_essential_data
+from BelarminoMonteiroAdvogado.models import db, ConteudoGeral, Pagina, SeedState
+from BelarminoMonteiroAdvogado.seeding import DEFAULT_CONTENT, SEED_NAME, apply_seed, seed_hash
+
+
+def _count_statements(engine, action):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        action()
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    return [s for s in statements if not s.lstrip().upper().startswith('PRAGMA')]
+
+
+def test_unchanged_seed_is_skipped_with_one_query(app):
+    with app.app_context():
+        ensure_essential_data()
+        assert db.session.get(SeedState, SEED_NAME).hash == seed_hash()
+        statements = _count_statements(db.engine, lambda: apply_seed(db.session))
+        assert len(statements) == 1 and 'seed_state' in statements[0]
+
+
+def test_forced_seed_restores_defaults_without_duplicates(app):
+    with app.app_context():
+        ensure_essential_data()
+        titulo = next(c['conteudo'] for c in DEFAULT_CONTENT['contato'] if c['secao'] == 'titulo')
+        row = ConteudoGeral.query.filter_by(pagina='contato', secao='titulo').first()
+        row.conteudo = 'Editado'
+        ConteudoGeral.query.filter_by(pagina='contato', secao='subtitulo').delete()
+        db.session.commit()
+        before = Pagina.query.filter_by(slug='contato').first().data_modificacao
+        total = db.session.scalar(select(func.count(ConteudoGeral.id)))
+
+        ensure_essential_data(force=True)
+        db.session.expire_all()
+        assert ConteudoGeral.query.filter_by(pagina='contato', secao='titulo').one().conteudo == titulo
+        assert ConteudoGeral.query.filter_by(pagina='contato', secao='subtitulo').count() == 1
+        assert db.session.scalar(select(func.count(ConteudoGeral.id))) == total + 1
+        assert Pagina.query.filter_by(slug='contato').first().data_modificacao >= before
+        assert Pagina.query.filter_by(slug='direito-civil').one().parent.slug == 'areas-de-atuacao'
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do cache de processo (`site_cache.py`): contadores de geração e
+snapshot imutável usado pelo processador de contexto `inject_global_vars`.
+"""
+import pytest
+from sqlalchemy import event
+
+from BelarminoMonteiroAdvogado.models import db, ThemeSettings, AreaAtuacao
+from BelarminoMonteiroAdvogado.site_cache import (
+    SNAPSHOT_TABLES, get_generation, get_site_snapshot, RegistroCongelado
+)
+
+
+def test_snapshot_is_reused_until_commit(app):
+    """O mesmo snapshot é devolvido enquanto nenhuma tabela monitorada muda."""
+    with app.app_context():
+        first = get_site_snapshot(app)
+        assert get_site_snapshot(app) is first
+
+        theme = ThemeSettings.query.first()
+        theme.theme = 'option3' if theme.theme != 'option3' else 'option2'
+        db.session.commit()
+
+        rebuilt = get_site_snapshot(app)
+        assert rebuilt is not first
+        assert rebuilt.theme == theme.theme
+
+
+def test_rollback_does_not_bump_generation(app):
+    """Alterações desfeitas com rollback não invalidam o snapshot."""
+    with app.app_context():
+        before = get_generation(*SNAPSHOT_TABLES)
+        db.session.add(AreaAtuacao(slug='rollback-test', titulo='T', descricao='D', icone='bi'))
+        db.session.flush()
+        db.session.rollback()
+        assert get_generation(*SNAPSHOT_TABLES) == before
+
+
+def test_bulk_delete_bumps_generation(app):
+    """Operações em massa (`query.delete()`) também invalidam o snapshot."""
+    with app.app_context():
+        before = get_generation(AreaAtuacao.__tablename__)
+        AreaAtuacao.query.filter_by(slug='nao-existe').delete()
+        db.session.commit()
+        assert get_generation(AreaAtuacao.__tablename__)[0] == before[0] + 1
+
+
+def test_snapshot_records_are_read_only(app):
+    """As cópias congeladas não aceitam escrita."""
+    with app.app_context():
+        snapshot = get_site_snapshot(app)
+        assert isinstance(snapshot.theme_settings, RegistroCongelado)
+        with pytest.raises(AttributeError):
+            snapshot.theme_settings.theme = 'option9'
+        with pytest.raises(AttributeError):
+            snapshot.theme = 'option9'
+        with pytest.raises(TypeError):
+            snapshot.configs['novo'] = 'valor'
+
+
+def test_context_processor_hot_path_has_no_queries(app):
+    """Com o snapshot aquecido, o processador de contexto não consulta o banco."""
+    with app.app_context():
+        get_site_snapshot(app)
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            with app.test_request_context('/'):
+                app.update_template_context({})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        assert statements == []
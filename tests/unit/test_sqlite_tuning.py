@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do perfil de PRAGMAs do SQLite (`sqlite_tuning.py`).
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from BelarminoMonteiroAdvogado.sqlite_tuning import install_sqlite_tuning, read_sqlite_pragmas, resolve_pragmas
+
+
+def test_file_database_gets_wal_profile_on_every_connection(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'site.db'}")
+    assert install_sqlite_tuning(engine, resolve_pragmas({'cache_size': -4000, 'mmap_size': None}))
+    with engine.connect() as first, engine.connect() as second:
+        for connection in (first, second):
+            pragmas = read_sqlite_pragmas(connection)
+            assert pragmas['journal_mode'] == 'wal'
+            assert (pragmas['synchronous'], pragmas['temp_store']) == (1, 2)  # NORMAL, MEMORY
+            assert (pragmas['cache_size'], pragmas['busy_timeout']) == (-4000, 5000)
+            assert pragmas['mmap_size'] == 0
+    engine.dispose()
+
+
+def test_memory_database_skips_file_only_pragmas():
+    engine = create_engine('sqlite://')
+    install_sqlite_tuning(engine, resolve_pragmas())
+    with engine.connect() as connection:
+        assert read_sqlite_pragmas(connection, ['journal_mode', 'busy_timeout']) == {
+            'journal_mode': 'memory', 'busy_timeout': 5000}
+
+
+def test_rejects_unsafe_pragma_values(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'site.db'}")
+    install_sqlite_tuning(engine, resolve_pragmas({'cache_size': '1; DROP TABLE x'}))
+    with pytest.raises(ValueError):
+        engine.connect()
+
+
+def test_app_engine_uses_profile(app):
+    assert app.extensions['sqlite_pragmas']['journal_mode'] == 'WAL'
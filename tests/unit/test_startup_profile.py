@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do perfil de inicialização (`startup_profile.py`).
+"""
+import os
+
+from BelarminoMonteiroAdvogado.startup_profile import (
+    DEFERRED_MODULES, compare_to_baseline, parse_importtime, run_probe)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_create_app_records_phases(app):
+    phases = app.extensions['startup_phases']
+    assert list(phases) == ['config', 'database', 'db_inspect', 'seeding', 'extensions', 'blueprints', 'cli']
+    assert all(ms >= 0 for ms in phases.values())
+
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = {'import_ms': 100.0, 'create_app_ms': 50.0, 'modules_loaded': 100,
+                'deferred_modules': ['PIL'], 'tolerance': {'time': 0.5, 'modules': 0.05}}
+    ok = {'import_ms': 140.0, 'create_app_ms': 60.0, 'modules_loaded': 105, 'deferred_loaded': []}
+    assert compare_to_baseline(ok, baseline) == []
+    slow = dict(ok, import_ms=151.0, modules_loaded=106, deferred_loaded=['PIL'])
+    problems = compare_to_baseline(slow, baseline)
+    assert len(problems) == 3 and 'PIL' in problems[2]
+
+
+def test_parse_importtime():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   PIL\n"
+              "import time:      1006 |      68156 | BelarminoMonteiroAdvogado\n")
+    assert parse_importtime(stderr) == [('PIL', 120, 120), ('BelarminoMonteiroAdvogado', 1006, 68156)]
+
+
+def test_cold_start_does_not_import_deferred_modules():
+    result = run_probe(ROOT)
+    assert result['deferred_loaded'] == [] and DEFERRED_MODULES
+    assert result['phases']['seeding'] > 0 and result['modules_loaded'] > 0
+
+
+def test_write_baseline_requires_baseline_path(runner):
+    result = runner.invoke(args=['startup-profile', '--write-baseline'])
+    assert result.exit_code == 2 and '--baseline' in result.output